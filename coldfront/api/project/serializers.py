@@ -6,6 +6,7 @@ from rest_framework import serializers
 from coldfront.core.project.models import Project, \
     ProjectUserRemovalRequestStatusChoice, ProjectUserRemovalRequest, \
     ProjectUser, ProjectUserStatusChoice, ProjectUserRoleChoice
+from coldfront.core.utils.choice_registry import get_choice
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -58,8 +59,8 @@ class ProjectUserRemovalRequestSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """If the status is being changed to 'Complete', ensure that a
         completion_time is given."""
-        complete_status = ProjectUserRemovalRequestStatusChoice.objects.get(
-            name='Complete')
+        complete_status = get_choice(
+            ProjectUserRemovalRequestStatusChoice, 'Complete')
         if 'status' in data and data['status'] == complete_status:
             if not isinstance(data.get('completion_time', None), datetime):
                 message = 'No completion_time is given.'
@@ -1,31 +1,119 @@
-from decimal import Decimal
-from django.db.models import Sum
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from collections import OrderedDict
+from coldfront.core.statistics.utils_.job_usage_rollup_utils import aggregate_job_usage_totals
+from coldfront.core.statistics.utils_.job_usage_rollup_utils import get_job_usage_totals
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from json import dumps
+from json import loads
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+from rest_framework.utils.urls import replace_query_param
 
 
 class JobPagination(pagination.PageNumberPagination):
     """A PageNumberPagination including aggregate fields over the entire
-    Job queryset. Adapted from: https://stackoverflow.com/a/39952895."""
+    Job queryset. Adapted from: https://stackoverflow.com/a/39952895.
+
+    If the view provides the filters applied to the queryset, as
+    job_usage_totals_filters, totals are computed mostly from daily
+    rollups rather than by scanning Jobs.
+
+    If the cursor query parameter is given, even if empty, pages are
+    instead selected by keyset on (startdate, jobslurmid), which the
+    queryset must be ordered by. Each page links to the next by cursor,
+    and no count is computed, so that walking all pages takes linear
+    time. Totals are only included in the first page."""
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
 
     def paginate_queryset(self, queryset, request, view=None):
-        total_amount = queryset.aggregate(
-            total_amount=Sum("amount"))["total_amount"]
-        if total_amount is None:
-            self.total_amount = Decimal("0.00")
-        else:
-            self.total_amount = total_amount
-        total_cpu_time = queryset.aggregate(
-            total_cpu_time=Sum("cpu_time"))["total_cpu_time"]
-        if total_cpu_time is None:
-            self.total_cpu_time = 0.0
-        else:
-            self.total_cpu_time = total_cpu_time
+        self.request = request
+        self.use_keyset = self.cursor_query_param in request.query_params
+        if self.use_keyset:
+            return self.paginate_queryset_by_keyset(queryset, request, view)
+        self.set_totals(queryset, view)
         return super(JobPagination, self).paginate_queryset(
             queryset, request, view)
 
+    def paginate_queryset_by_keyset(self, queryset, request, view=None):
+        """Return the page of Jobs following the position encoded in the
+        cursor, recording the cursor of the next page, if any."""
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            startdate, jobslurmid = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(startdate__gt=startdate) |
+                Q(startdate=startdate, jobslurmid__gt=jobslurmid))
+            self.include_totals = False
+        else:
+            self.set_totals(queryset, view)
+            self.include_totals = True
+
+        page_size = self.get_page_size(request)
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(
+                last.startdate, last.jobslurmid)
+        return page
+
+    def set_totals(self, queryset, view):
+        """Set the total amount and cpu_time of the given queryset."""
+        totals_filters = getattr(view, 'job_usage_totals_filters', None)
+        if totals_filters is not None:
+            self.total_amount, self.total_cpu_time = get_job_usage_totals(
+                queryset, **totals_filters)
+        else:
+            self.total_amount, self.total_cpu_time = \
+                aggregate_job_usage_totals(queryset)
+
+    @staticmethod
+    def encode_cursor(startdate, jobslurmid):
+        """Return a cursor encoding the given position."""
+        position = dumps([startdate.isoformat(), jobslurmid])
+        return urlsafe_b64encode(position.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        """Return the position encoded in the given cursor, or raise a
+        NotFound exception if it is invalid."""
+        try:
+            position = urlsafe_b64decode(cursor.encode('ascii'))
+            startdate, jobslurmid = loads(position)
+            startdate = parse_datetime(startdate)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if startdate is None or not isinstance(jobslurmid, str):
+            raise NotFound(self.invalid_cursor_message)
+        return startdate, jobslurmid
+
+    def get_next_link(self):
+        if not self.use_keyset:
+            return super(JobPagination, self).get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor)
+
     def get_paginated_response(self, data):
-        paginated_response = super(JobPagination, self).get_paginated_response(
-            data)
+        if self.use_keyset:
+            paginated_response = Response(OrderedDict([
+                ('next', self.get_next_link()),
+                ('results', data),
+            ]))
+            if not self.include_totals:
+                return paginated_response
+        else:
+            paginated_response = super(
+                JobPagination, self).get_paginated_response(data)
         paginated_response.data["total_amount"] = self.total_amount
         paginated_response.data["total_cpu_time"] = self.total_cpu_time
         return paginated_response
@@ -0,0 +1,29 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """A parser for newline-delimited JSON, which returns a list of the
+    values on non-blank lines."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        values = []
+        if stream is None:
+            return values
+        for line_number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                values.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(
+                    f'NDJSON parse error on line {line_number}: {e}')
+        return values
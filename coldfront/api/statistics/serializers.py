@@ -5,6 +5,7 @@ from coldfront.core.project.models import Project
 from coldfront.core.project.models import ProjectUser
 from coldfront.core.statistics.models import Job
 from coldfront.core.statistics.models import Node
+from coldfront.core.statistics.utils_.node_utils import add_nodes_to_jobs
 from coldfront.core.user.models import UserProfile
 from django.core.exceptions import MultipleObjectsReturned
 from django.core.exceptions import ObjectDoesNotExist
@@ -74,10 +75,8 @@ class JobSerializer(serializers.ModelSerializer):
         if 'nodes' in validated_data:
             nodes_data = validated_data.pop('nodes')
         job = Job.objects.create(**validated_data)
-        for node_data in nodes_data:
-            node = Node.objects.get_or_create(**node_data)[0]
-            job.nodes.add(node)
-        job.save()
+        add_nodes_to_jobs({
+            job.jobslurmid: [node_data['name'] for node_data in nodes_data]})
         return job
 
     def update(self, instance, validated_data):
@@ -99,9 +98,9 @@ class JobSerializer(serializers.ModelSerializer):
         instance.qos = validated_data.get('qos', instance.qos)
         if 'nodes' in validated_data:
             nodes_data = validated_data.get('nodes')
-            for node_data in nodes_data:
-                node = Node.objects.get_or_create(**node_data)[0]
-                instance.nodes.add(node)
+            add_nodes_to_jobs({
+                instance.jobslurmid: [
+                    node_data['name'] for node_data in nodes_data]})
         instance.num_cpus = validated_data.get('num_cpus', instance.num_cpus)
         instance.num_req_nodes = validated_data.get(
             'num_req_nodes', instance.num_req_nodes)
@@ -113,7 +112,18 @@ class JobSerializer(serializers.ModelSerializer):
         return instance
 
     def validate(self, data):
-        # Check that the specified dates occur in chronological order.
+        self.validate_date_order(data)
+
+        # Validate that needed accounting objects exist.
+        self.validate_accounting_allocation_objects(
+            data['userid'], data['accountid'])
+
+        return data
+
+    @classmethod
+    def validate_date_order(cls, data):
+        """Check that the dates in the given data occur in chronological
+        order. Raise a ValidationError if not."""
         submitdate = data['submitdate'] if 'submitdate' in data else None
         startdate = data['startdate'] if 'startdate' in data else None
         enddate = data['enddate'] if 'enddate' in data else None
@@ -121,39 +131,41 @@ class JobSerializer(serializers.ModelSerializer):
             message = (
                 f'Job start date {startdate} occurs before Job submit date '
                 f'{submitdate}.')
-            self.logger.error(message)
+            cls.logger.error(message)
             raise serializers.ValidationError(message)
         if startdate and enddate and enddate < startdate:
             message = (
                 f'Job end date {enddate} occurs before Job start date '
                 f'{startdate}.')
-            self.logger.error(message)
+            cls.logger.error(message)
             raise serializers.ValidationError(message)
         if submitdate and enddate and enddate < submitdate:
             message = (
                 f'Job end date {enddate} occurs before Job submit date '
                 f'{submitdate}.')
-            self.logger.error(message)
+            cls.logger.error(message)
             raise serializers.ValidationError(message)
 
-        # Validate that needed accounting objects exist.
-        user = data['userid']
-        account = data['accountid']
+    @classmethod
+    def validate_accounting_allocation_objects(cls, user, account):
+        """Return the accounting objects needed to process a Job for the
+        given User under the given account (Project). Raise a
+        ValidationError if they do not exist."""
         try:
-            get_accounting_allocation_objects(account, user=user)
+            return get_accounting_allocation_objects(account, user=user)
         except ProjectUser.DoesNotExist:
             message = (
                 f'User {user.username} is not a member of account '
                 f'{account.name}.')
-            self.logger.error(message)
+            cls.logger.error(message)
             raise serializers.ValidationError(message)
         except Allocation.DoesNotExist:
             message = (
                 f'Account {account.name} has no active compute allocation.')
-            self.logger.error(message)
+            cls.logger.error(message)
             raise serializers.ValidationError(message)
         except Allocation.MultipleObjectsReturned:
-            self.logger.error(
+            cls.logger.error(
                 f'Account {account.name} has more than one active compute '
                 f'allocation.')
             raise serializers.ValidationError('Unexpected server error.')
@@ -161,18 +173,16 @@ class JobSerializer(serializers.ModelSerializer):
             message = (
                 f'User {user.username} is not an active member of the compute '
                 f'allocation for account {account.name}.')
-            self.logger.error(message)
+            cls.logger.error(message)
             raise serializers.ValidationError(message)
         except (MultipleObjectsReturned, ObjectDoesNotExist) as e:
-            self.logger.error(
+            cls.logger.error(
                 f'Failed to retrieve a required database object. Details: {e}')
             raise serializers.ValidationError('Unexpected server error.')
         except TypeError as e:
-            self.logger.error(f'Incorrect input type. Details: {e}')
+            cls.logger.error(f'Incorrect input type. Details: {e}')
             raise serializers.ValidationError('Unexpected server error.')
 
-        return data
-
     def validate_userid(self, user):
         # If the Job already exists, check that the user matches the existing
         # one.
@@ -236,3 +246,13 @@ class JobSerializer(serializers.ModelSerializer):
                     # raise serializers.ValidationError(message)
 
         return qos
+
+
+class BulkJobSerializer(JobSerializer):
+    """A serializer for a Job in a batch of Jobs. The accounting objects
+    needed by the Jobs in the batch are validated by the caller, once
+    per user and account, rather than once per Job."""
+
+    def validate(self, data):
+        self.validate_date_order(data)
+        return data
@@ -1,16 +1,25 @@
 from coldfront.api.statistics.tests.test_job_base import TestJobBase
+from coldfront.api.statistics.utils import get_accounting_balances
+from coldfront.core.allocation.models import AllocationAttributeType
 from coldfront.core.allocation.models import AllocationAttributeUsage
 from coldfront.core.allocation.models import AllocationStatusChoice
 from coldfront.core.allocation.models import AllocationUserAttributeUsage
 from coldfront.core.allocation.models import AllocationUserStatusChoice
+from coldfront.core.allocation.utils_ import accounting_cache_utils
+from coldfront.core.allocation.utils_.accounting_cache_utils import invalidate_project_balances
+from coldfront.core.project.models import ProjectUserStatusChoice
 from coldfront.core.resource.utils import get_computing_allowance_project_prefixes
 from coldfront.core.resource.utils import get_primary_compute_resource
 from coldfront.core.resource.utils_.allowance_utils.computing_allowance import ComputingAllowance
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+from coldfront.core.utils.choice_registry import ChoiceRegistry
+from coldfront.core.utils.choice_registry import get_choice_pk
+from coldfront.core.utils.tests.test_base import use_shared_cache
 from decimal import ConversionSyntax
 from decimal import Decimal
 from django.conf import settings
 from django.test import override_settings
+from unittest.mock import patch
 
 
 class TestCanSubmitJobView(TestJobBase):
@@ -220,6 +229,110 @@ class TestCanSubmitJobView(TestJobBase):
         message = 'A job with job_cost 500.00 can be submitted.'
         self.assert_result('500.00', '0', 'fc_project', 200, True, message)
 
+    @use_shared_cache()
+    def test_accounting_balances_fast_path(self):
+        """Test that allowances and usages are retrieved for the common
+        case in a bounded number of queries, and that None is returned
+        otherwise."""
+        self.account_usage.value = Decimal('10.00')
+        self.account_usage.save()
+        self.user_account_usage.value = Decimal('5.00')
+        self.user_account_usage.save()
+
+        # Lookup rows are loaded into the registry of choices once the
+        # transaction loading them is committed. Discard them afterward, since
+        # the test's transaction is rolled back.
+        self.addCleanup(ChoiceRegistry.invalidate_all)
+        with self.captureOnCommitCallbacks(execute=True):
+            for model, name in ((AllocationStatusChoice, 'Active'),
+                                (AllocationUserStatusChoice, 'Active'),
+                                (ProjectUserStatusChoice, 'Active'),
+                                (AllocationAttributeType, 'Service Units')):
+                get_choice_pk(model, name)
+
+        # One joined query.
+        with self.assertNumQueries(1):
+            balances = get_accounting_balances('0', 'fc_project')
+        self.assertEqual(balances.account_allocation, Decimal('1000.00'))
+        self.assertEqual(balances.account_usage, Decimal('10.00'))
+        self.assertEqual(balances.user_account_allocation, Decimal('500.00'))
+        self.assertEqual(balances.user_account_usage, Decimal('5.00'))
+
+        # Subsequent calls are answered from the cache.
+        with self.assertNumQueries(0):
+            balances = get_accounting_balances('0', 'fc_project')
+        self.assertEqual(balances.account_usage, Decimal('10.00'))
+
+        self.assertIsNone(get_accounting_balances('1', 'fc_project'))
+        self.assertIsNone(get_accounting_balances('0', 'other_project'))
+
+        # The user is not an active member of the allocation.
+        self.allocation_user.status = AllocationUserStatusChoice.objects.get(
+            name='Removed')
+        self.allocation_user.save()
+        self.assertIsNone(get_accounting_balances('0', 'fc_project'))
+
+    def test_balances_not_cached_in_process_local_cache(self):
+        """Test that balances are not cached if the cache is local to
+        each process, since changes made by other processes would not
+        invalidate them."""
+        balances = get_accounting_balances('0', 'fc_project')
+        self.assertEqual(balances.user_account_usage, Decimal('0.00'))
+
+        # Update the usage without sending signals, as if in another process.
+        AllocationUserAttributeUsage.objects.filter(
+            pk=self.user_account_usage.pk).update(value=Decimal('400.00'))
+        balances = get_accounting_balances('0', 'fc_project')
+        self.assertEqual(balances.user_account_usage, Decimal('400.00'))
+
+    def test_cached_balances_invalidated_by_other_process(self):
+        """Test that, if the cache is shared between processes, cached
+        balances are invalidated by another process, using its own
+        instance of the cache."""
+        with use_shared_cache() as shared_cache:
+            balances = get_accounting_balances('0', 'fc_project')
+            self.assertEqual(balances.user_account_usage, Decimal('0.00'))
+
+            # Update the usage without sending signals, so that this process
+            # does not invalidate the cached balances.
+            AllocationUserAttributeUsage.objects.filter(
+                pk=self.user_account_usage.pk).update(value=Decimal('400.00'))
+            balances = get_accounting_balances('0', 'fc_project')
+            self.assertEqual(balances.user_account_usage, Decimal('0.00'))
+
+            other_cache = shared_cache.create_cache()
+            with patch.object(accounting_cache_utils, 'cache', other_cache):
+                invalidate_project_balances('fc_project')
+
+            balances = get_accounting_balances('0', 'fc_project')
+            self.assertEqual(balances.user_account_usage, Decimal('400.00'))
+
+    @use_shared_cache()
+    def test_cached_balances_invalidated_on_change(self):
+        """Test that changes to usages, allowances, and memberships are
+        reflected in subsequent requests, even after balances have been
+        cached."""
+        self.assert_result(
+            '500.00', '0', 'fc_project', 200, True,
+            'A job with job_cost 500.00 can be submitted.')
+
+        self.user_account_usage.value = Decimal('400.00')
+        self.user_account_usage.save()
+        message = (
+            'Adding job_cost 500.00 to user balance 400.00 would exceed user '
+            'allocation 500.00.')
+        self.assert_result('500.00', '0', 'fc_project', 200, False, message)
+
+        self.allocation_user_attribute.value = '1000.00'
+        self.allocation_user_attribute.save()
+        self.assert_result(
+            '500.00', '0', 'fc_project', 200, True,
+            'A job with job_cost 500.00 can be submitted.')
+
+        self.project_user.delete()
+        message = 'User user0 is not a member of account fc_project.'
+        self.assert_result('500.00', '0', 'fc_project', 200, False, message)
+
     def test_condo_jobs_always_allowed(self):
         """Test that requests under Condo accounts always succeed,
         regardless of cost."""
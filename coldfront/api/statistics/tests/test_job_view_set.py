@@ -1,20 +1,32 @@
+from csv import DictReader
 from datetime import datetime
 from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from json import dumps
+from json import loads
 
 import pytz
+import time
 
+from coldfront.api.statistics.pagination import JobPagination
+from coldfront.api.statistics.serializers import JobSerializer
 from coldfront.api.statistics.tests.test_job_base import TestJobBase
 from coldfront.api.statistics.utils import convert_utc_datetime_to_unix_timestamp
 from coldfront.api.statistics.utils import get_accounting_allocation_objects
 from coldfront.api.statistics.utils import create_project_allocation
 from coldfront.api.statistics.utils import create_user_project_allocation
+from coldfront.api.statistics.utils import get_accounting_balances
+from coldfront.api.statistics.utils import set_project_usage_value
 from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationAttributeUsageDelta
 from coldfront.core.allocation.models import AllocationStatusChoice
 from coldfront.core.allocation.models import AllocationUser
 from coldfront.core.allocation.models import AllocationUserAttribute
 from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.allocation.models import AllocationUserAttributeUsageDelta
 from coldfront.core.allocation.models import AllocationUserStatusChoice
+from coldfront.core.allocation.utils_.usage_ledger_utils import compact_usage_deltas
 from coldfront.core.project.models import Project
 from coldfront.core.project.models import ProjectStatusChoice
 from coldfront.core.project.models import ProjectUser
@@ -22,12 +34,21 @@ from coldfront.core.project.models import ProjectUserRoleChoice
 from coldfront.core.project.models import ProjectUserStatusChoice
 from coldfront.core.resource.utils import get_primary_compute_resource
 from coldfront.core.statistics.models import Job
+from coldfront.core.statistics.models import JobPartition
+from coldfront.core.statistics.models import JobUsageRollup
+from coldfront.core.statistics.models import Node
+from coldfront.core.statistics.utils_.node_utils import NodeNameCache
 from coldfront.core.user.models import ExpiringToken
 from coldfront.core.user.models import UserProfile
 from coldfront.core.utils.common import utc_datetime_to_display_time_zone_date
+from coldfront.core.utils.tests.test_base import use_shared_cache
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.db import transaction
 from django.db.models import Sum
+from django.test import override_settings
 
 from rest_framework.test import APIClient
 from unittest.mock import patch
@@ -415,6 +436,87 @@ class TestJobList(TestJobBase):
             total_cpu_time=Sum('cpu_time'))['total_cpu_time']
         self.assertEqual(float(json['total_cpu_time']), expected_total)
 
+    @patch.object(JobPagination, 'page_size', 3)
+    def test_keyset_pagination(self):
+        """Test that, given a cursor, pages are linked by cursor, cover
+        all results in order, and include totals only on the first
+        page."""
+        response = self.client.get(TestJobList.get_url())
+        self.assertEqual(response.status_code, 200)
+        expected_total_amount = response.json()['total_amount']
+        expected_jobslurmids = list(
+            Job.objects.order_by('startdate', 'jobslurmid').values_list(
+                'jobslurmid', flat=True))
+
+        jobslurmids = []
+        url = TestJobList.get_url(cursor='')
+        num_pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            json = response.json()
+            self.assertNotIn('count', json)
+            if num_pages == 0:
+                self.assertEqual(json['total_amount'], expected_total_amount)
+            else:
+                self.assertNotIn('total_amount', json)
+            self.assertLessEqual(len(json['results']), 3)
+            jobslurmids.extend(
+                result['jobslurmid'] for result in json['results'])
+            url = json['next']
+            num_pages += 1
+        self.assertEqual(jobslurmids, expected_jobslurmids)
+        self.assertEqual(num_pages, 3)
+
+    def test_invalid_cursor(self):
+        """Test that an invalid cursor raises an appropriate error."""
+        response = self.client.get(TestJobList.get_url(cursor='INVALID'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_ndjson(self):
+        """Test that exporting as newline-delimited JSON streams the same
+        Jobs, in the same form and order, as the list."""
+        url = TestJobList.get_url(account='PROJECT_0')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        expected = response.json()['results']
+        self.assertTrue(expected)
+
+        url = url.replace('/api/jobs/', '/api/jobs/export/')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        jobs = [loads(line) for line in content.splitlines()]
+        self.assertEqual(jobs, expected)
+
+    def test_export_csv(self):
+        """Test that exporting as CSV streams a header and a row for each
+        Job."""
+        url = TestJobList.get_url(export_format='csv')
+        url = url.replace('/api/jobs/', '/api/jobs/export/')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        rows = list(DictReader(StringIO(content)))
+        self.assertEqual(
+            [row['jobslurmid'] for row in rows],
+            list(Job.objects.order_by('startdate', 'jobslurmid').values_list(
+                'jobslurmid', flat=True)))
+        for row in rows:
+            job = Job.objects.get(jobslurmid=row['jobslurmid'])
+            self.assertEqual(row['accountid'], job.accountid.name)
+            self.assertEqual(
+                row['userid'], job.userid.userprofile.cluster_uid)
+            self.assertEqual(Decimal(row['amount']), job.amount)
+
+    def test_export_invalid_format(self):
+        """Test that an invalid export format raises an appropriate
+        error."""
+        response = self.client.get('/api/jobs/export/?export_format=INVALID')
+        self.assertEqual(response.status_code, 400)
+
 
 class TestJobSerializer(TestJobBase):
     """A suite for testing the functionality of JobSerializer."""
@@ -789,6 +891,22 @@ class TestJobViewSet(TestJobBase):
         self.assertEqual(job.partition, self.partition)
         self.assertEqual(job.qos, self.qos)
 
+    @use_shared_cache()
+    def test_post_caches_balances_on_commit(self):
+        """Test that, once a POST request that updates usages is
+        committed, the updated balances are cached."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.post_url, self.data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        with self.assertNumQueries(0):
+            balances = get_accounting_balances(
+                self.data['userid'], self.data['accountid'])
+        amount = Decimal(self.data['amount'])
+        self.assertEqual(balances.account_usage, amount)
+        self.assertEqual(balances.user_account_usage, amount)
+
     def test_post_duplicate(self):
         """Test that POST (create) requests with an existing ID fail."""
         response = self.client.post(self.post_url, self.data, format='json')
@@ -1362,3 +1480,469 @@ class TestJobViewSet(TestJobBase):
         user_usage.refresh_from_db()
         self.assertEqual(pre_allocation_usage, allocation_usage.value)
         self.assertEqual(pre_user_usage, user_usage.value)
+
+
+class TestJobBulk(TestJobBase):
+    """A suite for testing the bulk endpoint of JobViewSet."""
+
+    bulk_url = '/api/jobs/bulk/'
+
+    def job_data(self, jobslurmid, amount, node_names=()):
+        """Return request data for the Job with the given jobslurmid,
+        amount, and Node names."""
+        data = self.data.copy()
+        data['jobslurmid'] = jobslurmid
+        data['amount'] = amount
+        data['nodes'] = [{'name': name} for name in node_names]
+        return data
+
+    def test_bulk_creates_and_updates(self):
+        """Test that a batch creates new Jobs, updates existing ones,
+        attaches Nodes, and applies the changes in usage."""
+        response = self.client.post(self.post_url, self.data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        batch = [
+            self.job_data('1', '60.00', node_names=['n0000', 'n0001']),
+            self.job_data('2', '50.00', node_names=['n0001']),
+        ]
+        response = self.client.post(self.bulk_url, batch, format='json')
+        self.assertEqual(response.status_code, 200)
+        json = response.json()
+        self.assertEqual(json['created'], 1)
+        self.assertEqual(json['updated'], 1)
+        self.assertEqual(json['failed'], 0)
+        self.assertEqual(
+            [result['status'] for result in json['results']],
+            ['updated', 'created'])
+
+        job = Job.objects.get(jobslurmid='1')
+        self.assertEqual(job.amount, Decimal('60.00'))
+        self.assertEqual(
+            sorted(job.nodes.values_list('name', flat=True)),
+            ['n0000', 'n0001'])
+        job = Job.objects.get(jobslurmid='2')
+        self.assertEqual(job.amount, Decimal('50.00'))
+        self.assertEqual(job.userid, self.user)
+        self.assertEqual(job.accountid, self.project)
+        self.assertEqual(
+            list(job.nodes.values_list('name', flat=True)), ['n0001'])
+
+        self.account_usage.refresh_from_db()
+        self.user_account_usage.refresh_from_db()
+        self.assertEqual(self.account_usage.value, Decimal('110.00'))
+        self.assertEqual(self.user_account_usage.value, Decimal('110.00'))
+
+    def test_bulk_ndjson(self):
+        """Test that a batch may be given as newline-delimited JSON."""
+        body = '\n'.join(
+            dumps(self.job_data(str(i), '10.00')) for i in range(3))
+        response = self.client.post(
+            self.bulk_url, data=body + '\n',
+            content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertEqual(Job.objects.count(), 3)
+        self.account_usage.refresh_from_db()
+        self.assertEqual(self.account_usage.value, Decimal('30.00'))
+
+    def test_bulk_reports_invalid_jobs(self):
+        """Test that invalid Jobs in a batch are reported and skipped,
+        while valid ones are processed."""
+        outsider = User.objects.create(username='user1')
+        outsider_profile = UserProfile.objects.get(user=outsider)
+        outsider_profile.cluster_uid = '1'
+        outsider_profile.save()
+
+        unknown_user = self.job_data('2', '10.00')
+        unknown_user['userid'] = '2'
+        non_member = self.job_data('3', '10.00')
+        non_member['userid'] = '1'
+        batch = [
+            self.job_data('1', '10.00'),
+            unknown_user,
+            non_member,
+            self.job_data('1', '20.00'),
+            'not a job',
+        ]
+        response = self.client.post(self.bulk_url, batch, format='json')
+        self.assertEqual(response.status_code, 200)
+        json = response.json()
+        self.assertEqual(json['created'], 1)
+        self.assertEqual(json['failed'], 4)
+        statuses = [result['status'] for result in json['results']]
+        self.assertEqual(
+            statuses, ['created', 'error', 'error', 'error', 'error'])
+        self.assertEqual(
+            json['results'][2]['errors'],
+            [f'User {outsider.username} is not a member of account '
+             f'{self.project.name}.'])
+
+        self.assertEqual(Job.objects.count(), 1)
+        self.account_usage.refresh_from_db()
+        self.assertEqual(self.account_usage.value, Decimal('10.00'))
+
+    def test_bulk_updates_charge_current_amounts(self):
+        """Test that a Job updated twice in one batch is charged once,
+        and that a Job updated across batches is charged relative to its
+        current amount, even if a concurrent request updated it after it
+        was first read."""
+        response = self.client.post(
+            self.bulk_url, [self.job_data('1', '100.00')], format='json')
+        self.assertEqual(response.json()['created'], 1)
+
+        # The second update to the Job in the batch is rejected.
+        batch = [self.job_data('1', '60.00'), self.job_data('1', '40.00')]
+        response = self.client.post(self.bulk_url, batch, format='json')
+        json = response.json()
+        self.assertEqual(json['updated'], 1)
+        self.assertEqual(json['failed'], 1)
+        self.assertEqual(Job.objects.get(jobslurmid='1').amount, 60)
+        self.account_usage.refresh_from_db()
+        self.user_account_usage.refresh_from_db()
+        self.assertEqual(self.account_usage.value, Decimal('60.00'))
+        self.assertEqual(self.user_account_usage.value, Decimal('60.00'))
+
+        # Simulate a request that updates the Job, and is committed, after
+        # the Jobs in the batch are first read, but before its usages are
+        # locked.
+        validate = JobSerializer.validate_accounting_allocation_objects
+
+        def update_job_concurrently(user, account):
+            Job.objects.filter(jobslurmid='1').update(amount=Decimal('30.00'))
+            AllocationAttributeUsage.objects.filter(
+                pk=self.account_usage.pk).update(value=Decimal('30.00'))
+            AllocationUserAttributeUsage.objects.filter(
+                pk=self.user_account_usage.pk).update(value=Decimal('30.00'))
+            return validate(user, account)
+
+        with patch.object(
+                JobSerializer, 'validate_accounting_allocation_objects',
+                side_effect=update_job_concurrently):
+            response = self.client.post(
+                self.bulk_url, [self.job_data('1', '20.00')], format='json')
+        self.assertEqual(response.json()['updated'], 1)
+
+        self.assertEqual(Job.objects.get(jobslurmid='1').amount, 20)
+        self.account_usage.refresh_from_db()
+        self.user_account_usage.refresh_from_db()
+        self.assertEqual(self.account_usage.value, Decimal('20.00'))
+        self.assertEqual(self.user_account_usage.value, Decimal('20.00'))
+
+    def test_bulk_requires_list(self):
+        """Test that a batch that is not a list is rejected."""
+        response = self.client.post(self.bulk_url, self.data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Job.objects.count(), 0)
+
+
+class TestJobNodes(TestJobBase):
+    """A suite for testing the association of Jobs with Nodes."""
+
+    def tearDown(self):
+        """Discard Node names cached during the test, since the Nodes
+        are rolled back."""
+        NodeNameCache.invalidate()
+        super().tearDown()
+
+    def test_nodes_added_on_post_and_put(self):
+        """Test that Nodes given in POST and PUT requests are created if
+        needed and added to the Job."""
+        Node.objects.create(name='n0000')
+        data = self.data.copy()
+        data['nodes'] = [{'name': 'n0000'}, {'name': 'n0001'}]
+        response = self.client.post(self.post_url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        data['nodes'] = [{'name': 'n0001'}, {'name': 'n0002'}]
+        response = self.client.put(
+            self.put_url(data['jobslurmid']), data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        job = Job.objects.get(jobslurmid=data['jobslurmid'])
+        self.assertEqual(
+            sorted(job.nodes.values_list('name', flat=True)),
+            ['n0000', 'n0001', 'n0002'])
+        self.assertEqual(Node.objects.count(), 3)
+
+    def test_node_names_cached_on_commit(self):
+        """Test that, once committed, Node names are resolved without
+        querying the database, and that deleting a Node invalidates
+        them."""
+        with self.captureOnCommitCallbacks(execute=True):
+            ids_by_name = NodeNameCache.ids_by_name(['n0000', 'n0001'])
+        self.assertEqual(
+            ids_by_name,
+            dict(Node.objects.values_list('name', 'pk')))
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                NodeNameCache.ids_by_name(['n0001', 'n0000']), ids_by_name)
+
+        Node.objects.filter(name='n0000').delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            new_ids_by_name = NodeNameCache.ids_by_name(['n0000'])
+        self.assertNotEqual(new_ids_by_name['n0000'], ids_by_name['n0000'])
+
+    def test_node_names_reloaded_after_generation_expires(self):
+        """Test that Node names are reloaded once their generation
+        expires, even if Nodes were changed without being
+        invalidated."""
+        with self.captureOnCommitCallbacks(execute=True):
+            ids_by_name = NodeNameCache.ids_by_name(['n0000'])
+        # Rename the Node without sending signals, so that the names are
+        # not invalidated.
+        Node.objects.filter(name='n0000').update(name='n0001')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                NodeNameCache.ids_by_name(['n0000']), ids_by_name)
+
+        expired_time = time.time() + settings.CACHE_GENERATION_TIMEOUT + 1
+        with patch('django.core.cache.backends.locmem.time') as mock_time:
+            mock_time.time.return_value = expired_time
+            new_ids_by_name = NodeNameCache.ids_by_name(['n0000'])
+        self.assertEqual(
+            new_ids_by_name, {'n0000': Node.objects.get(name='n0000').pk})
+        self.assertNotEqual(new_ids_by_name, ids_by_name)
+
+    def test_node_names_not_cached_before_commit(self):
+        """Test that Node names are not cached if the transaction that
+        resolved them is not committed."""
+        NodeNameCache.ids_by_name(['n0000'])
+        with self.assertNumQueries(1):
+            NodeNameCache.ids_by_name(['n0000'])
+
+
+@override_settings(ACCOUNTING_USAGE_LEDGER_ENABLED=True)
+class TestJobUsageLedger(TestJobBase):
+    """A suite for testing JobViewSet when the usage ledger is
+    enabled."""
+
+    def assert_usages(self, stored, current):
+        """Assert that the stored usages of the Project and the User
+        and the current usages, including pending deltas, are as
+        given."""
+        self.account_usage.refresh_from_db()
+        self.user_account_usage.refresh_from_db()
+        self.assertEqual(self.account_usage.value, stored)
+        self.assertEqual(self.user_account_usage.value, stored)
+        balances = get_accounting_balances(
+            self.data['userid'], self.data['accountid'])
+        self.assertEqual(balances.account_usage, current)
+        self.assertEqual(balances.user_account_usage, current)
+
+    def test_charges_appended_and_compacted(self):
+        """Test that POST, PUT, and bulk requests append deltas instead
+        of writing usages, that the deltas are included in current
+        usages, and that compaction folds them into usages."""
+        response = self.client.post(self.post_url, self.data, format='json')
+        self.assertEqual(response.status_code, 201)
+        data = self.data.copy()
+        data['amount'] = '60.00'
+        response = self.client.put(
+            self.put_url(data['jobslurmid']), data, format='json')
+        self.assertEqual(response.status_code, 200)
+        batch = []
+        for jobslurmid in ('2', '3'):
+            data = self.data.copy()
+            data['jobslurmid'] = jobslurmid
+            data['amount'] = '10.00'
+            batch.append(data)
+        response = self.client.post(
+            '/api/jobs/bulk/', batch, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(AllocationAttributeUsageDelta.objects.count(), 3)
+        self.assertEqual(
+            AllocationUserAttributeUsageDelta.objects.count(), 3)
+        self.assert_usages(Decimal('0.00'), Decimal('80.00'))
+
+        self.assertEqual(compact_usage_deltas(batch_size=2), 6)
+        self.assertFalse(AllocationAttributeUsageDelta.objects.exists())
+        self.assertFalse(AllocationUserAttributeUsageDelta.objects.exists())
+        self.assert_usages(Decimal('80.00'), Decimal('80.00'))
+
+    def test_usage_not_negative(self):
+        """Test that current and compacted usages do not drop below
+        zero."""
+        AllocationAttributeUsageDelta.objects.create(
+            allocation_attribute_usage=self.account_usage,
+            value=Decimal('-10.00'))
+        AllocationUserAttributeUsageDelta.objects.create(
+            allocation_user_attribute_usage=self.user_account_usage,
+            value=Decimal('-10.00'))
+        self.assert_usages(Decimal('0.00'), Decimal('0.00'))
+        compact_usage_deltas()
+        self.assert_usages(Decimal('0.00'), Decimal('0.00'))
+
+    def test_set_usage_supersedes_deltas(self):
+        """Test that setting a usage discards its pending deltas."""
+        response = self.client.post(self.post_url, self.data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            set_project_usage_value(self.project, Decimal('5.00')))
+        self.assertFalse(AllocationAttributeUsageDelta.objects.exists())
+        self.assertEqual(
+            AllocationUserAttributeUsageDelta.objects.count(), 1)
+
+
+class TestJobUsageRollup(TestJobBase):
+    """A suite for testing that JobUsageRollup is maintained as Jobs are
+    written, and that list totals computed from it are correct."""
+
+    def assert_rollups_match_jobs(self):
+        """Assert that the totals of JobUsageRollup rows equal those of
+        Jobs with start dates and amounts."""
+        rollup_totals = JobUsageRollup.objects.aggregate(
+            amount=Sum('amount'), cpu_time=Sum('cpu_time'),
+            num_jobs=Sum('num_jobs'))
+        jobs = Job.objects.filter(
+            startdate__isnull=False, amount__isnull=False)
+        job_totals = jobs.aggregate(
+            amount=Sum('amount'), cpu_time=Sum('cpu_time'))
+        self.assertEqual(
+            rollup_totals['amount'] or Decimal('0.00'),
+            job_totals['amount'] or Decimal('0.00'))
+        self.assertAlmostEqual(
+            rollup_totals['cpu_time'] or 0.0, job_totals['cpu_time'] or 0.0)
+        self.assertEqual(rollup_totals['num_jobs'] or 0, jobs.count())
+
+    def test_rollups_maintained(self):
+        """Test that POST, PUT, and bulk requests and deletions update
+        JobUsageRollup."""
+        data = self.data.copy()
+        data['cpu_time'] = 10.0
+        response = self.client.post(self.post_url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assert_rollups_match_jobs()
+
+        data['amount'] = '60.00'
+        data['partition'] = 'other_partition'
+        response = self.client.put(
+            self.put_url(data['jobslurmid']), data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_rollups_match_jobs()
+        self.assertEqual(
+            JobUsageRollup.objects.get(partition='other_partition').amount,
+            Decimal('60.00'))
+
+        batch = []
+        for jobslurmid, amount in (('1', '50.00'), ('2', '20.00')):
+            job_data = self.data.copy()
+            job_data['jobslurmid'] = jobslurmid
+            job_data['amount'] = amount
+            batch.append(job_data)
+        response = self.client.post('/api/jobs/bulk/', batch, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_rollups_match_jobs()
+
+        Job.objects.get(jobslurmid='2').delete()
+        self.assert_rollups_match_jobs()
+        self.assertEqual(
+            JobUsageRollup.objects.filter(num_jobs__gt=0).get().amount,
+            Decimal('50.00'))
+
+    def test_list_totals_from_rollups(self):
+        """Test that list totals over ranges spanning several dates,
+        with partial dates at either end, equal those of the Jobs
+        listed."""
+        for i in range(10):
+            startdate = self.default_start + timedelta(hours=7 * i)
+            Job.objects.create(
+                jobslurmid=str(i), submitdate=startdate, startdate=startdate,
+                enddate=startdate, userid=self.user, accountid=self.project,
+                amount=Decimal(f'{i + 1}.00'), cpu_time=float(i),
+                partition=f'partition{i % 2}')
+
+        start_dt = self.default_start + timedelta(hours=5)
+        end_dt = self.default_start + timedelta(days=2, hours=10)
+        query = (
+            f'?start_time={convert_utc_datetime_to_unix_timestamp(start_dt)}'
+            f'&end_time={convert_utc_datetime_to_unix_timestamp(end_dt)}')
+        for extra in ('', f'&account={self.project.name}',
+                      f'&user={self.user.username}&partition=partition1',
+                      '&jobstatus=COMPLETED'):
+            response = self.client.get(self.get_url + query + extra)
+            self.assertEqual(response.status_code, 200)
+            json = response.json()
+            jobs = Job.objects.filter(
+                jobslurmid__in=[job['jobslurmid'] for job in json['results']])
+            self.assertEqual(json['count'], jobs.count())
+            expected = jobs.aggregate(
+                amount=Sum('amount'), cpu_time=Sum('cpu_time'))
+            self.assertEqual(
+                Decimal(json['total_amount']),
+                expected['amount'] or Decimal('0.00'))
+            self.assertAlmostEqual(
+                float(json['total_cpu_time']), expected['cpu_time'] or 0.0)
+
+    def test_rollups_without_project_or_user_unique(self):
+        """Test that Jobs without a Project or a User are rolled up into
+        a single row per key, which may not be duplicated."""
+        startdate = self.default_start + timedelta(hours=1)
+        for jobslurmid, userid, accountid in (
+                ('1', None, self.project), ('2', None, self.project),
+                ('3', self.user, None), ('4', self.user, None),
+                ('5', None, None), ('6', None, None)):
+            Job.objects.create(
+                jobslurmid=jobslurmid, submitdate=startdate,
+                startdate=startdate, enddate=startdate, userid=userid,
+                accountid=accountid, amount=Decimal('1.00'),
+                partition='partition')
+        self.assert_rollups_match_jobs()
+        self.assertEqual(JobUsageRollup.objects.count(), 3)
+        self.assertEqual(
+            set(JobUsageRollup.objects.values_list('num_jobs', flat=True)),
+            {2})
+
+        for rollup in JobUsageRollup.objects.all():
+            with self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    JobUsageRollup.objects.create(
+                        date=rollup.date, project=rollup.project,
+                        user=rollup.user, partition=rollup.partition)
+
+
+class TestJobPartitions(TestJobBase):
+    """A suite for testing that JobPartition is maintained as Jobs are
+    written."""
+
+    def assert_partitions(self, expected):
+        """Assert that the JobPartitions of each Job are the given ones,
+        given as a dictionary from jobslurmid to a set of names."""
+        actual = {}
+        for jobslurmid, name in JobPartition.objects.values_list(
+                'job', 'name'):
+            actual.setdefault(jobslurmid, set()).add(name)
+        self.assertEqual(actual, expected)
+
+    def test_partitions_maintained(self):
+        """Test that POST, PUT, and bulk requests update JobPartition,
+        and that deletions remove it."""
+        data = self.data.copy()
+        jobslurmid = data['jobslurmid']
+        data['partition'] = 'savio,savio2'
+        response = self.client.post(self.post_url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assert_partitions({jobslurmid: {'savio', 'savio2'}})
+
+        data['partition'] = 'savio2,savio3,savio3'
+        response = self.client.put(
+            self.put_url(jobslurmid), data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_partitions({jobslurmid: {'savio2', 'savio3'}})
+
+        batch = []
+        for other_jobslurmid, partition in (
+                (jobslurmid, 'savio'), ('2', 'savio_bigmem,savio')):
+            job_data = self.data.copy()
+            job_data['jobslurmid'] = other_jobslurmid
+            job_data['partition'] = partition
+            batch.append(job_data)
+        response = self.client.post('/api/jobs/bulk/', batch, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_partitions({
+            jobslurmid: {'savio'},
+            '2': {'savio', 'savio_bigmem'},
+        })
+
+        Job.objects.get(jobslurmid='2').delete()
+        self.assert_partitions({jobslurmid: {'savio'}})
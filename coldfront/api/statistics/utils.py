@@ -2,11 +2,19 @@ from coldfront.core.allocation.models import Allocation
 from coldfront.core.allocation.models import AllocationAttribute
 from coldfront.core.allocation.models import AllocationAttributeType
 from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationAttributeUsageDelta
 from coldfront.core.allocation.models import AllocationStatusChoice
 from coldfront.core.allocation.models import AllocationUser
 from coldfront.core.allocation.models import AllocationUserAttribute
 from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.allocation.models import AllocationUserAttributeUsageDelta
 from coldfront.core.allocation.models import AllocationUserStatusChoice
+from coldfront.core.allocation.utils_.accounting_cache_utils import get_balance_cache_key
+from coldfront.core.allocation.utils_.accounting_cache_utils import get_cached_balances
+from coldfront.core.allocation.utils_.accounting_cache_utils import set_cached_balances
+from coldfront.core.allocation.utils_.usage_ledger_utils import apply_pending_usage_deltas
+from coldfront.core.allocation.utils_.usage_ledger_utils import get_current_usage_value
+from coldfront.core.allocation.utils_.usage_ledger_utils import pending_usage_delta_sum
 from coldfront.core.project.models import Project
 from coldfront.core.project.models import ProjectUser
 from coldfront.core.project.models import ProjectUserStatusChoice
@@ -14,11 +22,17 @@ from coldfront.core.resource.utils import get_primary_compute_resource
 from coldfront.core.resource.utils import get_primary_compute_resource_name
 from coldfront.core.statistics.models import ProjectTransaction
 from coldfront.core.statistics.models import ProjectUserTransaction
+from coldfront.core.utils.choice_registry import get_choice
+from coldfront.core.utils.choice_registry import get_choice_pk
 from coldfront.core.utils.common import utc_now_offset_aware
 from datetime import datetime
 from decimal import Decimal
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import MultipleObjectsReturned
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
+from django.db.models import F
 import logging
 import pytz
 
@@ -39,6 +53,41 @@ class AccountingAllocationObjects(object):
         self.allocation_user_attribute_usage = allocation_user_attribute_usage
 
 
+class AccountingBalances(object):
+    """A container for the Service Units allowances and usages of a
+    Project and one of its users, needed for checking whether a job may
+    be submitted."""
+
+    def __init__(self, account_allocation=None, account_usage=None,
+                 user_account_allocation=None, user_account_usage=None):
+        self.account_allocation = account_allocation
+        self.account_usage = account_usage
+        self.user_account_allocation = user_account_allocation
+        self.user_account_usage = user_account_usage
+
+    @classmethod
+    def from_allocation_objects(cls, allocation_objects):
+        """Return an instance built from the given
+        AccountingAllocationObjects, which must have all fields set.
+        Usages include pending deltas from the usage ledger."""
+        return cls(
+            account_allocation=Decimal(
+                allocation_objects.allocation_attribute.value),
+            account_usage=get_current_usage_value(
+                allocation_objects.allocation_attribute_usage),
+            user_account_allocation=Decimal(
+                allocation_objects.allocation_user_attribute.value),
+            user_account_usage=get_current_usage_value(
+                allocation_objects.allocation_user_attribute_usage))
+
+    def as_tuple(self):
+        """Return the balances as a tuple, in the order accepted by the
+        constructor."""
+        return (
+            self.account_allocation, self.account_usage,
+            self.user_account_allocation, self.user_account_usage)
+
+
 def convert_utc_datetime_to_unix_timestamp(utc_dt):
     """Return the given UTC datetime object as the number of seconds
     since the beginning of the epoch.
@@ -89,13 +138,13 @@ def create_project_allocation(project, value):
 
     resource = get_primary_compute_resource()
 
-    status = AllocationStatusChoice.objects.get(name='Active')
+    status = get_choice(AllocationStatusChoice, 'Active')
     allocation = Allocation.objects.create(project=project, status=status)
     allocation.resources.add(resource)
     allocation.save()
 
-    allocation_attribute_type = AllocationAttributeType.objects.get(
-        name='Service Units')
+    allocation_attribute_type = get_choice(
+        AllocationAttributeType, 'Service Units')
     allocation_attribute = AllocationAttribute.objects.create(
         allocation_attribute_type=allocation_attribute_type,
         allocation=allocation, value=str(value))
@@ -141,16 +190,16 @@ def create_user_project_allocation(user, project, value):
 
     resource = get_primary_compute_resource()
 
-    status = AllocationStatusChoice.objects.get(name='Active')
+    status = get_choice(AllocationStatusChoice, 'Active')
     allocation = Allocation.objects.get(
         project=project, status=status, resources__name=resource.name)
 
-    status = AllocationUserStatusChoice.objects.get(name='Active')
+    status = get_choice(AllocationUserStatusChoice, 'Active')
     allocation_user = AllocationUser.objects.create(
         allocation=allocation, user=user, status=status)
 
-    allocation_attribute_type = AllocationAttributeType.objects.get(
-        name='Service Units')
+    allocation_attribute_type = get_choice(
+        AllocationAttributeType, 'Service Units')
     allocation_user_attribute = AllocationUserAttribute.objects.create(
         allocation_attribute_type=allocation_attribute_type,
         allocation=allocation, allocation_user=allocation_user,
@@ -200,14 +249,14 @@ def get_accounting_allocation_objects(project, user=None,
     if enforce_allocation_active:
         # Check that the project has an active Allocation to the
         # 'CLUSTER_NAME Compute' resource.
-        allocation_kwargs['status'] = AllocationStatusChoice.objects.get(
-            name='Active')
+        allocation_kwargs['status'] = get_choice(
+            AllocationStatusChoice, 'Active')
     allocation = Allocation.objects.get(**allocation_kwargs)
 
     # Check that the allocation has an attribute for Service Units and
     # an associated usage.
-    allocation_attribute_type = AllocationAttributeType.objects.get(
-        name='Service Units')
+    allocation_attribute_type = get_choice(
+        AllocationAttributeType, 'Service Units')
     allocation_attribute = AllocationAttribute.objects.get(
         allocation_attribute_type=allocation_attribute_type,
         allocation=allocation)
@@ -225,11 +274,11 @@ def get_accounting_allocation_objects(project, user=None,
         raise TypeError(f'User {user} is not a User object.')
 
     # Check that there is an active association between the user and project.
-    active_status = ProjectUserStatusChoice.objects.get(name='Active')
+    active_status = get_choice(ProjectUserStatusChoice, 'Active')
     ProjectUser.objects.get(user=user, project=project, status=active_status)
 
     # Check that the user is an active member of the allocation.
-    active_status = AllocationUserStatusChoice.objects.get(name='Active')
+    active_status = get_choice(AllocationUserStatusChoice, 'Active')
     allocation_user = AllocationUser.objects.get(
         allocation=allocation, user=user, status=active_status)
 
@@ -248,6 +297,127 @@ def get_accounting_allocation_objects(project, user=None,
     return objects
 
 
+def get_accounting_balances(cluster_uid, account_name):
+    """Return the Service Units allowances and usages of the Project
+    with the given name and of the user with the given cluster UID
+    under it, retrieved in a single joined query.
+
+    This is a fast path for the common case, in which the user is an
+    active member of the Project and of its single active compute
+    Allocation, and all needed attributes and usages exist. If any of
+    these does not hold, return None; callers should then fall back to
+    get_accounting_allocation_objects, which determines the exact
+    problem.
+
+    Results are cached if the cache is shared between processes, so
+    that repeated calls do not query the database until a relevant
+    object changes.
+
+    Parameters:
+        - cluster_uid (str): the cluster UID of the user
+        - account_name (str): the name of the Project
+
+    Returns:
+        - AccountingBalances instance, or None
+
+    Raises:
+        - None
+    """
+    # Retrieve the key before querying so that an invalidation occurring in
+    # the interim is not lost.
+    cache_key = get_balance_cache_key(cluster_uid, account_name)
+    cached_balances = get_cached_balances(cache_key)
+    if cached_balances is not None:
+        return AccountingBalances(*cached_balances)
+
+    # Lookup rows are resolved from the registry of choices, so that the
+    # query below filters on their primary keys without joining to them.
+    try:
+        active_allocation_status_pk = get_choice_pk(
+            AllocationStatusChoice, 'Active')
+        active_allocation_user_status_pk = get_choice_pk(
+            AllocationUserStatusChoice, 'Active')
+        active_project_user_status_pk = get_choice_pk(
+            ProjectUserStatusChoice, 'Active')
+        service_units_type_pk = get_choice_pk(
+            AllocationAttributeType, 'Service Units')
+    except (MultipleObjectsReturned, ObjectDoesNotExist):
+        return None
+
+    # Starting from the user's Service Units attribute, join to its usage,
+    # the user, the Allocation, the Project, the Project's membership, and
+    # the Allocation's Service Units attribute and its usage. Filters on
+    # multi-valued relations are given in a single call so that they apply
+    # to the same joined row, and values() reuses those joins.
+    rows = AllocationUserAttribute.objects.filter(
+        allocation_attribute_type_id=service_units_type_pk,
+        allocation_user__status_id=active_allocation_user_status_pk,
+        allocation_user__user__userprofile__cluster_uid=cluster_uid,
+        allocation__status_id=active_allocation_status_pk,
+        allocation__resources__name__iexact=(
+            f'{settings.PRIMARY_CLUSTER_NAME} Compute'),
+        allocation__project__name=account_name,
+        allocation__project__projectuser__user=F('allocation_user__user'),
+        allocation__project__projectuser__status_id=(
+            active_project_user_status_pk),
+        allocation__allocationattribute__allocation_attribute_type_id=(
+            service_units_type_pk),
+    ).annotate(
+        account_usage_pending=pending_usage_delta_sum(
+            AllocationAttributeUsageDelta, 'allocation_attribute_usage',
+            'allocation__allocationattribute__allocationattributeusage'),
+        user_account_usage_pending=pending_usage_delta_sum(
+            AllocationUserAttributeUsageDelta,
+            'allocation_user_attribute_usage',
+            'allocationuserattributeusage'),
+    ).values_list(
+        'allocation__allocationattribute__value',
+        'allocation__allocationattribute__allocationattributeusage__value',
+        'account_usage_pending',
+        'value',
+        'allocationuserattributeusage__value',
+        'user_account_usage_pending',
+    )[:2]
+    rows = list(rows)
+
+    # Zero or multiple rows indicate an uncommon case.
+    if len(rows) != 1:
+        return None
+    (account_allocation, account_usage, account_usage_pending,
+     user_account_allocation, user_account_usage,
+     user_account_usage_pending) = rows[0]
+    if account_usage is None or user_account_usage is None:
+        return None
+    account_usage = apply_pending_usage_deltas(
+        account_usage, account_usage_pending)
+    user_account_usage = apply_pending_usage_deltas(
+        user_account_usage, user_account_usage_pending)
+
+    balances = AccountingBalances(
+        account_allocation=Decimal(account_allocation),
+        account_usage=account_usage,
+        user_account_allocation=Decimal(user_account_allocation),
+        user_account_usage=user_account_usage)
+    set_cached_balances(cache_key, balances.as_tuple())
+    return balances
+
+
+def warm_accounting_balances(cluster_uid, account_name):
+    """Populate the cache with the balances for the given cluster UID
+    and Project name, logging any errors instead of raising them.
+
+    This is intended to be called after a transaction that changes the
+    balances has been committed, so that the next check does not query
+    the database."""
+    try:
+        get_accounting_balances(cluster_uid, account_name)
+    except Exception as e:
+        logger = logging.getLogger(__name__)
+        logger.exception(
+            f'Failed to cache balances for cluster UID {cluster_uid} and '
+            f'Project {account_name}. Details:\n{e}')
+
+
 def set_project_allocation_value(project, value):
     """Set the value of the compute allocation for the given Project;
     return whether or not the update was performed successfully.
@@ -309,6 +479,9 @@ def set_project_usage_value(project, value):
                 pk=allocation_objects.allocation_attribute_usage.pk)
         project_usage.value = value
         project_usage.save()
+        # Pending deltas from the usage ledger are superseded by the new
+        # value.
+        project_usage.deltas.all().delete()
     return True
 
 
@@ -382,4 +555,7 @@ def set_project_user_usage_value(user, project, value):
                 pk=allocation_objects.allocation_user_attribute_usage.pk)
         user_project_usage.value = value
         user_project_usage.save()
+        # Pending deltas from the usage ledger are superseded by the new
+        # value.
+        user_project_usage.deltas.all().delete()
     return True
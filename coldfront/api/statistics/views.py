@@ -1,11 +1,15 @@
+import csv
 import logging
 import pytz
 
 from collections import OrderedDict
+from collections import defaultdict
 from datetime import date
 from datetime import datetime
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
+from itertools import islice
+from json import dumps
 
 from django.core.exceptions import MultipleObjectsReturned
 from django.core.exceptions import ObjectDoesNotExist
@@ -13,22 +17,34 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction
 from django.http import Http404, JsonResponse
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.decorators import api_view
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 
 from coldfront.api.permissions import IsAdminUserOrReadOnly
 from coldfront.api.statistics.pagination import JobPagination
+from coldfront.api.statistics.parsers import NDJSONParser
+from coldfront.api.statistics.serializers import BulkJobSerializer
 from coldfront.api.statistics.serializers import JobSerializer
+from coldfront.api.statistics.utils import AccountingBalances
 from coldfront.api.statistics.utils import convert_utc_datetime_to_unix_timestamp
 from coldfront.api.statistics.utils import get_accounting_allocation_objects
+from coldfront.api.statistics.utils import get_accounting_balances
+from coldfront.api.statistics.utils import warm_accounting_balances
 from coldfront.core.allocation.models import Allocation
 from coldfront.core.allocation.models import AllocationAttributeUsage
 from coldfront.core.allocation.models import AllocationUser
 from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.allocation.utils_.usage_history_utils import save_job_usage
+from coldfront.core.allocation.utils_.usage_ledger_utils import append_usage_deltas
+from coldfront.core.allocation.utils_.usage_ledger_utils import usage_ledger_enabled
 from coldfront.core.project.models import Project
 from coldfront.core.project.models import ProjectUser
 from coldfront.core.project.utils_.renewal_utils import get_current_allowance_year_period
@@ -36,7 +52,11 @@ from coldfront.core.resource.utils import get_computing_allowance_project_prefix
 from coldfront.core.resource.utils_.allowance_utils.computing_allowance import ComputingAllowance
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 from coldfront.core.statistics.models import Job
+from coldfront.core.statistics.utils_.job_partition_utils import set_job_partitions
+from coldfront.core.statistics.utils_.job_usage_rollup_utils import JobUsageRollupDeltas
+from coldfront.core.statistics.utils_.node_utils import add_nodes_to_jobs
 from coldfront.core.user.models import UserProfile
+from coldfront.core.utils.common import Echo
 from coldfront.core.utils.common import display_time_zone_date_to_utc_datetime
 
 
@@ -103,6 +123,24 @@ end_time_parameter = openapi.Parameter(
         'this time are included.'),
     type=openapi.TYPE_NUMBER)
 
+cursor_parameter = openapi.Parameter(
+    'cursor',
+    openapi.IN_QUERY,
+    description=(
+        'If given, even if empty, pages are selected by cursor rather than by '
+        'number: each page links to the next, and no count is included. An '
+        'empty cursor selects the first page.'),
+    type=openapi.TYPE_STRING)
+
+export_format_parameter = openapi.Parameter(
+    'export_format',
+    openapi.IN_QUERY,
+    description=(
+        'The format in which to export jobs: "ndjson" (newline-delimited '
+        'JSON, the default) or "csv".'),
+    type=openapi.TYPE_STRING)
+
+
 
 @method_decorator(
     name='list',
@@ -110,7 +148,7 @@ end_time_parameter = openapi.Parameter(
         manual_parameters=[
             user_parameter, account_parameter, jobstatus_parameter,
             max_amount_parameter, min_amount_parameter, partition_parameter,
-            start_time_parameter, end_time_parameter],
+            start_time_parameter, end_time_parameter, cursor_parameter],
         operation_description=(
             'Returns jobs, with optional filtering by user, account, '
             'job status, amount, partition, and end date.')))
@@ -120,6 +158,8 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
     """A ViewSet for the Job model, intended for allocation accounting
     purposes."""
 
+    # The number of Jobs to read at a time when exporting.
+    export_chunk_size = 2000
     pagination_class = JobPagination
     permission_classes = [IsAdminUserOrReadOnly]
     serializer_class = JobSerializer
@@ -127,15 +167,23 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
     def get_queryset(self):
         # Begin with all jobs.
         jobs = Job.objects.all()
-        if self.action == 'list':
+        # The export applies the same filters as the list.
+        if self.action in ('list', 'export'):
+            # Record the filters applied, so that totals may be computed from
+            # daily rollups, if the filters support it.
+            totals_filters = {}
+            rollups_applicable = True
+
             # Filter by user, if provided.
             username = self.request.query_params.get('user', None)
             if username:
                 user = User.objects.get(username=username)
                 if user:
                     jobs = jobs.filter(userid=user)
+                    totals_filters['user'] = user
                 else:
                     jobs = Job.objects.none()
+                    rollups_applicable = False
 
             # Filter by account, if provided.
             account_name = self.request.query_params.get('account', None)
@@ -144,13 +192,16 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
                     account = Project.objects.get(name=account_name)
                 except Project.DoesNotExist:
                     jobs = Job.objects.none()
+                    rollups_applicable = False
                 else:
                     jobs = jobs.filter(accountid=account)
+                    totals_filters['project'] = account
 
             # Filter by jobstatus, if provided.
             jobstatus = self.request.query_params.get('jobstatus', None)
             if jobstatus:
                 jobs = jobs.filter(jobstatus=jobstatus)
+                rollups_applicable = False
 
             # Filter by amount minimum and/or maximum, if provided.
             min_amount = self.request.query_params.get(
@@ -170,11 +221,15 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
                     raise serializers.ValidationError(
                         f'Invalid maximum amount {max_amount}. Details: {e}')
             jobs = jobs.filter(amount__gte=min_amount, amount__lte=max_amount)
+            if (min_amount != settings.ALLOCATION_MIN or
+                    max_amount != settings.ALLOCATION_MAX):
+                rollups_applicable = False
 
             # Filter by partition, if provided.
             partition = self.request.query_params.get('partition', None)
             if partition:
                 jobs = jobs.filter(partition=partition)
+                totals_filters['partition'] = partition
 
             # Retrieve the default allocation year start and end as Unix
             # timestamps.
@@ -222,8 +277,17 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
             jobs = jobs.filter(
                 startdate__gte=start_time, startdate__lte=end_time)
 
-        # Return filtered jobs in ascending startdate order.
-        return jobs.order_by('startdate')
+            # JobPagination reads this to compute totals.
+            if rollups_applicable:
+                self.job_usage_totals_filters = {
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    **totals_filters,
+                }
+
+        # Return filtered jobs in ascending startdate order, breaking ties by
+        # jobslurmid, so that pages may be selected by keyset.
+        return jobs.order_by('startdate', 'jobslurmid')
 
     @swagger_auto_schema(
         manual_parameters=[authorization_parameter],
@@ -248,12 +312,15 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
             allocation_objects.allocation_attribute.value)
         user_account_allocation = Decimal(
             allocation_objects.allocation_user_attribute.value)
-        account_usage = (
-            AllocationAttributeUsage.objects.select_for_update().get(
-                pk=allocation_objects.allocation_attribute_usage.pk))
-        user_account_usage = (
-            AllocationUserAttributeUsage.objects.select_for_update().get(
-                pk=allocation_objects.allocation_user_attribute_usage.pk))
+        # When the usage ledger is enabled, usages are not locked.
+        use_usage_ledger = usage_ledger_enabled()
+        if not use_usage_ledger:
+            account_usage = (
+                AllocationAttributeUsage.objects.select_for_update().get(
+                    pk=allocation_objects.allocation_attribute_usage.pk))
+            user_account_usage = (
+                AllocationUserAttributeUsage.objects.select_for_update().get(
+                    pk=allocation_objects.allocation_user_attribute_usage.pk))
 
         logger.info(
             f'New Job POST request with data: {serializer.validated_data}.')
@@ -285,34 +352,47 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
             # must be called for each, since the Job is valid in the Slurm
             # database. Therefore, overdrawing is permitted here.
 
-            new_account_usage = account_usage.value + amount
-            if new_account_usage > account_allocation:
-                message = (
-                    f'Project {account.name} allocation will be overdrawn. '
-                    f'Allocation: {account_allocation}. Current usage: '
-                    f'{account_usage.value}. Requested job amount: {amount}. '
-                    f'This is permitted by design.')
-                logger.error(message)
-            logger.info(
-                f'Setting usage for Project {account.name} to '
-                f'{new_account_usage}.')
-            account_usage.value = new_account_usage
-            account_usage.save()
-
-            new_user_account_usage = user_account_usage.value + amount
-            if new_user_account_usage > user_account_allocation:
-                message = (
-                    f'User {user} allocation for Project {account.name} will '
-                    f'be overdrawn. Allocation: {user_account_allocation}. '
-                    f'Current usage: {user_account_usage.value}. Requested '
-                    f'job amount: {amount}. This is permitted by design.')
-                logger.error(message)
-            logger.info(
-                f'Setting usage for User {user} and Project {account.name} to '
-                f'{user_account_usage.value} + {amount} = '
-                f'{new_user_account_usage}.')
-            user_account_usage.value = new_user_account_usage
-            user_account_usage.save()
+            if use_usage_ledger:
+                logger.info(
+                    f'Appending usage deltas of {amount} for Project '
+                    f'{account.name} and for User {user} and Project '
+                    f'{account.name}.')
+                append_usage_deltas(
+                    allocation_objects.allocation_attribute_usage,
+                    allocation_objects.allocation_user_attribute_usage,
+                    amount)
+            else:
+                new_account_usage = account_usage.value + amount
+                if new_account_usage > account_allocation:
+                    message = (
+                        f'Project {account.name} allocation will be '
+                        f'overdrawn. Allocation: {account_allocation}. '
+                        f'Current usage: {account_usage.value}. Requested '
+                        f'job amount: {amount}. This is permitted by design.')
+                    logger.error(message)
+                logger.info(
+                    f'Setting usage for Project {account.name} to '
+                    f'{new_account_usage}.')
+                account_usage.value = new_account_usage
+                save_job_usage(account_usage)
+
+                new_user_account_usage = user_account_usage.value + amount
+                if new_user_account_usage > user_account_allocation:
+                    message = (
+                        f'User {user} allocation for Project {account.name} '
+                        f'will be overdrawn. Allocation: '
+                        f'{user_account_allocation}. Current usage: '
+                        f'{user_account_usage.value}. Requested job amount: '
+                        f'{amount}. This is permitted by design.')
+                    logger.error(message)
+                logger.info(
+                    f'Setting usage for User {user} and Project '
+                    f'{account.name} to {user_account_usage.value} + '
+                    f'{amount} = {new_user_account_usage}.')
+                user_account_usage.value = new_user_account_usage
+                save_job_usage(user_account_usage)
+
+            self.warm_accounting_balances_on_commit(user, account)
         else:
             logger.warning(f'Skipping usage updates for Job {jobslurmid}.')
 
@@ -359,12 +439,15 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
         account = serializer.validated_data['accountid']
         allocation_objects = get_accounting_allocation_objects(
             account, user=user)
-        account_usage = (
-            AllocationAttributeUsage.objects.select_for_update().get(
-                pk=allocation_objects.allocation_attribute_usage.pk))
-        user_account_usage = (
-            AllocationUserAttributeUsage.objects.select_for_update().get(
-                pk=allocation_objects.allocation_user_attribute_usage.pk))
+        # When the usage ledger is enabled, usages are not locked.
+        use_usage_ledger = usage_ledger_enabled()
+        if not use_usage_ledger:
+            account_usage = (
+                AllocationAttributeUsage.objects.select_for_update().get(
+                    pk=allocation_objects.allocation_attribute_usage.pk))
+            user_account_usage = (
+                AllocationUserAttributeUsage.objects.select_for_update().get(
+                    pk=allocation_objects.allocation_user_attribute_usage.pk))
 
         logger.info(
             f'New Job PUT request with data: {serializer.validated_data}.')
@@ -387,47 +470,70 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
         # If an amount is specified and job dates are valid, update usages.
         if job_has_amount and job_dates_valid:
             amount = Decimal(serializer.validated_data['amount'])
-            try:
-                job = Job.objects.get(jobslurmid=jobslurmid)
-            except Job.DoesNotExist:
-                logger.info(
-                    f'No Job with jobslurmid {jobslurmid} yet exists. '
-                    f'Creating it.')
-                new_account_usage = account_usage.value + amount
-                logger.info(
-                    f'Setting usage for Project {account.name} to '
-                    f'{account_usage.value} + {amount} = {new_account_usage}.')
-                account_usage.value = new_account_usage
-                new_user_account_usage = user_account_usage.value + amount
+            if use_usage_ledger:
+                # Usages are not locked, so lock the Job, so that concurrent
+                # requests for it do not append deltas computed from the same
+                # amount.
+                try:
+                    job = Job.objects.select_for_update().get(
+                        jobslurmid=jobslurmid)
+                except Job.DoesNotExist:
+                    delta = amount
+                else:
+                    delta = amount - job.amount
                 logger.info(
-                    f'Setting usage for User {user} and Project '
-                    f'{account.name} to {user_account_usage.value} + {amount} '
-                    f'= {new_user_account_usage}.')
-                user_account_usage.value = new_user_account_usage
+                    f'Appending usage deltas of {delta} for Project '
+                    f'{account.name} and for User {user} and Project '
+                    f'{account.name}.')
+                append_usage_deltas(
+                    allocation_objects.allocation_attribute_usage,
+                    allocation_objects.allocation_user_attribute_usage,
+                    delta)
             else:
-                logger.info(
-                    f'A Job with jobslurmid {jobslurmid} already exists. '
-                    f'Updating it.')
-                # The difference should be non-positive because the estimated
-                # cost is an upper bound of the actual cost.
-                difference = amount - job.amount
-                new_account_usage = max(
-                    account_usage.value + difference, Decimal('0.00'))
-                logger.info(
-                    f'Setting usage for Project {account.name} to max('
-                    f'{account_usage.value} + ({amount} - {job.amount}), 0) = '
-                    f'{new_account_usage}.')
-                account_usage.value = new_account_usage
-                new_user_account_usage = max(
-                    user_account_usage.value + difference, Decimal('0.00'))
-                logger.info(
-                    f'Setting usage for User {user} and Project '
-                    f'{account.name} to max({user_account_usage.value} + '
-                    f'({amount} - {job.amount}), 0) = '
-                    f'{new_user_account_usage}.')
-                user_account_usage.value = new_user_account_usage
-            account_usage.save()
-            user_account_usage.save()
+                try:
+                    job = Job.objects.get(jobslurmid=jobslurmid)
+                except Job.DoesNotExist:
+                    logger.info(
+                        f'No Job with jobslurmid {jobslurmid} yet exists. '
+                        f'Creating it.')
+                    new_account_usage = account_usage.value + amount
+                    logger.info(
+                        f'Setting usage for Project {account.name} to '
+                        f'{account_usage.value} + {amount} = '
+                        f'{new_account_usage}.')
+                    account_usage.value = new_account_usage
+                    new_user_account_usage = user_account_usage.value + amount
+                    logger.info(
+                        f'Setting usage for User {user} and Project '
+                        f'{account.name} to {user_account_usage.value} + '
+                        f'{amount} = {new_user_account_usage}.')
+                    user_account_usage.value = new_user_account_usage
+                else:
+                    logger.info(
+                        f'A Job with jobslurmid {jobslurmid} already exists. '
+                        f'Updating it.')
+                    # The difference should be non-positive because the
+                    # estimated cost is an upper bound of the actual cost.
+                    difference = amount - job.amount
+                    new_account_usage = max(
+                        account_usage.value + difference, Decimal('0.00'))
+                    logger.info(
+                        f'Setting usage for Project {account.name} to max('
+                        f'{account_usage.value} + ({amount} - {job.amount}), '
+                        f'0) = {new_account_usage}.')
+                    account_usage.value = new_account_usage
+                    new_user_account_usage = max(
+                        user_account_usage.value + difference, Decimal('0.00'))
+                    logger.info(
+                        f'Setting usage for User {user} and Project '
+                        f'{account.name} to max({user_account_usage.value} + '
+                        f'({amount} - {job.amount}), 0) = '
+                        f'{new_user_account_usage}.')
+                    user_account_usage.value = new_user_account_usage
+                save_job_usage(account_usage)
+                save_job_usage(user_account_usage)
+
+            self.warm_accounting_balances_on_commit(user, account)
         else:
             logger.warning(f'Skipping usage updates for Job {jobslurmid}.')
 
@@ -441,6 +547,342 @@ class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
 
         return Response(serializer.data)
 
+    @swagger_auto_schema(
+        manual_parameters=[authorization_parameter],
+        operation_description=(
+            'Creates or updates each Job in a batch, given as a JSON array or '
+            'as newline-delimited JSON (application/x-ndjson). Each Job is '
+            'processed as in a PUT (update) request. Invalid Jobs are '
+            'skipped. The outcome for each Job is returned, in order.'))
+    @action(detail=False, methods=['post'],
+            parser_classes=[JSONParser, NDJSONParser])
+    @transaction.atomic
+    def bulk(self, request, *args, **kwargs):
+        """The method for POST requests containing a batch of Jobs.
+
+        Jobs are grouped by user and account, so that the needed
+        accounting objects are retrieved once per group, and each usage
+        is locked and saved once. Jobs and their Nodes are written in
+        bulk."""
+        logger = logging.getLogger(__name__)
+
+        records = request.data
+        if not isinstance(records, list):
+            raise serializers.ValidationError('Expected a list of Jobs.')
+
+        logger.info(f'New Job bulk POST request with {len(records)} Jobs.')
+
+        results = [None] * len(records)
+
+        def set_error(_index, _jobslurmid, _errors):
+            results[_index] = {
+                'jobslurmid': _jobslurmid,
+                'status': 'error',
+                'errors': _errors,
+            }
+
+        # Retrieve those Jobs that already exist.
+        existing_jobs = Job.objects.in_bulk([
+            str(record['jobslurmid']) for record in records
+            if (isinstance(record, dict) and
+                record.get('jobslurmid') is not None)])
+
+        # Validate each Job, and group valid ones by account and user.
+        groups = OrderedDict()
+        seen_jobslurmids = set()
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                set_error(index, None, ['Expected a Job.'])
+                continue
+            jobslurmid = record.get('jobslurmid')
+            if jobslurmid is not None:
+                jobslurmid = str(jobslurmid)
+            if jobslurmid in seen_jobslurmids:
+                set_error(
+                    index, jobslurmid,
+                    [f'Job {jobslurmid} appears more than once in the batch.'])
+                continue
+            serializer = BulkJobSerializer(
+                existing_jobs.get(jobslurmid), data=record)
+            if not serializer.is_valid():
+                set_error(index, jobslurmid, serializer.errors)
+                continue
+            seen_jobslurmids.add(jobslurmid)
+            job_data = serializer.validated_data
+            key = (job_data['accountid'].pk, job_data['userid'].pk)
+            groups.setdefault(key, []).append((index, job_data))
+
+        # Validate that needed accounting objects exist for each group.
+        allocation_objects_by_key = {}
+        for key, group in list(groups.items()):
+            user = group[0][1]['userid']
+            account = group[0][1]['accountid']
+            try:
+                allocation_objects_by_key[key] = \
+                    JobSerializer.validate_accounting_allocation_objects(
+                        user, account)
+            except serializers.ValidationError as e:
+                for index, job_data in group:
+                    set_error(index, job_data['jobslurmid'], e.detail)
+                groups.pop(key)
+
+        # Lock each needed usage once, in a consistent order, unless the usage
+        # ledger is enabled. Groups for the same account share the account's
+        # usage.
+        use_usage_ledger = usage_ledger_enabled()
+        if use_usage_ledger:
+            allocation_objects_to_lock = []
+        else:
+            allocation_objects_to_lock = allocation_objects_by_key.values()
+        account_usage_pks = [
+            allocation_objects.allocation_attribute_usage.pk
+            for allocation_objects in allocation_objects_to_lock]
+        account_usages = {
+            usage.pk: usage
+            for usage in
+            AllocationAttributeUsage.objects.select_for_update().filter(
+                pk__in=account_usage_pks).order_by('pk')}
+        user_account_usage_pks = [
+            allocation_objects.allocation_user_attribute_usage.pk
+            for allocation_objects in allocation_objects_to_lock]
+        user_account_usages = {
+            usage.pk: usage
+            for usage in
+            AllocationUserAttributeUsage.objects.select_for_update().filter(
+                pk__in=user_account_usage_pks).order_by('pk')}
+
+        # Re-read the Jobs under row locks, after the usages, as in update.
+        # The Jobs read above are only used for validation: a concurrent
+        # request may have created or updated them since, and changes in usage
+        # must be computed from their current amounts.
+        existing_jobs = Job.objects.select_for_update().order_by(
+            'pk').in_bulk([
+                job_data['jobslurmid']
+                for group in groups.values() for _, job_data in group])
+
+        # Apply the changes in usage of each group's Jobs, in order.
+        jobs_to_create, jobs_to_update = [], []
+        jobs_with_new_partitions = []
+        rollup_deltas = JobUsageRollupDeltas()
+        node_names_by_jobslurmid = {}
+        updated_account_usage_pks = set()
+        updated_user_account_usage_pks = set()
+        for key, group in groups.items():
+            user = group[0][1]['userid']
+            account = group[0][1]['accountid']
+            allocation_objects = allocation_objects_by_key[key]
+            account_usage = account_usages.get(
+                allocation_objects.allocation_attribute_usage.pk)
+            user_account_usage = user_account_usages.get(
+                allocation_objects.allocation_user_attribute_usage.pk)
+            usages_updated = False
+            total_delta = Decimal('0.00')
+
+            for index, job_data in group:
+                jobslurmid = job_data['jobslurmid']
+                job = existing_jobs.get(jobslurmid)
+
+                job_has_amount = 'amount' in job_data
+                if not job_has_amount:
+                    logger.warning(f'Job {jobslurmid} has no amount.')
+
+                try:
+                    job_dates_valid = self.validate_job_dates(
+                        job_data, allocation_objects.allocation,
+                        end_date_expected=True)
+                except Exception as e:
+                    job_dates_valid = False
+                    logger.exception(
+                        f'Failed to determine whether dates for Job '
+                        f'{jobslurmid} are valid. Details:\n'
+                        f'{e}')
+
+                # If an amount is specified and job dates are valid, update
+                # usages.
+                if job_has_amount and job_dates_valid:
+                    amount = Decimal(job_data['amount'])
+                    if use_usage_ledger:
+                        if job is None:
+                            total_delta += amount
+                        else:
+                            total_delta += amount - job.amount
+                    elif job is None:
+                        account_usage.value = account_usage.value + amount
+                        user_account_usage.value = (
+                            user_account_usage.value + amount)
+                    else:
+                        # The difference should be non-positive because the
+                        # estimated cost is an upper bound of the actual cost.
+                        difference = amount - job.amount
+                        account_usage.value = max(
+                            account_usage.value + difference, Decimal('0.00'))
+                        user_account_usage.value = max(
+                            user_account_usage.value + difference,
+                            Decimal('0.00'))
+                    usages_updated = True
+                else:
+                    logger.warning(
+                        f'Skipping usage updates for Job {jobslurmid}.')
+
+                node_names_by_jobslurmid[jobslurmid] = [
+                    node_data['name']
+                    for node_data in job_data.pop('nodes', [])]
+                if job is None:
+                    job = Job(**job_data)
+                    jobs_to_create.append(job)
+                    jobs_with_new_partitions.append(job)
+                    results[index] = {
+                        'jobslurmid': jobslurmid, 'status': 'created'}
+                else:
+                    rollup_deltas.remove(job)
+                    previous_partition = job.partition
+                    for field, value in job_data.items():
+                        setattr(job, field, value)
+                    jobs_to_update.append(job)
+                    if job.partition != previous_partition:
+                        jobs_with_new_partitions.append(job)
+                    results[index] = {
+                        'jobslurmid': jobslurmid, 'status': 'updated'}
+                rollup_deltas.add(job)
+
+            if usages_updated:
+                if use_usage_ledger:
+                    logger.info(
+                        f'Appending usage deltas of {total_delta} for Project '
+                        f'{account.name} and for User {user} and Project '
+                        f'{account.name}.')
+                    append_usage_deltas(
+                        allocation_objects.allocation_attribute_usage,
+                        allocation_objects.allocation_user_attribute_usage,
+                        total_delta)
+                else:
+                    logger.info(
+                        f'Setting usage for Project {account.name} to '
+                        f'{account_usage.value}, and usage for User {user} '
+                        f'and Project {account.name} to '
+                        f'{user_account_usage.value}.')
+                    updated_account_usage_pks.add(account_usage.pk)
+                    updated_user_account_usage_pks.add(user_account_usage.pk)
+                self.warm_accounting_balances_on_commit(user, account)
+
+        for pk in sorted(updated_account_usage_pks):
+            save_job_usage(account_usages[pk])
+        for pk in sorted(updated_user_account_usage_pks):
+            save_job_usage(user_account_usages[pk])
+
+        # Write Jobs and their Nodes in bulk. Nodes are added to, but not
+        # removed from, existing Jobs.
+        Job.objects.bulk_create(jobs_to_create)
+        if jobs_to_update:
+            modified = timezone.now()
+            for job in jobs_to_update:
+                job.modified = modified
+            Job.objects.bulk_update(
+                jobs_to_update,
+                [field for field in JobSerializer.Meta.fields
+                 if field not in ('jobslurmid', 'nodes')] + ['modified'])
+        add_nodes_to_jobs(node_names_by_jobslurmid)
+        # Bulk writes do not send the signals that update JobUsageRollup and
+        # JobPartition.
+        rollup_deltas.apply()
+        set_job_partitions(jobs_with_new_partitions)
+
+        return Response({
+            'created': len(jobs_to_create),
+            'updated': len(jobs_to_update),
+            'failed': len(records) - len(jobs_to_create) - len(jobs_to_update),
+            'results': results,
+        })
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            user_parameter, account_parameter, jobstatus_parameter,
+            max_amount_parameter, min_amount_parameter, partition_parameter,
+            start_time_parameter, end_time_parameter,
+            export_format_parameter],
+        operation_description=(
+            'Streams all jobs, with the same optional filtering as the list, '
+            'as newline-delimited JSON or as CSV, without pagination.'))
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """The method for GET requests to stream Jobs."""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format == 'ndjson':
+            lines = (
+                dumps(row) + '\n'
+                for row in self.iter_export_rows(self.get_queryset()))
+            content_type = 'application/x-ndjson'
+        elif export_format == 'csv':
+            lines = self.iter_export_csv_lines(
+                self.iter_export_rows(self.get_queryset()))
+            content_type = 'text/csv'
+        else:
+            raise serializers.ValidationError(
+                f'Invalid export format {export_format}. Must be one of: '
+                f'ndjson, csv.')
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="jobs.{export_format}"')
+        return response
+
+    def iter_export_rows(self, jobs):
+        """Yield the given Jobs as dictionaries in the same form as
+        JobSerializer, reading them over a server-side cursor, in
+        chunks. Cluster UIDs, Project names, and Node names are selected
+        per chunk rather than per Job."""
+        serializer_fields = JobSerializer().fields
+        field_names = [
+            name for name in JobSerializer.Meta.fields if name != 'nodes']
+        lookups = {
+            'userid': 'userid__userprofile__cluster_uid',
+            'accountid': 'accountid__name',
+        }
+        rows = jobs.values_list(
+            *[lookups.get(name, name) for name in field_names]).iterator(
+                chunk_size=self.export_chunk_size)
+        while True:
+            chunk = list(islice(rows, self.export_chunk_size))
+            if not chunk:
+                break
+            node_names_by_jobslurmid = defaultdict(list)
+            job_nodes = Job.nodes.through.objects.filter(
+                job__in=[row[0] for row in chunk]).values_list(
+                    'job', 'node__name').order_by('pk')
+            for jobslurmid, node_name in job_nodes:
+                node_names_by_jobslurmid[jobslurmid].append(node_name)
+            for row in chunk:
+                job = OrderedDict()
+                for name, value in zip(field_names, row):
+                    if value is not None and name not in lookups:
+                        value = serializer_fields[name].to_representation(
+                            value)
+                    job[name] = value
+                job['nodes'] = [
+                    {'name': node_name}
+                    for node_name in node_names_by_jobslurmid[row[0]]]
+                yield job
+
+    @staticmethod
+    def iter_export_csv_lines(rows):
+        """Yield a header and a line of CSV for each of the given rows,
+        joining Node names with commas."""
+        writer = csv.writer(Echo())
+        yield writer.writerow(JobSerializer.Meta.fields)
+        for row in rows:
+            row['nodes'] = ','.join(node['name'] for node in row['nodes'])
+            yield writer.writerow(
+                row[name] for name in JobSerializer.Meta.fields)
+
+    @staticmethod
+    def warm_accounting_balances_on_commit(user, account):
+        """Once the current transaction is committed, cache the updated
+        balances for the given User and account (Project), so that the
+        next check at submission time does not query the database."""
+        cluster_uid = user.userprofile.cluster_uid
+        account_name = account.name
+        transaction.on_commit(
+            lambda: warm_accounting_balances(cluster_uid, account_name))
+
     @staticmethod
     def validate_job_dates(job_data, allocation, end_date_expected=False):
         """Given a dictionary representing a Job, its corresponding
@@ -688,73 +1130,87 @@ def can_submit_job(request, job_cost, user_id, account_id):
             f'{settings.DECIMAL_MAX_PLACES} decimal places.')
         return client_error(message)
 
-    # Validate user_id.
-    try:
-        user = UserProfile.objects.get(cluster_uid=user_id).user
-    except UserProfile.DoesNotExist:
-        message = f'No user exists with user_id {user_id}.'
-        return client_error(message)
-
-    # Validate account_id.
-    try:
-        account = Project.objects.get(name=account_id)
-    except Project.DoesNotExist:
-        message = f'No account exists with account_id {account_id}.'
-        return client_error(message)
-
-    # Allow all jobs for accounts that are not intended to have
-    # computing allowances (e.g., departmental cluster-specific accounts).
     computing_allowance_project_prefixes = \
         get_computing_allowance_project_prefixes()
-    if not account.name.startswith(computing_allowance_project_prefixes):
+
+    # In the common case, retrieve all needed values in a single query.
+    balances = get_accounting_balances(user_id, account_id)
+    if balances is None:
+        # Otherwise, retrieve objects individually to determine the
+        # problem.
+
+        # Validate user_id.
+        try:
+            user = UserProfile.objects.get(cluster_uid=user_id).user
+        except UserProfile.DoesNotExist:
+            message = f'No user exists with user_id {user_id}.'
+            return client_error(message)
+
+        # Validate account_id.
+        try:
+            account = Project.objects.get(name=account_id)
+        except Project.DoesNotExist:
+            message = f'No account exists with account_id {account_id}.'
+            return client_error(message)
+
+        # Allow all jobs for accounts that are not intended to have
+        # computing allowances (e.g., departmental cluster-specific
+        # accounts).
+        if not account.name.startswith(computing_allowance_project_prefixes):
+            return affirmative
+
+        # Validate that needed accounting objects exist.
+        try:
+            allocation_objects = get_accounting_allocation_objects(
+                account, user=user)
+        except ProjectUser.DoesNotExist:
+            message = (
+                f'User {user.username} is not a member of account '
+                f'{account.name}.')
+            logger.error(message)
+            return non_affirmative(message)
+        except Allocation.DoesNotExist:
+            message = (
+                f'Account {account.name} has no active compute allocation.')
+            logger.error(message)
+            return non_affirmative(message)
+        except Allocation.MultipleObjectsReturned:
+            logger.error(
+                f'Account {account.name} has more than one active compute '
+                f'allocation.')
+            return server_error
+        except AllocationUser.DoesNotExist:
+            message = (
+                f'User {user.username} is not an active member of the '
+                f'compute allocation for account {account.name}.')
+            logger.error(message)
+            return non_affirmative(message)
+        except (MultipleObjectsReturned, ObjectDoesNotExist) as e:
+            logger.error(
+                f'Failed to retrieve a required database object. Details: '
+                f'{e}')
+            return server_error
+        except TypeError as e:
+            logger.error(f'Incorrect input type. Details: {e}')
+            return server_error
+
+        balances = AccountingBalances.from_allocation_objects(
+            allocation_objects)
+    elif not account_id.startswith(computing_allowance_project_prefixes):
+        # Allow all jobs for accounts that are not intended to have
+        # computing allowances.
         return affirmative
 
-    # Validate that needed accounting objects exist.
-    try:
-        allocation_objects = get_accounting_allocation_objects(
-            account, user=user)
-    except ProjectUser.DoesNotExist:
-        message = (
-            f'User {user.username} is not a member of account {account.name}.')
-        logger.error(message)
-        return non_affirmative(message)
-    except Allocation.DoesNotExist:
-        message = f'Account {account.name} has no active compute allocation.'
-        logger.error(message)
-        return non_affirmative(message)
-    except Allocation.MultipleObjectsReturned:
-        logger.error(
-            f'Account {account.name} has more than one active compute '
-            f'allocation.')
-        return server_error
-    except AllocationUser.DoesNotExist:
-        message = (
-            f'User {user.username} is not an active member of the compute '
-            f'allocation for account {account.name}.')
-        logger.error(message)
-        return non_affirmative(message)
-    except (MultipleObjectsReturned, ObjectDoesNotExist) as e:
-        logger.error(
-            f'Failed to retrieve a required database object. Details: {e}')
-        return server_error
-    except TypeError as e:
-        logger.error(f'Incorrect input type. Details: {e}')
-        return server_error
-
-    # Retrieve compute allocation values.
-    account_allocation = Decimal(allocation_objects.allocation_attribute.value)
-    user_account_allocation = Decimal(
-        allocation_objects.allocation_user_attribute.value)
-
-    # Retrieve compute usage values.
-    account_usage = allocation_objects.allocation_attribute_usage.value
-    user_account_usage = (
-        allocation_objects.allocation_user_attribute_usage.value)
+    # Retrieve compute allocation and usage values.
+    account_allocation = balances.account_allocation
+    user_account_allocation = balances.user_account_allocation
+    account_usage = balances.account_usage
+    user_account_usage = balances.user_account_usage
 
     # If the account has infinite service units, allow the job, regardless of
     # cost.
     computing_allowance = ComputingAllowance(
-        ComputingAllowanceInterface().allowance_from_project(account))
+        ComputingAllowanceInterface().allowance_from_project_name(account_id))
     if computing_allowance.has_infinite_service_units():
         return affirmative
 
@@ -0,0 +1,32 @@
+#------------------------------------------------------------------------------
+# Default Strings. Override these in local settings
+#------------------------------------------------------------------------------
+
+EMAIL_DIRECTOR_PENDING_PROJECT_REVIEW_EMAIL = """
+You recently applied for renewal of your account, however, to date you have not entered any publication nor grant info in the ColdFront system. I am reluctant to approve your renewal without understanding why. If there are no relevant publications or grants yet, then please let me know. If there are, then I would appreciate it if you would take the time to enter the data (I have done it myself and it took about 15 minutes). We use this information to help make the case to the university for continued investment in our department and it is therefore important that faculty enter the data when appropriate. Please email xxx-helpexample.com if you need technical assistance.
+
+As always, I am available to discuss any of this.
+
+Best regards
+Director
+
+
+xxx@example.edu
+Phone: (xxx) xxx-xxx
+"""
+LOGIN_FAIL_MESSAGE = 'The username or password you entered is incorrect. <a href="password-reset/">Reset password</a>'
+"""
+ACCOUNT_CREATION_TEXT = '''University faculty can submit a help ticket to request an account.
+Please see <a href="#">instructions on our website</a>. Staff, students, and external collaborators must
+request an account through a university faculty member.
+'''
+"""
+ACCOUNT_CREATION_TEXT = (
+    'If you already have a BRC cluster (e.g., Savio, Vector, ABC) account and '
+    'this is the first time logging in to the portal, please set your portal '
+    'password <a href="/user/password-reset/">'
+    '<span class="accessibility-link-text">Set Password</span>here</a>. If '
+    'you do not have an account on any of the BRC clusters and you want your '
+    'first cluster account setup, please register to the portal '
+    '<a href="/user/register/"><span class="accessibility-link-text">Register'
+    '</span>here</a>.')
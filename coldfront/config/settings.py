@@ -222,6 +222,32 @@ ALLOCATION_MAX = Decimal('100000000.00')
 # Whether to allow all jobs, bypassing all checks at job submission time.
 ALLOW_ALL_JOBS = False
 
+# The number of seconds for which allocation balances checked at job
+# submission time may be cached. Balances are only cached if the default cache
+# is shared between processes (see local_settings.py.sample).
+ACCOUNTING_BALANCE_CACHE_TIMEOUT = 60 * 15
+
+# Whether charges for jobs should be appended to a ledger of usage deltas,
+# rather than written to usages under a row lock. Deltas are folded into
+# usages by the scheduled task for compacting them.
+ACCOUNTING_USAGE_LEDGER_ENABLED = False
+
+# How history of usages updated for jobs is recorded: 'all' (every update),
+# 'non_job' (no updates for jobs), or 'coalesce' (at most one update for jobs
+# per usage per window of USAGE_HISTORY_COALESCE_WINDOW seconds).
+USAGE_HISTORY_POLICY = 'all'
+USAGE_HISTORY_COALESCE_WINDOW = 60 * 60
+
+# ------------------------------------------------------------------------------
+# Cache settings
+# ------------------------------------------------------------------------------
+
+# The number of seconds after which data loaded once per process (e.g.,
+# computing allowances) are reloaded, even if they have not been invalidated.
+# This bounds how long a change made in one process may go unobserved by
+# others when the cache is not shared between them.
+CACHE_GENERATION_TIMEOUT = 60 * 5
+
 # ------------------------------------------------------------------------------
 # Local settings overrides (see local_settings.py.sample)
 # ------------------------------------------------------------------------------
@@ -19,6 +19,7 @@ from coldfront.core.allocation.models import (Allocation, AllocationAccount,
                                               AttributeType, SecureDirRequest,
                                               SecureDirAddUserRequest,
                                               SecureDirRemoveUserRequest)
+from coldfront.core.utils.choice_registry import get_choice
 
 
 @admin.register(AllocationStatusChoice)
@@ -279,16 +280,16 @@ class AllocationUserAdmin(SimpleHistoryAdmin):
 
     def set_active(self, request, queryset):
         queryset.update(
-            status=AllocationUserStatusChoice.objects.get(name='Active'))
+            status=get_choice(AllocationUserStatusChoice, 'Active'))
 
     def set_denied(self, request, queryset):
         queryset.update(
-            status=AllocationUserStatusChoice.objects.get(name='Denied'))
+            status=get_choice(AllocationUserStatusChoice, 'Denied'))
 
     def set_removed(self, request, queryset):
 
         queryset.update(
-            status=AllocationUserStatusChoice.objects.get(name='Removed'))
+            status=get_choice(AllocationUserStatusChoice, 'Removed'))
 
     set_active.short_description = "Set Selected User's Status To Active"
 
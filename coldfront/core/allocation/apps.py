@@ -6,4 +6,5 @@ class AllocationConfig(AppConfig):
 
     def ready(self):
         import coldfront.core.allocation.signals
+        import coldfront.core.allocation.signals_.accounting_signals
         import coldfront.core.allocation.signals_.renewal_signals
@@ -0,0 +1,118 @@
+from datetime import datetime
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from coldfront.core.allocation.utils_.usage_history_utils import JOB_USAGE_HISTORY_CHANGE_REASON
+from coldfront.core.allocation.utils_.usage_history_utils import USAGE_MODELS
+from coldfront.core.utils.common import add_argparse_dry_run_argument
+from coldfront.core.utils.common import display_time_zone_date_to_utc_datetime
+from coldfront.core.utils.common import utc_datetime_to_display_time_zone_date
+
+import logging
+
+"""An admin command that compacts the history of
+AllocationAttributeUsages and AllocationUserAttributeUsages into
+periodic snapshots."""
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Compact historical records of AllocationAttributeUsages and '
+        'AllocationUserAttributeUsages dated before the given date into '
+        'periodic snapshots, keeping the last update of each usage in each '
+        'period. Creations, deletions, and updates with reasons other than '
+        'charging for jobs are kept.')
+    logger = logging.getLogger(__name__)
+
+    date_format = '%Y-%m-%d'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'before',
+            help=(
+                f'Only records dated before this date, in the form '
+                f'{self.date_format.replace("%", "")}, are compacted.'),
+            type=self.valid_date)
+        parser.add_argument(
+            '--period',
+            choices=['day', 'week', 'month'],
+            default='day',
+            help='The length of the period of each snapshot.')
+        parser.add_argument(
+            '--batch_size',
+            default=10000,
+            help='The number of records to delete at a time.',
+            type=int)
+        add_argparse_dry_run_argument(parser)
+
+    def handle(self, *args, **options):
+        before = display_time_zone_date_to_utc_datetime(options['before'])
+        period = options['period']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        for model in USAGE_MODELS:
+            historical_model = model.history.model
+            pks = self.get_compactable_pks(
+                historical_model, model._meta.pk.attname, before, period)
+            model_name = historical_model.__name__
+            if dry_run:
+                message = f'Would delete {len(pks)} {model_name} records.'
+                self.stdout.write(self.style.WARNING(message))
+                continue
+            for i in range(0, len(pks), batch_size):
+                with transaction.atomic():
+                    historical_model.objects.filter(
+                        pk__in=pks[i:i + batch_size]).delete()
+            message = f'Deleted {len(pks)} {model_name} records.'
+            self.logger.info(message)
+            self.stdout.write(self.style.SUCCESS(message))
+
+    @staticmethod
+    def get_compactable_pks(historical_model, usage_pk_attname, before,
+                            period):
+        """Return the primary keys of the records of the given
+        historical usage model dated before the given UTC datetime that
+        are superseded by a later update for jobs to the same usage in
+        the same period.
+
+        Parameters:
+            - historical_model (Model): The model storing the history of
+                                        a usage model
+            - usage_pk_attname (str): The name of the field storing the
+                                      primary key of the usage
+            - before (datetime): A UTC datetime
+            - period (str): One of 'day', 'week', or 'month'
+
+        Returns:
+            - A list of ints
+        """
+        records = historical_model.objects.filter(
+            Q(history_change_reason__isnull=True) |
+            Q(history_change_reason=JOB_USAGE_HISTORY_CHANGE_REASON),
+            history_type='~',
+            history_date__lt=before,
+        ).order_by(
+            usage_pk_attname, 'history_date', 'history_id'
+        ).values_list(
+            'history_id', usage_pk_attname, 'history_date')
+
+        pks = []
+        previous_pk, previous_key = None, None
+        for pk, usage_id, history_date in records.iterator():
+            date = utc_datetime_to_display_time_zone_date(history_date)
+            if period == 'week':
+                date = date - timedelta(days=date.weekday())
+            elif period == 'month':
+                date = date.replace(day=1)
+            key = (usage_id, date)
+            if key == previous_key:
+                pks.append(previous_pk)
+            previous_pk, previous_key = pk, key
+        return pks
+
+    def valid_date(self, s):
+        return datetime.strptime(s, self.date_format).date()
@@ -6,6 +6,7 @@ from coldfront.core.allocation.utils import prorated_allocation_amount
 from coldfront.core.project.models import Project
 from coldfront.core.project.models import SavioProjectAllocationRequest
 from coldfront.core.project.utils import deactivate_project_and_allocation
+from coldfront.core.project.utils import deactivate_projects_and_allocations
 from coldfront.core.project.utils_.new_project_utils import SavioProjectProcessingRunner
 from coldfront.core.project.utils_.renewal_utils import AllocationRenewalProcessingRunner
 from coldfront.core.resource.utils import get_primary_compute_resource
@@ -13,11 +14,16 @@ from coldfront.core.resource.utils_.allowance_utils.computing_allowance import C
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 from coldfront.core.utils.common import add_argparse_dry_run_argument
 from coldfront.core.utils.common import display_time_zone_current_date
+from coldfront.core.utils.email.email_strategy import EnqueueEmailStrategy
 
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from functools import partial
 
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
+from django.db import connections
 from django.db.models import Q
 
 import logging
@@ -52,6 +58,29 @@ class Command(BaseCommand):
                 'Do not deactivate Projects prior to processing requests. '
                 'This is useful in case any outstanding requests need to be '
                 'processed by re-running the command.'))
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help=(
+                'Deactivate Projects in batches, with a constant number of '
+                'queries per batch, and process requests in batches, sending '
+                'the emails for each batch once it is complete. Each batch is '
+                'a checkpoint: if the command fails, re-running it resumes '
+                'from the first incomplete batch.'))
+        parser.add_argument(
+            '--batch_size',
+            default=500,
+            help=(
+                'The number of Projects or requests in each batch. Only used '
+                'with --bulk.'),
+            type=int)
+        parser.add_argument(
+            '--num_workers',
+            default=1,
+            help=(
+                'The number of threads with which to process requests. Only '
+                'used with --bulk.'),
+            type=int)
         add_argparse_dry_run_argument(parser)
 
     def handle(self, *args, **options):
@@ -68,6 +97,14 @@ class Command(BaseCommand):
         skip_deactivations = options['skip_deactivations']
         dry_run = options['dry_run']
 
+        bulk = options['bulk']
+        batch_size = options['batch_size']
+        num_workers = options['num_workers']
+        if batch_size < 1:
+            raise CommandError('The batch size must be positive.')
+        if num_workers < 1:
+            raise CommandError('The number of workers must be positive.')
+
         if not dry_run:
             if not self.is_allocation_period_current(allocation_period):
                 raise CommandError(
@@ -76,7 +113,8 @@ class Command(BaseCommand):
                     f'{allocation_period.end_date}) is not current.')
 
         self.handle_allocation_period(
-            allocation_period, skip_deactivations, dry_run)
+            allocation_period, skip_deactivations, dry_run, bulk=bulk,
+            batch_size=batch_size, num_workers=num_workers)
 
     def deactivate_projects(self, projects, dry_run):
         """Deactivate the given queryset of Projects. Return the number
@@ -121,6 +159,44 @@ class Command(BaseCommand):
                     self.logger.info(message)
         return num_successes
 
+    def deactivate_projects_in_bulk(self, projects, batch_size):
+        """Deactivate the given queryset of Projects in batches of the
+        given size, each in a single transaction. Return the number of
+        deactivations that succeeded.
+
+        Since deactivated Projects are no longer eligible, re-running
+        the command after a failure resumes from the first incomplete
+        batch."""
+        projects = list(projects)
+        num_total = len(projects)
+        num_successes = 0
+        for i in range(0, num_total, batch_size):
+            batch = projects[i:i + batch_size]
+            try:
+                errors_by_project_pk = deactivate_projects_and_allocations(
+                    batch)
+            except Exception as e:
+                errors_by_project_pk = {project.pk: e for project in batch}
+            for project in batch:
+                error = errors_by_project_pk.get(project.pk, None)
+                if error is not None:
+                    message = (
+                        f'Failed to deactivate Project {project.pk} '
+                        f'({project.name}).')
+                    self.stderr.write(self.style.ERROR(message))
+                    log_message = message + f' Details:\n{error}'
+                    self.logger.error(log_message, exc_info=error)
+                else:
+                    num_successes = num_successes + 1
+                    message = (
+                        f'Deactivated Project {project.pk} ({project.name}) '
+                        f'and reset Service Units.')
+                    self.stdout.write(self.style.SUCCESS(message))
+                    self.logger.info(message)
+            self.write_checkpoint(
+                'Projects', min(i + batch_size, num_total), num_total)
+        return num_successes
+
     def get_allowances_for_allocation_period(self, allocation_period):
         """For the given AllocationPeriod, return a list of computing
         allowances (Resource objects) that correspond to the period."""
@@ -166,7 +242,8 @@ class Command(BaseCommand):
         return Project.objects.filter(pk__in=expired_project_pks)
 
     def handle_allocation_period(self, allocation_period, skip_deactivations,
-                                 dry_run):
+                                 dry_run, bulk=False, batch_size=None,
+                                 num_workers=1):
         """Optionally deactivate eligible projects associated with the
         given period. Then, process all requests for new projects and
         allocation renewals that are scheduled for the period.
@@ -174,7 +251,10 @@ class Command(BaseCommand):
         If any deactivations fail, do not proceed with processing
         requests.
 
-        Optionally display updates instead of performing them."""
+        Optionally display updates instead of performing them.
+        Optionally perform them in bulk, in batches of the given size,
+        processing requests with the given number of threads."""
+        bulk = bulk and not dry_run
         if not skip_deactivations:
             allowances = self.get_allowances_for_allocation_period(
                 allocation_period)
@@ -184,7 +264,12 @@ class Command(BaseCommand):
                 projects = self.get_deactivation_eligible_projects(
                     allocation_period, allowance)
                 num_projects = projects.count()
-                num_successes = self.deactivate_projects(projects, dry_run)
+                if bulk:
+                    num_successes = self.deactivate_projects_in_bulk(
+                        projects, batch_size)
+                else:
+                    num_successes = self.deactivate_projects(
+                        projects, dry_run)
                 num_failures = num_projects - num_successes
                 if num_failures > 0:
                     failure_messages.append(
@@ -196,8 +281,15 @@ class Command(BaseCommand):
 
         # New project requests should be processed prior to renewal requests,
         # since a renewal request may depend on a new project request.
-        self.process_new_project_requests(allocation_period, dry_run)
-        self.process_allocation_renewal_requests(allocation_period, dry_run)
+        bulk_kwargs = {
+            'bulk': bulk,
+            'batch_size': batch_size,
+            'num_workers': num_workers,
+        }
+        self.process_new_project_requests(
+            allocation_period, dry_run, **bulk_kwargs)
+        self.process_allocation_renewal_requests(
+            allocation_period, dry_run, **bulk_kwargs)
 
     @staticmethod
     def is_allocation_period_current(allocation_period):
@@ -207,55 +299,74 @@ class Command(BaseCommand):
                 display_time_zone_current_date() <=
                 allocation_period.end_date)
 
-    def process_allocation_renewal_requests(self, allocation_period, dry_run):
+    def process_allocation_renewal_requests(self, allocation_period, dry_run,
+                                            **bulk_kwargs):
         """Process the "Approved" AllocationRenewalRequests for the
         given AllocationPeriod and allowance. Optionally display updates
-        instead of performing them."""
+        instead of performing them, or perform them in bulk."""
         model = AllocationRenewalRequest
         runner_class = AllocationRenewalProcessingRunner
         eligible_requests = model.objects.filter(
             allocation_period=allocation_period, status__name='Approved')
-        self.process_requests(model, runner_class, eligible_requests, dry_run)
+        self.process_requests(
+            model, runner_class, eligible_requests, dry_run, **bulk_kwargs)
 
-    def process_new_project_requests(self, allocation_period, dry_run):
+    def process_new_project_requests(self, allocation_period, dry_run,
+                                     **bulk_kwargs):
         """Process the "Approved - Scheduled"
         SavioProjectAllocationRequests for the given AllocationPeriod.
-        Optionally display updates instead of performing them."""
+        Optionally display updates instead of performing them, or
+        perform them in bulk."""
         model = SavioProjectAllocationRequest
         runner_class = SavioProjectProcessingRunner
         eligible_requests = model.objects.filter(
             allocation_period=allocation_period,
             status__name='Approved - Scheduled')
-        self.process_requests(model, runner_class, eligible_requests, dry_run)
+        self.process_requests(
+            model, runner_class, eligible_requests, dry_run, **bulk_kwargs)
 
-    def process_requests(self, model, runner_class, requests, dry_run):
+    def get_num_service_units(self, request, cached_allowance_data):
+        """Return the number of service units to grant to the given
+        request, prorated if its computing allowance is prorated. Cache
+        data about each allowance in the given dictionary."""
+        interface = self.computing_allowance_interface
+        computing_allowance = request.computing_allowance
+        if computing_allowance not in cached_allowance_data:
+            wrapper = ComputingAllowance(computing_allowance)
+            data = {
+                'num_service_units': Decimal(
+                    interface.service_units_from_name(
+                        wrapper.get_name())),
+                'is_prorated': wrapper.are_service_units_prorated(),
+            }
+            cached_allowance_data[computing_allowance] = data
+        data = cached_allowance_data[computing_allowance]
+        num_service_units = data['num_service_units']
+        if data['is_prorated']:
+            num_service_units = prorated_allocation_amount(
+                num_service_units, request.request_time,
+                request.allocation_period)
+        return num_service_units
+
+    def process_requests(self, model, runner_class, requests, dry_run,
+                         bulk=False, batch_size=None, num_workers=1):
         """Given a request model, a runner class for processing
         instances of that model, and a queryset of instances to process,
         run the runner on each instance. Optionally display updates
-        instead of performing them."""
+        instead of performing them, or perform them in bulk."""
+        if bulk and not dry_run:
+            self.process_requests_in_bulk(
+                model, runner_class, requests, batch_size, num_workers)
+            return
+
         model_name = model.__name__
         num_successes, num_failures = 0, 0
 
-        interface = self.computing_allowance_interface
         cached_allowance_data = {}
         for request in requests:
             try:
-                computing_allowance = request.computing_allowance
-                if computing_allowance not in cached_allowance_data:
-                    wrapper = ComputingAllowance(computing_allowance)
-                    data = {
-                        'num_service_units': Decimal(
-                            interface.service_units_from_name(
-                                wrapper.get_name())),
-                        'is_prorated': wrapper.are_service_units_prorated(),
-                    }
-                    cached_allowance_data[computing_allowance] = data
-                data = cached_allowance_data[computing_allowance]
-                num_service_units = data['num_service_units']
-                if data['is_prorated']:
-                    num_service_units = prorated_allocation_amount(
-                        num_service_units, request.request_time,
-                        request.allocation_period)
+                num_service_units = self.get_num_service_units(
+                    request, cached_allowance_data)
             except Exception as e:
                 num_failures = num_failures + 1
                 message = (
@@ -298,6 +409,149 @@ class Command(BaseCommand):
             self.write_statistics(
                 model_name, requests.count(), num_successes, num_failures)
 
+    def process_requests_in_bulk(self, model, runner_class, requests,
+                                 batch_size, num_workers):
+        """Given a request model, a runner class for processing
+        instances of that model, and a queryset of instances to process,
+        run the runner on each instance, in batches of the given size,
+        using the given number of threads. Each runner runs in its own
+        transaction. Runners for requests under the same Project run in
+        order on the same thread, since they update the same
+        Allocation. Defer the emails of each batch until it is
+        complete, and only send those for requests that succeeded.
+
+        Since processed requests are no longer eligible, re-running the
+        command after a failure resumes from the first incomplete
+        batch."""
+        model_name = model.__name__
+        num_successes, num_failures = 0, 0
+
+        requests = list(requests)
+        num_total = len(requests)
+
+        executor = None
+        if num_workers > 1:
+            executor = ThreadPoolExecutor(max_workers=num_workers)
+
+        cached_allowance_data = {}
+        try:
+            for i in range(0, num_total, batch_size):
+                to_run = []
+                for request in requests[i:i + batch_size]:
+                    try:
+                        num_service_units = self.get_num_service_units(
+                            request, cached_allowance_data)
+                    except Exception as e:
+                        num_failures = num_failures + 1
+                        message = (
+                            f'Failed to compute service units to grant to '
+                            f'{model_name} {request.pk}: {e}')
+                        self.stderr.write(self.style.ERROR(message))
+                        continue
+
+                    email_strategy = EnqueueEmailStrategy()
+                    try:
+                        runner = runner_class(
+                            request, num_service_units,
+                            email_strategy=email_strategy)
+                    except Exception as e:
+                        num_failures = num_failures + 1
+                        message = (
+                            f'Failed to initialize processing runner for '
+                            f'{model_name} {request.pk}: {e}')
+                        self.stderr.write(self.style.ERROR(message))
+                        continue
+
+                    to_run.append(
+                        (request, num_service_units, runner, email_strategy))
+
+                # Runners for requests under the same Project update the
+                # same Allocation, so run them in order, on the same worker.
+                indices_by_project_pk = defaultdict(list)
+                for index, (request, _, _, _) in enumerate(to_run):
+                    project_pk = self.get_request_project_pk(request)
+                    indices_by_project_pk[project_pk].append(index)
+                index_groups = list(indices_by_project_pk.values())
+                runner_groups = [
+                    [to_run[index][2] for index in indices]
+                    for indices in index_groups]
+                if executor is None:
+                    error_groups = [
+                        self.run_runners(runners)
+                        for runners in runner_groups]
+                else:
+                    error_groups = executor.map(
+                        partial(self.run_runners, close_db_connections=True),
+                        runner_groups)
+
+                errors = [None] * len(to_run)
+                for indices, error_group in zip(index_groups, error_groups):
+                    for index, error in zip(indices, error_group):
+                        errors[index] = error
+
+                for (request, num_service_units, _, email_strategy), error \
+                        in zip(to_run, errors):
+                    if error is not None:
+                        num_failures = num_failures + 1
+                        message = (
+                            f'Failed to process {model_name} {request.pk}: '
+                            f'{error}')
+                        self.stderr.write(self.style.ERROR(message))
+                        self.logger.error(message, exc_info=error)
+                    else:
+                        num_successes = num_successes + 1
+                        message = (
+                            f'Processed {model_name} {request.pk} with '
+                            f'{num_service_units} service units.')
+                        self.stdout.write(self.style.SUCCESS(message))
+                        email_strategy.send_queued_emails()
+
+                self.write_checkpoint(
+                    f'{model_name}s', min(i + batch_size, num_total),
+                    num_total)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.write_statistics(
+            model_name, num_total, num_successes, num_failures)
+
+    @staticmethod
+    def get_request_project_pk(request):
+        """Return the primary key of the Project whose Allocation the
+        given request updates when processed."""
+        if isinstance(request, AllocationRenewalRequest):
+            return request.post_project_id
+        return request.project_id
+
+    @staticmethod
+    def run_runners(runners, close_db_connections=False):
+        """Run the given runners in order, returning a list of the
+        exceptions they raised, with None for those that succeeded.
+        Optionally close the current thread's database connections
+        afterward, which a worker thread would otherwise leave open."""
+        errors = []
+        try:
+            for runner in runners:
+                try:
+                    runner.run()
+                except Exception as e:
+                    errors.append(e)
+                else:
+                    errors.append(None)
+        finally:
+            if close_db_connections:
+                connections.close_all()
+        return errors
+
+    def write_checkpoint(self, noun, num_completed, num_total):
+        """Write to stdout and to the log that the given number of the
+        given total number of entities, described by the given plural
+        noun, have been handled."""
+        message = f'Checkpoint: Handled {num_completed}/{num_total} {noun}.'
+        self.stdout.write(message)
+        self.logger.info(message)
+
     def write_statistics(self, model_name, num_total, num_successes,
                          num_failures):
         """Write success/failure statistics to stdout (or stderr) and to
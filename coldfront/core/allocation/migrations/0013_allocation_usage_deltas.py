@@ -0,0 +1,32 @@
+# Generated by Django 3.2.5 on 2026-10-18 03:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('allocation', '0012_cluster_access_request_remove_host_user_and_billing_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationUserAttributeUsageDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=11)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('allocation_user_attribute_usage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deltas', to='allocation.allocationuserattributeusage')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AllocationAttributeUsageDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=11)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('allocation_attribute_usage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deltas', to='allocation.allocationattributeusage')),
+            ],
+        ),
+    ]
@@ -146,6 +146,14 @@ class Allocation(TimeStampedModel):
 
     @property
     def get_parent_resource(self):
+        if 'resources' in getattr(self, '_prefetched_objects_cache', {}):
+            # Avoid queries if Resources were prefetched.
+            resources = list(self.resources.all())
+            if len(resources) == 1:
+                return resources[0]
+            return next(
+                (resource for resource in resources
+                 if resource.is_allocatable), None)
         if self.resources.count() == 1:
             return self.resources.first()
         else:
@@ -277,6 +285,22 @@ class AllocationAttributeUsage(TimeStampedModel):
         return '{}: {}'.format(self.allocation_attribute.allocation_attribute_type.name, self.value)
 
 
+class AllocationAttributeUsageDelta(models.Model):
+    """ A pending change to an AllocationAttributeUsage, appended when
+    the usage ledger is enabled, and folded into the usage by
+    compaction. """
+    allocation_attribute_usage = models.ForeignKey(
+        AllocationAttributeUsage, on_delete=models.CASCADE,
+        related_name='deltas')
+    value = models.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_MAX_PLACES)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.allocation_attribute_usage_id}: {self.value}'
+
+
 class AllocationUserStatusChoice(TimeStampedModel):
     name = models.CharField(max_length=64)
 
@@ -372,6 +396,22 @@ class AllocationUserAttributeUsage(TimeStampedModel):
             self.value)
 
 
+class AllocationUserAttributeUsageDelta(models.Model):
+    """ A pending change to an AllocationUserAttributeUsage, appended
+    when the usage ledger is enabled, and folded into the usage by
+    compaction. """
+    allocation_user_attribute_usage = models.ForeignKey(
+        AllocationUserAttributeUsage, on_delete=models.CASCADE,
+        related_name='deltas')
+    value = models.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_MAX_PLACES)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.allocation_user_attribute_usage_id}: {self.value}'
+
+
 def validate_allocation_attribute_value_type(expected_value_type, value):
     """Raise a ValidationError if the given value does not conform to
     the requirements of the expected value type."""
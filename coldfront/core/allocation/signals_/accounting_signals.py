@@ -0,0 +1,146 @@
+from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationAttribute
+from coldfront.core.allocation.models import AllocationAttributeType
+from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationAttributeUsageDelta
+from coldfront.core.allocation.models import AllocationStatusChoice
+from coldfront.core.allocation.models import AllocationUser
+from coldfront.core.allocation.models import AllocationUserAttribute
+from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.allocation.models import AllocationUserAttributeUsageDelta
+from coldfront.core.allocation.models import AllocationUserStatusChoice
+from coldfront.core.allocation.utils_.accounting_cache_utils import invalidate_all_balances
+from coldfront.core.allocation.utils_.accounting_cache_utils import invalidate_project_balances
+from coldfront.core.project.models import Project
+from coldfront.core.project.models import ProjectUser
+from coldfront.core.project.models import ProjectUserStatusChoice
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+import django.dispatch
+
+
+# Cached balances are invalidated both immediately and once the current
+# transaction is committed, so that an entry populated by another process
+# before the commit, which would not reflect the change, is discarded.
+
+
+def invalidate_balances_for_project_queryset(project_queryset):
+    """Invalidate the cached balances for the Projects in the given
+    queryset, now and on commit."""
+    for project_name in project_queryset.values_list('name', flat=True):
+        invalidate_project_balances(project_name)
+        transaction.on_commit(
+            lambda name=project_name: invalidate_project_balances(name))
+
+
+@django.dispatch.receiver(post_delete, sender=AllocationAttributeType)
+@django.dispatch.receiver(post_delete, sender=AllocationStatusChoice)
+@django.dispatch.receiver(post_delete, sender=AllocationUserStatusChoice)
+@django.dispatch.receiver(post_delete, sender=Project)
+@django.dispatch.receiver(post_delete, sender=ProjectUserStatusChoice)
+@django.dispatch.receiver(post_save, sender=AllocationAttributeType)
+@django.dispatch.receiver(post_save, sender=AllocationStatusChoice)
+@django.dispatch.receiver(post_save, sender=AllocationUserStatusChoice)
+@django.dispatch.receiver(post_save, sender=Project)
+@django.dispatch.receiver(post_save, sender=ProjectUserStatusChoice)
+def invalidate_all_cached_balances(sender, **kwargs):
+    """When an object that may affect any Project's balances (e.g., a
+    status, or a Project's name) is saved or deleted, invalidate all
+    cached balances."""
+    invalidate_all_balances()
+    transaction.on_commit(invalidate_all_balances)
+
+
+@django.dispatch.receiver(post_delete, sender=Allocation)
+@django.dispatch.receiver(post_delete, sender=ProjectUser)
+@django.dispatch.receiver(post_save, sender=Allocation)
+@django.dispatch.receiver(post_save, sender=ProjectUser)
+def invalidate_cached_balances_for_project_child(sender, instance, **kwargs):
+    """When an Allocation or ProjectUser is saved or deleted,
+    invalidate the cached balances for its Project."""
+    invalidate_balances_for_project_queryset(
+        Project.objects.filter(pk=instance.project_id))
+
+
+@django.dispatch.receiver(post_delete, sender=AllocationAttribute)
+@django.dispatch.receiver(post_delete, sender=AllocationUser)
+@django.dispatch.receiver(post_delete, sender=AllocationUserAttribute)
+@django.dispatch.receiver(post_save, sender=AllocationAttribute)
+@django.dispatch.receiver(post_save, sender=AllocationUser)
+@django.dispatch.receiver(post_save, sender=AllocationUserAttribute)
+def invalidate_cached_balances_for_allocation_child(sender, instance,
+                                                    **kwargs):
+    """When an object belonging to an Allocation is saved or deleted,
+    invalidate the cached balances for the Allocation's Project."""
+    invalidate_balances_for_project_queryset(
+        Project.objects.filter(allocation=instance.allocation_id))
+
+
+@django.dispatch.receiver(post_delete, sender=AllocationAttributeUsage)
+@django.dispatch.receiver(post_save, sender=AllocationAttributeUsage)
+def invalidate_cached_balances_for_allocation_attribute_usage(sender,
+                                                              instance,
+                                                              **kwargs):
+    """When an AllocationAttributeUsage is saved or deleted, invalidate
+    the cached balances for its Project."""
+    invalidate_balances_for_project_queryset(
+        Project.objects.filter(
+            allocation__allocationattribute=instance.allocation_attribute_id))
+
+
+@django.dispatch.receiver(post_delete, sender=AllocationUserAttributeUsage)
+@django.dispatch.receiver(post_save, sender=AllocationUserAttributeUsage)
+def invalidate_cached_balances_for_allocation_user_attribute_usage(sender,
+                                                                   instance,
+                                                                   **kwargs):
+    """When an AllocationUserAttributeUsage is saved or deleted,
+    invalidate the cached balances for its Project."""
+    invalidate_balances_for_project_queryset(
+        Project.objects.filter(
+            allocation__allocationuserattribute=(
+                instance.allocation_user_attribute_id)))
+
+
+# Deltas are deleted only when they are folded into, or superseded by, a saved
+# usage, which invalidates the cache itself, so deletions are not handled. This
+# also allows deltas to be deleted in bulk without loading them.
+
+
+@django.dispatch.receiver(post_save, sender=AllocationAttributeUsageDelta)
+def invalidate_cached_balances_for_allocation_attribute_usage_delta(sender,
+                                                                    instance,
+                                                                    **kwargs):
+    """When an AllocationAttributeUsageDelta is created, invalidate the
+    cached balances for its Project."""
+    invalidate_balances_for_project_queryset(
+        Project.objects.filter(
+            allocation__allocationattribute=(
+                instance.allocation_attribute_usage_id)))
+
+
+@django.dispatch.receiver(post_save, sender=AllocationUserAttributeUsageDelta)
+def invalidate_cached_balances_for_allocation_user_attribute_usage_delta(
+        sender, instance, **kwargs):
+    """When an AllocationUserAttributeUsageDelta is created, invalidate
+    the cached balances for its Project."""
+    invalidate_balances_for_project_queryset(
+        Project.objects.filter(
+            allocation__allocationuserattribute=(
+                instance.allocation_user_attribute_usage_id)))
+
+
+@django.dispatch.receiver(m2m_changed, sender=Allocation.resources.through)
+def invalidate_cached_balances_for_allocation_resources(sender, instance,
+                                                        action, **kwargs):
+    """When an Allocation's Resources change, invalidate the cached
+    balances for its Project."""
+    if action in ('post_add', 'post_clear', 'post_remove'):
+        if isinstance(instance, Allocation):
+            invalidate_balances_for_project_queryset(
+                Project.objects.filter(pk=instance.project_id))
+        else:
+            invalidate_all_balances()
+            transaction.on_commit(invalidate_all_balances)
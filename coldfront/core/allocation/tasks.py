@@ -7,6 +7,8 @@ from django.core.exceptions import ImproperlyConfigured
 
 from coldfront.core.allocation.models import (Allocation, AllocationAttribute,
                                               AllocationStatusChoice)
+from coldfront.core.allocation.utils_.usage_ledger_utils import compact_usage_deltas
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import get_domain_url, import_from_settings
 from coldfront.core.utils.mail import send_email_template
 
@@ -28,8 +30,7 @@ EMAIL_ALLOCATION_EXPIRING_NOTIFICATION_DAYS = import_from_settings(
 
 def update_statuses():
 
-    expired_status_choice = AllocationStatusChoice.objects.get(
-        name='Expired')
+    expired_status_choice = get_choice(AllocationStatusChoice, 'Expired')
     allocations_to_expire = Allocation.objects.filter(
         status__name='Active', end_date__lt=datetime.datetime.now().date())
     for sub_obj in allocations_to_expire:
@@ -186,3 +187,10 @@ def send_expiry_emails():
 
         logger.info('Allocation to {} expired email sent to {}.'.format(
             resource_name, ', '.join(email_receiver_list)))
+
+
+def compact_usage_ledger():
+    """Fold pending deltas from the usage ledger into usages."""
+    num_compacted = compact_usage_deltas()
+    if num_compacted:
+        logger.info(f'Compacted {num_compacted} usage deltas.')
@@ -0,0 +1,90 @@
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+import pytz
+
+from coldfront.core.allocation.tests.test_utils.test_usage_history_utils import TestUsageHistoryBase
+from coldfront.core.allocation.utils_.usage_history_utils import JOB_USAGE_HISTORY_CHANGE_REASON
+
+
+@override_settings(USAGE_HISTORY_POLICY='all')
+class TestCompactUsageHistory(TestUsageHistoryBase):
+    """A class for testing the compact_usage_history management
+    command."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        # Record updates at 09:00, 10:00, and 11:00 on each of two days, with
+        # an update not for jobs at 10:30 on the first.
+        display_tz = pytz.timezone(settings.DISPLAY_TIME_ZONE)
+        self.days = [datetime(2020, 1, 6), datetime(2020, 1, 7)]
+        self.kept_values = set()
+        for day in self.days:
+            for hour in (9, 10, 11):
+                self.charge('1.00')
+                self.set_latest_date(
+                    display_tz.localize(day.replace(hour=hour)))
+            self.kept_values.add(self.usage.value)
+        self.usage.value = Decimal('100.00')
+        self.usage._change_reason = 'Manually adjusted.'
+        self.usage.save()
+        del self.usage._change_reason
+        self.set_latest_date(display_tz.localize(self.days[0].replace(
+            hour=10, minute=30)))
+        self.kept_values.add(Decimal('100.00'))
+
+    @staticmethod
+    def call_command(*args):
+        """Call the command with the given arguments, returning its
+        output."""
+        out, err = StringIO(), StringIO()
+        call_command(
+            'compact_usage_history', *args, stdout=out, stderr=err)
+        return out.getvalue()
+
+    def set_latest_date(self, dt):
+        """Set the date of the latest record of the usage to the given
+        datetime."""
+        latest = self.usage.history.order_by('-history_id').first()
+        self.usage.history.filter(pk=latest.pk).update(
+            history_date=dt.astimezone(pytz.utc))
+
+    def test_keeps_last_update_per_period(self):
+        """Test that, of updates for jobs before the given date, only
+        the last of each usage in each period is kept, along with the
+        creation and updates not for jobs."""
+        num_records = self.usage.history.count()
+        self.call_command('2020-01-08')
+        self.assertEqual(self.usage.history.count(), num_records - 4)
+        self.assertTrue(self.usage.history.filter(history_type='+').exists())
+        updates = self.usage.history.filter(history_type='~')
+        self.assertEqual(
+            set(updates.values_list('value', flat=True)), self.kept_values)
+
+    def test_period_and_date(self):
+        """Test that records are grouped into the given period, and
+        that records dated on or after the given date are kept."""
+        num_records = self.usage.history.count()
+        self.call_command('2020-01-07', '--period', 'week')
+        self.assertEqual(self.usage.history.count(), num_records - 2)
+        self.call_command('2020-01-08', '--period', 'week')
+        self.assertEqual(self.usage.history.count(), num_records - 5)
+        updates = self.usage.history.filter(
+            history_change_reason=JOB_USAGE_HISTORY_CHANGE_REASON)
+        self.assertFalse(updates.exists())
+        self.assertEqual(
+            self.usage.history.filter(history_type='~').count(), 2)
+
+    def test_dry_run(self):
+        """Test that the command makes no changes in dry run mode."""
+        num_records = self.usage.history.count()
+        output = self.call_command('2020-01-08', '--dry_run')
+        self.assertIn(
+            'Would delete 4 HistoricalAllocationAttributeUsage records.',
+            output)
+        self.assertEqual(self.usage.history.count(), num_records)
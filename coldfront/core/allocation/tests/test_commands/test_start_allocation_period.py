@@ -32,6 +32,7 @@ from coldfront.core.project.models import SavioProjectAllocationRequest
 from coldfront.core.project.tests.utils import create_project_and_request
 from coldfront.core.project.utils_.new_project_utils import SavioProjectApprovalRunner
 from coldfront.core.project.utils_.new_project_utils import SavioProjectProcessingRunner
+from coldfront.core.project.utils_.renewal_utils import AllocationRenewalProcessingRunner
 from coldfront.core.project.utils_.renewal_utils import get_current_allowance_year_period
 from coldfront.core.project.utils_.renewal_utils import get_previous_allowance_year_period
 from coldfront.core.project.utils_.renewal_utils import get_next_allowance_year_period
@@ -703,16 +704,24 @@ class TestStartAllocationPeriod(TestBase):
 
     @staticmethod
     def call_command(allocation_period_id, skip_deactivations=False,
-                     dry_run=False):
+                     dry_run=False, bulk=False, batch_size=None,
+                     num_workers=None):
         """Call the command with the given AllocationPeriod ID and
-        optional skip_deactivation and dry_run flags, returning the
-        messages written to stdout and stderr."""
+        optional skip_deactivation, dry_run, and bulk flags, batch size,
+        and number of workers, returning the messages written to stdout
+        and stderr."""
         out, err = StringIO(), StringIO()
         args = ['start_allocation_period', allocation_period_id]
         if skip_deactivations:
             args.append('--skip_deactivations')
         if dry_run:
             args.append('--dry_run')
+        if bulk:
+            args.append('--bulk')
+        if batch_size is not None:
+            args.extend(['--batch_size', batch_size])
+        if num_workers is not None:
+            args.extend(['--num_workers', num_workers])
         kwargs = {'stdout': out, 'stderr': err}
         call_command(*args, **kwargs)
         return out.getvalue(), err.getvalue()
@@ -959,6 +968,130 @@ class TestStartAllocationPeriod(TestBase):
             AllocationRenewalRequest.objects.filter(
                 status__name='Complete').count())
 
+    def test_failed_bulk_deactivations_isolated(self):
+        """Test that, in bulk mode, a Project that fails to be
+        deactivated does not prevent the others from being deactivated,
+        that request processing does not proceed, and that re-running
+        the command only retries the failed Project."""
+        fc_existing = Project.objects.get(name='fc_existing')
+        pc_existing = Project.objects.get(name='pc_existing')
+        objects = get_accounting_allocation_objects(pc_existing)
+        objects.allocation_attribute_usage.delete()
+
+        allocation_period_id = self.current_allowance_year.id
+        with self.assertRaises(CommandError) as cm:
+            self.call_command(allocation_period_id, bulk=True)
+        self.assertEqual(
+            ('Failed to deactivate 1/1 "Partner Computing Allowance" '
+             'Projects.'),
+            str(cm.exception))
+
+        fc_existing.refresh_from_db()
+        self.assertEqual(fc_existing.status.name, 'Inactive')
+        pc_existing.refresh_from_db()
+        self.assertEqual(pc_existing.status.name, 'Active')
+        self.assertFalse(
+            SavioProjectAllocationRequest.objects.filter(
+                status__name='Approved - Complete',
+                allocation_period=self.current_allowance_year).exists())
+
+        num_historical_objects = fc_existing.history.count()
+        with self.assertRaises(CommandError) as cm:
+            self.call_command(allocation_period_id, bulk=True)
+        self.assertEqual(
+            ('Failed to deactivate 1/1 "Partner Computing Allowance" '
+             'Projects.'),
+            str(cm.exception))
+        self.assertEqual(
+            num_historical_objects, fc_existing.history.count())
+
+    def test_bulk_deactivations_invalidate_balances(self):
+        """Test that, in bulk mode, the cached balances of deactivated
+        Projects are invalidated, both immediately and on commit, since
+        bulk updates do not send signals."""
+        fc_existing = Project.objects.get(name='fc_existing')
+        pc_existing = Project.objects.get(name='pc_existing')
+        objects = get_accounting_allocation_objects(pc_existing)
+        objects.allocation_attribute_usage.delete()
+
+        with patch(
+                'coldfront.core.project.utils.invalidate_project_balances') \
+                as invalidate_project_balances:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(CommandError):
+                    self.call_command(
+                        self.current_allowance_year.id, bulk=True)
+        # The Project that failed to be deactivated is not invalidated.
+        self.assertEqual(
+            [call.args for call in
+             invalidate_project_balances.call_args_list],
+            [(fc_existing.name, ), (fc_existing.name, )])
+
+    def test_bulk_renewals_under_same_project_run_by_one_worker(self):
+        """Test that, in bulk mode with multiple workers,
+        AllocationRenewalRequests under the same Project are processed
+        in order by the same worker, so that the service units of each
+        are added to the Allocation."""
+        fc_existing = Project.objects.get(name='fc_existing')
+        renewal_request = AllocationRenewalRequest.objects.get(
+            post_project=fc_existing)
+        renewal_request.pk = None
+        renewal_request.pi = User.objects.create(
+            username=f'{fc_existing.name}_pi2',
+            email=f'{fc_existing.name}_pi2@email.com')
+        renewal_request.save()
+
+        executors = []
+
+        class SerialExecutor(object):
+            """A stand-in for ThreadPoolExecutor that runs tasks in
+            the calling thread, in which test data are visible, and
+            records the arguments of each."""
+
+            def __init__(self, max_workers=None):
+                self.args = []
+                executors.append(self)
+
+            def map(self, fn, *iterables):
+                self.args.extend(zip(*iterables))
+                return [fn(*args) for args in zip(*iterables)]
+
+            def shutdown(self):
+                pass
+
+        module = (
+            'coldfront.core.allocation.management.commands.'
+            'start_allocation_period')
+        with patch(f'{module}.ThreadPoolExecutor', SerialExecutor):
+            # Worker threads close their connections, but the test's
+            # connection must remain open.
+            with patch(f'{module}.connections'):
+                output, error = self.call_command(
+                    self.current_allowance_year.id, bulk=True,
+                    num_workers=2)
+        self.assertFalse(error)
+        self.assertIn(
+            'Processed 2 AllocationRenewalRequests, with 2 successes and 0 '
+            'failures.', output)
+
+        # Both renewal runners were run by a single worker.
+        runner_groups = [
+            [type(runner) for runner in runners]
+            for executor in executors for runners, in executor.args]
+        self.assertIn([AllocationRenewalProcessingRunner] * 2, runner_groups)
+
+        renewal_requests = AllocationRenewalRequest.objects.filter(
+            post_project=fc_existing)
+        self.assertTrue(
+            all(request.status.name == 'Complete'
+                for request in renewal_requests))
+        expected_num_service_units = sum(
+            request.num_service_units for request in renewal_requests)
+        allocation_attribute = get_accounting_allocation_objects(
+            fc_existing).allocation_attribute
+        self.assertEqual(
+            Decimal(allocation_attribute.value), expected_num_service_units)
+
     def test_multiple_runs_avoid_redundant_work(self):
         """Test that running the command multiple times does not
         re-deactivate Projects or re-process already completed
@@ -1250,9 +1383,10 @@ class TestStartAllocationPeriod(TestBase):
             self.assertNotIn('Deactivated', output)
             self.assertFalse(error)
 
-    def test_starts_allowance_year_period(self):
-        """Test that an AllocationPeriod representing an allowance year
-        is started properly."""
+    def start_allowance_year_period(self, **kwargs):
+        """Run the command to start the current allowance year, passing
+        the given keyword arguments, and assert that it is started
+        properly. Return the messages written to stdout and stderr."""
         allocation_period = self.current_allowance_year
 
         fc_existing = Project.objects.get(name='fc_existing')
@@ -1276,7 +1410,8 @@ class TestStartAllocationPeriod(TestBase):
         self.assertEqual(allocation_renewal_request.status.name, 'Approved')
 
         pre_time = utc_now_offset_aware()
-        self.call_command(allocation_period.id, dry_run=False)
+        output, error = self.call_command(
+            allocation_period.id, dry_run=False, **kwargs)
         post_time = utc_now_offset_aware()
 
         allocation_renewal_request.refresh_from_db()
@@ -1298,6 +1433,32 @@ class TestStartAllocationPeriod(TestBase):
         ic_new.refresh_from_db()
         self.assertEqual(ic_new.status.name, 'New')
 
+        return output, error
+
+    def test_starts_allowance_year_period(self):
+        """Test that an AllocationPeriod representing an allowance year
+        is started properly."""
+        self.start_allowance_year_period()
+
+    def test_starts_allowance_year_period_in_bulk(self):
+        """Test that an AllocationPeriod representing an allowance year
+        is started properly in bulk mode, in batches."""
+        output, error = self.start_allowance_year_period(
+            bulk=True, batch_size=1)
+        self.assertFalse(error)
+        # Projects are deactivated per allowance.
+        self.assertEqual(
+            output.count('Checkpoint: Handled 1/1 Projects.'), 2)
+        self.assertIn(
+            'Checkpoint: Handled 1/2 SavioProjectAllocationRequests.', output)
+        self.assertIn(
+            'Checkpoint: Handled 2/2 SavioProjectAllocationRequests.', output)
+        self.assertIn(
+            'Checkpoint: Handled 1/1 AllocationRenewalRequests.', output)
+        self.assertIn(
+            'Processed 2 SavioProjectAllocationRequests, with 2 successes and '
+            '0 failures.', output)
+
     def test_starts_instructional_period(self):
         """Test that an AllocationPeriod representing an instructional
         period is started properly."""
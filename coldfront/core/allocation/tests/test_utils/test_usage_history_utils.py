@@ -0,0 +1,104 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import override_settings
+
+from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationAttribute
+from coldfront.core.allocation.models import AllocationAttributeType
+from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationStatusChoice
+from coldfront.core.allocation.utils_.usage_history_utils import JOB_USAGE_HISTORY_CHANGE_REASON
+from coldfront.core.allocation.utils_.usage_history_utils import save_job_usage
+from coldfront.core.utils.common import utc_now_offset_aware
+from coldfront.core.utils.tests.test_base import TestBase
+
+
+class TestUsageHistoryBase(TestBase):
+    """A base class for testing the recording of usage history."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        user = self.create_test_user()
+        project = self.create_active_project_with_pi('fc_project', user)
+        allocation = Allocation.objects.create(
+            project=project,
+            status=AllocationStatusChoice.objects.get(name='Active'))
+        allocation_attribute = AllocationAttribute.objects.create(
+            allocation_attribute_type=AllocationAttributeType.objects.get(
+                name='Service Units'),
+            allocation=allocation,
+            value='1000.00')
+        self.usage = AllocationAttributeUsage.objects.get(
+            allocation_attribute=allocation_attribute)
+
+    def charge(self, amount):
+        """Charge the given amount to the usage as if for a job."""
+        self.usage.value += Decimal(amount)
+        save_job_usage(self.usage)
+
+
+class TestSaveJobUsage(TestUsageHistoryBase):
+    """A class for testing save_job_usage."""
+
+    @override_settings(USAGE_HISTORY_POLICY='all')
+    def test_all_policy_records_every_update(self):
+        """Test that, under the 'all' policy, each update is
+        recorded."""
+        num_records = self.usage.history.count()
+        for _ in range(3):
+            self.charge('1.00')
+        self.assertEqual(self.usage.history.count(), num_records + 3)
+
+    @override_settings(USAGE_HISTORY_POLICY='non_job')
+    def test_non_job_policy_records_no_updates(self):
+        """Test that, under the 'non_job' policy, updates are saved but
+        not recorded, while other updates are."""
+        num_records = self.usage.history.count()
+        for _ in range(3):
+            self.charge('1.00')
+        self.usage.refresh_from_db()
+        self.assertEqual(self.usage.value, Decimal('3.00'))
+        self.assertEqual(self.usage.history.count(), num_records)
+
+        self.usage.value = Decimal('0.00')
+        self.usage.save()
+        self.assertEqual(self.usage.history.count(), num_records + 1)
+
+    @override_settings(
+        USAGE_HISTORY_POLICY='coalesce', USAGE_HISTORY_COALESCE_WINDOW=3600)
+    def test_coalesce_policy_records_one_update_per_window(self):
+        """Test that, under the 'coalesce' policy, updates within a
+        window overwrite the same record, which reflects the latest
+        value, and that a new window or a non-job update begins a new
+        record."""
+        num_records = self.usage.history.count()
+        for _ in range(3):
+            self.charge('1.00')
+        self.assertEqual(self.usage.history.count(), num_records + 1)
+        latest = self.usage.history.latest()
+        self.assertEqual(latest.value, Decimal('3.00'))
+        self.assertEqual(
+            latest.history_change_reason, JOB_USAGE_HISTORY_CHANGE_REASON)
+
+        # A record begun before the window is not overwritten.
+        self.usage.history.filter(pk=latest.pk).update(
+            history_date=utc_now_offset_aware() - timedelta(hours=2))
+        self.charge('1.00')
+        self.assertEqual(self.usage.history.count(), num_records + 2)
+        self.assertEqual(
+            self.usage.history.get(pk=latest.pk).value, Decimal('3.00'))
+
+        # Nor is a record of an update not for jobs.
+        self.usage.value = Decimal('0.00')
+        self.usage.save()
+        self.charge('1.00')
+        self.assertEqual(self.usage.history.count(), num_records + 4)
+        self.assertEqual(self.usage.history.latest().value, Decimal('1.00'))
+
+    @override_settings(USAGE_HISTORY_POLICY='invalid')
+    def test_invalid_policy_raises_error(self):
+        """Test that an invalid policy raises a ValueError."""
+        with self.assertRaises(ValueError):
+            self.charge('1.00')
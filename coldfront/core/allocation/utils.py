@@ -32,6 +32,7 @@ from coldfront.core.project.models import Project
 from coldfront.core.resource.models import Resource
 from coldfront.core.resource.utils import get_primary_compute_resource_name
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import display_time_zone_current_date
 from coldfront.core.utils.common import utc_now_offset_aware
 
@@ -43,7 +44,7 @@ import pytz
 
 def set_allocation_user_status_to_error(allocation_user_pk):
     allocation_user_obj = AllocationUser.objects.get(pk=allocation_user_pk)
-    error_status = AllocationUserStatusChoice.objects.get(name='Error')
+    error_status = get_choice(AllocationUserStatusChoice, 'Error')
     allocation_user_obj.status = error_status
     allocation_user_obj.save()
 
@@ -116,7 +117,7 @@ def annotate_queryset_with_allocation_period_not_started_bool(queryset):
 
 def get_or_create_active_allocation_user(allocation_obj, user_obj):
     allocation_user_status_choice = \
-        AllocationUserStatusChoice.objects.get(name='Active')
+        get_choice(AllocationUserStatusChoice, 'Active')
     if allocation_obj.allocationuser_set.filter(user=user_obj).exists():
         allocation_user_obj = allocation_obj.allocationuser_set.get(
             user=user_obj)
@@ -132,8 +133,7 @@ def get_or_create_active_allocation_user(allocation_obj, user_obj):
 
 
 def set_allocation_user_attribute_value(allocation_user_obj, type_name, value):
-    allocation_attribute_type = AllocationAttributeType.objects.get(
-        name=type_name)
+    allocation_attribute_type = get_choice(AllocationAttributeType, type_name)
     allocation_user_attribute, _ = \
         AllocationUserAttribute.objects.get_or_create(
             allocation_attribute_type=allocation_attribute_type,
@@ -157,26 +157,47 @@ def get_project_compute_resource_name(project_obj):
 
     The name is based on currently-enabled flags (i.e., BRC, LRC). If
     one cannot be determined, return the empty string."""
+    return get_project_compute_resource_names(
+        [project_obj.name])[project_obj.name]
+
+
+def get_project_compute_resource_names(project_names):
+    """Return a dictionary mapping each of the given Project names to
+    the name of the '{cluster_name} Compute' Resource that corresponds
+    to the Project, as returned by get_project_compute_resource_name,
+    using at most one query regardless of the number of names."""
+    resource_names = {}
+    primary_compute_resource_name = None
     if flag_enabled('BRC_ONLY'):
-        if project_obj.name == 'abc':
-            resource_name = 'ABC Compute'
-        elif project_obj.name.startswith('vector_'):
-            resource_name = 'Vector Compute'
-        else:
-            resource_name = get_primary_compute_resource_name()
-        return resource_name
+        for project_name in project_names:
+            if project_name == 'abc':
+                resource_name = 'ABC Compute'
+            elif project_name.startswith('vector_'):
+                resource_name = 'Vector Compute'
+            else:
+                if primary_compute_resource_name is None:
+                    primary_compute_resource_name = \
+                        get_primary_compute_resource_name()
+                resource_name = primary_compute_resource_name
+            resource_names[project_name] = resource_name
+        return resource_names
     if flag_enabled('LRC_ONLY'):
         computing_allowance_interface = ComputingAllowanceInterface()
         project_name_prefixes = tuple([
             computing_allowance_interface.code_from_name(allowance.name)
             for allowance in computing_allowance_interface.allowances()])
-        if project_obj.name.startswith(project_name_prefixes):
-            resource_name = get_primary_compute_resource_name()
-        else:
-            # TODO: Verify this behavior.
-            resource_name = f'{project_obj.name.upper()} Compute'
-        return resource_name
-    return ''
+        for project_name in project_names:
+            if project_name.startswith(project_name_prefixes):
+                if primary_compute_resource_name is None:
+                    primary_compute_resource_name = \
+                        get_primary_compute_resource_name()
+                resource_name = primary_compute_resource_name
+            else:
+                # TODO: Verify this behavior.
+                resource_name = f'{project_name.upper()} Compute'
+            resource_names[project_name] = resource_name
+        return resource_names
+    return {project_name: '' for project_name in project_names}
 
 
 def get_project_compute_allocation(project_obj):
@@ -279,7 +300,7 @@ def create_secure_dirs(project, subdirectory_name, scratch_or_groups):
 
     allocation = Allocation.objects.create(
         project=project,
-        status=AllocationStatusChoice.objects.get(name='Active'),
+        status=get_choice(AllocationStatusChoice, 'Active'),
         start_date=utc_now_offset_aware())
 
     p2p3_path = p2p3_directory.resourceattribute_set.get(
@@ -287,8 +308,8 @@ def create_secure_dirs(project, subdirectory_name, scratch_or_groups):
 
     allocation.resources.add(p2p3_directory)
 
-    allocation_attribute_type = AllocationAttributeType.objects.get(
-        name='Cluster Directory Access')
+    allocation_attribute_type = get_choice(
+        AllocationAttributeType, 'Cluster Directory Access')
 
     p2p3_subdirectory = AllocationAttribute.objects.create(
         allocation_attribute_type=allocation_attribute_type,
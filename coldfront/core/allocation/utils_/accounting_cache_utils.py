@@ -0,0 +1,90 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from coldfront.core.utils.common import import_from_settings
+from coldfront.core.utils.common import is_cache_shared
+
+
+# The Service Units allowances and usages ("balances") of Projects and their
+# users are cached so that they may be read without querying the database.
+# Entries are keyed on a Project's name and a user's cluster UID. Each key also
+# includes a token for the Project and a global token. Replacing a token makes
+# all entries stored under the previous one unreachable, so entries may be
+# invalidated without knowing their keys.
+#
+# Balances are only cached if the cache is shared between processes (e.g.,
+# Redis or memcached). Otherwise, a change made in one process (e.g., a job
+# charged by a web worker) would not invalidate the entries of others, which
+# could allow jobs to be submitted against stale balances.
+
+
+# The number of seconds for which cached balances remain valid. This bounds
+# the staleness of entries affected by changes that do not invalidate them
+# (e.g., changes to users' cluster UIDs).
+ACCOUNTING_BALANCE_CACHE_TIMEOUT = import_from_settings(
+    'ACCOUNTING_BALANCE_CACHE_TIMEOUT', 15 * 60)
+
+KEY_PREFIX = 'accounting_balances'
+
+
+def _global_token_key():
+    """Return the key under which the global token is stored."""
+    return KEY_PREFIX
+
+
+def _project_token_key(project_name):
+    """Return the key under which the token for the Project with the
+    given name is stored."""
+    return f'{KEY_PREFIX}:{project_name}'
+
+
+def get_balance_cache_key(cluster_uid, project_name):
+    """Return the key under which the balances for the given cluster
+    UID and Project name are currently stored, or None if balances are
+    not cached (e.g., because the cache is local to each process).
+
+    Callers that populate the cache from the database should retrieve
+    the key before querying, so that an invalidation that occurs in the
+    interim causes the populated entry to be unreachable."""
+    if not is_cache_shared():
+        return None
+    token_keys = [_global_token_key(), _project_token_key(project_name)]
+    tokens = cache.get_many(token_keys)
+    if len(tokens) < len(token_keys):
+        for token_key in token_keys:
+            if token_key not in tokens:
+                cache.add(token_key, uuid4().hex, None)
+        tokens = cache.get_many(token_keys)
+        if len(tokens) < len(token_keys):
+            return None
+    global_token, project_token = [tokens[key] for key in token_keys]
+    return (
+        f'{KEY_PREFIX}:{global_token}:{project_name}:{project_token}:'
+        f'{cluster_uid}')
+
+
+def get_cached_balances(key):
+    """Return the tuple of balances stored under the given key, or None
+    if there is none."""
+    if key is None:
+        return None
+    return cache.get(key)
+
+
+def set_cached_balances(key, balances):
+    """Store the given tuple of balances under the given key."""
+    if key is None:
+        return
+    cache.set(key, balances, ACCOUNTING_BALANCE_CACHE_TIMEOUT)
+
+
+def invalidate_all_balances():
+    """Invalidate the cached balances for all Projects."""
+    cache.set(_global_token_key(), uuid4().hex, None)
+
+
+def invalidate_project_balances(project_name):
+    """Invalidate the cached balances for the Project with the given
+    name and all of its users."""
+    cache.set(_project_token_key(project_name), uuid4().hex, None)
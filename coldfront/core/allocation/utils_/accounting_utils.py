@@ -12,6 +12,7 @@ from coldfront.core.allocation.models import AllocationUserAttributeUsage
 from coldfront.core.project.models import ProjectUser
 from coldfront.core.statistics.models import ProjectTransaction
 from coldfront.core.statistics.models import ProjectUserTransaction
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import assert_obj_type
 from coldfront.core.utils.common import utc_now_offset_aware
 
@@ -129,6 +130,9 @@ def set_allocation_service_units_usage(allocation_attribute_usage,
             pk=allocation_attribute_usage.pk)
         allocation_attribute_usage.value = num_service_units
         allocation_attribute_usage.save()
+        # Pending deltas from the usage ledger are superseded by the new
+        # value.
+        allocation_attribute_usage.deltas.all().delete()
         allocation_attribute_usage.refresh_from_db()
 
         if change_reason is not None:
@@ -235,6 +239,9 @@ def set_allocation_user_service_units_usage(allocation_user_attribute_usage,
                 pk=allocation_user_attribute_usage.pk)
         allocation_user_attribute_usage.value = num_service_units
         allocation_user_attribute_usage.save()
+        # Pending deltas from the usage ledger are superseded by the new
+        # value.
+        allocation_user_attribute_usage.deltas.all().delete()
         allocation_user_attribute_usage.refresh_from_db()
 
         if change_reason is not None:
@@ -393,8 +400,7 @@ def set_service_units_for_allocation_users(accounting_allocation_objects,
     if set_usage:
         assert_num_service_units_in_bounds(usage)
 
-    service_units_type = AllocationAttributeType.objects.get(
-        name='Service Units')
+    service_units_type = get_choice(AllocationAttributeType, 'Service Units')
     service_units_user_attributes = \
         allocation.allocationuserattribute_set.filter(
             allocation_attribute_type=service_units_type)
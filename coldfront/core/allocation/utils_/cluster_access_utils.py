@@ -15,6 +15,7 @@ from coldfront.core.allocation.utils import set_allocation_user_attribute_value
 from coldfront.core.project.models import ProjectUser
 from coldfront.core.resource.utils import get_primary_compute_resource
 from coldfront.core.statistics.models import ProjectUserTransaction
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import import_from_settings
 from coldfront.core.utils.common import utc_now_offset_aware
 from coldfront.core.utils.email.email_strategy import SendEmailStrategy
@@ -41,11 +42,11 @@ class ClusterAccessRequestRunner(object):
         assert isinstance(allocation_user_obj, AllocationUser)
         assert (
             allocation_user_obj.status ==
-            AllocationUserStatusChoice.objects.get(name='Active'))
+            get_choice(AllocationUserStatusChoice, 'Active'))
         self._allocation_user_obj = allocation_user_obj
         self._allocation_user_attribute_obj = None
-        self._allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Cluster Account Status')
+        self._allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Cluster Account Status')
 
         self._project_obj = self._allocation_user_obj.allocation.project
         self._user_obj = self._allocation_user_obj.user
@@ -68,8 +69,8 @@ class ClusterAccessRequestRunner(object):
         """Create a ClusterAccessRequest with status 'Pending - Add'."""
         request = ClusterAccessRequest.objects.create(
             allocation_user=self._allocation_user_obj,
-            status=ClusterAccessRequestStatusChoice.objects.get(
-                name='Pending - Add'),
+            status=get_choice(
+                ClusterAccessRequestStatusChoice, 'Pending - Add'),
             request_time=utc_now_offset_aware())
         message = (
             f'Created a ClusterAccessRequest {request.pk} for user '
@@ -222,7 +223,7 @@ class ClusterAccessRequestCompleteRunner(object):
     def _give_cluster_access_attribute(self):
         """Activates cluster access attribute for user."""
         cluster_account_status = \
-            AllocationAttributeType.objects.get(name='Cluster Account Status')
+            get_choice(AllocationAttributeType, 'Cluster Account Status')
         cluster_access_attribute, _ = \
             AllocationUserAttribute.objects.get_or_create(
                 allocation_attribute_type=cluster_account_status,
@@ -255,8 +256,8 @@ class ClusterAccessRequestCompleteRunner(object):
     def _set_user_service_units(self):
         """Set the AllocationUser's 'Service Units' attribute value to
         that of the Allocation."""
-        allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Service Units')
+        allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Service Units')
         allocation_service_units = self.allocation.allocationattribute_set.get(
             allocation_attribute_type=allocation_attribute_type)
         set_allocation_user_attribute_value(
@@ -362,7 +363,7 @@ class ClusterAccessRequestDenialRunner(object):
     def _deny_cluster_access_attribute(self):
         """Activates cluster access attribute for user."""
         cluster_account_status = \
-            AllocationAttributeType.objects.get(name='Cluster Account Status')
+            get_choice(AllocationAttributeType, 'Cluster Account Status')
         cluster_access_attribute, _ = \
             AllocationUserAttribute.objects.get_or_create(
                 allocation_attribute_type=cluster_account_status,
@@ -13,6 +13,7 @@ from coldfront.core.allocation.models import Allocation, AllocationStatusChoice,
     SecureDirRequestStatusChoice, AllocationUser, AllocationUserStatusChoice
 from coldfront.core.project.models import Project, ProjectUser
 from coldfront.core.resource.models import Resource, ResourceAttribute
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import utc_now_offset_aware
 from coldfront.core.utils.mail import send_email_template
 
@@ -58,7 +59,7 @@ def create_secure_dirs(project, subdirectory_name, scratch_or_groups):
 
     allocation = Allocation.objects.create(
         project=project,
-        status=AllocationStatusChoice.objects.get(name='Active'),
+        status=get_choice(AllocationStatusChoice, 'Active'),
         start_date=utc_now_offset_aware())
 
     p2p3_path = p2p3_directory.resourceattribute_set.get(
@@ -66,8 +67,8 @@ def create_secure_dirs(project, subdirectory_name, scratch_or_groups):
 
     allocation.resources.add(p2p3_directory)
 
-    allocation_attribute_type = AllocationAttributeType.objects.get(
-        name='Cluster Directory Access')
+    allocation_attribute_type = get_choice(
+        AllocationAttributeType, 'Cluster Directory Access')
 
     p2p3_subdirectory = AllocationAttribute.objects.create(
         allocation_attribute_type=allocation_attribute_type,
@@ -134,17 +135,15 @@ def secure_dir_request_state_status(secure_dir_request):
             mou['status'] == 'Denied' or
             setup['status'] == 'Denied' or
             other['timestamp']):
-        return SecureDirRequestStatusChoice.objects.get(name='Denied')
+        return get_choice(SecureDirRequestStatusChoice, 'Denied')
 
     # One or more steps is pending.
     if (rdm_consultation['status'] == 'Pending' or
             mou['status'] == 'Pending'):
-        return SecureDirRequestStatusChoice.objects.get(
-            name='Under Review')
+        return get_choice(SecureDirRequestStatusChoice, 'Under Review')
 
     # The request has been approved and is processing.
-    return SecureDirRequestStatusChoice.objects.get(
-        name='Approved - Processing')
+    return get_choice(SecureDirRequestStatusChoice, 'Approved - Processing')
 
 
 class SecureDirRequestDenialRunner(object):
@@ -161,7 +160,7 @@ class SecureDirRequestDenialRunner(object):
     def deny_request(self):
         """Set the status of the request to 'Denied'."""
         self.request_obj.status = \
-            SecureDirRequestStatusChoice.objects.get(name='Denied')
+            get_choice(SecureDirRequestStatusChoice, 'Denied')
         self.request_obj.save()
 
     def send_email(self):
@@ -224,7 +223,7 @@ class SecureDirRequestApprovalRunner(object):
     def approve_request(self):
         """Set the status of the request to 'Approved - Complete'."""
         self.request_obj.status = \
-            SecureDirRequestStatusChoice.objects.get(name='Approved - Complete')
+            get_choice(SecureDirRequestStatusChoice, 'Approved - Complete')
         self.request_obj.completion_time = utc_now_offset_aware()
         self.request_obj.save()
 
@@ -273,7 +272,7 @@ class SecureDirRequestApprovalRunner(object):
                 AllocationUser.objects.create(
                     allocation=alloc,
                     user=pi,
-                    status=AllocationUserStatusChoice.objects.get(name='Active')
+                    status=get_choice(AllocationUserStatusChoice, 'Active')
                 )
 
     def send_email(self, groups_alloc, scratch_alloc):
@@ -287,8 +286,8 @@ class SecureDirRequestApprovalRunner(object):
             users_to_notify.append(self.request_obj.requester)
             users_to_notify = set(users_to_notify)
 
-            allocation_attribute_type = AllocationAttributeType.objects.get(
-                name='Cluster Directory Access')
+            allocation_attribute_type = get_choice(
+                AllocationAttributeType, 'Cluster Directory Access')
 
             groups_dir = AllocationAttribute.objects.get(
                 allocation_attribute_type=allocation_attribute_type,
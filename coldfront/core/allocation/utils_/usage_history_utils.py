@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.utils.common import import_from_settings
+
+
+# AllocationAttributeUsage and AllocationUserAttributeUsage are updated for
+# every job charged, and each update writes a historical record. Since Jobs
+# (and, when enabled, the usage ledger) record the charges themselves, the
+# history of these updates may be reduced, depending on the
+# USAGE_HISTORY_POLICY setting:
+#     - 'all': Record every update (default).
+#     - 'non_job': Do not record updates for jobs; record other updates
+#       (e.g., manual adjustments and resets).
+#     - 'coalesce': Record at most one update for jobs per usage per window
+#       of USAGE_HISTORY_COALESCE_WINDOW seconds. Within a window, the
+#       record begun by the first update is overwritten by later ones.
+#
+# The compact_usage_history command reduces existing history to periodic
+# snapshots.
+
+USAGE_HISTORY_POLICY_ALL = 'all'
+USAGE_HISTORY_POLICY_NON_JOB = 'non_job'
+USAGE_HISTORY_POLICY_COALESCE = 'coalesce'
+USAGE_HISTORY_POLICIES = (
+    USAGE_HISTORY_POLICY_ALL,
+    USAGE_HISTORY_POLICY_NON_JOB,
+    USAGE_HISTORY_POLICY_COALESCE,
+)
+
+# The change reason of historical records written for jobs under the
+# 'coalesce' policy, which identifies those records that may be overwritten.
+JOB_USAGE_HISTORY_CHANGE_REASON = 'Charged for jobs.'
+
+USAGE_MODELS = (AllocationAttributeUsage, AllocationUserAttributeUsage)
+
+
+def get_usage_history_policy():
+    """Return the configured policy for recording history of usages
+    updated for jobs, raising a ValueError if it is invalid."""
+    policy = import_from_settings(
+        'USAGE_HISTORY_POLICY', USAGE_HISTORY_POLICY_ALL)
+    if policy not in USAGE_HISTORY_POLICIES:
+        raise ValueError(
+            f'Invalid USAGE_HISTORY_POLICY {policy}. Must be one of: '
+            f'{", ".join(USAGE_HISTORY_POLICIES)}.')
+    return policy
+
+
+def save_job_usage(usage):
+    """Save the given AllocationAttributeUsage or
+    AllocationUserAttributeUsage, which was updated for jobs, recording
+    its history according to the configured policy.
+
+    Parameters:
+        - usage (AllocationAttributeUsage or
+                 AllocationUserAttributeUsage)
+
+    Returns:
+        - None
+
+    Raises:
+        - ValueError, if the configured policy is invalid
+    """
+    policy = get_usage_history_policy()
+    if policy == USAGE_HISTORY_POLICY_NON_JOB:
+        usage.save_without_historical_record()
+        return
+    if policy == USAGE_HISTORY_POLICY_ALL:
+        usage.save()
+        return
+
+    window = timedelta(
+        seconds=import_from_settings('USAGE_HISTORY_COALESCE_WINDOW', 3600))
+    latest = usage.history.order_by('-history_date', '-history_id').first()
+    if (latest is not None and
+            latest.history_type == '~' and
+            latest.history_change_reason == JOB_USAGE_HISTORY_CHANGE_REASON and
+            latest.history_date > timezone.now() - window):
+        usage.save_without_historical_record()
+        # Overwrite the record's copy of the usage's fields, but not its date,
+        # so that the window does not slide.
+        type(latest).objects.filter(pk=latest.pk).update(
+            **{field.attname: getattr(usage, field.attname)
+               for field in usage._meta.concrete_fields})
+    else:
+        usage._change_reason = JOB_USAGE_HISTORY_CHANGE_REASON
+        try:
+            usage.save()
+        finally:
+            del usage._change_reason
@@ -0,0 +1,157 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationAttributeUsageDelta
+from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.allocation.models import AllocationUserAttributeUsageDelta
+from coldfront.core.allocation.utils_.usage_history_utils import save_job_usage
+from coldfront.core.utils.common import import_from_settings
+
+
+# When the usage ledger is enabled, charges for jobs are appended as deltas to
+# AllocationAttributeUsageDelta and AllocationUserAttributeUsageDelta, rather
+# than written to the locked AllocationAttributeUsage and
+# AllocationUserAttributeUsage rows, so that concurrent charges to the same
+# Project do not contend for a row lock. The current usage is the stored value
+# plus any pending deltas, which are periodically folded into the stored value
+# by compaction.
+#
+# Only the checks made when jobs are submitted and charged account for pending
+# deltas. Other readers of usages see the stored value, which lags by at most
+# the compaction interval.
+
+
+def usage_ledger_enabled():
+    """Return whether charges for jobs should be appended to the usage
+    ledger rather than written to usages directly."""
+    return import_from_settings('ACCOUNTING_USAGE_LEDGER_ENABLED', False)
+
+
+def append_usage_deltas(allocation_attribute_usage,
+                        allocation_user_attribute_usage, amount):
+    """Append deltas of the given amount for the given
+    AllocationAttributeUsage and AllocationUserAttributeUsage. No locks
+    on the usages are taken.
+
+    Parameters:
+        - allocation_attribute_usage (AllocationAttributeUsage)
+        - allocation_user_attribute_usage (AllocationUserAttributeUsage)
+        - amount (Decimal): A number of Service Units, which may be
+                            negative
+
+    Returns:
+        - None
+
+    Raises:
+        - None
+    """
+    with transaction.atomic():
+        AllocationAttributeUsageDelta.objects.create(
+            allocation_attribute_usage=allocation_attribute_usage,
+            value=amount)
+        AllocationUserAttributeUsageDelta.objects.create(
+            allocation_user_attribute_usage=allocation_user_attribute_usage,
+            value=amount)
+
+
+def pending_usage_delta_sum(delta_model, usage_field, usage_ref):
+    """Return an expression for annotating a queryset with the sum of
+    pending deltas of the given model (AllocationAttributeUsageDelta or
+    AllocationUserAttributeUsageDelta), whose given field references the
+    usage at the given lookup path, or zero if there are none."""
+    deltas = delta_model.objects.filter(
+        **{usage_field: OuterRef(usage_ref)}
+    ).values(usage_field).annotate(total=Sum('value')).values('total')
+    return Coalesce(
+        Subquery(deltas), Value(Decimal('0.00')),
+        output_field=DecimalField())
+
+
+def apply_pending_usage_deltas(value, pending):
+    """Return the current usage, given a stored usage value and the sum
+    of its pending deltas. As when compacting, usage may not drop below
+    zero."""
+    return max(value + Decimal(pending), Decimal('0.00'))
+
+
+def get_current_usage_value(usage):
+    """Return the current value of the given AllocationAttributeUsage or
+    AllocationUserAttributeUsage, including any pending deltas."""
+    pending = usage.deltas.aggregate(total=Sum('value'))['total']
+    if pending is None:
+        return usage.value
+    return apply_pending_usage_deltas(usage.value, pending)
+
+
+def compact_usage_deltas(batch_size=10000):
+    """Fold pending deltas into the usages they apply to, and delete
+    them. Usage may not drop below zero.
+
+    Each batch is processed in a transaction that locks the affected
+    usages, so that it may run concurrently with other compactions and
+    with charges, which append deltas without waiting.
+
+    Parameters:
+        - batch_size (int): The maximum number of deltas of each model
+                            to fold per transaction
+
+    Returns:
+        - The number of deltas folded
+
+    Raises:
+        - None
+    """
+    num_compacted = 0
+    models = (
+        (AllocationAttributeUsageDelta, AllocationAttributeUsage,
+         'allocation_attribute_usage_id'),
+        (AllocationUserAttributeUsageDelta, AllocationUserAttributeUsage,
+         'allocation_user_attribute_usage_id'),
+    )
+    for delta_model, usage_model, usage_field in models:
+        # Only fold deltas that exist at the start, so that compaction ends
+        # even if deltas are appended faster than they are folded.
+        max_pk = delta_model.objects.aggregate(max_pk=Max('pk'))['max_pk']
+        while max_pk is not None:
+            candidate_pks = list(
+                delta_model.objects.filter(pk__lte=max_pk).order_by(
+                    'pk').values_list('pk', flat=True)[:batch_size])
+            if not candidate_pks:
+                break
+            with transaction.atomic():
+                usage_pks = set(
+                    delta_model.objects.filter(
+                        pk__in=candidate_pks).values_list(
+                            usage_field, flat=True))
+                usages = list(
+                    usage_model.objects.select_for_update(no_key=True).filter(
+                        pk__in=usage_pks).order_by('pk'))
+
+                # Deltas may only be removed while their usage is locked, so
+                # those that remain are folded exactly once.
+                deltas = list(
+                    delta_model.objects.filter(
+                        pk__in=candidate_pks).values_list(
+                            'pk', usage_field, 'value'))
+                totals = defaultdict(Decimal)
+                for _, usage_pk, value in deltas:
+                    totals[usage_pk] += value
+                for usage in usages:
+                    if usage.pk in totals:
+                        usage.value = apply_pending_usage_deltas(
+                            usage.value, totals[usage.pk])
+                        save_job_usage(usage)
+                delta_model.objects.filter(
+                    pk__in=[pk for pk, _, _ in deltas]).delete()
+                num_compacted += len(deltas)
+    return num_compacted
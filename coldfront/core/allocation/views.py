@@ -46,6 +46,7 @@ from coldfront.core.project.models import (Project, ProjectUser,
                                            ProjectUserStatusChoice)
 from coldfront.core.resource.models import Resource
 from coldfront.core.user.utils import access_agreement_signed
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import get_domain_url, import_from_settings
 from coldfront.core.utils.mail import send_email_template
 
@@ -246,7 +247,7 @@ class AllocationDetailView(LoginRequiredMixin, UserPassesTestMixin, TemplateView
 
         # Filter users by whether they have been removed from the allocation.
         allocation_user_status_choice_removed = \
-            AllocationUserStatusChoice.objects.get(name='Removed')
+            get_choice(AllocationUserStatusChoice, 'Removed')
         context['allocation_users'] = \
             allocation_users.exclude(status=allocation_user_status_choice_removed)
         context['allocation_users_removed_from_proj'] = \
@@ -685,11 +686,10 @@ class AllocationCreateView(LoginRequiredMixin, UserPassesTestMixin, FormView):
                 users.append(pi_user)
 
         if INVOICE_ENABLED and resource_obj.requires_payment:
-            allocation_status_obj = AllocationStatusChoice.objects.get(
-                name=INVOICE_DEFAULT_STATUS)
+            allocation_status_obj = get_choice(
+                AllocationStatusChoice, INVOICE_DEFAULT_STATUS)
         else:
-            allocation_status_obj = AllocationStatusChoice.objects.get(
-                name='New')
+            allocation_status_obj = get_choice(AllocationStatusChoice, 'New')
 
         allocation_obj = Allocation.objects.create(
             project=project_obj,
@@ -701,8 +701,9 @@ class AllocationCreateView(LoginRequiredMixin, UserPassesTestMixin, FormView):
 
         if ALLOCATION_ACCOUNT_ENABLED and allocation_account and resource_obj.name in ALLOCATION_ACCOUNT_MAPPING:
 
-            allocation_attribute_type_obj = AllocationAttributeType.objects.get(
-                name=ALLOCATION_ACCOUNT_MAPPING[resource_obj.name])
+            allocation_attribute_type_obj = get_choice(
+                AllocationAttributeType,
+                ALLOCATION_ACCOUNT_MAPPING[resource_obj.name])
             AllocationAttribute.objects.create(
                 allocation_attribute_type=allocation_attribute_type_obj,
                 allocation=allocation_obj,
@@ -712,8 +713,8 @@ class AllocationCreateView(LoginRequiredMixin, UserPassesTestMixin, FormView):
         for linked_resource in resource_obj.linked_resources.all():
             allocation_obj.resources.add(linked_resource)
 
-        allocation_user_active_status = AllocationUserStatusChoice.objects.get(
-            name='Active')
+        allocation_user_active_status = get_choice(
+            AllocationUserStatusChoice, 'Active')
         for user in users:
             allocation_user_obj = AllocationUser.objects.create(
                 allocation=allocation_obj,
@@ -837,8 +838,8 @@ class AllocationAddUsersView(LoginRequiredMixin, UserPassesTestMixin, TemplateVi
 
         if formset.is_valid():
 
-            allocation_user_active_status_choice = AllocationUserStatusChoice.objects.get(
-                name='Active')
+            allocation_user_active_status_choice = get_choice(
+                AllocationUserStatusChoice, 'Active')
 
             for form in formset:
                 user_form_data = form.cleaned_data
@@ -951,8 +952,8 @@ class AllocationRemoveUsersView(LoginRequiredMixin, UserPassesTestMixin, Templat
         remove_users_count = 0
 
         if formset.is_valid():
-            allocation_user_removed_status_choice = AllocationUserStatusChoice.objects.get(
-                name='Removed')
+            allocation_user_removed_status_choice = get_choice(
+                AllocationUserStatusChoice, 'Removed')
             for form in formset:
                 user_form_data = form.cleaned_data
                 if user_form_data['selected']:
@@ -1135,8 +1136,8 @@ class AllocationActivateRequestView(LoginRequiredMixin, UserPassesTestMixin, Vie
     def get(self, request, pk):
         allocation_obj = get_object_or_404(Allocation, pk=pk)
 
-        allocation_status_active_obj = AllocationStatusChoice.objects.get(
-            name='Active')
+        allocation_status_active_obj = get_choice(
+            AllocationStatusChoice, 'Active')
         start_date = datetime.datetime.now()
         end_date = datetime.datetime.now(
         ) + relativedelta(days=ALLOCATION_DEFAULT_ALLOCATION_LENGTH)
@@ -1200,8 +1201,8 @@ class AllocationDenyRequestView(LoginRequiredMixin, UserPassesTestMixin, View):
     def get(self, request, pk):
         allocation_obj = get_object_or_404(Allocation, pk=pk)
 
-        allocation_status_denied_obj = AllocationStatusChoice.objects.get(
-            name='Denied')
+        allocation_status_denied_obj = get_choice(
+            AllocationStatusChoice, 'Denied')
 
         allocation_obj.status = allocation_status_denied_obj
         allocation_obj.start_date = None
@@ -1346,12 +1347,12 @@ class AllocationRenewView(LoginRequiredMixin, UserPassesTestMixin, TemplateView)
         formset = formset(
             request.POST, initial=users_in_allocation, prefix='userform')
 
-        allocation_renewal_requested_status_choice = AllocationStatusChoice.objects.get(
-            name='Renewal Requested')
-        allocation_user_removed_status_choice = AllocationUserStatusChoice.objects.get(
-            name='Removed')
-        project_user_remove_status_choice = ProjectUserStatusChoice.objects.get(
-            name='Removed')
+        allocation_renewal_requested_status_choice = get_choice(
+            AllocationStatusChoice, 'Renewal Requested')
+        allocation_user_removed_status_choice = get_choice(
+            AllocationUserStatusChoice, 'Removed')
+        project_user_remove_status_choice = get_choice(
+            ProjectUserStatusChoice, 'Removed')
 
         allocation_obj.status = allocation_renewal_requested_status_choice
         allocation_obj.save()
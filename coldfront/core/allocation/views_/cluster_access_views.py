@@ -26,6 +26,7 @@ from coldfront.core.allocation.utils_.cluster_access_utils import ClusterAccessR
 from coldfront.core.allocation.utils_.cluster_access_utils import ClusterAccessRequestDenialRunner
 from coldfront.core.allocation.utils_.cluster_access_utils import ClusterAccessRequestRunner
 from coldfront.core.user.utils_.host_user_utils import host_user_lbl_email
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import utc_now_offset_aware
 
 
@@ -291,7 +292,7 @@ class AllocationClusterAccountUpdateStatusView(LoginRequiredMixin,
         status = form_data.get('status')
 
         self.request_obj.status = \
-            ClusterAccessRequestStatusChoice.objects.get(name=status)
+            get_choice(ClusterAccessRequestStatusChoice, status)
         self.request_obj.save()
 
         allocation = self.request_obj.allocation_user.allocation
@@ -365,7 +366,7 @@ class AllocationClusterAccountActivateRequestView(LoginRequiredMixin,
         try:
             with transaction.atomic():
                 self.request_obj.status = \
-                    ClusterAccessRequestStatusChoice.objects.get(name='Complete')
+                    get_choice(ClusterAccessRequestStatusChoice, 'Complete')
                 self.request_obj.completion_time = utc_now_offset_aware()
                 self.request_obj.save()
                 runner = \
@@ -456,7 +457,7 @@ class AllocationClusterAccountDenyRequestView(LoginRequiredMixin,
         try:
             with transaction.atomic():
                 self.request_obj.status = \
-                    ClusterAccessRequestStatusChoice.objects.get(name='Denied')
+                    get_choice(ClusterAccessRequestStatusChoice, 'Denied')
                 self.request_obj.completion_time = utc_now_offset_aware()
                 self.request_obj.save()
 
@@ -40,6 +40,7 @@ from coldfront.core.allocation.utils_.secure_dir_utils import \
 from coldfront.core.project.forms import ReviewStatusForm, ReviewDenyForm
 from coldfront.core.project.models import ProjectUser, Project
 from coldfront.core.user.utils import access_agreement_signed
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import utc_now_offset_aware, \
     session_wizard_all_form_data
 from coldfront.core.utils.mail import send_email_template
@@ -599,14 +600,14 @@ class SecureDirManageUsersCompleteStatusView(LoginRequiredMixin,
                 AllocationUser.objects.get_or_create(
                     allocation=self.secure_dir_request.allocation,
                     user=self.secure_dir_request.user,
-                    status=AllocationUserStatusChoice.objects.get(name='Active')
+                    status=get_choice(AllocationUserStatusChoice, 'Active')
                 )
 
             # Sets the allocation user status to removed if the request
             # was a removal request.
             if not self.add_bool:
                 alloc_user.status = \
-                    AllocationUserStatusChoice.objects.get(name='Removed')
+                    get_choice(AllocationUserStatusChoice, 'Removed')
                 alloc_user.save()
 
             # Send notification email to PIs and the user that the
@@ -919,8 +920,7 @@ class SecureDirRequestWizard(LoginRequiredMixin,
             request_kwargs['project'] = existing_project
             request_kwargs['directory_name'] = directory_name
             request_kwargs['status'] = \
-                SecureDirRequestStatusChoice.objects.get(
-                    name='Under Review')
+                get_choice(SecureDirRequestStatusChoice, 'Under Review')
             request_kwargs['request_time'] = utc_now_offset_aware()
 
             # Check that the project does not have an existing Secure
@@ -8,6 +8,7 @@ from coldfront.core.billing.models import BillingActivity
 from coldfront.core.billing.models import BillingProject
 from coldfront.core.project.models import Project
 from coldfront.core.resource.utils import get_computing_allowance_project_prefixes
+from coldfront.core.utils.choice_registry import get_choice
 
 
 logger = logging.getLogger(__name__)
@@ -35,8 +36,8 @@ def is_project_billing_id_required_and_missing(project_obj):
     if not project_obj.name.startswith(computing_allowance_project_prefixes):
         return False
     allocation = get_project_compute_allocation(project_obj)
-    allocation_attribute_type = AllocationAttributeType.objects.get(
-        name='Billing Activity')
+    allocation_attribute_type = get_choice(
+        AllocationAttributeType, 'Billing Activity')
     billing_attribute = allocation.allocationattribute_set.filter(
         allocation_attribute_type=allocation_attribute_type).first()
     if billing_attribute is None:
@@ -0,0 +1,19 @@
+import logging
+
+from coldfront.core.portal.utils import refresh_portal_summaries
+from coldfront.core.utils.common import is_cache_shared
+
+logger = logging.getLogger(__name__)
+
+
+def update_portal_summaries():
+    """Recompute the stored summaries displayed on public pages. Do
+    nothing if the cache is local to each process, since the summaries
+    stored by this one would not be read by others."""
+    if not is_cache_shared():
+        logger.info(
+            'Skipped refreshing portal summaries because the cache is not '
+            'shared.')
+        return
+    refresh_portal_summaries()
+    logger.info('Refreshed portal summaries.')
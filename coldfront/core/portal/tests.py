@@ -1,3 +1,211 @@
-from django.test import TestCase
+from contextlib import nullcontext
+from unittest.mock import patch
+
+from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationAttributeType
+from coldfront.core.allocation.models import AllocationStatusChoice
+from coldfront.core.allocation.models import AllocationUser
+from coldfront.core.allocation.models import AllocationUserAttribute
+from coldfront.core.allocation.models import AllocationUserStatusChoice
+from coldfront.core.portal.utils import compute_allocation_by_fos
+from coldfront.core.portal.utils import compute_allocation_summary
+from coldfront.core.portal.utils import get_portal_summary
+from coldfront.core.portal.utils import PORTAL_SUMMARY_CACHE_TIMEOUT
+from coldfront.core.portal.utils import PORTAL_SUMMARY_LOCAL_CACHE_TIMEOUT
+from coldfront.core.portal.utils import get_user_dashboard_context
+from coldfront.core.resource.models import Resource
+from coldfront.core.resource.models import ResourceType
+from coldfront.core.portal.tasks import update_portal_summaries
+from coldfront.core.resource.utils import get_primary_compute_resource
+from coldfront.core.utils.tests.test_base import TestBase
+from coldfront.core.utils.tests.test_base import use_shared_cache
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class TestUserDashboardContext(TestBase):
+    """A class for testing get_user_dashboard_context."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.create_test_user()
+        self.num_projects = 0
+
+    def create_membership(self, cluster_account_status):
+        """Create an Active Project with the User as its PI and an
+        Active Allocation to the primary compute Resource, under which
+        the User has the given cluster account status."""
+        project = self.create_active_project_with_pi(
+            f'fc_project_{self.num_projects}', self.user)
+        self.num_projects += 1
+        allocation = Allocation.objects.create(
+            project=project,
+            status=AllocationStatusChoice.objects.get(name='Active'))
+        allocation.resources.add(get_primary_compute_resource())
+        allocation_user = AllocationUser.objects.create(
+            allocation=allocation, user=self.user,
+            status=AllocationUserStatusChoice.objects.get(name='Active'))
+        AllocationUserAttribute.objects.create(
+            allocation_attribute_type=AllocationAttributeType.objects.get(
+                name='Cluster Account Status'),
+            allocation=allocation, allocation_user=allocation_user,
+            value=cluster_account_status)
+        return project
+
+    def get_context(self):
+        """Return the context for the User, and the number of queries
+        issued to compute and display it."""
+        with CaptureQueriesContext(connection) as queries:
+            context = get_user_dashboard_context(self.user)
+            for allocation in context['allocation_list']:
+                allocation.project.title
+                allocation.status.name
+                allocation.get_parent_resource
+        return context, len(queries.captured_queries)
+
+    def test_annotations(self):
+        """Test that Projects are annotated with their cluster names and
+        the User's cluster account statuses."""
+        self.create_membership('Pending - Add')
+        context, _ = self.get_context()
+        project = context['project_list'][0]
+        self.assertEqual(project.display_status, 'Pending - Add')
+        self.assertEqual(project.cluster_name, 'Savio')
+        self.assertNotIn('cluster_username', context)
+
+        self.create_membership('Active')
+        context, _ = self.get_context()
+        self.assertEqual(context['cluster_username'], self.user.username)
+        self.assertEqual(len(context['allocation_list']), 2)
+        for allocation in context['allocation_list']:
+            self.assertEqual(
+                allocation.get_parent_resource,
+                get_primary_compute_resource())
+
+    def test_num_queries_constant(self):
+        """Test that the number of queries issued does not depend on the
+        number of the User's memberships."""
+        self.create_membership('Active')
+        _, expected_num_queries = self.get_context()
+        for _ in range(5):
+            self.create_membership('Active')
+        context, num_queries = self.get_context()
+        self.assertEqual(len(context['project_list']), 6)
+        self.assertEqual(num_queries, expected_num_queries)
+
+
+class TestAllocationSummaries(TestBase):
+    """A class for testing the summaries of all Allocations displayed on
+    public pages."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.create_test_user()
+        self.active_status = AllocationStatusChoice.objects.get(
+            name='Active')
+        resource_type = ResourceType.objects.get(name='Cluster')
+        self.cluster = Resource.objects.create(
+            name='Cluster', resource_type=resource_type)
+        self.partition = Resource.objects.create(
+            name='Partition', resource_type=resource_type,
+            parent_resource=self.cluster)
+        self.storage = Resource.objects.create(
+            name='Storage', resource_type=resource_type,
+            is_allocatable=False)
+        self.num_allocations = 0
+
+    def create_allocation(self, resources, status=None):
+        """Create an Allocation to the given Resources, with the given
+        status, which defaults to 'Active'."""
+        project = self.create_active_project_with_pi(
+            f'fc_project_{self.num_allocations}', self.user)
+        self.num_allocations += 1
+        allocation = Allocation.objects.create(
+            project=project, status=status or self.active_status)
+        allocation.resources.add(*resources)
+        AllocationUser.objects.create(
+            allocation=allocation, user=self.user,
+            status=AllocationUserStatusChoice.objects.get(name='Active'))
+        return allocation
+
+    def expected_counts_by_resource(self):
+        """Return the counts of Allocations by Resource, computed as they
+        were before being aggregated in the database."""
+        counts = {}
+        for allocation in Allocation.objects.filter(status__name='Active'):
+            resource = allocation.get_parent_resource
+            resource = resource.parent_resource or resource
+            counts[resource.name] = counts.get(resource.name, 0) + 1
+        return counts
+
+    def test_allocation_summary(self):
+        """Test that Allocations are counted under their parent Resources
+        or the parents of those, in a constant number of queries."""
+        self.create_allocation([self.cluster])
+        self.create_allocation([self.partition])
+        self.create_allocation([self.cluster, self.storage])
+        self.create_allocation([self.storage])
+        self.create_allocation(
+            [self.cluster],
+            status=AllocationStatusChoice.objects.get(name='Expired'))
+
+        with CaptureQueriesContext(connection) as queries:
+            context = compute_allocation_summary()
+        expected_num_queries = len(queries.captured_queries)
+        self.assertEqual(
+            context['allocations_count_by_resource'],
+            [('Cluster', 'Cluster', 3), ('Storage', 'Cluster', 1)])
+        self.assertEqual(
+            dict((name, count) for name, _, count in
+                 context['allocations_count_by_resource']),
+            self.expected_counts_by_resource())
+
+        for _ in range(5):
+            self.create_allocation([self.partition])
+        with CaptureQueriesContext(connection) as queries:
+            context = compute_allocation_summary()
+        self.assertEqual(len(queries.captured_queries), expected_num_queries)
+        self.assertEqual(
+            context['allocations_count_by_resource'][0],
+            ('Cluster', 'Cluster', 8))
+
+        response = self.client.get(reverse('allocation-summary'))
+        self.assertContains(response, 'Partition', count=0)
+        self.assertContains(response, 'Storage')
+
+    def test_allocation_by_fos(self):
+        """Test that Allocations, their users, and PIs are counted."""
+        self.create_allocation([self.cluster])
+        self.create_allocation([self.cluster])
+        context = compute_allocation_by_fos()
+        fos = Allocation.objects.first().project.field_of_science.description
+        self.assertEqual(context['allocations_by_fos'], {fos: 2})
+        self.assertEqual(context['active_users_by_fos'], {fos: 2})
+        self.assertEqual(context['total_allocations_users'], 1)
+        self.assertEqual(context['active_pi_count'], 1)
+
+        response = self.client.get(reverse('allocation-by-fos'))
+        self.assertContains(response, fos)
+
+    def test_cache_timeout_depends_on_cache_sharing(self):
+        """Test that summaries are stored for longer, and refreshed by
+        the task, only if the cache is shared between processes."""
+        key = 'portal_summary:allocation_by_fos'
+        for shared, timeout in ((False, PORTAL_SUMMARY_LOCAL_CACHE_TIMEOUT),
+                                (True, PORTAL_SUMMARY_CACHE_TIMEOUT)):
+            with self.subTest(shared=shared):
+                context = use_shared_cache() if shared else nullcontext()
+                with context:
+                    cache.delete(key)
+                    with patch.object(cache, 'set', wraps=cache.set) as set_:
+                        get_portal_summary('allocation_by_fos')
+                    self.assertEqual(set_.call_args.args[2], timeout)
+
+                    cache.delete(key)
+                    update_portal_summaries()
+                    self.assertEqual(cache.get(key) is not None, shared)
 
-# Create your tests here.
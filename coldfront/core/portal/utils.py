@@ -1,6 +1,46 @@
 import datetime
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import Subquery
+from django.db.models import When
+from django.db.models.functions import Coalesce
 
 from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationUser
+from coldfront.core.allocation.models import AllocationUserAttribute
+from coldfront.core.allocation.utils import get_project_compute_resource_names
+from coldfront.core.project.models import Project
+from coldfront.core.project.models import ProjectUser
+from coldfront.core.project.models import ProjectUserJoinRequest
+from coldfront.core.project.models import ProjectUserRemovalRequest
+from coldfront.core.resource.models import Resource
+from coldfront.core.utils.common import import_from_settings
+from coldfront.core.utils.common import is_cache_shared
+
+
+# Summaries of all Allocations displayed on public pages are computed with
+# grouped queries and stored in the cache ("materialized"). Pages read the
+# stored summaries, computing them only if they are missing.
+#
+# If the cache is shared between processes (e.g., Redis or memcached), stored
+# summaries are refreshed periodically by a scheduled task, so they may be kept
+# for longer. Otherwise, each process stores its own, which a task could not
+# refresh, so they are kept for a shorter time.
+
+PORTAL_SUMMARY_CACHE_KEY_PREFIX = 'portal_summary'
+# The number of seconds for which a stored summary remains valid if the cache
+# is shared. This should exceed the interval at which summaries are refreshed.
+PORTAL_SUMMARY_CACHE_TIMEOUT = import_from_settings(
+    'PORTAL_SUMMARY_CACHE_TIMEOUT', 60 * 60)
+# The number of seconds for which a stored summary remains valid otherwise.
+PORTAL_SUMMARY_LOCAL_CACHE_TIMEOUT = import_from_settings(
+    'PORTAL_SUMMARY_LOCAL_CACHE_TIMEOUT', 60 * 15)
 
 
 def generate_publication_by_year_chart_data(publications_by_year):
@@ -79,14 +119,19 @@ def generate_resources_chart_data(allocations_count_by_resource_type):
 
 def generate_allocations_chart_data():
 
-    active_count = Allocation.objects.filter(status__name='Active').count()
-    new_count = Allocation.objects.filter(status__name='New').count()
-    renewal_requested_count = Allocation.objects.filter(status__name='Renewal Requested').count()
-
     now = datetime.datetime.now()
     start_time = datetime.date(now.year - 1, 1, 1)
-    expired_count = Allocation.objects.filter(
-        status__name='Expired', end_date__gte=start_time).count()
+    counts = Allocation.objects.aggregate(
+        active_count=Count('pk', filter=Q(status__name='Active')),
+        new_count=Count('pk', filter=Q(status__name='New')),
+        renewal_requested_count=Count(
+            'pk', filter=Q(status__name='Renewal Requested')),
+        expired_count=Count(
+            'pk', filter=Q(status__name='Expired', end_date__gte=start_time)))
+    active_count = counts['active_count']
+    new_count = counts['new_count']
+    renewal_requested_count = counts['renewal_requested_count']
+    expired_count = counts['expired_count']
 
     active_label = "Active: %d" % (active_count)
     new_label = "New: %d" % (new_count)
@@ -110,3 +155,195 @@ def generate_allocations_chart_data():
     }
 
     return allocation_chart_data
+
+
+def get_active_allocation_counts_by_resource():
+    """Return a list of tuples of the name of a Resource, the name of
+    its ResourceType, and the number of 'Active' Allocations to it,
+    ordered by Resource name.
+
+    Each Allocation is counted under its parent Resource (see
+    Allocation.get_parent_resource) or, if that Resource has a parent,
+    under that parent. Counts are computed with a single grouped query,
+    rather than several queries per Allocation."""
+    through = Allocation.resources.through
+    allocation_resources = Resource.objects.filter(
+        allocation=OuterRef('pk')).order_by('name')
+    parent_resource_id = Case(
+        When(
+            num_resources=1,
+            then=Subquery(allocation_resources.values('pk')[:1])),
+        default=Subquery(
+            allocation_resources.filter(
+                is_allocatable=True).values('pk')[:1]),
+        output_field=IntegerField())
+    rows = Allocation.objects.filter(
+        status__name='Active'
+    ).annotate(
+        num_resources=Subquery(
+            through.objects.filter(
+                allocation_id=OuterRef('pk')
+            ).values('allocation_id').annotate(
+                count=Count('pk')).values('count'),
+            output_field=IntegerField()),
+        parent_resource_id=parent_resource_id,
+    ).annotate(
+        top_resource_id=Coalesce(
+            Subquery(
+                Resource.objects.filter(
+                    pk=OuterRef('parent_resource_id')
+                ).values('parent_resource')[:1],
+                output_field=IntegerField()),
+            'parent_resource_id'),
+    ).filter(
+        top_resource_id__isnull=False
+    ).values('top_resource_id').annotate(
+        count=Count('pk')).values_list('top_resource_id', 'count').order_by()
+
+    counts = dict(rows)
+    resources = Resource.objects.filter(
+        pk__in=counts).select_related('resource_type').order_by('name')
+    return [
+        (resource.name, resource.resource_type.name, counts[resource.pk])
+        for resource in resources]
+
+
+def compute_allocation_summary():
+    """Return the context for the allocation summary page."""
+    allocations_count_by_resource = get_active_allocation_counts_by_resource()
+    allocation_count_by_resource_type = Counter()
+    for _, resource_type_name, count in allocations_count_by_resource:
+        allocation_count_by_resource_type[resource_type_name] += count
+
+    context = {}
+    context['allocations_chart_data'] = generate_allocations_chart_data()
+    context['allocations_count_by_resource'] = allocations_count_by_resource
+    context['resources_chart_data'] = generate_resources_chart_data(
+        dict(allocation_count_by_resource_type))
+    return context
+
+
+def compute_allocation_by_fos():
+    """Return the context for the page summarizing Allocations by field
+    of science."""
+    allocations_by_fos = Allocation.objects.filter(
+        status__name='Active'
+    ).values('project__field_of_science__description').annotate(
+        count=Count('pk')).values_list(
+            'project__field_of_science__description', 'count').order_by()
+
+    user_allocations = AllocationUser.objects.filter(
+        status__name='Active', allocation__status__name='Active')
+    active_users_by_fos = user_allocations.values(
+        'allocation__project__field_of_science__description').annotate(
+            count=Count('pk')).values_list(
+                'allocation__project__field_of_science__description',
+                'count').order_by()
+    total_allocations_users = user_allocations.values(
+        'user').distinct().count()
+
+    active_pi_count = ProjectUser.objects.filter(
+        project__status__name__in=['Active', 'New'],
+        role__name='Principal Investigator',
+    ).values('user').distinct().count()
+
+    context = {}
+    context['allocations_by_fos'] = dict(allocations_by_fos)
+    context['active_users_by_fos'] = dict(active_users_by_fos)
+    context['total_allocations_users'] = total_allocations_users
+    context['active_pi_count'] = active_pi_count
+    return context
+
+
+PORTAL_SUMMARY_FUNCTIONS = {
+    'allocation_summary': compute_allocation_summary,
+    'allocation_by_fos': compute_allocation_by_fos,
+}
+
+
+def get_portal_summary_cache_timeout():
+    """Return the number of seconds for which a stored summary remains
+    valid, which depends on whether the cache is shared between
+    processes."""
+    if is_cache_shared():
+        return PORTAL_SUMMARY_CACHE_TIMEOUT
+    return PORTAL_SUMMARY_LOCAL_CACHE_TIMEOUT
+
+
+def get_portal_summary(name):
+    """Return the stored summary with the given name, computing and
+    storing it if it is missing."""
+    key = f'{PORTAL_SUMMARY_CACHE_KEY_PREFIX}:{name}'
+    summary = cache.get(key)
+    if summary is None:
+        summary = PORTAL_SUMMARY_FUNCTIONS[name]()
+        cache.set(key, summary, get_portal_summary_cache_timeout())
+    return summary
+
+
+def refresh_portal_summaries():
+    """Compute and store all summaries."""
+    timeout = get_portal_summary_cache_timeout()
+    for name, function in PORTAL_SUMMARY_FUNCTIONS.items():
+        key = f'{PORTAL_SUMMARY_CACHE_KEY_PREFIX}:{name}'
+        cache.set(key, function(), timeout)
+
+
+def get_user_dashboard_context(user):
+    """Return a dictionary of the Projects, Allocations, and requests
+    of the given User to display on the home page.
+
+    Each Project is annotated with its cluster name and the User's
+    cluster access status under it. The number of queries issued does
+    not depend on the number of the User's memberships."""
+    context = {}
+
+    project_list = list(
+        Project.objects.filter(
+            (Q(status__name__in=['New', 'Active', ]) &
+             Q(projectuser__user=user) &
+             Q(projectuser__status__name__in=['Active', 'Pending - Remove']))
+        ).distinct().order_by('name'))
+
+    access_states = dict(
+        AllocationUserAttribute.objects.filter(
+            allocation_attribute_type__name='Cluster Account Status',
+            allocation_user__user=user,
+        ).order_by('pk').values_list('allocation__project', 'value'))
+    resource_names = get_project_compute_resource_names(
+        [project.name for project in project_list])
+
+    for project in project_list:
+        project.display_status = access_states.get(project.pk, None)
+        if (project.display_status is not None and
+                'Active' in project.display_status):
+            context['cluster_username'] = user.username
+        project.cluster_name = resource_names[project.name].replace(
+            ' Compute', '')
+
+    allocation_list = Allocation.objects.filter(
+        Q(status__name__in=['Active', 'New', 'Renewal Requested', ]) &
+        Q(project__status__name__in=['Active', 'New']) &
+        Q(project__projectuser__user=user) &
+        Q(project__projectuser__status__name__in=['Active', ]) &
+        Q(allocationuser__user=user) &
+        Q(allocationuser__status__name__in=['Active', ])
+    ).distinct().select_related(
+        'project', 'status').prefetch_related('resources').order_by('-created')
+
+    context['project_list'] = project_list
+    context['allocation_list'] = allocation_list
+
+    context['num_join_requests'] = \
+        ProjectUserJoinRequest.objects.filter(
+            project_user__status__name='Pending - Add',
+            project_user__user=user). \
+            values('project_user').distinct().count()
+
+    context['pending_removal_request_projects'] = list(
+        ProjectUserRemovalRequest.objects.filter(
+            Q(project_user__user=user) &
+            Q(status__name='Pending')
+        ).values_list('project_user__project__name', flat=True))
+
+    return context
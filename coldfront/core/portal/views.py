@@ -1,25 +1,16 @@
 import operator
-from collections import Counter
 from collections import defaultdict
 
 from django.conf import settings
 from django.contrib.humanize.templatetags.humanize import intcomma
-from django.db.models import Count, Q, Sum
+from django.db.models import Count, Sum
 from django.shortcuts import render
-from django.views.decorators.cache import cache_page
 
-from coldfront.core.allocation.models import (Allocation,
-                                              AllocationUser,
-                                              AllocationUserAttribute)
-from coldfront.core.allocation.utils import get_project_compute_resource_name
 # from coldfront.core.grant.models import Grant
-from coldfront.core.portal.utils import (generate_allocations_chart_data,
-                                         generate_publication_by_year_chart_data,
-                                         generate_resources_chart_data,
-                                         generate_total_grants_by_agency_chart_data)
-from coldfront.core.project.models import Project, ProjectUserJoinRequest
-from coldfront.core.project.models import ProjectUserJoinRequest
-from coldfront.core.project.models import ProjectUserRemovalRequest
+from coldfront.core.portal.utils import (generate_publication_by_year_chart_data,
+                                         generate_total_grants_by_agency_chart_data,
+                                         get_portal_summary,
+                                         get_user_dashboard_context)
 
 
 # from coldfront.core.publication.models import Publication
@@ -31,56 +22,7 @@ def home(request):
     context = {}
     if request.user.is_authenticated:
         template_name = 'portal/authorized_home.html'
-        project_list = Project.objects.filter(
-            (Q(status__name__in=['New', 'Active', ]) &
-             Q(projectuser__user=request.user) &
-             Q(projectuser__status__name__in=['Active', 'Pending - Remove']))
-        ).distinct().order_by('name')
-
-        cluster_access_attributes = AllocationUserAttribute.objects.filter(allocation_attribute_type__name='Cluster Account Status',
-                                                                       allocation_user__user=request.user)
-        access_states = {}
-        for attribute in cluster_access_attributes:
-            project = attribute.allocation.project
-            status = attribute.value
-            access_states[project] = status
-
-        for project in project_list:
-            project.display_status = access_states.get(project, None)
-            if (project.display_status is not None and
-                    'Active' in project.display_status):
-                context['cluster_username'] = request.user.username
-
-            resource_name = get_project_compute_resource_name(project)
-            project.cluster_name = resource_name.replace(' Compute', '')
-
-        allocation_list = Allocation.objects.filter(
-           Q(status__name__in=['Active', 'New', 'Renewal Requested', ]) &
-           Q(project__status__name__in=['Active', 'New']) &
-           Q(project__projectuser__user=request.user) &
-           Q(project__projectuser__status__name__in=['Active', ]) &
-           Q(allocationuser__user=request.user) &
-           Q(allocationuser__status__name__in=['Active', ])
-        ).distinct().order_by('-created')
-        context['project_list'] = project_list
-        context['allocation_list'] = allocation_list
-
-        num_join_requests = \
-            ProjectUserJoinRequest.objects.filter(
-                project_user__status__name='Pending - Add',
-                project_user__user=request.user). \
-                order_by('project_user', '-created'). \
-                distinct('project_user').count()
-
-        context['num_join_requests'] = num_join_requests
-
-        context['pending_removal_request_projects'] = \
-            [removal_request.project_user.project.name
-             for removal_request in
-             ProjectUserRemovalRequest.objects.filter(
-                 Q(project_user__user__username=request.user.username) &
-                 Q(status__name='Pending'))]
-
+        context.update(get_user_dashboard_context(request.user))
     else:
         template_name = 'portal/nonauthorized_home.html'
 
@@ -159,51 +101,11 @@ def center_summary(request):
     return render(request, 'portal/center_summary.html', context)
 
 
-@cache_page(60 * 15)
 def allocation_by_fos(request):
-
-    allocations_by_fos = Counter(list(Allocation.objects.filter(
-        status__name='Active').values_list('project__field_of_science__description', flat=True)))
-
-    user_allocations = AllocationUser.objects.filter(
-        status__name='Active', allocation__status__name='Active')
-
-    active_users_by_fos = Counter(list(user_allocations.values_list(
-        'allocation__project__field_of_science__description', flat=True)))
-    total_allocations_users = user_allocations.values(
-        'user').distinct().count()
-
-    pis = set()
-    for project in Project.objects.filter(status__name__in=['Active', 'New']):
-        pis.update([pi.username for pi in project.pis()])
-    active_pi_count = len(pis)
-
-    context = {}
-    context['allocations_by_fos'] = dict(allocations_by_fos)
-    context['active_users_by_fos'] = dict(active_users_by_fos)
-    context['total_allocations_users'] = total_allocations_users
-    context['active_pi_count'] = active_pi_count
+    context = get_portal_summary('allocation_by_fos')
     return render(request, 'portal/allocation_by_fos.html', context)
 
 
-@cache_page(60 * 15)
 def allocation_summary(request):
-
-    allocation_resources = [
-        allocation.get_parent_resource.parent_resource if allocation.get_parent_resource.parent_resource else allocation.get_parent_resource for allocation in Allocation.objects.filter(status__name='Active')]
-
-    allocations_count_by_resource = dict(Counter(allocation_resources))
-
-    allocation_count_by_resource_type = dict(
-        Counter([ele.resource_type.name for ele in allocation_resources]))
-
-    allocations_chart_data = generate_allocations_chart_data()
-    resources_chart_data = generate_resources_chart_data(
-        allocation_count_by_resource_type)
-
-    context = {}
-    context['allocations_chart_data'] = allocations_chart_data
-    context['allocations_count_by_resource'] = allocations_count_by_resource
-    context['resources_chart_data'] = resources_chart_data
-
+    context = get_portal_summary('allocation_summary')
     return render(request, 'portal/allocation_summary.html', context)
@@ -12,6 +12,7 @@ from coldfront.core.project.utils_.renewal_utils import non_denied_renewal_reque
 from coldfront.core.project.utils_.renewal_utils import pis_with_renewal_requests_pks
 from coldfront.core.resource.utils_.allowance_utils.computing_allowance import ComputingAllowance
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+from coldfront.core.utils.choice_registry import get_choice
 
 from django import forms
 
@@ -45,8 +46,8 @@ class ProjectRenewalPISelectionForm(forms.Form):
         self.allocation_period = AllocationPeriod.objects.get(
             pk=self.allocation_period_pk)
 
-        role = ProjectUserRoleChoice.objects.get(name='Principal Investigator')
-        status = ProjectUserStatusChoice.objects.get(name='Active')
+        role = get_choice(ProjectUserRoleChoice, 'Principal Investigator')
+        status = get_choice(ProjectUserStatusChoice, 'Active')
 
         pi_project_users = ProjectUser.objects.prefetch_related('user').filter(
             project__pk__in=self.project_pks, role=role, status=status
@@ -164,8 +165,8 @@ class ProjectRenewalProjectSelectionForm(forms.Form):
         computing_allowance_interface = ComputingAllowanceInterface()
         self.computing_allowance = ComputingAllowance(self.computing_allowance)
 
-        role = ProjectUserRoleChoice.objects.get(name='Principal Investigator')
-        status = ProjectUserStatusChoice.objects.get(name='Active')
+        role = get_choice(ProjectUserRoleChoice, 'Principal Investigator')
+        status = get_choice(ProjectUserStatusChoice, 'Active')
 
         project_pks = list(
             ProjectUser.objects.select_related(
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.5 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0022_project_allocation_request_billing_activity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savioprojectallocationrequest',
+            index=models.Index(fields=['status', 'request_time'], name='project_sav_status__e2de26_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vectorprojectallocationrequest',
+            index=models.Index(fields=['status', 'modified'], name='project_vec_status__743b3e_idx'),
+        ),
+    ]
@@ -12,6 +12,7 @@ from model_utils.models import TimeStampedModel
 from simple_history.models import HistoricalRecords
 
 from coldfront.core.field_of_science.models import FieldOfScience
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import import_from_settings
 
 PROJECT_ENABLE_PROJECT_REVIEW = import_from_settings(
@@ -67,8 +68,8 @@ We do not have information about your research. Please provide a detailed descri
         if self.pk:
             old_obj = Project.objects.get(pk=self.pk)
             if old_obj.status.name != self.status.name:
-                pending_status = ProjectUserStatusChoice.objects.get(
-                    name='Pending - Add')
+                pending_status = get_choice(
+                    ProjectUserStatusChoice, 'Pending - Add')
                 if self.status.name == 'Active':
                     # If the status changed to 'Active', create another join
                     # request, since only the latest created request is
@@ -91,8 +92,8 @@ We do not have information about your research. Please provide a detailed descri
                 elif self.status.name == 'Denied':
                     # If the status changed to 'Denied', deny all pending
                     # join requests.
-                    denied_status = ProjectUserStatusChoice.objects.get(
-                        name='Denied')
+                    denied_status = get_choice(
+                        ProjectUserStatusChoice, 'Denied')
                     self.projectuser_set.filter(
                         status=pending_status).update(status=denied_status)
 
@@ -177,8 +178,7 @@ We do not have information about your research. Please provide a detailed descri
     def is_pooled(self):
         """Return whether this project is a pooled project. In
         particular, it is pooled if it has more than one PI."""
-        pi_role = ProjectUserRoleChoice.objects.get(
-            name='Principal Investigator')
+        pi_role = get_choice(ProjectUserRoleChoice, 'Principal Investigator')
         return self.projectuser_set.filter(role=pi_role).count() > 1
 
     def managers_and_pis_emails(self):
@@ -536,6 +536,11 @@ class SavioProjectAllocationRequest(TimeStampedModel):
     class Meta:
         verbose_name = 'Savio Project Allocation Request'
         verbose_name_plural = 'Savio Project Allocation Requests'
+        # Match the request list views, which filter requests by status and
+        # may order them by request time.
+        indexes = [
+            models.Index(fields=['status', 'request_time']),
+        ]
 
 
 class VectorProjectAllocationRequest(TimeStampedModel):
@@ -603,6 +608,10 @@ class VectorProjectAllocationRequest(TimeStampedModel):
     class Meta:
         verbose_name = 'Vector Project Allocation Request'
         verbose_name_plural = 'Vector Project Allocation Requests'
+        # Vector requests have no request time; they are dated by modified.
+        indexes = [
+            models.Index(fields=['status', 'modified']),
+        ]
 
 
 class ProjectUserRemovalRequestStatusChoice(TimeStampedModel):
@@ -1,9 +1,15 @@
+from unittest.mock import patch
+
 from coldfront.core.project.models import ProjectAllocationRequestStatusChoice
 from coldfront.core.project.tests.utils import create_project_and_request
 from coldfront.core.project.utils_.renewal_utils import get_current_allowance_year_period
+from coldfront.core.project.views_.new_project_views.approval_views import SavioProjectRequestListView
 from coldfront.core.utils.tests.test_base import TestBase
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.html import escape
 
 
 class TestViewMixin(object):
@@ -160,3 +166,53 @@ class TestSavioProjectRequestPendingListView(TestViewMixin, TestBase):
         """Test that the correct type is displayed on the page."""
         response = self.client.get(self.url)
         self.assertContains(response, 'Pending New Project Requests')
+
+    def test_pagination(self):
+        """Test that requests are split into pages, ordered as
+        requested."""
+        with patch.object(SavioProjectRequestListView, 'paginate_by', 2):
+            response = self.client.get(
+                self.url, {'order_by': 'id', 'direction': 'des'})
+            self.assertEqual(
+                list(response.context['savio_project_request_list']),
+                [self.request_c, self.request_b])
+            self.assertContains(response, 'Page 1 of 2')
+            self.assertEqual(
+                response.context['order_parameters'],
+                'order_by=id&direction=des')
+
+            response = self.client.get(
+                self.url, {'page': 2, 'order_by': 'id', 'direction': 'des'})
+            self.assertEqual(
+                list(response.context['savio_project_request_list']),
+                [self.request_a])
+
+    def test_order_parameters_encoded(self):
+        """Test that the ordering parameters preserved in pagination
+        links are URL-encoded."""
+        with patch.object(SavioProjectRequestListView, 'paginate_by', 2):
+            response = self.client.get(
+                self.url, {'order_by': 'id', 'direction': 'des&page=2"><'})
+        order_parameters = 'order_by=id&direction=des%26page%3D2%22%3E%3C'
+        self.assertEqual(
+            response.context['order_parameters'], order_parameters)
+        self.assertContains(response, f'{escape(order_parameters)}"')
+        self.assertNotContains(response, 'page=2"><')
+
+    def test_num_queries_independent_of_num_requests(self):
+        """Test that the number of queries made does not depend on the
+        number of requests displayed."""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        num_queries = len(context.captured_queries)
+
+        computing_allowance = TestBase.get_fca_computing_allowance()
+        allocation_period = get_current_allowance_year_period()
+        for i in range(3):
+            create_project_and_request(
+                f'project_{i}', 'New', computing_allowance,
+                allocation_period, self.user_a, self.user_b, 'Under Review')
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            len(response.context['savio_project_request_list']), 6)
@@ -4,6 +4,8 @@ from coldfront.core.project.models import ProjectUser
 from coldfront.core.project.models import ProjectUserRoleChoice
 from coldfront.core.project.models import ProjectUserStatusChoice
 from coldfront.core.utils.tests.test_base import TestBase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from urllib.parse import urlencode
 
@@ -92,4 +94,25 @@ class TestProjectListView(TestBase):
         self.assertEqual(expected_num_successes, actual_num_successes)
         self.assertEqual(expected_num_failures, actual_num_failures)
 
+    def test_num_queries_constant(self):
+        """Test that the number of queries issued to list Projects does
+        not depend on the number of Projects listed."""
+        url = self.project_list_url()
+
+        def num_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        self.create_active_project_with_pi('fc_project_0', self.user)
+        expected_num_queries = num_queries()
+        for i in range(1, 6):
+            self.create_active_project_with_pi(f'fc_project_{i}', self.user)
+        self.assertEqual(num_queries(), expected_num_queries)
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['projects_count'], 6)
+        self.assertContains(response, self.user.username)
+
     # TODO
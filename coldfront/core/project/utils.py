@@ -1,17 +1,39 @@
+from collections import defaultdict
+
+from django.core.exceptions import MultipleObjectsReturned
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
+from django.utils.module_loading import import_string
 from flags.state import flag_enabled
+from simple_history.utils import bulk_update_with_history
 
 from coldfront.api.statistics.utils import get_accounting_allocation_objects
+from coldfront.core.allocation.models import ALLOCATION_FUNCS_ON_EXPIRE
+from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationAttribute
+from coldfront.core.allocation.models import AllocationAttributeType
+from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationAttributeUsageDelta
 from coldfront.core.allocation.models import AllocationStatusChoice
+from coldfront.core.allocation.models import AllocationUser
+from coldfront.core.allocation.models import AllocationUserAttribute
+from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.allocation.models import AllocationUserAttributeUsageDelta
 from coldfront.core.allocation.utils import get_project_compute_resource_name
+from coldfront.core.allocation.utils_.accounting_cache_utils import invalidate_project_balances
 from coldfront.core.allocation.utils_.accounting_utils import set_service_units
 from coldfront.core.project.models import Project
 from coldfront.core.project.models import ProjectStatusChoice
+from coldfront.core.project.models import ProjectUser
 from coldfront.core.resource.utils import get_compute_resource_names
 from coldfront.core.resource.utils import get_primary_compute_resource_name
+from coldfront.core.statistics.models import ProjectTransaction
+from coldfront.core.statistics.models import ProjectUserTransaction
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import display_time_zone_current_date
 from coldfront.core.utils.common import import_from_settings
 from coldfront.core.utils.common import project_detail_url
+from coldfront.core.utils.common import utc_now_offset_aware
 from coldfront.core.utils.mail import send_email_template
 from django.conf import settings
 from django.db.models import Case, CharField, F, Value, When
@@ -190,12 +212,12 @@ def deactivate_project_and_allocation(project, change_reason=None):
     if change_reason is None:
         change_reason = 'Zeroing service units during allocation expiration.'
 
-    project.status = ProjectStatusChoice.objects.get(name='Inactive')
+    project.status = get_choice(ProjectStatusChoice, 'Inactive')
 
     accounting_allocation_objects = get_accounting_allocation_objects(
         project, enforce_allocation_active=False)
     allocation = accounting_allocation_objects.allocation
-    allocation.status = AllocationStatusChoice.objects.get(name='Expired')
+    allocation.status = get_choice(AllocationStatusChoice, 'Expired')
     allocation.start_date = display_time_zone_current_date()
     allocation.end_date = None
 
@@ -215,6 +237,216 @@ def deactivate_project_and_allocation(project, change_reason=None):
         set_service_units(accounting_allocation_objects, **set_su_kwargs)
 
 
+def deactivate_projects_and_allocations(projects, change_reason=None):
+    """Perform the updates of deactivate_project_and_allocation for
+    each of the given Projects, using a number of queries that does not
+    depend on the number of Projects or their users.
+
+    A Project whose "CLUSTER_NAME Compute" Allocation, or whose
+    Allocation's Service Units attributes or usages, do not exist as
+    expected is not deactivated. All other Projects are deactivated in
+    a single transaction.
+
+    Parameters:
+        - projects (iterable of Project)
+        - change_reason (str or None): An optional reason to set in
+                                       created historical objects for
+                                       Service Units
+
+    Returns:
+        - A dictionary mapping the primary keys of Projects that were
+          not deactivated to the exceptions explaining why
+
+    Raises:
+        - AssertionError
+    """
+    projects = list(projects)
+    for project in projects:
+        assert isinstance(project, Project)
+
+    if change_reason is None:
+        change_reason = 'Zeroing service units during allocation expiration.'
+
+    errors_by_project_pk = {}
+
+    allocations_by_project_pk = defaultdict(list)
+    for allocation in Allocation.objects.select_related('status').filter(
+            project__in=projects,
+            resources__name=get_primary_compute_resource_name()):
+        allocations_by_project_pk[allocation.project_id].append(allocation)
+    allocations_by_pk = {}
+    for project in projects:
+        try:
+            allocation = _get_only(
+                allocations_by_project_pk[project.pk], Allocation)
+        except (MultipleObjectsReturned, ObjectDoesNotExist) as e:
+            errors_by_project_pk[project.pk] = e
+        else:
+            allocations_by_pk[allocation.pk] = allocation
+
+    service_units_type = get_choice(AllocationAttributeType, 'Service Units')
+
+    attributes_by_allocation_pk = defaultdict(list)
+    for attribute in AllocationAttribute.objects.select_related(
+            'allocationattributeusage').filter(
+                allocation__in=list(allocations_by_pk),
+                allocation_attribute_type=service_units_type):
+        attributes_by_allocation_pk[attribute.allocation_id].append(attribute)
+    user_attributes_by_allocation_pk = defaultdict(list)
+    for user_attribute in AllocationUserAttribute.objects.select_related(
+            'allocation_user', 'allocationuserattributeusage').filter(
+                allocation__in=list(allocations_by_pk),
+                allocation_attribute_type=service_units_type):
+        user_attributes_by_allocation_pk[user_attribute.allocation_id].append(
+            user_attribute)
+
+    allocations, attributes, usages = [], [], []
+    user_attributes, user_usages = [], []
+    for allocation_pk, allocation in allocations_by_pk.items():
+        try:
+            attribute = _get_only(
+                attributes_by_allocation_pk[allocation_pk],
+                AllocationAttribute)
+            usage = attribute.allocationattributeusage
+            allocation_user_attributes = \
+                user_attributes_by_allocation_pk[allocation_pk]
+            allocation_user_usages = [
+                user_attribute.allocationuserattributeusage
+                for user_attribute in allocation_user_attributes]
+        except (MultipleObjectsReturned, ObjectDoesNotExist) as e:
+            errors_by_project_pk[allocation.project_id] = e
+            continue
+        allocations.append(allocation)
+        attributes.append(attribute)
+        usages.append(usage)
+        user_attributes.extend(allocation_user_attributes)
+        user_usages.extend(allocation_user_usages)
+
+    projects = [
+        project for project in projects
+        if project.pk not in errors_by_project_pk]
+    if not projects:
+        return errors_by_project_pk
+
+    # A ProjectUser may not exist for an AllocationUser who was removed from
+    # the Project. Only add transactions for those that exist.
+    project_user_pks = {
+        (project_pk, user_pk): project_user_pk
+        for project_pk, user_pk, project_user_pk in
+        ProjectUser.objects.filter(project__in=projects).values_list(
+            'project_id', 'user_id', 'pk')}
+
+    now = utc_now_offset_aware()
+    current_date = display_time_zone_current_date()
+    num_service_units = settings.ALLOCATION_MIN
+    inactive_status = get_choice(ProjectStatusChoice, 'Inactive')
+    expired_status = get_choice(AllocationStatusChoice, 'Expired')
+
+    newly_expired_allocation_pks = []
+    for project in projects:
+        project.status = inactive_status
+        project.modified = now
+    for allocation in allocations:
+        if allocation.status.name != expired_status.name:
+            newly_expired_allocation_pks.append(allocation.pk)
+        allocation.status = expired_status
+        allocation.start_date = current_date
+        allocation.end_date = None
+        allocation.modified = now
+    for attribute in attributes + user_attributes:
+        attribute.value = str(num_service_units)
+        attribute.modified = now
+    for usage in usages + user_usages:
+        usage.value = num_service_units
+        usage.modified = now
+
+    project_transactions = [
+        ProjectTransaction(
+            project_id=project.pk,
+            date_time=now,
+            allocation=num_service_units)
+        for project in projects]
+    project_user_transactions = []
+    for user_attribute in user_attributes:
+        key = (
+            allocations_by_pk[user_attribute.allocation_id].project_id,
+            user_attribute.allocation_user.user_id)
+        if key in project_user_pks:
+            project_user_transactions.append(
+                ProjectUserTransaction(
+                    project_user_id=project_user_pks[key],
+                    date_time=now,
+                    allocation=num_service_units))
+
+    with transaction.atomic():
+        bulk_update_with_history(
+            projects, Project, ['status', 'modified'], default_date=now)
+        bulk_update_with_history(
+            allocations, Allocation,
+            ['status', 'start_date', 'end_date', 'modified'],
+            default_date=now)
+        for allocation_pk in newly_expired_allocation_pks:
+            for func_string in ALLOCATION_FUNCS_ON_EXPIRE:
+                import_string(func_string)(allocation_pk)
+
+        for model, objs in ((AllocationAttribute, attributes),
+                            (AllocationAttributeUsage, usages),
+                            (AllocationUserAttribute, user_attributes),
+                            (AllocationUserAttributeUsage, user_usages)):
+            bulk_update_with_history(
+                objs, model, ['value', 'modified'],
+                default_change_reason=change_reason, default_date=now)
+
+        # Pending deltas from the usage ledger are superseded by the new
+        # values.
+        AllocationAttributeUsageDelta.objects.filter(
+            allocation_attribute_usage__in=usages).delete()
+        AllocationUserAttributeUsageDelta.objects.filter(
+            allocation_user_attribute_usage__in=user_usages).delete()
+
+        ProjectTransaction.objects.bulk_create(project_transactions)
+        ProjectUserTransaction.objects.bulk_create(project_user_transactions)
+
+        # Bulk updates do not send the signals that invalidate cached
+        # balances and enqueue changes to Slurm associations.
+        for project in projects:
+            invalidate_project_balances(project.name)
+            transaction.on_commit(
+                lambda name=project.name: invalidate_project_balances(name))
+        _enqueue_slurm_association_deltas(newly_expired_allocation_pks)
+
+    return errors_by_project_pk
+
+
+def _enqueue_slurm_association_deltas(allocation_pks):
+    """If the Slurm plugin applies changes to associations as they
+    happen, enqueue the re-evaluation of the associations of the users
+    of the Allocations with the given primary keys."""
+    if not ('coldfront.plugins.slurm' in settings.INSTALLED_APPS and
+            getattr(settings, 'SLURM_ENABLE_SIGNALS', False)):
+        return
+    from coldfront.plugins.slurm.signals import enqueue_association_deltas
+    allocation_user_pks = list(
+        AllocationUser.objects.filter(
+            allocation__in=allocation_pks).values_list('pk', flat=True))
+    if allocation_user_pks:
+        enqueue_association_deltas(allocation_user_pks)
+
+
+def _get_only(objs, model):
+    """Return the only object in the given list of instances of the
+    given model, raising the same exceptions as model.objects.get if
+    there is not exactly one."""
+    if not objs:
+        raise model.DoesNotExist(
+            f'{model._meta.object_name} matching query does not exist.')
+    if len(objs) > 1:
+        raise model.MultipleObjectsReturned(
+            f'get() returned more than one {model._meta.object_name} -- it '
+            f'returned {len(objs)}!')
+    return objs[0]
+
+
 def is_primary_cluster_project(project):
     """Return the Project is associated with the primary cluster."""
     project_compute_resource_name = get_project_compute_resource_name(project)
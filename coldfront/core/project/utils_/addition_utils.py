@@ -12,6 +12,7 @@ from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAl
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterfaceError
 from coldfront.core.statistics.models import ProjectTransaction
 from coldfront.core.statistics.models import ProjectUserTransaction
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import project_detail_url
 from coldfront.core.utils.common import utc_now_offset_aware
 from coldfront.core.utils.mail import send_email_template
@@ -36,8 +37,8 @@ class AllocationAdditionRunnerBase(object):
         """Store the given AllocationAdditionRequest. If it has an
         unexpected status, raise an error."""
         self.request_obj = request_obj
-        expected_status = AllocationAdditionRequestStatusChoice.objects.get(
-            name='Under Review')
+        expected_status = get_choice(
+            AllocationAdditionRequestStatusChoice, 'Under Review')
         self.assert_request_status(expected_status)
 
     def assert_request_status(self, expected_status):
@@ -61,7 +62,7 @@ class AllocationAdditionDenialRunner(AllocationAdditionRunnerBase):
     def deny_request(self):
         """Set the status of the request to 'Denied'."""
         self.request_obj.status = \
-            AllocationAdditionRequestStatusChoice.objects.get(name='Denied')
+            get_choice(AllocationAdditionRequestStatusChoice, 'Denied')
         self.request_obj.save()
 
     def run(self):
@@ -115,7 +116,7 @@ class AllocationAdditionProcessingRunner(AllocationAdditionRunnerBase):
         """Set the status of the request to 'Complete' and set its
         completion_time."""
         self.request_obj.status = \
-            AllocationAdditionRequestStatusChoice.objects.get(name='Complete')
+            get_choice(AllocationAdditionRequestStatusChoice, 'Complete')
         self.request_obj.completion_time = utc_now_offset_aware()
         self.request_obj.save()
 
@@ -225,7 +226,7 @@ def can_project_purchase_service_units(project):
 def has_pending_allocation_addition_request(project):
     """Return whether the given Project has an 'Under Review'
     AllocationAdditionRequest."""
-    under_review_status = AllocationAdditionRequestStatusChoice.objects.get(
-        name='Under Review')
+    under_review_status = get_choice(
+        AllocationAdditionRequestStatusChoice, 'Under Review')
     return AllocationAdditionRequest.objects.filter(
         project=project, status=under_review_status).exists()
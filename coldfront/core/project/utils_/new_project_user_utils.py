@@ -27,6 +27,7 @@ from coldfront.core.resource.utils import get_computing_allowance_project_prefix
 from coldfront.core.user.utils_.host_user_utils import eligible_host_project_users
 from coldfront.core.user.utils_.host_user_utils import lbl_email_address
 from coldfront.core.user.utils_.host_user_utils import needs_host
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.email.email_strategy import validate_email_strategy_or_get_default
 
 
@@ -48,8 +49,8 @@ def add_vector_user_to_designated_savio_project(user_obj, email_strategy=None):
     project_name = settings.SAVIO_PROJECT_FOR_VECTOR_USERS
     project_obj = Project.objects.get(name=project_name)
 
-    user_role = ProjectUserRoleChoice.objects.get(name='User')
-    active_status = ProjectUserStatusChoice.objects.get(name='Active')
+    user_role = get_choice(ProjectUserRoleChoice, 'User')
+    active_status = get_choice(ProjectUserStatusChoice, 'Active')
 
     project_user_exists = ProjectUser.objects.filter(
         project=project_obj, user=user_obj).exists()
@@ -110,7 +111,7 @@ class NewProjectUserRunner(ABC):
         assert isinstance(project_user_obj, ProjectUser)
         assert (
             project_user_obj.status ==
-            ProjectUserStatusChoice.objects.get(name='Active'))
+            get_choice(ProjectUserStatusChoice, 'Active'))
         assert isinstance(source, NewProjectUserSource)
         self._project_user_obj = project_user_obj
 
@@ -263,8 +264,8 @@ class LRCNewProjectUserRunner(NewProjectUserRunner):
     def _get_allocation_billing_attribute(self):
         """Return the AllocationAttribute with type 'Billing Activity'
         associated with the Allocation, which is expected to exist."""
-        allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Billing Activity')
+        allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Billing Activity')
         return self._allocation_obj.allocationattribute_set.get(
             allocation_attribute_type=allocation_attribute_type)
 
@@ -272,8 +273,8 @@ class LRCNewProjectUserRunner(NewProjectUserRunner):
         """Return the AllocationUserAttribute with type 'Billing
         Activity' associated with the AllocationUser if it exists, else
         None."""
-        allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Billing Activity')
+        allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Billing Activity')
         try:
             return self._allocation_user_obj.allocationuserattribute_set.get(
                 allocation_attribute_type=allocation_attribute_type)
@@ -304,8 +305,8 @@ class LRCNewProjectUserRunner(NewProjectUserRunner):
             user_profile.billing_activity = billing_activity
             user_profile.save()
 
-        allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Billing Activity')
+        allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Billing Activity')
         allocation_user_billing_attribute = \
             self._get_allocation_user_billing_attribute()
         if not isinstance(
@@ -17,6 +17,7 @@ from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAl
 from coldfront.core.statistics.models import ProjectTransaction
 from coldfront.core.statistics.models import ProjectUserTransaction
 from coldfront.core.user.utils import account_activation_url
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import display_time_zone_current_date
 from coldfront.core.utils.common import import_from_settings
 from coldfront.core.utils.common import project_detail_url
@@ -140,14 +141,14 @@ class ProjectDenialRunner(object):
     def deny_project(self):
         """Set the Project's status to 'Denied'."""
         project = self.request_obj.project
-        project.status = ProjectStatusChoice.objects.get(name='Denied')
+        project.status = get_choice(ProjectStatusChoice, 'Denied')
         project.save()
         return project
 
     def deny_request(self):
         """Set the status of the request to 'Denied'."""
         self.request_obj.status = \
-            ProjectAllocationRequestStatusChoice.objects.get(name='Denied')
+            get_choice(ProjectAllocationRequestStatusChoice, 'Denied')
         self.request_obj.save()
 
     def send_email(self):
@@ -192,7 +193,7 @@ class ProjectProcessingRunner(object):
     def activate_project(self):
         """Set the Project's status to 'Active'."""
         project = self.request_obj.project
-        project.status = ProjectStatusChoice.objects.get(name='Active')
+        project.status = get_choice(ProjectStatusChoice, 'Active')
         project.save()
         return project
 
@@ -200,8 +201,8 @@ class ProjectProcessingRunner(object):
         """Set the status of the request to 'Approved - Complete' and
         set its completion_time."""
         self.request_obj.status = \
-            ProjectAllocationRequestStatusChoice.objects.get(
-                name='Approved - Complete')
+            get_choice(
+                ProjectAllocationRequestStatusChoice, 'Approved - Complete')
         self.request_obj.completion_time = utc_now_offset_aware()
         self.request_obj.save()
 
@@ -219,8 +220,8 @@ class ProjectProcessingRunner(object):
         """Store the BillingActivity of the request in the given
         Allocation's AllocationAttribute of type 'Billing Activity',
         creating it if it does not exist, and updating it if it does."""
-        allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Billing Activity')
+        allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Billing Activity')
         value = str(self.request_obj.billing_activity.pk)
         AllocationAttribute.objects.update_or_create(
             allocation_attribute_type=allocation_attribute_type,
@@ -282,8 +283,8 @@ class SavioProjectApprovalRunner(object):
         """Set the status of the request to 'Approved - Scheduled' and
         set its approval_time."""
         self.request_obj.status = \
-            ProjectAllocationRequestStatusChoice.objects.get(
-                name='Approved - Scheduled')
+            get_choice(
+                ProjectAllocationRequestStatusChoice, 'Approved - Scheduled')
         self.request_obj.approval_time = utc_now_offset_aware()
         self.request_obj.save()
 
@@ -319,7 +320,7 @@ class SavioProjectProcessingRunner(ProjectProcessingRunner):
         pool = self.request_obj.pool
 
         allocation = get_project_compute_allocation(project)
-        allocation.status = AllocationStatusChoice.objects.get(name='Active')
+        allocation.status = get_choice(AllocationStatusChoice, 'Active')
         # If this is a new Project, set its Allocation's start dates. Always
         # set its end date.
         if not pool:
@@ -328,8 +329,8 @@ class SavioProjectProcessingRunner(ProjectProcessingRunner):
         allocation.save()
 
         # Set or increase the allocation's service units.
-        allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Service Units')
+        allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Service Units')
         allocation_attribute, _ = \
             AllocationAttribute.objects.get_or_create(
                 allocation_attribute_type=allocation_attribute_type,
@@ -391,7 +392,7 @@ def savio_request_state_status(savio_request):
     if (eligibility['status'] == 'Denied' or
             readiness['status'] == 'Denied' or
             other['timestamp']):
-        return ProjectAllocationRequestStatusChoice.objects.get(name='Denied')
+        return get_choice(ProjectAllocationRequestStatusChoice, 'Denied')
 
     # If an MOU is required, retrieve its signed status.
     computing_allowance_wrapper = ComputingAllowance(
@@ -406,14 +407,13 @@ def savio_request_state_status(savio_request):
     if (eligibility['status'] == 'Pending' or
             readiness['status'] == 'Pending' or
             memorandum_not_signed):
-        return ProjectAllocationRequestStatusChoice.objects.get(
-            name='Under Review')
+        return get_choice(ProjectAllocationRequestStatusChoice, 'Under Review')
 
     # The request has been approved, and is processing, scheduled, or complete.
     # The states 'Approved - Scheduled' and 'Approved - Complete' should only
     # be set once the request is scheduled for activation or activated.
-    return ProjectAllocationRequestStatusChoice.objects.get(
-        name='Approved - Processing')
+    return get_choice(
+        ProjectAllocationRequestStatusChoice, 'Approved - Processing')
 
 
 def send_new_project_request_admin_notification_email(request):
@@ -671,7 +671,7 @@ class VectorProjectProcessingRunner(ProjectProcessingRunner):
         """Perform allocation-related handling."""
         project = self.request_obj.project
         allocation = get_project_compute_allocation(project)
-        allocation.status = AllocationStatusChoice.objects.get(name='Active')
+        allocation.status = get_choice(AllocationStatusChoice, 'Active')
         allocation.start_date = utc_now_offset_aware()
         allocation.save()
         return allocation, Decimal(settings.ALLOCATION_MIN)
@@ -721,15 +721,14 @@ def vector_request_state_status(vector_request):
 
     # The requester was ineligible.
     if eligibility['status'] == 'Denied':
-        return ProjectAllocationRequestStatusChoice.objects.get(name='Denied')
+        return get_choice(ProjectAllocationRequestStatusChoice, 'Denied')
 
     # Requester eligibility is not yet determined.
     if eligibility['status'] == 'Pending':
-        return ProjectAllocationRequestStatusChoice.objects.get(
-            name='Under Review')
+        return get_choice(ProjectAllocationRequestStatusChoice, 'Under Review')
 
     # The request has been approved, and is processing or complete. The final
     # state, 'Approved - Complete', should only be set once the request is
     # finally activated.
-    return ProjectAllocationRequestStatusChoice.objects.get(
-        name='Approved - Processing')
+    return get_choice(
+        ProjectAllocationRequestStatusChoice, 'Approved - Processing')
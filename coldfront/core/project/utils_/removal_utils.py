@@ -11,6 +11,7 @@ from coldfront.core.allocation.utils import get_project_compute_allocation
 from coldfront.core.project.models import (ProjectUserRemovalRequestStatusChoice,
                                            ProjectUserRemovalRequest,
                                            ProjectUserStatusChoice)
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.mail import send_email_template
 from coldfront.core.utils.common import import_from_settings
 
@@ -31,8 +32,10 @@ class ProjectRemovalRequestRunner(object):
         self.success_messages = []
 
     def run(self):
-        pending_status = ProjectUserRemovalRequestStatusChoice.objects.get(name='Pending')
-        processing_status = ProjectUserRemovalRequestStatusChoice.objects.get(name='Processing')
+        pending_status = get_choice(
+            ProjectUserRemovalRequestStatusChoice, 'Pending')
+        processing_status = get_choice(
+            ProjectUserRemovalRequestStatusChoice, 'Processing')
         flag = True
         removal_request = None
 
@@ -78,7 +81,8 @@ class ProjectRemovalRequestRunner(object):
             removal_request.save()
 
             proj_user_obj = self.proj_obj.projectuser_set.get(user=self.user_obj)
-            proj_user_obj.status = ProjectUserStatusChoice.objects.get(name='Pending - Remove')
+            proj_user_obj.status = get_choice(
+                ProjectUserStatusChoice, 'Pending - Remove')
             proj_user_obj.save()
 
             message = f'Successfully created project removal request for ' \
@@ -154,7 +158,7 @@ class ProjectRemovalRequestProcessingRunner(object):
         assert isinstance(request_obj, ProjectUserRemovalRequest)
         assert (
             request_obj.status ==
-            ProjectUserRemovalRequestStatusChoice.objects.get(name='Complete'))
+            get_choice(ProjectUserRemovalRequestStatusChoice, 'Complete'))
         self._request_obj = request_obj
         self._removed_user = self._request_obj.project_user.user
         self._project = self._request_obj.project_user.project
@@ -193,7 +197,7 @@ class ProjectRemovalRequestProcessingRunner(object):
 
     def _remove_user_from_project(self):
         """Set the ProjectUser's status to 'Removed'."""
-        removed_status = ProjectUserStatusChoice.objects.get(name='Removed')
+        removed_status = get_choice(ProjectUserStatusChoice, 'Removed')
         project_user = self._request_obj.project_user
         project_user.status = removed_status
         project_user.save()
@@ -221,8 +225,7 @@ class ProjectRemovalRequestProcessingRunner(object):
             logger.error(message)
             return
 
-        removed_status = AllocationUserStatusChoice.objects.get(
-            name='Removed')
+        removed_status = get_choice(AllocationUserStatusChoice, 'Removed')
         allocation_user = allocation_users.first()
         allocation_user.status = removed_status
         allocation_user.save()
@@ -232,8 +235,8 @@ class ProjectRemovalRequestProcessingRunner(object):
             f'"{removed_status.name}".')
         self._success_messages.append(message)
 
-        cluster_account_status_type = AllocationAttributeType.objects.get(
-            name='Cluster Account Status')
+        cluster_account_status_type = get_choice(
+            AllocationAttributeType, 'Cluster Account Status')
         try:
             cluster_account_status = \
                 allocation_user.allocationuserattribute_set.get(
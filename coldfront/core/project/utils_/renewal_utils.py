@@ -1,4 +1,5 @@
 from coldfront.api.statistics.utils import set_project_user_allocation_value
+from coldfront.core.allocation.models import Allocation
 from coldfront.core.allocation.models import AllocationAttribute
 from coldfront.core.allocation.models import AllocationAttributeType
 from coldfront.core.allocation.models import AllocationPeriod
@@ -18,6 +19,7 @@ from coldfront.core.resource.utils_.allowance_utils.computing_allowance import C
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 from coldfront.core.statistics.models import ProjectTransaction
 from coldfront.core.statistics.models import ProjectUserTransaction
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import display_time_zone_current_date
 from coldfront.core.utils.common import import_from_settings
 from coldfront.core.utils.common import project_detail_url
@@ -140,8 +142,8 @@ def get_pi_active_unique_project(pi_user, computing_allowance,
     allowance_resource = computing_allowance.get_resource()
 
     # Check AllocationRenewalRequests.
-    renewal_request_status = AllocationRenewalRequestStatusChoice.objects.get(
-        name='Complete')
+    renewal_request_status = get_choice(
+        AllocationRenewalRequestStatusChoice, 'Complete')
     renewal_requests = AllocationRenewalRequest.objects.filter(
         computing_allowance=allowance_resource,
         allocation_period=allocation_period,
@@ -160,8 +162,7 @@ def get_pi_active_unique_project(pi_user, computing_allowance,
 
     # Check new project requests.
     new_project_request_status = \
-        ProjectAllocationRequestStatusChoice.objects.get(
-            name='Approved - Complete')
+        get_choice(ProjectAllocationRequestStatusChoice, 'Approved - Complete')
     new_project_requests = SavioProjectAllocationRequest.objects.filter(
         computing_allowance=allowance_resource,
         allocation_period=allocation_period,
@@ -556,8 +557,7 @@ def allocation_renewal_request_state_status(request):
     eligibility = state['eligibility']
     other = state['other']
 
-    denied_status = AllocationRenewalRequestStatusChoice.objects.get(
-        name='Denied')
+    denied_status = get_choice(AllocationRenewalRequestStatusChoice, 'Denied')
 
     # The request was denied for some other non-listed reason.
     if other['timestamp']:
@@ -575,8 +575,7 @@ def allocation_renewal_request_state_status(request):
             return denied_status
 
     # The request has not been denied, so it is under review.
-    return AllocationRenewalRequestStatusChoice.objects.get(
-        name='Under Review')
+    return get_choice(AllocationRenewalRequestStatusChoice, 'Under Review')
 
 
 class AllocationRenewalRunnerBase(object):
@@ -688,8 +687,8 @@ class AllocationRenewalApprovalRunner(AllocationRenewalRunnerBase):
     def __init__(self, request_obj, num_service_units, email_strategy=None):
         super().__init__(request_obj)
         self.request_obj.allocation_period.assert_not_ended()
-        expected_status = AllocationRenewalRequestStatusChoice.objects.get(
-            name='Under Review')
+        expected_status = get_choice(
+            AllocationRenewalRequestStatusChoice, 'Under Review')
         self.assert_request_status(expected_status)
         validate_num_service_units(num_service_units)
         self.num_service_units = num_service_units
@@ -705,7 +704,7 @@ class AllocationRenewalApprovalRunner(AllocationRenewalRunnerBase):
         """Set the status of the request to 'Approved' and set its
         approval_time."""
         self.request_obj.status = \
-            AllocationRenewalRequestStatusChoice.objects.get(name='Approved')
+            get_choice(AllocationRenewalRequestStatusChoice, 'Approved')
         self.request_obj.approval_time = utc_now_offset_aware()
         self.request_obj.save()
 
@@ -756,8 +755,8 @@ class AllocationRenewalDenialRunner(AllocationRenewalRunnerBase):
 
     def __init__(self, request_obj):
         super().__init__(request_obj)
-        unexpected_status = AllocationRenewalRequestStatusChoice.objects.get(
-            name='Complete')
+        unexpected_status = get_choice(
+            AllocationRenewalRequestStatusChoice, 'Complete')
         self.assert_request_not_status(unexpected_status)
 
     def run(self):
@@ -769,14 +768,14 @@ class AllocationRenewalDenialRunner(AllocationRenewalRunnerBase):
     def deny_post_project(self):
         """Set the post_project's status to 'Denied'."""
         project = self.request_obj.post_project
-        project.status = ProjectStatusChoice.objects.get(name='Denied')
+        project.status = get_choice(ProjectStatusChoice, 'Denied')
         project.save()
         return project
 
     def deny_request(self):
         """Set the status of the request to 'Denied'."""
         self.request_obj.status = \
-            AllocationRenewalRequestStatusChoice.objects.get(name='Denied')
+            get_choice(AllocationRenewalRequestStatusChoice, 'Denied')
         self.request_obj.save()
 
     def handle_unpooled_to_unpooled(self):
@@ -826,8 +825,8 @@ class AllocationRenewalProcessingRunner(AllocationRenewalRunnerBase):
         super().__init__(request_obj)
         self.request_obj.allocation_period.assert_started()
         self.request_obj.allocation_period.assert_not_ended()
-        expected_status = AllocationRenewalRequestStatusChoice.objects.get(
-            name='Approved')
+        expected_status = get_choice(
+            AllocationRenewalRequestStatusChoice, 'Approved')
         self.assert_request_status(expected_status)
         validate_num_service_units(num_service_units)
         self.num_service_units = num_service_units
@@ -862,7 +861,7 @@ class AllocationRenewalProcessingRunner(AllocationRenewalRunnerBase):
     @staticmethod
     def activate_project(project):
         """Set the given Project's status to 'Active'."""
-        status = ProjectStatusChoice.objects.get(name='Active')
+        status = get_choice(ProjectStatusChoice, 'Active')
         project.status = status
         project.save()
         return project
@@ -871,7 +870,7 @@ class AllocationRenewalProcessingRunner(AllocationRenewalRunnerBase):
         """Set the status of the request to 'Complete', set its number
         of service units, and set its completion_time."""
         self.request_obj.status = \
-            AllocationRenewalRequestStatusChoice.objects.get(name='Complete')
+            get_choice(AllocationRenewalRequestStatusChoice, 'Complete')
         self.request_obj.num_service_units = num_service_units
         self.request_obj.completion_time = utc_now_offset_aware()
         self.request_obj.save()
@@ -900,8 +899,8 @@ class AllocationRenewalProcessingRunner(AllocationRenewalRunnerBase):
                     f'under it.')
                 logger.error(message)
             else:
-                pi_project_user.role = ProjectUserRoleChoice.objects.get(
-                    name='User')
+                pi_project_user.role = get_choice(
+                    ProjectUserRoleChoice, 'User')
                 pi_project_user.save()
                 message = (
                     f'Demoted {pi.username} from \'Principal Investigator\' '
@@ -959,8 +958,11 @@ class AllocationRenewalProcessingRunner(AllocationRenewalRunnerBase):
         project = self.request_obj.post_project
         allocation_period = self.request_obj.allocation_period
 
-        allocation = get_project_compute_allocation(project)
-        allocation.status = AllocationStatusChoice.objects.get(name='Active')
+        # Lock the Allocation, so that concurrent requests under the same
+        # Project do not overwrite each other's service units.
+        allocation = Allocation.objects.select_for_update().get(
+            pk=get_project_compute_allocation(project).pk)
+        allocation.status = get_choice(AllocationStatusChoice, 'Active')
         # For the start and end dates, if the Project is not 'Active' or the
         # date is not set, set it.
         if old_project_status.name != 'Active' or not allocation.start_date:
@@ -970,10 +972,10 @@ class AllocationRenewalProcessingRunner(AllocationRenewalRunnerBase):
         allocation.save()
 
         # Increase the allocation's service units.
-        allocation_attribute_type = AllocationAttributeType.objects.get(
-            name='Service Units')
+        allocation_attribute_type = get_choice(
+            AllocationAttributeType, 'Service Units')
         allocation_attribute, _ = \
-            AllocationAttribute.objects.get_or_create(
+            AllocationAttribute.objects.select_for_update().get_or_create(
                 allocation_attribute_type=allocation_attribute_type,
                 allocation=allocation)
         existing_value = (
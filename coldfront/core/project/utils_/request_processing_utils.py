@@ -6,6 +6,7 @@ from coldfront.core.project.models import ProjectUserRoleChoice
 from coldfront.core.project.models import ProjectUserStatusChoice
 from coldfront.core.project.utils_.new_project_user_utils import NewProjectUserRunnerFactory
 from coldfront.core.project.utils_.new_project_user_utils import NewProjectUserSource
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.email.email_strategy import validate_email_strategy_or_get_default
 
 
@@ -21,9 +22,9 @@ def create_project_users(project, requester, pi, request_class,
     email_strategy = validate_email_strategy_or_get_default(
         email_strategy=email_strategy)
 
-    active_status = ProjectUserStatusChoice.objects.get(name='Active')
-    manager_role = ProjectUserRoleChoice.objects.get(name='Manager')
-    pi_role = ProjectUserRoleChoice.objects.get(name='Principal Investigator')
+    active_status = get_choice(ProjectUserStatusChoice, 'Active')
+    manager_role = get_choice(ProjectUserRoleChoice, 'Manager')
+    pi_role = get_choice(ProjectUserRoleChoice, 'Principal Investigator')
 
     is_requester_pi = requester.pk == pi.pk
     runners_to_run = []
@@ -6,7 +6,7 @@ from django.contrib.auth.models import User
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db import transaction
-from django.db.models import Case, CharField, Q, Value, When
+from django.db.models import Case, CharField, Prefetch, Q, Value, When
 from django.forms import formset_factory
 from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
@@ -51,6 +51,7 @@ from coldfront.core.resource.utils_.allowance_utils.computing_allowance import C
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 from coldfront.core.user.forms import UserSearchForm
 from coldfront.core.user.utils import CombinedUserSearch, access_agreement_signed
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import (get_domain_url, import_from_settings)
 from coldfront.core.utils.email.email_strategy import EnqueueEmailStrategy
 from coldfront.core.utils.mail import send_email, send_email_template
@@ -357,6 +358,15 @@ class ProjectListView(LoginRequiredMixin, ListView):
             ).order_by(order_by)
             projects = annotate_queryset_with_cluster_name(projects)
 
+        # Load the PIs of the displayed Projects in a single query.
+        projects = projects.prefetch_related(
+            Prefetch(
+                'projectuser_set',
+                queryset=ProjectUser.objects.filter(
+                    role__name='Principal Investigator'
+                ).select_related('user').order_by('user__username'),
+                to_attr='pi_project_users'))
+
         return projects.distinct()
 
     def get_context_data(self, **kwargs):
@@ -366,8 +376,9 @@ class ProjectListView(LoginRequiredMixin, ListView):
         # block access to joining projects until user-acess-agreement has been signed
         context['user_agreement_signed'] = self.request.user.userprofile.access_agreement_signed_date is not None
 
-        projects_count = self.get_queryset().count()
-        context['projects_count'] = projects_count
+        # Reuse the count computed by the paginator, rather than building and
+        # counting the queryset again.
+        context['projects_count'] = context['paginator'].count
 
         project_search_form = ProjectSearchForm(self.request.GET)
         if project_search_form.is_valid():
@@ -415,7 +426,7 @@ class ProjectListView(LoginRequiredMixin, ListView):
         # The "Renew a PI's Allowance" button should only be visible to
         # Managers and PIs.
         role_names = ['Manager', 'Principal Investigator']
-        status = ProjectUserStatusChoice.objects.get(name='Active')
+        status = get_choice(ProjectUserStatusChoice, 'Active')
         context['renew_allowance_visible'] = \
             ProjectUser.objects.filter(
                 user=self.request.user, role__name__in=role_names,
@@ -510,8 +521,9 @@ class ProjectArchivedListView(LoginRequiredMixin, UserPassesTestMixin,
     def get_context_data(self, **kwargs):
 
         context = super().get_context_data(**kwargs)
-        projects_count = self.get_queryset().count()
-        context['projects_count'] = projects_count
+        # Reuse the count computed by the paginator, rather than building and
+        # counting the queryset again.
+        context['projects_count'] = context['paginator'].count
         context['expand'] = False
 
         project_search_form = ProjectSearchForm(self.request.GET)
@@ -592,10 +604,9 @@ class ProjectArchiveProjectView(LoginRequiredMixin, UserPassesTestMixin, Templat
     def post(self, request, *args, **kwargs):
         pk = self.kwargs.get('pk')
         project = get_object_or_404(Project, pk=pk)
-        project_status_archive = ProjectStatusChoice.objects.get(
-            name='Archived')
-        allocation_status_expired = AllocationStatusChoice.objects.get(
-            name='Expired')
+        project_status_archive = get_choice(ProjectStatusChoice, 'Archived')
+        allocation_status_expired = get_choice(
+            AllocationStatusChoice, 'Expired')
         end_date = datetime.datetime.now()
         project.status = project_status_archive
         project.save()
@@ -621,15 +632,15 @@ class ProjectCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
 
     def form_valid(self, form):
         project_obj = form.save(commit=False)
-        form.instance.status = ProjectStatusChoice.objects.get(name='New')
+        form.instance.status = get_choice(ProjectStatusChoice, 'New')
         project_obj.save()
         self.object = project_obj
 
         project_user_obj = ProjectUser.objects.create(
             user=self.request.user,
             project=project_obj,
-            role=ProjectUserRoleChoice.objects.get(name='Manager'),
-            status=ProjectUserStatusChoice.objects.get(name='Active')
+            role=get_choice(ProjectUserRoleChoice, 'Manager'),
+            status=get_choice(ProjectUserStatusChoice, 'Active')
         )
 
         return super().form_valid(form)
@@ -754,7 +765,7 @@ class ProjectAddUsersSearchResultsView(LoginRequiredMixin, UserPassesTestMixin,
                 'Signed' if access_agreement_signed(user) else 'Unsigned')
             # add data for access agreements
             match.update(
-                {'role': ProjectUserRoleChoice.objects.get(name='User'),
+                {'role': get_choice(ProjectUserRoleChoice, 'User'),
                  'user_access_agreement': user_access_agreement_status})
 
         if matches:
@@ -849,7 +860,7 @@ class ProjectAddUsersView(LoginRequiredMixin, UserPassesTestMixin, View):
             user_access_agreement_status = (
                 'Signed' if access_agreement_signed(user) else 'Unsigned')
             match.update(
-                {'role': ProjectUserRoleChoice.objects.get(name='User'),
+                {'role': get_choice(ProjectUserRoleChoice, 'User'),
                  'user_access_agreement': user_access_agreement_status})
 
         formset = formset_factory(ProjectAddUserForm, max_num=len(matches))
@@ -860,10 +871,10 @@ class ProjectAddUsersView(LoginRequiredMixin, UserPassesTestMixin, View):
 
         added_users_count = 0
         if formset.is_valid() and allocation_form.is_valid():
-            project_user_active_status_choice = ProjectUserStatusChoice.objects.get(
-                name='Active')
-            allocation_user_active_status_choice = AllocationUserStatusChoice.objects.get(
-                name='Active')
+            project_user_active_status_choice = get_choice(
+                ProjectUserStatusChoice, 'Active')
+            allocation_user_active_status_choice = get_choice(
+                AllocationUserStatusChoice, 'Active')
             allocation_form_data = allocation_form.cleaned_data['allocation']
             if '__select_all__' in allocation_form_data:
                 allocation_form_data.remove('__select_all__')
@@ -1141,7 +1152,8 @@ class ProjectUserDetail(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
                 enable_notifications = form_data.get('enable_notifications')
 
                 old_role = project_user_obj.role
-                new_role = ProjectUserRoleChoice.objects.get(name=form_data.get('role'))
+                new_role = get_choice(
+                    ProjectUserRoleChoice, form_data.get('role'))
                 demotion = False
 
                 # demote manager to user role
@@ -1263,8 +1275,8 @@ class ProjectReviewView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         project_obj = get_object_or_404(Project, pk=self.kwargs.get('pk'))
         project_review_form = ProjectReviewForm(project_obj.pk, request.POST)
 
-        project_review_status_choice = ProjectReviewStatusChoice.objects.get(
-            name='Pending')
+        project_review_status_choice = get_choice(
+            ProjectReviewStatusChoice, 'Pending')
 
         if project_review_form.is_valid():
             form_data = project_review_form.cleaned_data
@@ -1338,8 +1350,8 @@ class ProjectReviewCompleteView(LoginRequiredMixin, UserPassesTestMixin, View):
         project_review_obj = get_object_or_404(
             ProjectReview, pk=project_review_pk)
 
-        project_review_status_completed_obj = ProjectReviewStatusChoice.objects.get(
-            name='Completed')
+        project_review_status_completed_obj = get_choice(
+            ProjectReviewStatusChoice, 'Completed')
         project_review_obj.status = project_review_status_completed_obj
         project_review_obj.project.project_needs_review = False
         project_review_obj.save()
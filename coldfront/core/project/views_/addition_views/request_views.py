@@ -8,6 +8,7 @@ from coldfront.core.project.utils_.addition_utils import can_project_purchase_se
 from coldfront.core.project.utils_.addition_utils import has_pending_allocation_addition_request
 from coldfront.core.project.utils_.permissions_utils import is_user_manager_or_pi_of_project
 from coldfront.core.user.utils import access_agreement_signed
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import utc_now_offset_aware
 from coldfront.core.utils.mail import send_email_template
 
@@ -176,8 +177,8 @@ class AllocationAdditionRequestView(LoginRequiredMixin, UserPassesTestMixin,
             request_kwargs = {
                 'requester': requester,
                 'project': project,
-                'status': AllocationAdditionRequestStatusChoice.objects.get(
-                    name='Under Review'),
+                'status': get_choice(
+                    AllocationAdditionRequestStatusChoice, 'Under Review'),
                 'num_service_units': num_service_units,
                 'request_time': utc_now_offset_aware(),
                 'extra_fields': extra_fields,
@@ -28,6 +28,7 @@ from coldfront.core.project.models import ProjectUserStatusChoice
 from coldfront.core.project.utils import send_project_join_request_denial_email
 from coldfront.core.project.utils_.new_project_user_utils import NewProjectUserRunnerFactory
 from coldfront.core.project.utils_.new_project_user_utils import NewProjectUserSource
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.email.email_strategy import EnqueueEmailStrategy
 
 
@@ -117,8 +118,8 @@ class ProjectReviewJoinRequestsView(LoginRequiredMixin, UserPassesTestMixin,
             messages.error(request, message)
             return self.redirect
 
-        project_user_status_choice = ProjectUserStatusChoice.objects.get(
-            name=status_name)
+        project_user_status_choice = get_choice(
+            ProjectUserStatusChoice, status_name)
 
         num_reviews = 0
         failed_usernames = []
@@ -29,6 +29,7 @@ from coldfront.core.project.utils import send_project_join_notification_email
 from coldfront.core.project.views import ProjectListView
 from coldfront.core.user.utils_.host_user_utils import is_lbl_employee
 from coldfront.core.user.utils_.host_user_utils import needs_host
+from coldfront.core.utils.choice_registry import get_choice
 
 
 logger = logging.getLogger(__name__)
@@ -50,8 +51,7 @@ class ProjectJoinView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
                 self.request, 'You must sign the User Access Agreement before you can join a project.')
             return False
 
-        inactive_project_status = ProjectStatusChoice.objects.get(
-            name='Inactive')
+        inactive_project_status = get_choice(ProjectStatusChoice, 'Inactive')
         if project_obj.status == inactive_project_status:
             message = (
                 f'Project {project_obj.name} is inactive, and may not be '
@@ -73,8 +73,10 @@ class ProjectJoinView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
                 messages.warning(self.request, message)
                 return False
 
-            pending_status = ProjectUserRemovalRequestStatusChoice.objects.get(name='Pending')
-            processing_status = ProjectUserRemovalRequestStatusChoice.objects.get(name='Processing')
+            pending_status = get_choice(
+                ProjectUserRemovalRequestStatusChoice, 'Pending')
+            processing_status = get_choice(
+                ProjectUserRemovalRequestStatusChoice, 'Processing')
 
             if ProjectUserRemovalRequest.objects. \
                     filter(project_user=project_user,
@@ -117,8 +119,8 @@ class ProjectJoinView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         project_obj = get_object_or_404(Project, pk=self.kwargs.get('pk'))
         user_obj = self.request.user
         project_users = project_obj.projectuser_set.filter(user=user_obj)
-        role = ProjectUserRoleChoice.objects.get(name='User')
-        status = ProjectUserStatusChoice.objects.get(name='Pending - Add')
+        role = get_choice(ProjectUserRoleChoice, 'User')
+        status = get_choice(ProjectUserStatusChoice, 'Pending - Add')
         reason = self.request.POST['reason']
 
         select_host_user_form = ProjectSelectHostUserForm(
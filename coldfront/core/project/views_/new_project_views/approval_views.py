@@ -20,6 +20,7 @@ from coldfront.core.project.utils_.new_project_utils import VectorProjectProcess
 from coldfront.core.project.utils_.new_project_utils import vector_request_state_status
 from coldfront.core.resource.utils_.allowance_utils.computing_allowance import ComputingAllowance
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+from coldfront.core.utils.choice_registry import get_choice_pk
 from coldfront.core.utils.common import display_time_zone_current_date
 from coldfront.core.utils.common import format_date_month_name_day_year
 from coldfront.core.utils.common import utc_now_offset_aware
@@ -40,11 +41,13 @@ from django.urls import reverse
 from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic import DetailView
-from django.views.generic.base import TemplateView
+from django.views.generic import ListView
 from django.views.generic.edit import FormView
 
 from flags.state import flag_enabled
 
+from urllib.parse import urlencode
+
 import iso8601
 import logging
 
@@ -54,13 +57,18 @@ import logging
 # =============================================================================
 
 
-class SavioProjectRequestListView(LoginRequiredMixin, TemplateView):
+class SavioProjectRequestListView(LoginRequiredMixin, ListView):
     template_name = 'project/project_request/savio/project_request_list.html'
     login_url = '/'
+    paginate_by = 30
+    context_object_name = 'savio_project_request_list'
     # Show completed requests if True; else, show pending requests.
     completed = False
 
     def get_queryset(self):
+        """Return either pending or completed requests. If the user is
+        a superuser, return all such requests. Otherwise, return only
+        those for which the user is a requester or PI."""
         order_by = self.request.GET.get('order_by')
         if order_by:
             direction = self.request.GET.get('direction')
@@ -72,32 +80,45 @@ class SavioProjectRequestListView(LoginRequiredMixin, TemplateView):
         else:
             order_by = 'id'
 
-        return annotate_queryset_with_allocation_period_not_started_bool(
-            SavioProjectAllocationRequest.objects.order_by(order_by))
-
-    def get_context_data(self, **kwargs):
-        """Include either pending or completed requests. If the user is
-        a superuser, show all such requests. Otherwise, show only those
-        for which the user is a requester or PI."""
-        context = super().get_context_data(**kwargs)
         args, kwargs = [], {}
-
-        request_list = self.get_queryset()
         user = self.request.user
         permission = 'project.view_savioprojectallocationrequest'
         if not (user.is_superuser or user.has_perm(permission)):
             args.append(Q(requester=user) | Q(pi=user))
         if self.completed:
-            status__name__in = [
+            status_names = [
                 'Approved - Complete', 'Approved - Scheduled', 'Denied']
         else:
-            status__name__in = ['Under Review', 'Approved - Processing']
-        kwargs['status__name__in'] = status__name__in
-        context['savio_project_request_list'] = request_list.filter(
-            *args, **kwargs)
+            status_names = ['Under Review', 'Approved - Processing']
+        # Filter on the primary keys of statuses, rather than joining to them,
+        # so that the (status, request_time) index may be used.
+        kwargs['status__in'] = [
+            get_choice_pk(ProjectAllocationRequestStatusChoice, name)
+            for name in status_names]
+
+        return annotate_queryset_with_allocation_period_not_started_bool(
+            SavioProjectAllocationRequest.objects.filter(
+                *args, **kwargs
+            ).select_related(
+                'pi', 'project', 'requester', 'status'
+            ).order_by(order_by, 'id'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
         context['request_filter'] = (
             'completed' if self.completed else 'pending')
 
+        # Preserve the ordering across pages.
+        order_by = self.request.GET.get('order_by')
+        if order_by:
+            parameters = {'order_by': order_by}
+            direction = self.request.GET.get('direction')
+            if direction:
+                parameters['direction'] = direction
+            context['order_parameters'] = urlencode(parameters)
+        else:
+            context['order_parameters'] = ''
+
         return context
 
 
@@ -903,13 +924,18 @@ class SavioProjectUndenyRequestView(LoginRequiredMixin, UserPassesTestMixin,
 # BRC: VECTOR
 # =============================================================================
 
-class VectorProjectRequestListView(LoginRequiredMixin, TemplateView):
+class VectorProjectRequestListView(LoginRequiredMixin, ListView):
     template_name = 'project/project_request/vector/project_request_list.html'
     login_url = '/'
+    paginate_by = 30
+    context_object_name = 'vector_project_request_list'
     # Show completed requests if True; else, show pending requests.
     completed = False
 
     def get_queryset(self):
+        """Return either pending or completed requests. If the user is
+        a superuser, return all such requests. Otherwise, return only
+        those for which the user is a requester or PI."""
         order_by = self.request.GET.get('order_by')
         if order_by:
             direction = self.request.GET.get('direction')
@@ -920,32 +946,44 @@ class VectorProjectRequestListView(LoginRequiredMixin, TemplateView):
             order_by = direction + order_by
         else:
             order_by = 'id'
-        return VectorProjectAllocationRequest.objects.order_by(order_by)
-
-    def get_context_data(self, **kwargs):
-        """Include either pending or completed requests. If the user is
-        a superuser, show all such requests. Otherwise, show only those
-        for which the user is a requester or PI."""
-        context = super().get_context_data(**kwargs)
 
         args, kwargs = [], {}
-
         user = self.request.user
-
-        request_list = self.get_queryset()
         permission = 'project.view_vectorprojectallocationrequest'
         if not (user.is_superuser or user.has_perm(permission)):
             args.append(Q(requester=user) | Q(pi=user))
         if self.completed:
-            status__name__in = ['Approved - Complete', 'Denied']
+            status_names = ['Approved - Complete', 'Denied']
         else:
-            status__name__in = ['Under Review', 'Approved - Processing']
-        kwargs['status__name__in'] = status__name__in
-        context['vector_project_request_list'] = request_list.filter(
-            *args, **kwargs)
+            status_names = ['Under Review', 'Approved - Processing']
+        # Filter on the primary keys of statuses, rather than joining to them,
+        # so that the (status, modified) index may be used.
+        kwargs['status__in'] = [
+            get_choice_pk(ProjectAllocationRequestStatusChoice, name)
+            for name in status_names]
+
+        return VectorProjectAllocationRequest.objects.filter(
+            *args, **kwargs
+        ).select_related(
+            'pi', 'project', 'requester', 'status'
+        ).order_by(order_by, 'id')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
         context['request_filter'] = (
             'completed' if self.completed else 'pending')
 
+        # Preserve the ordering across pages.
+        order_by = self.request.GET.get('order_by')
+        if order_by:
+            parameters = {'order_by': order_by}
+            direction = self.request.GET.get('direction')
+            if direction:
+                parameters['direction'] = direction
+            context['order_parameters'] = urlencode(parameters)
+        else:
+            context['order_parameters'] = ''
+
         return context
 
 
@@ -30,6 +30,7 @@ from coldfront.core.resource.utils_.allowance_utils.computing_allowance import C
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 from coldfront.core.user.models import UserProfile
 from coldfront.core.user.utils import access_agreement_signed
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import session_wizard_all_form_data
 from coldfront.core.utils.common import utc_now_offset_aware
 
@@ -277,8 +278,8 @@ class SavioProjectRequestWizard(LoginRequiredMixin, UserPassesTestMixin,
                 request_kwargs['pool'] = pooling_requested
                 request_kwargs['survey_answers'] = survey_data
                 request_kwargs['status'] = \
-                    ProjectAllocationRequestStatusChoice.objects.get(
-                        name='Under Review')
+                    get_choice(
+                        ProjectAllocationRequestStatusChoice, 'Under Review')
                 request_kwargs['request_time'] = utc_now_offset_aware()
                 request = SavioProjectAllocationRequest.objects.create(
                     **request_kwargs)
@@ -516,7 +517,7 @@ class SavioProjectRequestWizard(LoginRequiredMixin, UserPassesTestMixin,
         data = form_data[step_number]
 
         # Create the new Project.
-        status = ProjectStatusChoice.objects.get(name='New')
+        status = get_choice(ProjectStatusChoice, 'New')
         try:
             project = Project.objects.create(
                 name=data['name'],
@@ -530,7 +531,7 @@ class SavioProjectRequestWizard(LoginRequiredMixin, UserPassesTestMixin,
             raise e
 
         # Create an allocation to the primary compute resource.
-        status = AllocationStatusChoice.objects.get(name='New')
+        status = get_choice(AllocationStatusChoice, 'New')
         allocation = Allocation.objects.create(project=project, status=status)
         resource = get_primary_compute_resource()
         allocation.resources.add(resource)
@@ -671,8 +672,8 @@ class VectorProjectRequestView(LoginRequiredMixin, UserPassesTestMixin,
             # Store form data in a request.
 
             pi = User.objects.get(username=settings.VECTOR_PI_USERNAME)
-            status = ProjectAllocationRequestStatusChoice.objects.get(
-                name='Under Review')
+            status = get_choice(
+                ProjectAllocationRequestStatusChoice, 'Under Review')
             request = VectorProjectAllocationRequest.objects.create(
                 requester=self.request.user,
                 pi=pi,
@@ -704,7 +705,7 @@ class VectorProjectRequestView(LoginRequiredMixin, UserPassesTestMixin,
     def __handle_create_new_project(self, data):
         """Create a new project and an allocation to the Vector Compute
         resource."""
-        status = ProjectStatusChoice.objects.get(name='New')
+        status = get_choice(ProjectStatusChoice, 'New')
         try:
             project = Project.objects.create(
                 name=data['name'],
@@ -717,7 +718,7 @@ class VectorProjectRequestView(LoginRequiredMixin, UserPassesTestMixin,
             raise e
 
         # Create an allocation to the "Vector Compute" resource.
-        status = AllocationStatusChoice.objects.get(name='New')
+        status = get_choice(AllocationStatusChoice, 'New')
         allocation = Allocation.objects.create(project=project, status=status)
         resource = Resource.objects.get(name='Vector Compute')
         allocation.resources.add(resource)
@@ -19,6 +19,7 @@ from coldfront.core.project.models import (Project,
                                            ProjectUserRemovalRequestStatusChoice)
 from coldfront.core.project.utils_.removal_utils import ProjectRemovalRequestProcessingRunner
 from coldfront.core.project.utils_.removal_utils import ProjectRemovalRequestRunner
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import (import_from_settings,
                                          utc_now_offset_aware)
 
@@ -375,8 +376,8 @@ class ProjectRemovalRequestUpdateStatusView(LoginRequiredMixin,
         status = form_data.get('status')
 
         request_obj = self.project_removal_request_obj
-        request_obj.status = ProjectUserRemovalRequestStatusChoice.objects.get(
-            name=status)
+        request_obj.status = get_choice(
+            ProjectUserRemovalRequestStatusChoice, status)
         request_obj.save()
 
         message = (
@@ -443,8 +444,7 @@ class ProjectRemovalRequestCompleteStatusView(LoginRequiredMixin,
             request_obj = self.project_removal_request_obj
             with transaction.atomic():
                 request_obj.status = \
-                    ProjectUserRemovalRequestStatusChoice.objects.get(
-                        name=status)
+                    get_choice(ProjectUserRemovalRequestStatusChoice, status)
                 request_obj.save()
                 if status == 'Complete':
                     request_obj.completion_time = utc_now_offset_aware()
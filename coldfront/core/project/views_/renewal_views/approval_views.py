@@ -12,6 +12,7 @@ from coldfront.core.project.utils_.renewal_utils import allocation_renewal_reque
 from coldfront.core.project.utils_.renewal_utils import allocation_renewal_request_state_status
 from coldfront.core.resource.utils_.allowance_utils.computing_allowance import ComputingAllowance
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import display_time_zone_current_date
 from coldfront.core.utils.common import format_date_month_name_day_year
 from coldfront.core.utils.common import utc_now_offset_aware
@@ -318,8 +319,8 @@ class AllocationRenewalRequestDetailView(LoginRequiredMixin,
         """Return whether the request is ready for final submission."""
         new_project_request = self.request_obj.new_project_request
         if new_project_request:
-            complete_status = ProjectAllocationRequestStatusChoice.objects.get(
-                name='Approved - Complete')
+            complete_status = get_choice(
+                ProjectAllocationRequestStatusChoice, 'Approved - Complete')
             if new_project_request.status != complete_status:
                 return False
         else:
@@ -30,6 +30,7 @@ from coldfront.core.resource.utils_.allowance_utils.constants import BRCAllowanc
 from coldfront.core.resource.utils_.allowance_utils.constants import LRCAllowances
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 from coldfront.core.user.utils import access_agreement_signed
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import session_wizard_all_form_data
 from coldfront.core.utils.common import utc_now_offset_aware
 
@@ -141,8 +142,7 @@ class AllocationRenewalMixin(object):
         request_kwargs['computing_allowance'] = computing_allowance
         request_kwargs['allocation_period'] = allocation_period
         request_kwargs['status'] = \
-            AllocationRenewalRequestStatusChoice.objects.get(
-                name='Under Review')
+            get_choice(AllocationRenewalRequestStatusChoice, 'Under Review')
         request_kwargs['pre_project'] = pre_project
         request_kwargs['post_project'] = post_project
         request_kwargs['new_project_request'] = new_project_request
@@ -240,7 +240,7 @@ class AllocationRenewalRequestView(LoginRequiredMixin, UserPassesTestMixin,
             messages.error(self.request, message)
             return False
         role_names = ['Manager', 'Principal Investigator']
-        status = ProjectUserStatusChoice.objects.get(name='Active')
+        status = get_choice(ProjectUserStatusChoice, 'Active')
         has_access = ProjectUser.objects.filter(
             user=user, role__name__in=role_names, status=status)
         if has_access:
@@ -272,7 +272,7 @@ class AllocationRenewalRequestView(LoginRequiredMixin, UserPassesTestMixin,
             project_name_prefix = self.interface.code_from_name(
                 self.computing_allowance.name)
             role_names = ['Manager', 'Principal Investigator']
-            status = ProjectUserStatusChoice.objects.get(name='Active')
+            status = get_choice(ProjectUserStatusChoice, 'Active')
             project_users = user.projectuser_set.filter(
                 project__name__startswith=project_name_prefix,
                 role__name__in=role_names,
@@ -401,7 +401,7 @@ class AllocationRenewalRequestView(LoginRequiredMixin, UserPassesTestMixin,
         data = form_data[step_number]
 
         # Create the new Project.
-        status = ProjectStatusChoice.objects.get(name='New')
+        status = get_choice(ProjectStatusChoice, 'New')
         try:
             project = Project.objects.create(
                 name=data['name'],
@@ -414,7 +414,7 @@ class AllocationRenewalRequestView(LoginRequiredMixin, UserPassesTestMixin,
             raise e
 
         # Create an allocation to the primary compute resource.
-        status = AllocationStatusChoice.objects.get(name='New')
+        status = get_choice(AllocationStatusChoice, 'New')
         allocation = Allocation.objects.create(project=project, status=status)
         resource = get_primary_compute_resource()
         allocation.resources.add(resource)
@@ -436,8 +436,7 @@ class AllocationRenewalRequestView(LoginRequiredMixin, UserPassesTestMixin,
         request_kwargs['pool'] = False
         request_kwargs['survey_answers'] = survey_data
         request_kwargs['status'] = \
-            ProjectAllocationRequestStatusChoice.objects.get(
-                name='Under Review')
+            get_choice(ProjectAllocationRequestStatusChoice, 'Under Review')
         return SavioProjectAllocationRequest.objects.create(**request_kwargs)
 
     def __infer_pi_current_project(self, pi_user, computing_allowance):
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ResourceConfig(AppConfig):
     name = 'coldfront.core.resource'
+
+    def ready(self):
+        import coldfront.core.resource.signals
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+import django.dispatch
+
+from coldfront.core.resource.models import Resource
+from coldfront.core.resource.models import ResourceAttribute
+from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+
+
+@django.dispatch.receiver(post_delete, sender=Resource)
+@django.dispatch.receiver(post_delete, sender=ResourceAttribute)
+@django.dispatch.receiver(post_save, sender=Resource)
+@django.dispatch.receiver(post_save, sender=ResourceAttribute)
+def invalidate_computing_allowance_interface(sender, **kwargs):
+    """When a Resource or ResourceAttribute is saved or deleted,
+    invalidate the cached ComputingAllowanceInterface.
+
+    Invalidate both immediately and once the current transaction is
+    committed, so that an instance rebuilt by another process before
+    the commit, which would not include the change, is discarded."""
+    ComputingAllowanceInterface.invalidate()
+    transaction.on_commit(ComputingAllowanceInterface.invalidate)
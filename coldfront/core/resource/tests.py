@@ -1,3 +1,86 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest.mock import patch
+import time
 
-# Create your tests here.
+from django.conf import settings
+
+from coldfront.core.resource.models import Resource
+from coldfront.core.resource.models import ResourceAttribute
+from coldfront.core.resource.utils_.allowance_utils.constants import BRCAllowances
+from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterfaceError
+from coldfront.core.utils.tests.test_base import TestBase
+
+
+class TestComputingAllowanceInterface(TestBase):
+    """A class for testing the caching behavior of
+    ComputingAllowanceInterface."""
+
+    def test_instance_shared(self):
+        """Test that the same instance is returned without issuing
+        queries once it has been built."""
+        interface = ComputingAllowanceInterface()
+        with self.assertNumQueries(0):
+            self.assertIs(ComputingAllowanceInterface(), interface)
+
+    def test_attribute_change_invalidates(self):
+        """Test that changing an allowance's ResourceAttribute causes
+        the instance to be rebuilt."""
+        interface = ComputingAllowanceInterface()
+        old_value = interface.service_units_from_name(BRCAllowances.FCA)
+
+        allowance = self.get_fca_computing_allowance()
+        attribute = ResourceAttribute.objects.get(
+            resource=allowance,
+            resource_attribute_type__name='Service Units')
+        new_value = str(Decimal(old_value) + Decimal('1.00'))
+        attribute.value = new_value
+        attribute.save()
+
+        interface = ComputingAllowanceInterface()
+        self.assertEqual(
+            interface.service_units_from_name(BRCAllowances.FCA), new_value)
+
+    def test_resource_deletion_invalidates(self):
+        """Test that deleting an allowance Resource causes the instance
+        to be rebuilt."""
+        interface = ComputingAllowanceInterface()
+        self.assertTrue(interface.code_from_name(BRCAllowances.ICA))
+
+        Resource.objects.filter(name=BRCAllowances.ICA).delete()
+
+        interface = ComputingAllowanceInterface()
+        with self.assertRaises(ComputingAllowanceInterfaceError):
+            interface.code_from_name(BRCAllowances.ICA)
+
+    def test_explicit_invalidation(self):
+        """Test that invalidating causes a new instance to be built."""
+        interface = ComputingAllowanceInterface()
+        ComputingAllowanceInterface.invalidate()
+        self.assertIsNot(ComputingAllowanceInterface(), interface)
+
+    def test_rebuilt_after_generation_expires(self):
+        """Test that the instance is rebuilt once its generation
+        expires, so that a change whose invalidation is not observed
+        (e.g., one made by another process using its own cache) is
+        reflected within a bounded time."""
+        interface = ComputingAllowanceInterface()
+        old_value = interface.service_units_from_name(BRCAllowances.FCA)
+        new_value = str(Decimal(old_value) + Decimal('1.00'))
+
+        # Update the attribute without sending signals, so that the instance
+        # is not invalidated.
+        ResourceAttribute.objects.filter(
+            resource=self.get_fca_computing_allowance(),
+            resource_attribute_type__name='Service Units').update(
+                value=new_value)
+        interface = ComputingAllowanceInterface()
+        self.assertEqual(
+            interface.service_units_from_name(BRCAllowances.FCA), old_value)
+
+        expired_time = time.time() + settings.CACHE_GENERATION_TIMEOUT + 1
+        with patch('django.core.cache.backends.locmem.time') as mock_time:
+            mock_time.time.return_value = expired_time
+            interface = ComputingAllowanceInterface()
+        self.assertEqual(
+            interface.service_units_from_name(BRCAllowances.FCA), new_value)
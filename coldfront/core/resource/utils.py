@@ -1,9 +1,7 @@
 from django.conf import settings
 
 from coldfront.core.resource.models import Resource
-from coldfront.core.resource.models import ResourceAttribute
-from coldfront.core.resource.models import ResourceAttributeType
-from coldfront.core.resource.models import ResourceType
+from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 
 
 def get_compute_resource_names():
@@ -17,14 +15,7 @@ def get_compute_resource_names():
 def get_computing_allowance_project_prefixes():
     """Return a tuple of prefixes (strs) that names of Projects with
     computing allowances should begin with."""
-    resource_attribute_type = ResourceAttributeType.objects.get(name='code')
-    resource_type = ResourceType.objects.get(name='Computing Allowance')
-    resources = Resource.objects.filter(resource_type=resource_type)
-    prefixes = ResourceAttribute.objects.filter(
-        resource_attribute_type=resource_attribute_type,
-        resource__in=resources).values_list(
-            'value', flat=True)
-    return tuple(prefixes)
+    return tuple(ComputingAllowanceInterface().codes())
 
 
 def get_primary_compute_resource():
@@ -1,16 +1,75 @@
+from threading import Lock
+from uuid import uuid4
+
+from django.core.cache import cache
+
 from coldfront.core.resource.models import Resource
 from coldfront.core.resource.models import ResourceType
+from coldfront.core.utils.common import import_from_settings
 
 
 class ComputingAllowanceInterface(object):
     """A singleton that fetches computing allowances from the database
-    and provides methods for retrieving associated data."""
+    and provides methods for retrieving associated data.
+
+    The instance is built once per process and shared by all callers.
+    It is rebuilt when the generation stored in the configured cache
+    changes, which happens when allowances are modified (see
+    invalidate). A cache shared between processes (e.g., Redis or
+    memcached) propagates invalidations to all of them. The generation
+    expires after CACHE_GENERATION_TIMEOUT seconds, so that a process
+    that does not observe an invalidation (e.g., because the cache is
+    local to each process) rebuilds the instance within that time."""
+
+    # The key under which the current generation is stored in the cache.
+    _cache_key = 'computing_allowance_interface_generation'
+
+    _instance = None
+    _instance_generation = None
+    _lock = Lock()
+
+    def __new__(cls):
+        """Return the shared instance, building it if it does not exist
+        or is outdated."""
+        generation = cls._current_generation()
+        with cls._lock:
+            if (cls._instance is None or generation is None or
+                    cls._instance_generation != generation):
+                instance = super().__new__(cls)
+                instance._load()
+                cls._instance = instance
+                cls._instance_generation = generation
+            return cls._instance
+
+    @classmethod
+    def _current_generation(cls):
+        """Return the current generation from the cache, setting one if
+        there is none. Return None if the cache does not store values
+        (e.g., it is a dummy cache)."""
+        generation = cache.get(cls._cache_key)
+        if generation is None:
+            cache.add(cls._cache_key, uuid4().hex, cls._generation_timeout())
+            generation = cache.get(cls._cache_key)
+        return generation
 
-    def __init__(self):
+    @staticmethod
+    def _generation_timeout():
+        """Return the number of seconds after which a generation
+        expires."""
+        return import_from_settings('CACHE_GENERATION_TIMEOUT', 60 * 5)
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate the shared instance in all processes using the
+        cache, so that it is rebuilt on next use."""
+        cache.set(cls._cache_key, uuid4().hex, cls._generation_timeout())
+
+    def _load(self):
         """Retrieve database objects and instantiate data structures."""
         resource_type = ResourceType.objects.get(name='Computing Allowance')
         allowances = Resource.objects.prefetch_related(
-            'resourceattribute_set').filter(resource_type=resource_type)
+            'resourceattribute_set__resource_attribute_type').filter(
+                resource_type=resource_type)
 
         # A mapping from code values to allowance Resource objects.
         self._code_to_object = {}
@@ -65,7 +124,15 @@ class ComputingAllowanceInterface(object):
         """Given a Project, return the corresponding allowance (Resource
         object)."""
         try:
-            code = project.name[:3]
+            return self.allowance_from_project_name(project.name)
+        except Exception as e:
+            raise ComputingAllowanceInterfaceError(e)
+
+    def allowance_from_project_name(self, project_name):
+        """Given the name of a Project, return the corresponding
+        allowance (Resource object)."""
+        try:
+            code = project_name[:3]
             return self.allowance_from_code(code)
         except Exception as e:
             raise ComputingAllowanceInterfaceError(e)
@@ -74,6 +141,10 @@ class ComputingAllowanceInterface(object):
         """Return a list of allowances (Resource objects)."""
         return list(self._name_to_object.values())
 
+    def codes(self):
+        """Return a list of the codes of all allowances."""
+        return list(self._code_to_object.keys())
+
     def code_from_name(self, name):
         """Given a name, return the corresponding allowance's code."""
         try:
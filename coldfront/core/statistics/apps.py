@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class StatisticsConfig(AppConfig):
     name = 'coldfront.core.statistics'
+
+    def ready(self):
+        import coldfront.core.statistics.signals
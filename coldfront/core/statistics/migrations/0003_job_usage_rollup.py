@@ -0,0 +1,74 @@
+# Generated by Django 3.2.5 on 2026-10-18 03:18
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+import pytz
+
+
+def populate_job_usage_rollups(apps, schema_editor):
+    Job = apps.get_model('statistics', 'Job')
+    JobUsageRollup = apps.get_model('statistics', 'JobUsageRollup')
+    rows = Job.objects.filter(
+        startdate__isnull=False,
+        amount__gte=settings.ALLOCATION_MIN,
+        amount__lte=settings.ALLOCATION_MAX,
+    ).annotate(
+        date=TruncDate(
+            'startdate', tzinfo=pytz.timezone(settings.DISPLAY_TIME_ZONE)),
+        partition_or_blank=Coalesce('partition', Value('')),
+    ).values(
+        'date', 'accountid', 'userid', 'partition_or_blank'
+    ).annotate(
+        total_amount=Sum('amount'),
+        total_cpu_time=Coalesce(Sum('cpu_time'), Value(0.0)),
+        total_num_jobs=Count('pk'),
+    ).order_by()
+    JobUsageRollup.objects.bulk_create(
+        (JobUsageRollup(
+            date=row['date'],
+            project_id=row['accountid'],
+            user_id=row['userid'],
+            partition=row['partition_or_blank'],
+            amount=row['total_amount'],
+            cpu_time=row['total_cpu_time'],
+            num_jobs=row['total_num_jobs'])
+         for row in rows.iterator()),
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('project', '0022_project_allocation_request_billing_activity'),
+        ('statistics', '0002_projecttransaction_projectusertransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobUsageRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('partition', models.CharField(blank=True, default='', max_length=50)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=17)),
+                ('cpu_time', models.FloatField(default=0.0)),
+                ('num_jobs', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='project.project')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job Usage Rollup',
+                'unique_together': {('date', 'project', 'user', 'partition')},
+            },
+        ),
+        migrations.RunPython(
+            populate_job_usage_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.5 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0003_job_usage_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['startdate', 'jobslurmid'], name='statistics__startda_407b41_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['accountid', 'startdate', 'jobslurmid'], name='statistics__account_12af84_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['userid', 'startdate', 'jobslurmid'], name='statistics__userid__02213f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['partition', 'startdate'], name='statistics__partiti_38f0cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['jobstatus', 'startdate'], name='statistics__jobstat_9d565a_idx'),
+        ),
+    ]
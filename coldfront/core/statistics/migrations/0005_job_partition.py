@@ -0,0 +1,57 @@
+# Generated by Django 3.2.5 on 2026-10-18 03:49
+
+from django.db import migrations, models
+from itertools import islice
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+
+def populate_job_partitions(apps, schema_editor):
+    Job = apps.get_model('statistics', 'Job')
+    JobPartition = apps.get_model('statistics', 'JobPartition')
+
+    def job_partitions():
+        rows = Job.objects.exclude(partition__isnull=True).exclude(
+            partition='').values_list('pk', 'partition')
+        for pk, partition in rows.iterator(chunk_size=BATCH_SIZE):
+            names = set()
+            for name in partition.split(','):
+                name = name.strip()
+                if name and name not in names:
+                    names.add(name)
+                    yield JobPartition(job_id=pk, name=name)
+
+    # bulk_create materializes the objects it is given. Insert them one batch
+    # at a time, so that only one batch is held in memory.
+    partitions = job_partitions()
+    while True:
+        batch = list(islice(partitions, BATCH_SIZE))
+        if not batch:
+            break
+        JobPartition.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0004_job_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPartition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partitions', to='statistics.job')),
+            ],
+            options={
+                'verbose_name': 'Job Partition',
+                'unique_together': {('name', 'job')},
+            },
+        ),
+        migrations.RunPython(
+            populate_job_partitions, migrations.RunPython.noop),
+    ]
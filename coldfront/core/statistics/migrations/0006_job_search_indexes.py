@@ -0,0 +1,60 @@
+from django.db import DatabaseError
+from django.db import migrations
+from django.db import transaction
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Trigram indexes on the expressions that case-insensitive substring filters on
+# Jobs compare (e.g., UPPER("jobslurmid"::text) LIKE UPPER('%123%')). They are
+# PostgreSQL-specific, so they are created with SQL, and skipped on other
+# databases, or if the pg_trgm extension may not be created.
+#
+# Since the table of Jobs is large, the indexes are created (and dropped)
+# concurrently, so that writes to it are not blocked while they are built.
+# This may not be done in a transaction, so the migration is not atomic.
+TRIGRAM_INDEXES = {
+    'statistics_job_jobslurmid_trgm': 'jobslurmid',
+    'statistics_job_jobstatus_trgm': 'jobstatus',
+    'statistics_job_partition_trgm': 'partition',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError as e:
+        logger.warning(
+            f'Skipping trigram indexes on Jobs; the pg_trgm extension could '
+            f'not be created: {e}')
+        return
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON '
+            f'statistics_job USING gin (UPPER({column}::text) gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('statistics', '0005_job_partition'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
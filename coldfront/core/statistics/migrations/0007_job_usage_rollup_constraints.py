@@ -0,0 +1,59 @@
+# Generated by Django 3.2.5 on 2026-10-18 06:05
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models import Q
+from django.db.models import Sum
+
+
+def merge_duplicate_job_usage_rollups(apps, schema_editor):
+    """Merge rows without a Project or a User that have the same key,
+    which the previous unique constraint did not prevent."""
+    JobUsageRollup = apps.get_model('statistics', 'JobUsageRollup')
+    duplicate_keys = JobUsageRollup.objects.filter(
+        Q(project__isnull=True) | Q(user__isnull=True)
+    ).values(
+        'date', 'project', 'user', 'partition'
+    ).annotate(num_rows=Count('pk')).filter(num_rows__gt=1).order_by()
+    for key in duplicate_keys.iterator():
+        rollups = JobUsageRollup.objects.filter(
+            date=key['date'], project=key['project'], user=key['user'],
+            partition=key['partition'])
+        totals = rollups.aggregate(
+            amount=Sum('amount'), cpu_time=Sum('cpu_time'),
+            num_jobs=Sum('num_jobs'))
+        pk = rollups.order_by('pk').values_list('pk', flat=True).first()
+        rollups.exclude(pk=pk).delete()
+        JobUsageRollup.objects.filter(pk=pk).update(**totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0006_job_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='jobusagerollup',
+            unique_together=set(),
+        ),
+        migrations.RunPython(
+            merge_duplicate_job_usage_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='jobusagerollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('project__isnull', False), ('user__isnull', False)), fields=('date', 'project', 'user', 'partition'), name='unique_job_usage_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobusagerollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('project__isnull', True), ('user__isnull', False)), fields=('date', 'user', 'partition'), name='unique_job_usage_rollup_without_project'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobusagerollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('project__isnull', False), ('user__isnull', True)), fields=('date', 'project', 'partition'), name='unique_job_usage_rollup_without_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobusagerollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('project__isnull', True), ('user__isnull', True)), fields=('date', 'partition'), name='unique_job_usage_rollup_without_project_or_user'),
+        ),
+    ]
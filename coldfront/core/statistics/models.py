@@ -1,10 +1,12 @@
 from coldfront.core.project.models import Project
 from coldfront.core.project.models import ProjectUser
+from decimal import Decimal
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from model_utils.models import TimeStampedModel
 
@@ -65,10 +67,85 @@ class Job(TimeStampedModel):
     raw_time = models.FloatField(default=None, blank=True, null=True)
     cpu_time = models.FloatField(default=None, blank=True, null=True)
 
+    class Meta:
+        # Match the filters and ordering of the Job list API, which pages
+        # through Jobs by (startdate, jobslurmid).
+        indexes = [
+            models.Index(fields=['startdate', 'jobslurmid']),
+            models.Index(fields=['accountid', 'startdate', 'jobslurmid']),
+            models.Index(fields=['userid', 'startdate', 'jobslurmid']),
+            models.Index(fields=['partition', 'startdate']),
+            models.Index(fields=['jobstatus', 'startdate']),
+        ]
+
     def __str__(self):
         return self.jobslurmid
 
 
+class JobPartition(models.Model):
+    """One of the partitions in the comma-separated partition of a Job,
+    stored separately so that Jobs may be filtered and grouped by
+    partition using an index. Rows are maintained as Jobs are created
+    and updated."""
+
+    job = models.ForeignKey(
+        Job, on_delete=models.CASCADE, related_name='partitions')
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        unique_together = ('name', 'job')
+        verbose_name = 'Job Partition'
+
+    def __str__(self):
+        return self.name
+
+
+class JobUsageRollup(models.Model):
+    """Totals of Jobs that started on a date, in
+    settings.DISPLAY_TIME_ZONE, under a Project, by a User, on a
+    partition. Only Jobs with amounts are included. Rows are maintained
+    as Jobs are created, updated, and deleted.
+
+    Jobs need not have a Project or a User, so neither may the rows. A
+    unique constraint over nullable columns treats NULLs as distinct,
+    so each combination of NULL columns has its own constraint."""
+
+    date = models.DateField()
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, blank=True, null=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, blank=True, null=True)
+    partition = models.CharField(max_length=50, blank=True, default='')
+    # Totals may exceed the maximum amount of a single Job.
+    amount = models.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS + 6,
+        decimal_places=settings.DECIMAL_MAX_PLACES,
+        default=Decimal('0.00'))
+    cpu_time = models.FloatField(default=0.0)
+    num_jobs = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'project', 'user', 'partition'],
+                condition=Q(project__isnull=False, user__isnull=False),
+                name='unique_job_usage_rollup'),
+            models.UniqueConstraint(
+                fields=['date', 'user', 'partition'],
+                condition=Q(project__isnull=True, user__isnull=False),
+                name='unique_job_usage_rollup_without_project'),
+            models.UniqueConstraint(
+                fields=['date', 'project', 'partition'],
+                condition=Q(project__isnull=False, user__isnull=True),
+                name='unique_job_usage_rollup_without_user'),
+            models.UniqueConstraint(
+                fields=['date', 'partition'],
+                condition=Q(project__isnull=True, user__isnull=True),
+                name='unique_job_usage_rollup_without_project_or_user'),
+        ]
+        verbose_name = 'Job Usage Rollup'
+
+
 class ProjectTransaction(models.Model):
     project = models.ForeignKey(
         Project, on_delete=models.CASCADE, related_name='transactions')
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+import django.dispatch
+
+from coldfront.core.statistics.models import Job
+from coldfront.core.statistics.models import Node
+from coldfront.core.statistics.utils_.job_partition_utils import set_job_partitions
+from coldfront.core.statistics.utils_.job_usage_rollup_utils import JobUsageRollupDeltas
+from coldfront.core.statistics.utils_.node_utils import NodeNameCache
+
+
+@django.dispatch.receiver(post_delete, sender=Node)
+@django.dispatch.receiver(post_save, sender=Node)
+def invalidate_node_name_cache(sender, created=False, **kwargs):
+    """When a Node is renamed or deleted, invalidate the cached mapping
+    from Node names to primary keys.
+
+    Invalidate both immediately and once the current transaction is
+    committed, so that a mapping reloaded by another process before the
+    commit, which would not include the change, is discarded."""
+    if created:
+        return
+    NodeNameCache.invalidate()
+    transaction.on_commit(NodeNameCache.invalidate)
+
+
+# Jobs written in bulk (e.g., by the bulk ingestion endpoint) do not send these
+# signals, so their writers update JobUsageRollup and JobPartition themselves.
+
+
+@django.dispatch.receiver(pre_save, sender=Job)
+def record_previous_job_usage(sender, instance, raw=False, **kwargs):
+    """Before a Job is saved, record the removal of its contribution to
+    JobUsageRollup, as stored in the database, if any, and whether its
+    partition is changing."""
+    if raw:
+        return
+    deltas = JobUsageRollupDeltas()
+    partition_changed = True
+    # Jobs have explicit primary keys, so even a new instance may overwrite an
+    # existing Job.
+    if instance.pk is not None:
+        previous = Job.objects.filter(pk=instance.pk).only(
+            'startdate', 'accountid', 'userid', 'partition', 'amount',
+            'cpu_time').first()
+        if previous is not None:
+            deltas.remove(previous)
+            partition_changed = previous.partition != instance.partition
+    instance._job_usage_rollup_deltas = deltas
+    instance._job_partition_changed = partition_changed
+
+
+@django.dispatch.receiver(post_save, sender=Job)
+def update_job_usage_rollup_on_save(sender, instance, raw=False, **kwargs):
+    """After a Job is saved, replace its previous contribution to
+    JobUsageRollup with its current one."""
+    if raw:
+        return
+    deltas = instance.__dict__.pop(
+        '_job_usage_rollup_deltas', JobUsageRollupDeltas())
+    deltas.add(instance)
+    deltas.apply()
+
+
+@django.dispatch.receiver(post_save, sender=Job)
+def update_job_partitions_on_save(sender, instance, raw=False, **kwargs):
+    """After a Job is saved, update its JobPartitions if its partition
+    changed."""
+    if raw:
+        return
+    if instance.__dict__.pop('_job_partition_changed', True):
+        set_job_partitions([instance])
+
+
+@django.dispatch.receiver(post_delete, sender=Job)
+def update_job_usage_rollup_on_delete(sender, instance, **kwargs):
+    """After a Job is deleted, remove its contribution to
+    JobUsageRollup."""
+    deltas = JobUsageRollupDeltas()
+    deltas.remove(instance)
+    deltas.apply()
@@ -4,7 +4,10 @@ from django.urls import reverse
 from http import HTTPStatus
 
 from coldfront.core.project.models import *
+from coldfront.core.statistics.utils_.job_query_filtering import \
+    job_query_filtering
 from coldfront.core.user.models import UserProfile
+from coldfront.core.utils.common import display_time_zone_date_to_utc_datetime
 from coldfront.core.utils.common import utc_now_offset_aware
 from coldfront.core.utils.tests.test_base import TestBase
 from coldfront.core.statistics.models import Job
@@ -338,6 +341,53 @@ class TestSlurmJobListView(TestJobBase):
         test_error_message('&amount=100&amount_modifier=leq', False, False)
 
 
+class TestJobQueryFiltering(TestJobBase):
+    """A class for testing job_query_filtering"""
+
+    def test_on_date_filters_display_time_zone_day(self):
+        """Test that filtering for Jobs on a date includes exactly those
+        between the start of the date and the start of the next date, in
+        the display time zone."""
+        date = datetime.date(2022, 3, 13)
+        day_start = display_time_zone_date_to_utc_datetime(date)
+        next_day_start = display_time_zone_date_to_utc_datetime(
+            date + datetime.timedelta(days=1))
+        submitdates = {
+            'before': day_start - datetime.timedelta(microseconds=1),
+            'start': day_start,
+            'end': next_day_start - datetime.timedelta(microseconds=1),
+            'after': next_day_start,
+        }
+        for jobslurmid, submitdate in submitdates.items():
+            Job.objects.create(
+                jobslurmid=jobslurmid, submitdate=submitdate,
+                userid=self.user1, accountid=self.project1)
+
+        for modifier, expected in (('Before', {'before'}),
+                                   ('On', {'start', 'end'}),
+                                   ('After', {'end', 'after'})):
+            jobs = job_query_filtering(
+                Job.objects.filter(jobslurmid__in=submitdates),
+                {'submitdate': date, 'submit_modifier': modifier})
+            self.assertEqual(
+                set(jobs.values_list('jobslurmid', flat=True)), expected)
+
+    def test_substring_filters(self):
+        """Test that statuses match by prefix, and that other fields
+        match by case-insensitive substring."""
+        self.job2.jobstatus = 'CANCELLED by 0'
+        self.job2.save()
+
+        for data, expected in (({'status': 'CANCELLED'}, {self.job2}),
+                               ({'status': 'by 0'}, set()),
+                               ({'jobslurmid': '234'}, {self.job1}),
+                               ({'partition': 'PARTITION2'}, {self.job2}),
+                               ({'project_name': self.project1.name},
+                                {self.job1})):
+            jobs = job_query_filtering(Job.objects.all(), data)
+            self.assertEqual(set(jobs), expected)
+
+
 class TestSlurmJobDetailView(TestJobBase):
     """A class for testing SlurmJobDetailView"""
 
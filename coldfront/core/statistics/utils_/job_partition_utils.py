@@ -0,0 +1,40 @@
+from coldfront.core.statistics.models import JobPartition
+
+
+# JobPartition stores the individual partitions of each Job. Signals handle
+# individual saves, and callers that write Jobs in bulk update partitions
+# themselves, using set_job_partitions. Rows are deleted along with their Jobs.
+
+
+def split_partitions(partition):
+    """Return the distinct, non-empty names in the given comma-separated
+    partition string, in order."""
+    names = []
+    for name in (partition or '').split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def set_job_partitions(jobs):
+    """Replace the JobPartitions of the given Jobs with those in their
+    current partition strings, using a constant number of queries.
+
+    Parameters:
+        - jobs (iterable): An iterable of saved Jobs
+
+    Returns:
+        - None
+
+    Raises:
+        - None
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+    JobPartition.objects.filter(job__in=[job.pk for job in jobs]).delete()
+    JobPartition.objects.bulk_create([
+        JobPartition(job_id=job.pk, name=name)
+        for job in jobs
+        for name in split_partitions(job.partition)])
@@ -1,10 +1,39 @@
+from datetime import timedelta
+
 from coldfront.core.utils.common import display_time_zone_date_to_utc_datetime
 
 
+# Substring filters on Job fields are case-insensitive, comparing
+# UPPER(field::text). On PostgreSQL, they are served by trigram indexes on the
+# same expressions (see migration 0006_job_search_indexes); other databases
+# scan. Date filters compare dates against times, rather than extracting parts
+# of dates, so that they may use indexes on the dates.
+
+
+def filter_jobs_by_date(job_list, field, date, modifier):
+    """Return the given queryset of Jobs, filtered to those whose given
+    date field is before, on, or after the given date, interpreted as
+    being in settings.DISPLAY_TIME_ZONE, depending on the given
+    modifier."""
+    start = display_time_zone_date_to_utc_datetime(date)
+    if modifier == 'Before':
+        job_list = job_list.filter(**{f'{field}__lt': start})
+    elif modifier == 'On':
+        # Days are not always 24 hours long in the display time zone.
+        end = display_time_zone_date_to_utc_datetime(date + timedelta(days=1))
+        job_list = job_list.filter(
+            **{f'{field}__gte': start, f'{field}__lt': end})
+    elif modifier == 'After':
+        job_list = job_list.filter(**{f'{field}__gt': start})
+    return job_list
+
+
 def job_query_filtering(job_list, data):
     if data.get('status'):
+        # Statuses are chosen from Slurm job states, which begin stored
+        # statuses (e.g., "CANCELLED by 0").
         job_list = job_list.filter(
-            jobstatus__icontains=data.get('status'))
+            jobstatus__istartswith=data.get('status'))
 
     if data.get('jobslurmid'):
         job_list = job_list.filter(
@@ -28,45 +57,11 @@ def job_query_filtering(job_list, data):
         else:
             job_list = job_list.filter(amount__gte=data.get('amount'))
 
-    if data.get('submitdate'):
-        submit_modifier = data.get('submit_modifier')
-        submit_date = display_time_zone_date_to_utc_datetime(
-            data.get('submitdate'))
-
-        if submit_modifier == 'Before':
-            job_list = job_list.filter(submitdate__lt=submit_date)
-        elif submit_modifier == 'On':
-            job_list = job_list.filter(submitdate__year=submit_date.year,
-                                       submitdate__month=submit_date.month,
-                                       submitdate__day=submit_date.day)
-        elif submit_modifier == 'After':
-            job_list = job_list.filter(submitdate__gt=submit_date)
-
-    if data.get('startdate'):
-        start_modifier = data.get('start_modifier')
-        start_date = display_time_zone_date_to_utc_datetime(
-            data.get('startdate'))
-
-        if start_modifier == 'Before':
-            job_list = job_list.filter(startdate__lt=start_date)
-        elif start_modifier == 'On':
-            job_list = job_list.filter(startdate__year=start_date.year,
-                                       startdate__month=start_date.month,
-                                       startdate__day=start_date.day)
-        elif start_modifier == 'After':
-            job_list = job_list.filter(startdate__gt=start_date)
-
-    if data.get('enddate'):
-        end_modifier = data.get('end_modifier')
-        end_date = display_time_zone_date_to_utc_datetime(data.get('enddate'))
-
-        if end_modifier == 'Before':
-            job_list = job_list.filter(enddate__lt=end_date)
-        elif end_modifier == 'On':
-            job_list = job_list.filter(enddate__year=end_date.year,
-                                       enddate__month=end_date.month,
-                                       enddate__day=end_date.day)
-        elif end_modifier == 'After':
-            job_list = job_list.filter(enddate__gt=end_date)
+    for field, modifier_key in (('submitdate', 'submit_modifier'),
+                                ('startdate', 'start_modifier'),
+                                ('enddate', 'end_modifier')):
+        if data.get(field):
+            job_list = filter_jobs_by_date(
+                job_list, field, data.get(field), data.get(modifier_key))
 
     return job_list
@@ -0,0 +1,157 @@
+import math
+
+import pytz
+from django.conf import settings
+from django.db import connection
+from django.db.models import Aggregate
+from django.db.models import Avg
+from django.db.models import Case
+from django.db.models import CharField
+from django.db.models import Count
+from django.db.models import DurationField
+from django.db.models import ExpressionWrapper
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import Min
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import TruncMonth
+
+
+"""Utilities for computing statistics about the times that Jobs spent
+queued, in the database rather than in Python."""
+
+
+# The fields by which statistics may be grouped.
+QUEUE_TIME_GROUPS = ['partition', 'allowance_type', 'month']
+
+
+class PercentileDisc(Aggregate):
+    """The first value, in ascending order, at or above the given
+    percentile of values. Only PostgreSQL supports this aggregate."""
+
+    function = 'PERCENTILE_DISC'
+    name = 'PercentileDisc'
+    template = (
+        '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)')
+
+    def __init__(self, expression, percentile, **extra):
+        fraction = float(percentile) / 100
+        super().__init__(expression, fraction=fraction, **extra)
+
+
+def _queue_time():
+    return ExpressionWrapper(
+        F('startdate') - F('submitdate'), output_field=DurationField())
+
+
+def _group_alias(name):
+    """Return the alias of the annotation for the given group, which
+    must not conflict with fields of Job."""
+    return f'group_{name}'
+
+
+def _group_expressions(group_by, allowance_prefixes):
+    """Return a dictionary mapping the alias of each of the given groups
+    to the expression whose values Jobs are grouped by."""
+    expressions = {}
+    for name in group_by:
+        alias = _group_alias(name)
+        if name == 'partition':
+            expressions[alias] = F('partitions__name')
+        elif name == 'allowance_type':
+            # Longer prefixes are matched first, in case one prefix begins
+            # with another.
+            expressions[alias] = Case(
+                *[When(accountid__name__startswith=prefix,
+                       then=Value(prefix))
+                  for prefix in sorted(
+                      allowance_prefixes, key=len, reverse=True)],
+                default=Value(''),
+                output_field=CharField())
+        elif name == 'month':
+            expressions[alias] = TruncMonth(
+                'submitdate',
+                tzinfo=pytz.timezone(settings.DISPLAY_TIME_ZONE))
+        else:
+            raise ValueError(f'Invalid group {name}.')
+    return expressions
+
+
+def _nearest_rank_percentile(jobs, count, percentile):
+    """Return the queue time at the given percentile of the given
+    annotated queryset of Jobs, which has the given count, selecting it
+    by its rank, in the same way that PercentileDisc does."""
+    index = max(math.ceil(count * percentile / 100) - 1, 0)
+    return jobs.order_by('queue_time').values_list(
+        'queue_time', flat=True)[index]
+
+
+def get_job_queue_time_statistics(jobs, group_by=(), percentiles=(),
+                                  allowance_prefixes=()):
+    """Return statistics about the times that the given Jobs spent
+    queued, optionally grouped, computed in the database. Jobs without
+    submit or start dates are excluded.
+
+    On PostgreSQL, each statistic is computed in a single query. On
+    other databases, each percentile of each group is selected by rank
+    in a separate query.
+
+    Parameters:
+        - jobs (QuerySet): A queryset of Jobs
+        - group_by (iterable): Names in QUEUE_TIME_GROUPS. When grouped
+                               by partition, a Job counts towards each of
+                               its partitions.
+        - percentiles (iterable): Integers between 1 and 99
+        - allowance_prefixes (iterable): The prefixes of Project names
+                                         that determine allowance types
+
+    Returns:
+        - A list of dictionaries, one per group with Jobs, ordered by
+          group, each with the group values, the number of Jobs
+          ('count'), the 'average', 'minimum', and 'maximum' queue times
+          (timedelta), and the queue time at each percentile, keyed by
+          'p<percentile>'
+
+    Raises:
+        - ValueError, if a group is invalid
+    """
+    group_by = list(group_by)
+    percentiles = list(percentiles)
+    group_expressions = _group_expressions(group_by, allowance_prefixes)
+
+    jobs = jobs.filter(
+        submitdate__isnull=False, startdate__isnull=False
+    ).annotate(queue_time=_queue_time(), **group_expressions)
+
+    aggregates = {
+        'count': Count('pk'),
+        'average': Avg('queue_time'),
+        'minimum': Min('queue_time'),
+        'maximum': Max('queue_time'),
+    }
+    use_percentile_aggregate = connection.vendor == 'postgresql'
+    if use_percentile_aggregate:
+        for percentile in percentiles:
+            aggregates[f'p{percentile}'] = PercentileDisc(
+                'queue_time', percentile)
+
+    aliases = list(group_expressions)
+    if aliases:
+        rows = list(
+            jobs.values(*aliases).annotate(**aggregates).order_by(*aliases))
+    else:
+        row = jobs.aggregate(**aggregates)
+        rows = [row] if row['count'] else []
+
+    statistics = []
+    for row in rows:
+        if not use_percentile_aggregate:
+            group_jobs = jobs.filter(**{alias: row[alias] for alias in aliases})
+            for percentile in percentiles:
+                row[f'p{percentile}'] = _nearest_rank_percentile(
+                    group_jobs, row['count'], percentile)
+        entry = {name: row.pop(_group_alias(name)) for name in group_by}
+        entry.update(row)
+        statistics.append(entry)
+    return statistics
@@ -0,0 +1,189 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import pytz
+from django.conf import settings
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+
+from coldfront.core.statistics.models import Job
+from coldfront.core.statistics.models import JobUsageRollup
+from coldfront.core.utils.common import display_time_zone_date_to_utc_datetime
+
+
+# JobUsageRollup stores daily totals of Jobs, so that totals over long periods
+# may be computed without scanning Jobs. Rows are adjusted by the differences
+# that writes to Jobs make: signals handle individual saves and deletions, and
+# callers that write Jobs in bulk apply the differences themselves, using
+# JobUsageRollupDeltas.
+
+
+class JobUsageRollupDeltas(object):
+    """Differences to apply to JobUsageRollup rows, accumulated from the
+    states of Jobs before and after they are written."""
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: [Decimal('0.00'), 0.0, 0])
+
+    @staticmethod
+    def _key_and_totals(job):
+        """Return the key of the row that the given Job contributes to,
+        and its contributions to the amount and cpu_time, or None if it
+        does not contribute, because it has no start date or amount."""
+        startdate = Job._meta.get_field('startdate').to_python(job.startdate)
+        amount = Job._meta.get_field('amount').to_python(job.amount)
+        if startdate is None or amount is None:
+            return None
+        # Match the default filtering on amounts of the Job list API.
+        if not (settings.ALLOCATION_MIN <= amount <= settings.ALLOCATION_MAX):
+            return None
+        date = startdate.astimezone(
+            pytz.timezone(settings.DISPLAY_TIME_ZONE)).date()
+        cpu_time = Job._meta.get_field('cpu_time').to_python(job.cpu_time)
+        key = (date, job.accountid_id, job.userid_id, job.partition or '')
+        return key, amount, cpu_time or 0.0
+
+    def add(self, job, sign=1):
+        """Add the contribution of the given Job, in its current state,
+        to the deltas."""
+        entry = self._key_and_totals(job)
+        if entry is None:
+            return
+        key, amount, cpu_time = entry
+        delta = self._deltas[key]
+        delta[0] += sign * amount
+        delta[1] += sign * cpu_time
+        delta[2] += sign
+
+    def remove(self, job):
+        """Remove the contribution of the given Job, in its current
+        state, from the deltas."""
+        self.add(job, sign=-1)
+
+    def apply(self):
+        """Apply the accumulated deltas to JobUsageRollup rows, in a
+        consistent order, and clear them."""
+        def sort_key(key):
+            date, project_id, user_id, partition = key
+            return date, project_id or 0, user_id or 0, partition
+
+        for key in sorted(self._deltas, key=sort_key):
+            amount, cpu_time, num_jobs = self._deltas[key]
+            if not (amount or cpu_time or num_jobs):
+                continue
+            self._apply_delta(key, amount, cpu_time, num_jobs)
+        self._deltas.clear()
+
+    @staticmethod
+    def _apply_delta(key, amount, cpu_time, num_jobs):
+        """Add the given delta to the JobUsageRollup row with the given
+        key, creating it if needed."""
+        date, project_id, user_id, partition = key
+        lookup = {
+            'date': date,
+            'project_id': project_id,
+            'user_id': user_id,
+            'partition': partition,
+        }
+        rollups = JobUsageRollup.objects.filter(**lookup)
+        pk = rollups.values_list('pk', flat=True).first()
+        if pk is None:
+            # A missing row has nothing to remove (e.g., it was deleted
+            # along with its Project).
+            if num_jobs <= 0:
+                return
+            try:
+                with transaction.atomic():
+                    JobUsageRollup.objects.create(
+                        amount=amount, cpu_time=cpu_time, num_jobs=num_jobs,
+                        **lookup)
+                return
+            except IntegrityError:
+                # The row was created concurrently.
+                pk = rollups.values_list('pk', flat=True).first()
+        JobUsageRollup.objects.filter(pk=pk).update(
+            amount=F('amount') + amount,
+            cpu_time=F('cpu_time') + cpu_time,
+            num_jobs=F('num_jobs') + num_jobs)
+
+
+def aggregate_job_usage_totals(jobs):
+    """Return the total amount and cpu_time of the given queryset of
+    Jobs, using a single query."""
+    totals = jobs.aggregate(
+        total_amount=Sum('amount'), total_cpu_time=Sum('cpu_time'))
+    total_amount = totals['total_amount']
+    if total_amount is None:
+        total_amount = Decimal('0.00')
+    total_cpu_time = totals['total_cpu_time']
+    if total_cpu_time is None:
+        total_cpu_time = 0.0
+    return total_amount, total_cpu_time
+
+
+def get_job_usage_totals(jobs, start_time, end_time, project=None, user=None,
+                         partition=None):
+    """Return the total amount and cpu_time of the given queryset of
+    Jobs, which must consist of exactly the Jobs with amounts that
+    started between the given times, inclusive, optionally under the
+    given Project, by the given User, and on the given partition.
+
+    Totals for dates, in settings.DISPLAY_TIME_ZONE, that are entirely
+    between the times are read from JobUsageRollup. Only Jobs that
+    started on the partial dates at either end are scanned.
+
+    Parameters:
+        - jobs (QuerySet): A queryset of Jobs
+        - start_time (datetime): An offset-aware datetime
+        - end_time (datetime): An offset-aware datetime
+        - project (Project): An optional Project
+        - user (User): An optional User
+        - partition (str): An optional partition
+
+    Returns:
+        - A tuple of the total amount (Decimal) and the total cpu_time
+          (float)
+
+    Raises:
+        - None
+    """
+    display_tz = pytz.timezone(settings.DISPLAY_TIME_ZONE)
+    one_day = timedelta(days=1)
+
+    # Jobs start at a precision of a microsecond, so the last whole date ends
+    # before or at the given end time.
+    first_date = start_time.astimezone(display_tz).date()
+    first_date_start = display_time_zone_date_to_utc_datetime(first_date)
+    if first_date_start < start_time:
+        first_date += one_day
+        first_date_start = display_time_zone_date_to_utc_datetime(first_date)
+    last_date = (
+        (end_time + timedelta(microseconds=1)).astimezone(display_tz).date() -
+        one_day)
+    if first_date > last_date:
+        return aggregate_job_usage_totals(jobs)
+    last_date_end = display_time_zone_date_to_utc_datetime(
+        last_date + one_day)
+
+    rollups = JobUsageRollup.objects.filter(
+        date__gte=first_date, date__lte=last_date)
+    if project is not None:
+        rollups = rollups.filter(project=project)
+    if user is not None:
+        rollups = rollups.filter(user=user)
+    if partition:
+        rollups = rollups.filter(partition=partition)
+    totals = rollups.aggregate(
+        total_amount=Sum('amount'), total_cpu_time=Sum('cpu_time'))
+
+    partial_amount, partial_cpu_time = aggregate_job_usage_totals(
+        jobs.filter(
+            Q(startdate__lt=first_date_start) |
+            Q(startdate__gte=last_date_end)))
+    return (
+        (totals['total_amount'] or Decimal('0.00')) + partial_amount,
+        (totals['total_cpu_time'] or 0.0) + partial_cpu_time)
@@ -0,0 +1,133 @@
+from threading import Lock
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from coldfront.core.statistics.models import Job
+from coldfront.core.statistics.models import Node
+from coldfront.core.utils.common import import_from_settings
+
+
+class NodeNameCache(object):
+    """A process-local mapping from Node names to primary keys, loaded
+    from the database in full on first use.
+
+    Only entries for committed Nodes are stored, so that a rolled-back
+    transaction cannot leave behind keys of Nodes that do not exist. The
+    mapping is reloaded when the generation stored in the configured
+    cache changes, which happens when Nodes are renamed or deleted (see
+    invalidate), or when it expires after CACHE_GENERATION_TIMEOUT
+    seconds."""
+
+    # The key under which the current generation is stored in the cache.
+    _cache_key = 'node_name_cache_generation'
+
+    _ids_by_name = None
+    _generation = None
+    _lock = Lock()
+
+    @classmethod
+    def _current_generation(cls):
+        """Return the current generation from the cache, setting one if
+        there is none. Return None if the cache does not store values
+        (e.g., it is a dummy cache)."""
+        generation = cache.get(cls._cache_key)
+        if generation is None:
+            cache.add(cls._cache_key, uuid4().hex, cls._generation_timeout())
+            generation = cache.get(cls._cache_key)
+        return generation
+
+    @staticmethod
+    def _generation_timeout():
+        """Return the number of seconds after which a generation
+        expires."""
+        return import_from_settings('CACHE_GENERATION_TIMEOUT', 60 * 5)
+
+    @classmethod
+    def _publish(cls, ids_by_name, generation, replace=False):
+        """Store the given entries, read under the given generation, in
+        the mapping, replacing it entirely if requested. Discard them if
+        the generation has since changed."""
+        with cls._lock:
+            if replace:
+                if generation is not None:
+                    cls._ids_by_name = ids_by_name
+                    cls._generation = generation
+            elif (cls._ids_by_name is not None and
+                    cls._generation == generation):
+                cls._ids_by_name.update(ids_by_name)
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate the mapping in all processes using the cache, so
+        that it is reloaded on next use."""
+        cache.set(cls._cache_key, uuid4().hex, cls._generation_timeout())
+
+    @classmethod
+    def ids_by_name(cls, names):
+        """Return a dictionary mapping each of the given Node names to
+        the primary key of the Node with that name, creating any that
+        do not exist with a single query."""
+        names = set(names)
+        if not names:
+            return {}
+
+        generation = cls._current_generation()
+        with cls._lock:
+            if (cls._ids_by_name is not None and generation is not None and
+                    cls._generation == generation):
+                ids_by_name = cls._ids_by_name
+            else:
+                ids_by_name = None
+        if ids_by_name is None:
+            ids_by_name = dict(Node.objects.values_list('name', 'pk'))
+            transaction.on_commit(
+                lambda: cls._publish(ids_by_name, generation, replace=True))
+
+        found = {
+            name: ids_by_name[name] for name in names if name in ids_by_name}
+        missing_names = names - set(found)
+        if missing_names:
+            # Another process may create some of the same Nodes concurrently.
+            Node.objects.bulk_create(
+                [Node(name=name) for name in missing_names],
+                ignore_conflicts=True)
+            created = dict(
+                Node.objects.filter(
+                    name__in=missing_names).values_list('name', 'pk'))
+            transaction.on_commit(lambda: cls._publish(created, generation))
+            found.update(created)
+        return found
+
+
+def add_nodes_to_jobs(node_names_by_jobslurmid):
+    """Associate Jobs with Nodes, creating any Nodes that do not exist.
+    Existing associations are kept.
+
+    Parameters:
+        - node_names_by_jobslurmid (dict): A mapping from jobslurmids of
+                                           existing Jobs to iterables of
+                                           Node names
+
+    Returns:
+        - None
+
+    Raises:
+        - None
+    """
+    node_names_by_jobslurmid = {
+        jobslurmid: set(node_names)
+        for jobslurmid, node_names in node_names_by_jobslurmid.items()}
+    node_ids_by_name = NodeNameCache.ids_by_name(
+        name
+        for node_names in node_names_by_jobslurmid.values()
+        for name in node_names)
+    if not node_ids_by_name:
+        return
+    JobNode = Job.nodes.through
+    JobNode.objects.bulk_create(
+        [JobNode(job_id=jobslurmid, node_id=node_ids_by_name[name])
+         for jobslurmid, node_names in node_names_by_jobslurmid.items()
+         for name in node_names],
+        ignore_conflicts=True)
@@ -5,6 +5,8 @@ from bs4 import BeautifulSoup
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from coldfront.api.statistics.utils import create_project_allocation, \
@@ -113,8 +115,21 @@ class TestRequestHubView(TestBase):
             pytz.timezone(settings.DISPLAY_TIME_ZONE)).strftime('%b. %d, %Y')
 
     def get_response(self, user, url):
+        """Return the response to the given user's request for the given
+        hub URL, with the requests of each section loaded into it, as
+        they are once each section is expanded."""
         self.client.login(username=user.username, password=self.password)
-        return self.client.get(url)
+        response = self.client.get(url)
+        soup = BeautifulSoup(response.content, 'html.parser')
+        for body in soup.find_all(
+                'div', {'class': 'request-hub-section-body'}):
+            section_response = self.client.get(body['data-url'])
+            self.assertEqual(section_response.status_code, 200)
+            body.clear()
+            body.append(
+                BeautifulSoup(section_response.content, 'html.parser'))
+        response.content = str(soup)
+        return response
 
     def assert_no_requests(self, user, url, exclude=None):
         response = self.get_response(user, url)
@@ -644,3 +659,73 @@ class TestRequestHubView(TestBase):
         self.assert_no_requests(self.user1, self.url)
         self.assert_no_requests(self.staff, self.url)
         self.assert_no_requests(self.admin, self.url)
+
+    def create_savio_project_requests(self, num_requests):
+        """Create the given number of pending and completed
+        SavioProjectAllocationRequests each for self.project0."""
+        kwargs = {
+            'requester': self.user0,
+            'allocation_type': 'FCA',
+            'pi': self.pi,
+            'project': self.project0,
+            'pool': False,
+            'survey_answers': savio_project_request_state_schema()
+        }
+        for status_name in ('Under Review', 'Denied'):
+            status = ProjectAllocationRequestStatusChoice.objects.get(
+                name=status_name)
+            for _ in range(num_requests):
+                SavioProjectAllocationRequest.objects.create(
+                    status=status, **kwargs)
+
+    def test_num_queries(self):
+        """Test that the numbers of queries made to display the hub and
+        a section do not depend on the number of requests, and that the
+        numbers of pending requests are computed in one query."""
+        section_url = reverse(
+            'request-hub-admin-section', args=['savio_project_request'])
+        self.client.login(
+            username=self.admin.username, password=self.password)
+
+        def get_num_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        self.create_savio_project_requests(1)
+        num_hub_queries = get_num_queries(self.admin_url)
+        num_section_queries = get_num_queries(section_url)
+
+        self.create_savio_project_requests(5)
+        self.assertEqual(get_num_queries(self.admin_url), num_hub_queries)
+        self.assertEqual(get_num_queries(section_url), num_section_queries)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.admin_url)
+        count_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' in query['sql']]
+        self.assertEqual(len(count_queries), 1)
+        self.assert_pending_request_badge_shown(
+            'new_project_request_section', response, 6)
+
+    def test_section_access(self):
+        """Test that unknown sections are not found, and that only
+        staff/admin may view sections of all requests."""
+        section = 'savio_project_request'
+        url = reverse('request-hub-section', args=[section])
+        admin_url = reverse('request-hub-admin-section', args=[section])
+
+        self.client.login(
+            username=self.user0.username, password=self.password)
+        response = self.client.get(
+            reverse('request-hub-section', args=['nonexistent']))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(admin_url).status_code, 403)
+
+        self.client.login(
+            username=self.staff.username, password=self.password)
+        self.assertEqual(self.client.get(admin_url).status_code, 200)
+
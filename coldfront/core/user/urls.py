@@ -139,4 +139,14 @@ urlpatterns += [
     path('request-hub-admin',
          request_hub_views.RequestHubView.as_view(show_all_requests=True),
          name='request-hub-admin'),
+
+    path('request-hub/<str:section>',
+         request_hub_views.RequestHubSectionView.as_view(
+             show_all_requests=False),
+         name='request-hub-section'),
+
+    path('request-hub-admin/<str:section>',
+         request_hub_views.RequestHubSectionView.as_view(
+             show_all_requests=True),
+         name='request-hub-admin-section'),
 ]
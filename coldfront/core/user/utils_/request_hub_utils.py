@@ -0,0 +1,428 @@
+from django.db.models import Count
+from django.db.models import IntegerField
+from django.db.models import Q
+from django.db.models import Value
+from flags.state import flag_enabled
+
+from coldfront.core.allocation.models import AllocationAdditionRequest
+from coldfront.core.allocation.models import AllocationRenewalRequest
+from coldfront.core.allocation.models import ClusterAccessRequest
+from coldfront.core.allocation.models import SecureDirAddUserRequest
+from coldfront.core.allocation.models import SecureDirRemoveUserRequest
+from coldfront.core.allocation.models import SecureDirRequest
+from coldfront.core.allocation.utils import annotate_queryset_with_allocation_period_not_started_bool
+from coldfront.core.project.models import Project
+from coldfront.core.project.models import ProjectUserJoinRequest
+from coldfront.core.project.models import ProjectUserRemovalRequest
+from coldfront.core.project.models import SavioProjectAllocationRequest
+from coldfront.core.project.models import VectorProjectAllocationRequest
+
+
+"""Classes for retrieving the requests displayed in the request hub.
+
+The hub lists a section per type of request. The numbers of pending
+requests of all sections are computed in a single query, while the
+requests themselves are only retrieved for a section once it is
+expanded."""
+
+
+class RequestHubSection(object):
+    """A section of the request hub, listing pending and completed
+    requests of one type that are visible to a user."""
+
+    # The name of the section, which identifies it in URLs.
+    name = None
+    # The id of the section's element.
+    id = None
+    title = None
+    # The template rendering a table of the requests.
+    table = None
+    # The URL name, and arguments, of the main page for the requests.
+    button_path = None
+    button_args = ()
+    button_text = None
+    help_text = None
+
+    model = None
+    # The relations rendered by the table, which are retrieved with the
+    # requests.
+    related_fields = ()
+    order_by = 'modified'
+
+    def __init__(self, user, show_all_requests, num):
+        self.user = user
+        self.show_all_requests = show_all_requests
+        # The number of the section's first paginator. Each section has two.
+        self.num = num
+        self.num_pending = None
+
+    @property
+    def button_arg1(self):
+        return self.button_args[0] if self.button_args else None
+
+    @property
+    def button_arg2(self):
+        return self.button_args[1] if len(self.button_args) > 1 else None
+
+    def completed_q(self):
+        """Return a Q object selecting completed requests."""
+        raise NotImplementedError
+
+    def pending_q(self):
+        """Return a Q object selecting pending requests."""
+        raise NotImplementedError
+
+    def user_q(self):
+        """Return a Q object selecting requests visible to the user,
+        when not all requests are shown."""
+        raise NotImplementedError
+
+    @staticmethod
+    def user_projects(user, role_names):
+        """Return a queryset of the Projects on which the given User is
+        'Active' with one of the given role names."""
+        return Project.objects.filter(
+            projectuser__user=user,
+            projectuser__role__name__in=role_names,
+            projectuser__status__name='Active')
+
+    def get_queryset(self, q):
+        """Return a queryset of the requests visible to the user that
+        match the given Q object, without related objects."""
+        queryset = self.model.objects.filter(q)
+        if not self.show_all_requests:
+            queryset = queryset.filter(self.user_q())
+        return queryset
+
+    def get_rows(self, queryset):
+        """Return the given queryset of requests, ordered and with the
+        objects rendered by the table."""
+        return queryset.select_related(*self.related_fields).order_by(
+            self.order_by, 'pk')
+
+    def completed_requests(self):
+        return self.get_rows(self.get_queryset(self.completed_q()))
+
+    def pending_requests(self):
+        return self.get_rows(self.get_queryset(self.pending_q()))
+
+
+class ClusterAccessRequestSection(RequestHubSection):
+
+    name = 'cluster_account_request'
+    id = 'cluster_access_request_section'
+    title = 'Cluster Access Requests'
+    table = 'allocation/allocation_cluster_account_request_list_table.html'
+    button_path = 'allocation-cluster-account-request-list'
+    button_text = 'Go To Cluster Access Requests Main Page'
+    help_text = 'Showing your cluster access requests.'
+
+    model = ClusterAccessRequest
+    related_fields = (
+        'allocation_user__allocation__project',
+        'allocation_user__user__userprofile__billing_activity__'
+        'billing_project',
+        'status',
+    )
+
+    def completed_q(self):
+        return Q(status__name__in=['Denied', 'Complete'])
+
+    def pending_q(self):
+        return Q(status__name__in=['Pending - Add', 'Processing'])
+
+    def user_q(self):
+        return Q(allocation_user__user=self.user)
+
+
+class ProjectJoinRequestSection(RequestHubSection):
+
+    name = 'project_join_request'
+    id = 'project_join_request_section'
+    title = 'Project Join Requests'
+    table = 'project/project_join_request_list_table.html'
+    button_path = 'project-join-request-list'
+    button_text = 'Go To Project Join Requests Main Page'
+    help_text = 'Showing your project join requests.'
+
+    model = ProjectUserJoinRequest
+    related_fields = ('project_user__project', 'project_user__user')
+
+    def completed_q(self):
+        return Q(project_user__status__name__in=['Active', 'Denied'])
+
+    def pending_q(self):
+        return Q(project_user__status__name='Pending - Add')
+
+    def user_q(self):
+        return Q(project_user__user=self.user)
+
+
+class ProjectRemovalRequestSection(RequestHubSection):
+
+    name = 'project_removal_request'
+    id = 'project_removal_request_section'
+    title = 'Project Removal Requests'
+    table = 'project/project_removal/project_removal_request_list_table.html'
+    button_path = 'project-removal-request-list'
+    button_text = 'Go To Project Removal Requests Main Page'
+    help_text = (
+        'Showing project removal requests that you requested or requests in '
+        'which you are the user being removed.')
+
+    model = ProjectUserRemovalRequest
+    related_fields = (
+        'project_user__project', 'project_user__user', 'requester', 'status')
+
+    def completed_q(self):
+        return Q(status__name='Complete')
+
+    def pending_q(self):
+        return Q(status__name__in=['Pending', 'Processing'])
+
+    def user_q(self):
+        return Q(project_user__user=self.user) | Q(requester=self.user)
+
+
+class ProjectRenewalRequestSection(RequestHubSection):
+
+    name = 'project_renewal_request'
+    id = 'project_renewal_request_section'
+    title = 'Project Renewal Requests'
+    table = 'project/project_renewal/project_renewal_request_list_table.html'
+    button_path = 'pi-allocation-renewal-pending-request-list'
+    button_text = 'Go To Project Renewal Requests Main Page'
+    help_text = (
+        'Showing project renewal requests that you requested or requests in '
+        'which you are the PI for the associated project.')
+
+    model = AllocationRenewalRequest
+    related_fields = ('pi', 'post_project', 'requester', 'status')
+    order_by = 'request_time'
+
+    def completed_q(self):
+        return Q(status__name__in=['Approved', 'Complete', 'Denied'])
+
+    def pending_q(self):
+        return Q(status__name__in=['Under Review'])
+
+    def user_q(self):
+        return Q(requester=self.user) | Q(pi=self.user)
+
+    def get_rows(self, queryset):
+        return annotate_queryset_with_allocation_period_not_started_bool(
+            super().get_rows(queryset))
+
+
+class SavioProjectRequestSection(RequestHubSection):
+
+    name = 'savio_project_request'
+    id = 'new_project_request_section'
+    title = 'New Project Requests'
+    table = 'project/project_request/savio/project_request_list_table.html'
+    button_path = 'new-project-pending-request-list'
+    button_text = 'Go To New Project Requests Main Page'
+    help_text = (
+        'Showing new project requests that you requested or requests in '
+        'which you are the PI for the associated project.')
+
+    model = SavioProjectAllocationRequest
+    related_fields = ('pi', 'project', 'requester', 'status')
+    order_by = 'request_time'
+
+    def completed_q(self):
+        return Q(status__name__in=[
+            'Approved - Complete', 'Approved - Scheduled', 'Denied'])
+
+    def pending_q(self):
+        return Q(status__name__in=['Under Review', 'Approved - Processing'])
+
+    def user_q(self):
+        return Q(pi=self.user) | Q(requester=self.user)
+
+    def get_rows(self, queryset):
+        return annotate_queryset_with_allocation_period_not_started_bool(
+            super().get_rows(queryset))
+
+
+class SecureDirRequestSection(RequestHubSection):
+
+    name = 'secure_dir_request'
+    id = 'secure_dir_request_section'
+    title = 'Secure Directory Requests'
+    table = 'secure_dir/secure_dir_request/secure_dir_request_list_table.html'
+    button_path = 'secure-dir-pending-request-list'
+    button_text = 'Go To Secure Directory Requests Main Page'
+    help_text = (
+        'Showing secure directory requests for projects where you are a PI.')
+
+    model = SecureDirRequest
+    related_fields = ('project', 'requester', 'status')
+
+    def completed_q(self):
+        return Q(status__name__in=['Approved - Complete', 'Denied'])
+
+    def pending_q(self):
+        return Q(status__name__in=['Under Review', 'Approved - Processing'])
+
+    def user_q(self):
+        return (
+            Q(requester=self.user) |
+            Q(project__in=self.user_projects(
+                self.user, ['Principal Investigator'])))
+
+
+class SecureDirManageUserRequestSection(RequestHubSection):
+    """A section for requests to add or remove users from secure
+    directories."""
+
+    table = 'secure_dir/secure_dir_manage_user_request_list_table.html'
+    button_path = 'secure-dir-manage-users-request-list'
+
+    related_fields = ('allocation__project', 'status', 'user')
+
+    def completed_q(self):
+        return Q(status__name__in=['Complete', 'Denied'])
+
+    def pending_q(self):
+        return Q(status__name__in=['Pending', 'Processing'])
+
+    def user_q(self):
+        return (
+            Q(user=self.user) |
+            Q(allocation__project__in=self.user_projects(
+                self.user, ['Principal Investigator'])))
+
+
+class SecureDirJoinRequestSection(SecureDirManageUserRequestSection):
+
+    name = 'secure_dir_join_request'
+    id = 'secure_dir_join_request_section'
+    title = 'Secure Directory Join Requests'
+    button_args = ('add', 'pending')
+    button_text = 'Go To Secure Directory Join Requests Main Page'
+    help_text = (
+        'Showing secure directory join requests in which you are a PI for '
+        'the associated project or in which you are the user.')
+
+    model = SecureDirAddUserRequest
+
+
+class SecureDirRemoveRequestSection(SecureDirManageUserRequestSection):
+
+    name = 'secure_dir_remove_request'
+    id = 'secure_dir_remove_request_section'
+    title = 'Secure Directory Removal Requests'
+    button_args = ('remove', 'pending')
+    button_text = 'Go To Secure Directory Removal Requests Main Page'
+    help_text = (
+        'Showing secure directory removal requests in which you are a PI for '
+        'the associated project or in which you are the user.')
+
+    model = SecureDirRemoveUserRequest
+
+
+class ServiceUnitPurchaseRequestSection(RequestHubSection):
+
+    name = 'su_purchase_request'
+    id = 'service_unit_purchase_request_section'
+    title = 'Service Unit Purchase Requests'
+    table = 'project/project_allocation_addition/request_list_table.html'
+    button_path = 'service-units-purchase-pending-request-list'
+    button_text = 'Go To Service Unit Purchase Requests Main Page'
+    help_text = (
+        'Showing service unit purchase requests in which you are a PI or '
+        'manager for the associated project.')
+
+    model = AllocationAdditionRequest
+    related_fields = ('project', 'requester', 'status')
+
+    def completed_q(self):
+        return Q(status__name__in=['Complete', 'Denied'])
+
+    def pending_q(self):
+        return Q(status__name__in=['Under Review'])
+
+    def user_q(self):
+        return Q(project__in=self.user_projects(
+            self.user, ['Manager', 'Principal Investigator']))
+
+
+class VectorProjectRequestSection(RequestHubSection):
+
+    name = 'vector_project_request'
+    id = 'vector_project_request_section'
+    title = 'Vector Project Requests'
+    table = 'project/project_request/vector/project_request_list_table.html'
+    button_path = 'vector-project-pending-request-list'
+    button_text = 'Go To Vector Project Requests Main Page'
+    help_text = (
+        'Showing Vector project requests that you requested or requests in '
+        'which you are the PI for the associated project.')
+
+    model = VectorProjectAllocationRequest
+    related_fields = ('pi', 'project', 'requester', 'status')
+
+    def completed_q(self):
+        return Q(status__name__in=['Approved - Complete', 'Denied'])
+
+    def pending_q(self):
+        return Q(status__name__in=['Under Review', 'Approved - Processing'])
+
+    def user_q(self):
+        return Q(pi=self.user) | Q(requester=self.user)
+
+
+class RequestHub(object):
+    """The sections of the request hub displayed to a user, in order of
+    display."""
+
+    # Pairs of section classes and the names of the flags that must be
+    # enabled for them to be displayed, if any.
+    section_classes = (
+        (ClusterAccessRequestSection, None),
+        (ProjectJoinRequestSection, None),
+        (ProjectRemovalRequestSection, None),
+        (ProjectRenewalRequestSection, None),
+        (SavioProjectRequestSection, None),
+        (SecureDirRequestSection, 'SECURE_DIRS_REQUESTABLE'),
+        (SecureDirJoinRequestSection, 'SECURE_DIRS_REQUESTABLE'),
+        (SecureDirRemoveRequestSection, 'SECURE_DIRS_REQUESTABLE'),
+        (ServiceUnitPurchaseRequestSection, 'SERVICE_UNITS_PURCHASABLE'),
+        (VectorProjectRequestSection, 'BRC_ONLY'),
+    )
+
+    def __init__(self, user, show_all_requests):
+        self.sections = []
+        for i, (section_class, flag_name) in enumerate(self.section_classes):
+            if flag_name and not flag_enabled(flag_name):
+                continue
+            self.sections.append(
+                section_class(user, show_all_requests, 2 * i))
+
+    def get_section(self, name):
+        """Return the displayed section with the given name, or None."""
+        for section in self.sections:
+            if section.name == name:
+                return section
+        return None
+
+    def set_num_pending(self):
+        """Set the number of pending requests of each section, computing
+        them in a single query."""
+        querysets = []
+        for i, section in enumerate(self.sections):
+            querysets.append(
+                section.get_queryset(
+                    section.pending_q()
+                ).order_by().values(
+                    section_index=Value(i, output_field=IntegerField())
+                ).annotate(
+                    num_pending=Count('pk')
+                ).values_list('section_index', 'num_pending'))
+        if not querysets:
+            return
+        num_pending_by_index = dict(
+            querysets[0].union(*querysets[1:], all=True))
+        for i, section in enumerate(self.sections):
+            section.num_pending = num_pending_by_index.get(i, 0)
@@ -43,6 +43,7 @@ from coldfront.core.user.utils import send_account_already_active_email
 from coldfront.core.user.utils import send_email_verification_email
 from coldfront.core.user.utils import update_user_primary_email_address
 from coldfront.core.user.utils_.host_user_utils import is_lbl_employee
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import (import_from_settings,
                                          utc_now_offset_aware)
 
@@ -935,8 +936,8 @@ class IdentityLinkingRequestView(UserPassesTestMixin, View):
         return True
 
     def dispatch(self, request, *args, **kwargs):
-        self.pending_status = IdentityLinkingRequestStatusChoice.objects.get(
-            name='Pending')
+        self.pending_status = get_choice(
+            IdentityLinkingRequestStatusChoice, 'Pending')
         user = self.request.user
         redirection = HttpResponseRedirect(reverse('user-profile'))
 
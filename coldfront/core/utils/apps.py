@@ -6,3 +6,4 @@ class UtilsConfig(AppConfig):
 
     def ready(self):
         import coldfront.core.utils.flag_conditions
+        import coldfront.core.utils.signals
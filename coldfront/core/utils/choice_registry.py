@@ -0,0 +1,168 @@
+import copy
+from threading import Lock
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+
+from coldfront.core.utils.common import import_from_settings
+
+
+"""A registry of the rows of lookup models (e.g., AllocationStatusChoice,
+ProjectUserRoleChoice, and AllocationAttributeType), which are resolved
+by name on most code paths, so that each lookup need not query the
+database."""
+
+
+# The suffixes of the names of models whose rows are registered, and the names
+# of additional such models.
+REGISTERED_MODEL_NAME_SUFFIXES = ('StatusChoice', 'RoleChoice')
+REGISTERED_MODEL_NAMES = ('AllocationAttributeType', )
+
+
+class ChoiceRegistry(object):
+    """A process-local mapping, per registered model, from names of rows
+    to the rows, each loaded from the database in full on first use.
+
+    As with NodeNameCache, a model's rows are only stored once the
+    transaction that loaded them is committed, so that a rolled-back
+    transaction cannot leave behind rows that do not exist; until then,
+    lookups query the database. A model's rows are reloaded when its
+    generation stored in the configured cache changes, which happens
+    when any of them is saved or deleted (see invalidate), or when it
+    expires after CACHE_GENERATION_TIMEOUT seconds. The latter bounds
+    how long a process whose cache does not observe an invalidation made
+    by another process may use stale rows."""
+
+    # The prefix of the keys under which the current generations are stored.
+    _cache_key_prefix = 'choice_registry_generation'
+
+    # A mapping from model labels to (generation, rows by name) pairs.
+    _entries = {}
+    _lock = Lock()
+
+    @staticmethod
+    def is_registered(model):
+        """Return whether rows of the given model are registered."""
+        name = model.__name__
+        return (name.endswith(REGISTERED_MODEL_NAME_SUFFIXES) or
+                name in REGISTERED_MODEL_NAMES)
+
+    @classmethod
+    def registered_models(cls):
+        """Return the installed models whose rows are registered."""
+        return [model for model in apps.get_models()
+                if cls.is_registered(model)]
+
+    @classmethod
+    def _cache_key(cls, model):
+        return f'{cls._cache_key_prefix}:{model._meta.label}'
+
+    @classmethod
+    def _current_generation(cls, model):
+        """Return the current generation of the given model from the
+        cache, setting one if there is none. Return None if the cache
+        does not store values (e.g., it is a dummy cache)."""
+        cache_key = cls._cache_key(model)
+        generation = cache.get(cache_key)
+        if generation is None:
+            cache.add(cache_key, uuid4().hex, cls._generation_timeout())
+            generation = cache.get(cache_key)
+        return generation
+
+    @staticmethod
+    def _generation_timeout():
+        """Return the number of seconds after which a generation
+        expires."""
+        return import_from_settings('CACHE_GENERATION_TIMEOUT', 60 * 5)
+
+    @classmethod
+    def _publish(cls, model, generation, rows_by_name):
+        """Store the given rows of the given model, read under the given
+        generation, unless there is no generation."""
+        if generation is None:
+            return
+        with cls._lock:
+            cls._entries[model._meta.label] = (generation, rows_by_name)
+
+    @classmethod
+    def invalidate(cls, model):
+        """Invalidate the rows of the given model in all processes using
+        the cache, so that they are reloaded on next use."""
+        cache.set(
+            cls._cache_key(model), uuid4().hex, cls._generation_timeout())
+
+    @classmethod
+    def invalidate_all(cls):
+        """Invalidate the rows of all registered models."""
+        for model in cls.registered_models():
+            cls.invalidate(model)
+
+    @classmethod
+    def _rows_by_name(cls, model):
+        """Return a dictionary mapping names to lists of rows of the
+        given model with those names."""
+        if not cls.is_registered(model):
+            raise ValueError(f'{model.__name__} is not registered.')
+        generation = cls._current_generation(model)
+        with cls._lock:
+            entry = cls._entries.get(model._meta.label)
+        if (entry is not None and generation is not None and
+                entry[0] == generation):
+            return entry[1]
+
+        rows_by_name = {}
+        for row in model._default_manager.select_related():
+            rows_by_name.setdefault(row.name, []).append(row)
+        transaction.on_commit(
+            lambda: cls._publish(model, generation, rows_by_name))
+        return rows_by_name
+
+    @classmethod
+    def get(cls, model, name):
+        """Return a copy of the row of the given model with the given
+        name, raising the same exceptions as model.objects.get(name=name)
+        if there is not exactly one."""
+        rows = cls._rows_by_name(model).get(name, [])
+        if not rows:
+            raise model.DoesNotExist(
+                f'{model._meta.object_name} matching query does not exist.')
+        if len(rows) > 1:
+            raise model.MultipleObjectsReturned(
+                f'get() returned more than one {model._meta.object_name} '
+                f'-- it returned {len(rows)}!')
+        return copy.copy(rows[0])
+
+    @classmethod
+    def pk(cls, model, name):
+        """Return the primary key of the row of the given model with the
+        given name, so that queries may filter on it without joining to
+        the model's table. Raise the same exceptions as get."""
+        return cls.get(model, name).pk
+
+
+def get_choice(model, name):
+    """Return the row of the given registered model (e.g.,
+    AllocationStatusChoice) with the given name, without querying the
+    database if its rows are registered.
+
+    Parameters:
+        - model (Model): A model for which ChoiceRegistry.is_registered
+        - name (str): The name of the row
+
+    Returns:
+        - An instance of the model
+
+    Raises:
+        - model.DoesNotExist, if there is no such row
+        - model.MultipleObjectsReturned, if there are several
+        - ValueError, if the model is not registered
+    """
+    return ChoiceRegistry.get(model, name)
+
+
+def get_choice_pk(model, name):
+    """Return the primary key of the row of the given registered model
+    with the given name. See get_choice."""
+    return ChoiceRegistry.pk(model, name)
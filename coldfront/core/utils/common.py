@@ -8,6 +8,9 @@ from datetime import datetime
 from decimal import Decimal
 
 from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse
 
@@ -35,6 +38,14 @@ def import_from_settings(attr, *args):
         raise ImproperlyConfigured('Setting {0} not found'.format(attr))
 
 
+def is_cache_shared(alias='default'):
+    """Return whether the cache with the given alias is shared between
+    processes (e.g., Redis or memcached), as opposed to being local to
+    each process (e.g., the default local-memory cache) or not storing
+    values at all."""
+    return not isinstance(caches[alias], (DummyCache, LocMemCache))
+
+
 def get_domain_url(request):
     return request.build_absolute_uri().replace(request.get_full_path(), '')
 
@@ -0,0 +1,125 @@
+import csv
+import gzip
+import json
+import textwrap
+
+"""Utilities for exporting rows of data incrementally, so that exports
+of large tables run in bounded memory."""
+
+
+# The number of rows to fetch from the database at a time. On PostgreSQL,
+# rows are fetched from a server-side cursor.
+EXPORT_CHUNK_SIZE = 2000
+
+
+class RowWriter(object):
+    """A base class for objects that write rows, each a sequence of
+    values corresponding to a header, to an output one at a time."""
+
+    def __init__(self, output, header):
+        self.output = output
+        self.header = header
+
+    def begin(self):
+        """Write anything that precedes the first row."""
+        pass
+
+    def write_row(self, row):
+        """Write the given row."""
+        raise NotImplementedError
+
+    def end(self):
+        """Write anything that follows the last row."""
+        pass
+
+
+class CSVRowWriter(RowWriter):
+    """Write rows as CSV, preceded by the header."""
+
+    def begin(self):
+        self.writer = csv.writer(self.output)
+        self.writer.writerow(self.header)
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+
+class JSONRowWriter(RowWriter):
+    """Write rows as a JSON array of objects keyed by the header,
+    formatted as json.dumps(rows, indent=4) would format them."""
+
+    def begin(self):
+        self.output.write('[')
+        self.num_rows = 0
+
+    def write_row(self, row):
+        obj = json.dumps(dict(zip(self.header, row)), indent=4, default=str)
+        separator = ',\n' if self.num_rows else '\n'
+        self.output.write(separator + textwrap.indent(obj, ' ' * 4))
+        self.num_rows += 1
+
+    def end(self):
+        self.output.write('\n]')
+
+
+class NDJSONRowWriter(RowWriter):
+    """Write rows as newline-delimited JSON objects keyed by the
+    header."""
+
+    def write_row(self, row):
+        self.output.write(
+            json.dumps(dict(zip(self.header, row)), default=str) + '\n')
+
+
+ROW_WRITER_CLASSES = {
+    'csv': CSVRowWriter,
+    'json': JSONRowWriter,
+    'ndjson': NDJSONRowWriter,
+}
+
+EXPORT_FORMATS = list(ROW_WRITER_CLASSES)
+
+
+def export_rows(rows, header, format, output, error):
+    """Write the given rows, an iterable of sequences of values
+    corresponding to the given header, to the given output in the given
+    format, consuming them one at a time.
+
+    Parameters:
+        - rows (iterable): An iterable of sequences of values
+        - header (list): A list of column names
+        - format (str): One of EXPORT_FORMATS
+        - output (file): A text stream to write rows to
+        - error (file): A text stream to write errors to
+
+    Returns:
+        - None
+
+    Raises:
+        - Any exception raised while retrieving the first row. Errors
+          raised while writing are written to the error stream instead.
+          If there are no rows, 'Empty QuerySet' is written there, and
+          nothing is written to the output.
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        error.write('Empty QuerySet')
+        return
+    try:
+        writer = ROW_WRITER_CLASSES[format](output, header)
+        writer.begin()
+        writer.write_row(first_row)
+        for row in rows:
+            writer.write_row(row)
+        writer.end()
+    except Exception as e:
+        error.write(str(e))
+
+
+def open_export_file(path):
+    """Open the file at the given path for writing text, compressing it
+    with gzip if the path ends with '.gz'."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', newline='')
+    return open(path, 'w', newline='')
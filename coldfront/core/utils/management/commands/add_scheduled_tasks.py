@@ -6,6 +6,8 @@ from django.core.management.base import BaseCommand, CommandError
 from django_q.models import Schedule
 from django_q.tasks import schedule
 
+from coldfront.core.utils.common import is_cache_shared
+
 base_dir = settings.BASE_DIR
 
 
@@ -21,3 +23,26 @@ class Command(BaseCommand):
         schedule('coldfront.core.allocation.tasks.send_expiry_emails',
                  schedule_type=Schedule.DAILY,
                  next_run=datetime.datetime(date.year, date.month, date.day, 00, 00, 00, 000000))
+
+        if settings.ACCOUNTING_USAGE_LEDGER_ENABLED:
+            schedule('coldfront.core.allocation.tasks.compact_usage_ledger',
+                     schedule_type=Schedule.MINUTES,
+                     minutes=1)
+
+        if ('coldfront.plugins.slurm' in settings.INSTALLED_APPS and
+                getattr(settings, 'SLURM_ENABLE_SIGNALS', False)):
+            schedule('coldfront.plugins.slurm.tasks.check_associations',
+                     schedule_type=Schedule.DAILY,
+                     next_run=datetime.datetime(date.year, date.month, date.day, 00, 00, 00, 000000))
+
+        if 'coldfront.plugins.system_monitor' in settings.EXTRA_APPS:
+            schedule('coldfront.plugins.system_monitor.tasks.refresh_system_monitor_data',
+                     schedule_type=Schedule.MINUTES,
+                     minutes=1)
+
+        # Portal summaries stored by the task are only visible to other
+        # processes if the cache is shared.
+        if is_cache_shared():
+            schedule('coldfront.core.portal.tasks.update_portal_summaries',
+                     schedule_type=Schedule.MINUTES,
+                     minutes=15)
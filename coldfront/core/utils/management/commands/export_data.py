@@ -1,19 +1,25 @@
-import csv
-import json
 import datetime
+from itertools import chain
+from itertools import groupby
 from sys import stdout, stderr
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Value, F, CharField, Func, \
-    DurationField, ExpressionWrapper
+from django.db.models import Value, F, CharField, Func
 
 from coldfront.core.allocation.models import AllocationAttributeType, \
     AllocationUserAttribute
 from coldfront.core.statistics.models import Job
+from coldfront.core.statistics.utils_.job_queue_time_utils import QUEUE_TIME_GROUPS
+from coldfront.core.statistics.utils_.job_queue_time_utils import get_job_queue_time_statistics
 from coldfront.core.project.models import Project, ProjectStatusChoice, \
-    SavioProjectAllocationRequest, VectorProjectAllocationRequest
+    ProjectUser, SavioProjectAllocationRequest, VectorProjectAllocationRequest
 from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
+from coldfront.core.utils.choice_registry import get_choice
 from coldfront.core.utils.common import display_time_zone_date_to_utc_datetime
+from coldfront.core.utils.export_utils import EXPORT_CHUNK_SIZE
+from coldfront.core.utils.export_utils import EXPORT_FORMATS
+from coldfront.core.utils.export_utils import export_rows
+from coldfront.core.utils.export_utils import open_export_file
 
 
 """An admin command that exports the results of useful database queries
@@ -49,12 +55,7 @@ class Command(BaseCommand):
                                   help='Export list of users and their latest '
                                        'job if they have submitted a job since '
                                        'a given date.')
-        latest_jobs_by_user_parser.add_argument(
-            '--format',
-            choices=['csv', 'json'],
-            required=True,
-            help='Export results in the given format.',
-            type=str)
+        self.add_output_arguments(latest_jobs_by_user_parser)
         latest_jobs_by_user_parser.add_argument(
             '--start_date',
             help='Date since users last submitted a job. '
@@ -65,12 +66,7 @@ class Command(BaseCommand):
             subparsers.add_parser('new_cluster_accounts',
                                   help='Export list of new user accounts '
                                        'created since a given date.')
-        new_cluster_accounts_parser.add_argument(
-            '--format',
-            choices=['csv', 'json'],
-            required=True,
-            help='Export results in the given format.',
-            type=str)
+        self.add_output_arguments(new_cluster_accounts_parser)
         new_cluster_accounts_parser.add_argument(
             '--start_date',
             help='Date that users last created an account. '
@@ -100,6 +96,21 @@ class Command(BaseCommand):
             '--partition',
             help='Filter jobs by the partition they requested.',
             type=str)
+        job_avg_queue_time_parser.add_argument(
+            '--group_by',
+            action='append',
+            choices=QUEUE_TIME_GROUPS,
+            default=[],
+            help='Report queue times separately for each group. May be '
+                 'given multiple times.',
+            type=str)
+        job_avg_queue_time_parser.add_argument(
+            '--percentile',
+            action='append',
+            default=[],
+            help='Also report the queue time at the given percentile, '
+                 'between 1 and 99. May be given multiple times.',
+            type=valid_percentile)
 
         project_subparser = subparsers.add_parser('projects',
                                                   help='Export projects data')
@@ -107,11 +118,7 @@ class Command(BaseCommand):
                                        choices=self.allowance_prefixes,
                                        help='Filter projects by the given allowance type.',
                                        type=str)
-        project_subparser.add_argument('--format',
-                                       choices=['csv', 'json'],
-                                       required=True,
-                                       help='Export results in the given format.',
-                                       type=str)
+        self.add_output_arguments(project_subparser)
         project_subparser.add_argument('--active_only', action='store_true')
 
         new_project_requests_subparser = subparsers.\
@@ -125,26 +132,45 @@ class Command(BaseCommand):
                                                     help='Get Requests from this date.'
                                                     'Must take the form of "MM-DD-YYYY".',
                                                     type=valid_date)
-        new_project_requests_subparser.add_argument('--format',
-                                                    choices=['csv', 'json'],
-                                                    required=True,
-                                                    help='Export results in the given format.',
-                                                    type=str)
+        self.add_output_arguments(new_project_requests_subparser)
 
         survey_responses_subparser = subparsers.add_parser('survey_responses',
                                                            help='Export survey responses')
-        survey_responses_subparser.add_argument('--format', help='Format to dump survey responses in',
-                                                type=str, required=True, choices=['json', 'csv'])
+        self.add_output_arguments(survey_responses_subparser)
         survey_responses_subparser.add_argument('--allowance_type',
                                                 help='Dump responses for Projects with given prefix',
                                                 type=str, required=False, default='',
                                                 choices=self.allowance_prefixes)
 
+    @staticmethod
+    def add_output_arguments(parser):
+        """Add arguments controlling the output of exported rows to the
+        given parser."""
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            required=True,
+            help='Export results in the given format.',
+            type=str)
+        parser.add_argument(
+            '--output',
+            help=(
+                'Write results to the file at the given path instead of '
+                'stdout, compressing them with gzip if the path ends with '
+                '".gz".'),
+            type=str)
+
     def handle(self, *args, **options):
         """Call the handler for the provided subcommand."""
         subcommand = options['subcommand']
         handler = getattr(self, f'handle_{subcommand}')
-        handler(*args, **options)
+        path = options.get('output', None)
+        if not path:
+            handler(*args, **options)
+            return
+        with open_export_file(path) as output:
+            options['stdout'] = output
+            handler(*args, **options)
 
     def handle_latest_jobs_by_user(self, *args, **options):
         """Handle the 'latest_jobs_by_user' subcommand."""
@@ -171,18 +197,9 @@ class Command(BaseCommand):
         query_set = query_set.order_by('userid', '-submitdate').\
             distinct('userid')
 
-        if format == 'csv':
-            query_set = query_set.values_list(*fields)
-            self.to_csv(query_set,
-                        header=[*fields],
-                        output=output,
-                        error=error)
-
-        else:
-            query_set = query_set.values(*fields)
-            self.to_json(query_set,
-                         output=output,
-                         error=error)
+        rows = query_set.values_list(*fields).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE)
+        export_rows(rows, fields, format, output, error)
 
     def handle_new_cluster_accounts(self, *args, **options):
         """Handle the 'new_cluster_accounts' subcommand."""
@@ -192,8 +209,8 @@ class Command(BaseCommand):
         error = options.get('stderr', stderr)
         fields = ['username', 'date_created']
 
-        cluster_account_status = AllocationAttributeType.objects.get(
-            name='Cluster Account Status')
+        cluster_account_status = get_choice(
+            AllocationAttributeType, 'Cluster Account Status')
 
         query_set = AllocationUserAttribute.objects.filter(
             allocation_attribute_type=cluster_account_status,
@@ -216,18 +233,9 @@ class Command(BaseCommand):
         query_set = query_set.order_by('username', '-created'). \
             distinct('username')
 
-        if format == 'csv':
-            query_set = query_set.values_list(*fields)
-            self.to_csv(query_set,
-                        header=[*fields],
-                        output=output,
-                        error=error)
-
-        else:
-            query_set = query_set.values(*fields)
-            self.to_json(query_set,
-                         output=output,
-                         error=error)
+        rows = query_set.values_list(*fields).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE)
+        export_rows(rows, fields, format, output, error)
 
     def handle_job_avg_queue_time(self, *args, **options):
         """Handle the 'job_avg_queue_time' subcommand."""
@@ -235,16 +243,14 @@ class Command(BaseCommand):
         end_date = options.get('end_date', None)
         allowance_type = options.get('allowance_type', None)
         partition = options.get('partition', None)
+        group_by = options.get('group_by', [])
+        percentiles = sorted(set(options.get('percentile', [])))
 
         if start_date and end_date and end_date < start_date:
             message = 'start_date must be before end_date.'
             raise CommandError(message)
 
-        # only select jobs that have valid start and submit dates
-        query_set = Job.objects.exclude(startdate=None, submitdate=None)
-
-        query_set = query_set.annotate(queue_time=ExpressionWrapper(
-            F('startdate') - F('submitdate'), output_field=DurationField()))
+        query_set = Job.objects.all()
 
         if start_date:
             start_date = display_time_zone_date_to_utc_datetime(start_date)
@@ -258,33 +264,33 @@ class Command(BaseCommand):
             query_set = query_set.filter(accountid__name__startswith=allowance_type)
 
         if partition:
-            message = 'Filtering on job partitions may take over a minute...'
-            self.stdout.write(self.style.WARNING(message))
-
-            # further reduce query_set size before splitting partition
-            query_set = query_set.filter(partition__icontains=partition)
-            ids = set()
+            query_set = query_set.filter(partitions__name=partition)
 
-            for job in query_set.iterator():
-                if partition in job.partition.split(','):
-                    ids.add(job.jobslurmid)
-            query_set = query_set.filter(jobslurmid__in=ids)
+        # Statistics are computed in the database; only jobs with valid start
+        # and submit dates are included.
+        statistics = get_job_queue_time_statistics(
+            query_set, group_by=group_by, percentiles=percentiles,
+            allowance_prefixes=self.allowance_prefixes)
 
-        if query_set.count() == 0:
+        if not statistics:
             message = 'No jobs found that satisfy the passed arguments'
             raise CommandError(message)
 
-        message = 'Calculating average job queue time...'
-        self.stdout.write(self.style.WARNING(message))
-        query_set = query_set.values_list('queue_time', flat=True)
-        avg_queue_time = sum(query_set, datetime.timedelta()) / query_set.count()
-
-        total_seconds = int(avg_queue_time.total_seconds())
-        hours, remainder = divmod(total_seconds, 60*60)
-        minutes, seconds = divmod(remainder, 60)
-        time_str = '{}hrs {}mins {}secs'.format(hours, minutes, seconds)
-
-        self.stdout.write(self.style.SUCCESS(time_str))
+        for entry in statistics:
+            groups = []
+            for name in group_by:
+                value = entry[name]
+                if name == 'month' and value is not None:
+                    value = value.strftime('%Y-%m')
+                groups.append(f'{name}={value}')
+            details = [f'{entry["count"]} jobs'] + [
+                f'p{percentile} {format_duration(entry[f"p{percentile}"])}'
+                for percentile in percentiles]
+            line = '{} ({})'.format(
+                format_duration(entry['average']), ', '.join(details))
+            if groups:
+                line = '{}: {}'.format(', '.join(groups), line)
+            self.stdout.write(self.style.SUCCESS(line))
 
     def handle_projects(self, *args, **kwargs):
         format = kwargs['format']
@@ -296,62 +302,47 @@ class Command(BaseCommand):
             projects = projects.filter(name__istartswith=allowance_type)
 
         if active_only:
-            active_status = ProjectStatusChoice.objects.get(name='Active')
-            projects = projects.filter(status=active_status)
+            projects = projects.filter(
+                status=get_choice(ProjectStatusChoice, 'Active'))
 
         projects = projects.order_by('id')
 
-        pi_table, manager_table, status_table = [], [], []
-        for project in projects:
-            pis = project.pis()
-            table = [
-                f'{pi.first_name} {pi.last_name} ({pi.email})' for pi in pis]
-            if len(table) > 0:
-                pi_table.append(table)
-            else:
-                pi_table.append(None)
-
-            managers = project.managers()
-            table = [
-                f'{manager.first_name} {manager.last_name} ({manager.email})'
-                for manager in managers]
-            if len(table) > 0:
-                manager_table.append(table)
-            else:
-                manager_table.append(None)
-
-            status_table.append(str(project.status))
-
         header = ['id', 'created', 'modified', 'name', 'title', 'description']
-        query_set_ = projects.values_list(*header)
-
-        query_set = []
-        for index, project in enumerate(query_set_):
-            project = list(project)
-            project.extend([status_table[index],
-                            ';'.join(pi_table[index] or []),
-                            ';'.join(manager_table[index] or [])])
-
-            query_set.append(project)
+        project_rows = projects.values_list(
+            *header, 'status__name').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        # PIs and Managers are fetched in a second query, ordered by Project
+        # in the same way, and merged with the Projects as both are read.
+        project_users = ProjectUser.objects.filter(
+            project__in=projects,
+            role__name__in=['Principal Investigator', 'Manager'],
+        ).order_by('project_id', 'user__username').values_list(
+            'project_id', 'role__name', 'user__first_name',
+            'user__last_name', 'user__email').iterator(
+                chunk_size=EXPORT_CHUNK_SIZE)
+        project_users_by_project_id = groupby(
+            project_users, key=lambda project_user: project_user[0])
+
+        def rows():
+            next_group = next(project_users_by_project_id, None)
+            for row in project_rows:
+                project_id = row[0]
+                pis, managers = [], []
+                if next_group is not None and next_group[0] == project_id:
+                    for _, role_name, first_name, last_name, email in \
+                            next_group[1]:
+                        user_str = f'{first_name} {last_name} ({email})'
+                        if role_name == 'Manager':
+                            managers.append(user_str)
+                        else:
+                            pis.append(user_str)
+                    next_group = next(project_users_by_project_id, None)
+                yield [*row, ';'.join(pis), ';'.join(managers)]
 
         header.extend(['status', 'pis', 'manager'])
-        if format == 'csv':
-            self.to_csv(query_set,
-                        header=header,
-                        output=kwargs.get('stdout', stdout),
-                        error=kwargs.get('stderr', stderr))
-
-        elif format == 'json':
-            query_set_ = query_set
-            query_set = []
-
-            for project in query_set_:
-                project = dict(zip(header, project))
-                query_set.append(project)
-
-            self.to_json(query_set,
-                         output=kwargs.get('stdout', stdout),
-                         error=kwargs.get('stderr', stderr))
+        export_rows(rows(), header, format,
+                    kwargs.get('stdout', stdout),
+                    kwargs.get('stderr', stderr))
 
     def handle_new_project_requests(self, *args, **kwargs):
         format = kwargs['format']
@@ -371,48 +362,38 @@ class Command(BaseCommand):
             date = display_time_zone_date_to_utc_datetime(date)
             requests = requests.filter(created__gte=date)
 
-        additional_headers = ['project', 'status', 'requester', 'pi']
-        projects = [request.project.name for request in requests]
-        statuses = [request.status.name for request in requests]
-
-        requesters = []
-        for request in requests:
-            requesters.append(f'{request.requester.first_name} ' +
-                              f'{request.requester.last_name} ' +
-                              f'({request.requester.email})')
-
-        pis = []
-        for request in requests:
-            pis.append(f'{request.pi.first_name} ' +
-                       f'{request.pi.last_name} ' +
-                       f'({request.pi.email})')
-
-        query_set = []
-        requests = requests.values_list(*header)
-        for project, status, requester, pi, request in \
-                zip(projects, statuses, requesters, pis, requests):
-            request = list(request)
-            request[1] = str(request[1])
-            request[2] = str(request[2])
-
-            request.extend([project, status, requester, pi])
-            query_set.append(request)
-
-        headers = header + additional_headers
-        query_set = list(map(lambda query: dict(zip(headers, query)), query_set))
-
-        if format == 'csv':
-            query_set_ = [query.values() for query in query_set]
-
-            self.to_csv(query_set_,
-                        header=headers,
-                        output=kwargs.get('stdout', stdout),
-                        error=kwargs.get('stderr', stderr))
-
-        elif format == 'json':
-            self.to_json(query_set,
-                         output=kwargs.get('stdout', stdout),
-                         error=kwargs.get('stderr', stderr))
+        # Related names are resolved with joins in the same query.
+        related_fields = [
+            'project__name', 'status__name',
+            'requester__first_name', 'requester__last_name',
+            'requester__email',
+            'pi__first_name', 'pi__last_name', 'pi__email']
+        requests = requests.values_list(*header, *related_fields).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE)
+
+        def rows():
+            num_fields = len(header)
+            for request in requests:
+                request = list(request)
+                (project, status, requester_first_name, requester_last_name,
+                 requester_email, pi_first_name, pi_last_name, pi_email) = \
+                    request[num_fields:]
+                request = request[:num_fields]
+                request[1] = str(request[1])
+                request[2] = str(request[2])
+                request.extend([
+                    project,
+                    status,
+                    f'{requester_first_name} {requester_last_name} '
+                    f'({requester_email})',
+                    f'{pi_first_name} {pi_last_name} ({pi_email})',
+                ])
+                yield request
+
+        headers = header + ['project', 'status', 'requester', 'pi']
+        export_rows(rows(), headers, format,
+                    kwargs.get('stdout', stdout),
+                    kwargs.get('stderr', stderr))
 
     def handle_survey_responses(self, *args, **kwargs):
         format = kwargs['format']
@@ -423,95 +404,39 @@ class Command(BaseCommand):
             allocation_requests = allocation_requests.filter(
                 project__name__istartswith=allowance_type)
 
-        _surveys = list(allocation_requests.values_list('survey_answers', flat=True))
-        projects = Project.objects.filter(
-            pk__in=allocation_requests.values_list('project', flat=True))
-        surveys = []
+        surveys = allocation_requests.order_by(
+            '-project__name').values_list(
+                'project__name', 'project__title', 'survey_answers').iterator(
+                    chunk_size=EXPORT_CHUNK_SIZE)
 
         if format == 'csv':
-            for project, survey in zip(projects, _surveys):
-                surveys.append({
-                    'project_name': project.name,
-                    'project_title': project.title,
-                    **survey
-                })
-
-            surveys = list(sorted(surveys, key=lambda x: x['project_name'], reverse=True))
-            try:
-                writer = csv.DictWriter(kwargs.get('stdout', stdout), surveys[0].keys())
-                writer.writeheader()
-
-                for survey in surveys:
-                    writer.writerow(survey)
-
-            except Exception as e:
-                kwargs.get('stderr', stderr).write(str(e))
-
-        elif format == 'json':
-            for project, survey in zip(projects, _surveys):
-                surveys.append({
-                    'project_name': project.name,
-                    'project_title': project.title,
-                    'survey_responses': survey
-                })
-
-            surveys = list(sorted(surveys, key=lambda x: x['project_name'], reverse=True))
-            self.to_json(surveys,
-                         output=kwargs.get('stdout', stdout),
-                         error=kwargs.get('stderr', stderr))
+            # Survey questions are columns, as given by the first survey.
+            first_survey = next(surveys, None)
+            if first_survey is None:
+                kwargs.get('stderr', stderr).write('Empty QuerySet')
+                return
+            questions = list(first_survey[2].keys())
+            header = ['project_name', 'project_title', *questions]
+
+            def rows():
+                for project_name, project_title, survey in \
+                        chain([first_survey], surveys):
+                    unexpected = set(survey) - set(questions)
+                    if unexpected:
+                        raise ValueError(
+                            f'dict contains fields not in fieldnames: '
+                            f'{", ".join(map(repr, unexpected))}')
+                    yield [
+                        project_name, project_title,
+                        *[survey.get(question, '') for question in questions]]
 
-    @staticmethod
-    def to_csv(query_set, header=None, output=stdout, error=stderr):
-        '''
-        write query_set to output and give errors to error.
-        does not manage the fds, only writes to them
-
-        Parameters
-        ----------
-        query_set : QuerySet to write
-        header: csv header to write
-        output : output fd, defaults to stdout
-        error : error fd, defaults to stderr
-        '''
-
-        if not query_set:
-            error.write('Empty QuerySet')
-            return
-
-        try:
-            writer = csv.writer(output)
-
-            if header:
-                writer.writerow(header)
-
-            for x in query_set:
-                writer.writerow(x)
-
-        except Exception as e:
-            error.write(str(e))
-
-    @staticmethod
-    def to_json(query_set, output=stdout, error=stderr):
-        '''
-        write query_set to output and give errors to error.
-        does not manage the fds, only writes to them
-
-        Parameters
-        ----------
-        query_set : QuerySet to write
-        output : output fd, defaults to stdout
-        error : error fd, defaults to stderr
-        '''
-
-        if not query_set:
-            error.write('Empty QuerySet')
-            return
+        else:
+            header = ['project_name', 'project_title', 'survey_responses']
+            rows = lambda: surveys
 
-        try:
-            json_output = json.dumps(list(query_set), indent=4, default=str)
-            output.writelines(json_output)
-        except Exception as e:
-            error.write(str(e))
+        export_rows(rows(), header, format,
+                    kwargs.get('stdout', stdout),
+                    kwargs.get('stderr', stderr))
 
 
 def valid_date(s):
@@ -521,3 +446,24 @@ def valid_date(s):
         msg = f'{s} is not a valid date. ' \
               f'Must take the form of "MM-DD-YYYY".'
         raise CommandError(msg)
+
+
+def valid_percentile(s):
+    try:
+        percentile = int(s)
+    except ValueError:
+        percentile = None
+    if percentile is None or not 1 <= percentile <= 99:
+        msg = f'{s} is not a valid percentile. ' \
+              f'Must be an integer between 1 and 99.'
+        raise CommandError(msg)
+    return percentile
+
+
+def format_duration(duration):
+    """Return the given timedelta as a string of hours, minutes, and
+    seconds."""
+    total_seconds = int(duration.total_seconds())
+    hours, remainder = divmod(total_seconds, 60*60)
+    minutes, seconds = divmod(remainder, 60)
+    return '{}hrs {}mins {}secs'.format(hours, minutes, seconds)
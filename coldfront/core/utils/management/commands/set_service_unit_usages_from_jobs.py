@@ -1,19 +1,46 @@
 from coldfront.core.allocation.models import Allocation
 from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationAttributeUsageDelta
 from coldfront.core.allocation.models import AllocationUserAttributeUsage
-from coldfront.core.project.models import Project
+from coldfront.core.allocation.models import AllocationUserAttributeUsageDelta
+from coldfront.core.allocation.utils_.accounting_cache_utils import invalidate_all_balances
+from coldfront.core.project.models import ProjectUser
+from coldfront.core.resource.utils import get_computing_allowance_project_prefixes
 from coldfront.core.resource.utils import get_primary_compute_resource
-from coldfront.core.resource.utils_.allowance_utils.interface import ComputingAllowanceInterface
 from coldfront.core.statistics.models import Job
 from collections import defaultdict
 from decimal import Decimal
 from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from simple_history.utils import bulk_update_with_history
 import logging
 
 """An admin command that sets usages of 'Service Units' attributes based
 on Jobs submitted since their respective start dates."""
 
 
+def valid_datetime(s):
+    """Return the given ISO 8601 string as a timezone-aware datetime,
+    interpreting naive values in the current time zone."""
+    try:
+        dt = parse_datetime(s)
+    except ValueError:
+        dt = None
+    if dt is None:
+        raise CommandError(
+            f'{s} is not a valid datetime. Must take the form of '
+            f'"YYYY-MM-DD HH:MM[:SS][TZ]".')
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
 class Command(BaseCommand):
 
     help = (
@@ -23,78 +50,225 @@ class Command(BaseCommand):
         'Resource.')
     logger = logging.getLogger(__name__)
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help=(
+                'Only recompute usages for Projects with Jobs created or '
+                'updated at or after the given time (e.g., that of the last '
+                'run), in the form "YYYY-MM-DD HH:MM[:SS][TZ]".'),
+            type=valid_datetime)
+        parser.add_argument(
+            '--batch_size',
+            default=100,
+            help=(
+                'The number of Projects whose usages are locked and set at a '
+                'time.'),
+            type=int)
+
     def handle(self, *args, **options):
-        computing_allowance_interface = ComputingAllowanceInterface()
-        prefixes = []
-        for allowance in computing_allowance_interface.allowances():
-            prefixes.append(
-                computing_allowance_interface.code_from_name(allowance.name))
-        prefixes = tuple(prefixes)
-
-        projects = Project.objects.prefetch_related('projectuser_set')
-        resource = get_primary_compute_resource()
-        for project in projects.iterator():
-            if not project.name.startswith(prefixes):
-                continue
-            allocation = Allocation.objects.prefetch_related(
-                'allocationuser_set').filter(
-                    resources=resource, project=project).first()
-            start_date = allocation.start_date
-            if not start_date:
-                message = f'Project {project.pk} has no start date.'
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('The batch size must be positive.')
+
+        allocations = self.get_allocations(options['since'])
+        project_pks = list(allocations)
+        for i in range(0, len(project_pks), batch_size):
+            self.set_usages({
+                project_pk: allocations[project_pk]
+                for project_pk in project_pks[i:i + batch_size]})
+
+    def set_usages(self, allocations):
+        """Given a dictionary mapping Project IDs to Allocations, set
+        the usages of the Allocations to the totals of their Jobs, in a
+        single transaction.
+
+        Only the usages of the given Allocations are locked, and only
+        while their Jobs are summed, so that the charging of Jobs to
+        other Projects is not blocked."""
+        with transaction.atomic():
+            # Lock usages before summing Jobs, so that any Job being charged
+            # concurrently either is included in the totals or waits until
+            # they have been set.
+            project_usages = self.get_locked_project_usages(allocations)
+            project_user_usages = self.get_locked_project_user_usages(
+                allocations)
+            project_totals, project_user_totals = self.get_totals(allocations)
+
+            self.set_project_usages(
+                allocations, project_usages, project_totals)
+            self.set_project_user_usages(
+                allocations, project_user_usages, project_user_totals)
+
+            # Pending deltas from the usage ledger are superseded by the
+            # recomputed usages.
+            AllocationAttributeUsageDelta.objects.filter(
+                allocation_attribute_usage__in=[
+                    usage.pk for usages in project_usages.values()
+                    for usage in usages]).delete()
+            AllocationUserAttributeUsageDelta.objects.filter(
+                allocation_user_attribute_usage__in=[
+                    usage.pk for usages in project_user_usages.values()
+                    for usage in usages]).delete()
+
+            # Usages are updated in bulk, without sending signals.
+            transaction.on_commit(invalidate_all_balances)
+
+    def get_allocations(self, since):
+        """Return a dictionary mapping the IDs of Projects with
+        computing allowances to their first Allocation to the primary
+        compute Resource, only including Projects with Jobs created or
+        updated at or after the given time, if any. Skip those whose
+        Allocations have no start date."""
+        prefixes = get_computing_allowance_project_prefixes()
+        if not prefixes:
+            return {}
+        prefix_filter = Q()
+        for prefix in prefixes:
+            prefix_filter |= Q(project__name__startswith=prefix)
+
+        candidates = Allocation.objects.filter(
+            prefix_filter, resources=get_primary_compute_resource())
+        if since is not None:
+            candidates = candidates.filter(
+                project__in=Job.objects.filter(
+                    modified__gte=since).values('accountid'))
+
+        allocations = {}
+        for allocation in candidates.order_by('end_date', 'pk'):
+            allocations.setdefault(allocation.project_id, allocation)
+        for project_pk, allocation in list(allocations.items()):
+            if not allocation.start_date:
+                message = f'Project {project_pk} has no start date.'
                 self.stderr.write(self.style.ERROR(message))
                 self.logger.error(message)
-                continue
-            # Accumulate usages from Jobs submitted at or after the
-            # allocation's start date.
-            project_total = Decimal('0.00')
-            project_user_totals = defaultdict(Decimal)
-            for project_user in project.projectuser_set.all():
-                project_user_totals[project_user.user.pk] = Decimal('0.00')
-            jobs = Job.objects.filter(
-                accountid=project, submitdate__gte=allocation.start_date)
-            for job in jobs.iterator():
-                project_total += job.amount
-                project_user_totals[job.userid.pk] += job.amount
-            # Set the Project's usage.
+                allocations.pop(project_pk)
+        return allocations
+
+    @staticmethod
+    def get_totals(allocations):
+        """Given a dictionary mapping Project IDs to Allocations, return
+        the total amounts of Jobs submitted at or after the start dates
+        of the Allocations, both per Project ID and per (Project ID,
+        User ID), using a single grouped query. Every ProjectUser has a
+        total, even if zero."""
+        project_totals = {
+            project_pk: Decimal('0.00') for project_pk in allocations}
+        project_user_totals = defaultdict(Decimal)
+        project_users = ProjectUser.objects.filter(
+            project__in=allocations).values_list('project', 'user')
+        for project_pk, user_pk in project_users.iterator():
+            project_user_totals[(project_pk, user_pk)] = Decimal('0.00')
+
+        # Both conditions on the Allocation apply to the same joined row.
+        rows = Job.objects.filter(
+            accountid__allocation__in=[
+                allocation.pk for allocation in allocations.values()],
+            submitdate__gte=F('accountid__allocation__start_date'),
+        ).values('accountid', 'userid').annotate(
+            total=Sum('amount')).values_list('accountid', 'userid', 'total')
+        for project_pk, user_pk, total in rows.iterator():
+            total = total or Decimal('0.00')
+            project_totals[project_pk] += total
+            project_user_totals[(project_pk, user_pk)] += total
+        return project_totals, project_user_totals
+
+    @staticmethod
+    def get_locked_project_usages(allocations):
+        """Return a dictionary mapping the IDs of the given Allocations to
+        lists of their AllocationAttributeUsages, which are locked."""
+        usages_by_allocation_pk = defaultdict(list)
+        usages = AllocationAttributeUsage.objects.filter(
+            allocation_attribute__allocation__in=[
+                allocation.pk for allocation in allocations.values()]
+        ).select_related('allocation_attribute').select_for_update(
+            of=('self',)).order_by('pk')
+        for usage in usages:
+            usages_by_allocation_pk[
+                usage.allocation_attribute.allocation_id].append(usage)
+        return usages_by_allocation_pk
+
+    @staticmethod
+    def get_locked_project_user_usages(allocations):
+        """Return a dictionary mapping (Allocation ID, User ID) pairs for
+        the given Allocations to lists of their
+        AllocationUserAttributeUsages, which are locked."""
+        usages_by_key = defaultdict(list)
+        usages = AllocationUserAttributeUsage.objects.filter(
+            allocation_user_attribute__allocation__in=[
+                allocation.pk for allocation in allocations.values()]
+        ).select_related(
+            'allocation_user_attribute__allocation_user'
+        ).select_for_update(of=('self',)).order_by('pk')
+        for usage in usages:
+            allocation_user = usage.allocation_user_attribute.allocation_user
+            usages_by_key[
+                (allocation_user.allocation_id, allocation_user.user_id)
+            ].append(usage)
+        return usages_by_key
+
+    def set_project_usages(self, allocations, usages_by_allocation_pk,
+                           project_totals):
+        """Set the usage of each Project's Allocation to its total,
+        updating those that changed in bulk."""
+        usages_to_update = []
+        for project_pk, allocation in allocations.items():
+            project_total = project_totals[project_pk]
             # TODO: This will fail when more than one attribute has usage.
-            try:
-                allocation_attribute_usage = AllocationAttributeUsage.objects.get(
-                    allocation_attribute__allocation=allocation.pk)
-                allocation_attribute_usage.value = project_total
-                allocation_attribute_usage.save()
+            allocation_usages = usages_by_allocation_pk[allocation.pk]
+            if len(allocation_usages) != 1:
+                message = (
+                    f'Failed to set usage for Project {project_pk} to '
+                    f'{project_total}.')
+                self.stderr.write(self.style.ERROR(message))
+                self.logger.error(message)
+                self.logger.error(
+                    f'Allocation {allocation.pk} has '
+                    f'{len(allocation_usages)} usages.')
+                continue
+            usage = allocation_usages[0]
+            if usage.value != project_total:
+                usage.value = project_total
+                usages_to_update.append(usage)
                 message = (
-                    f'Set usage for Project {project.pk} to {project_total}.')
+                    f'Set usage for Project {project_pk} to {project_total}.')
                 self.stdout.write(self.style.SUCCESS(message))
                 self.logger.info(message)
-            except Exception as e:
+        self.bulk_update_usages(AllocationAttributeUsage, usages_to_update)
+
+    def set_project_user_usages(self, allocations, usages_by_key,
+                                project_user_totals):
+        """Set the usage of each User in each Project's Allocation to
+        its total, updating those that changed in bulk."""
+        usages_to_update = []
+        for (project_pk, user_pk), amount in project_user_totals.items():
+            allocation = allocations[project_pk]
+            # TODO: This will fail when more than one attribute has usage.
+            user_usages = usages_by_key[(allocation.pk, user_pk)]
+            if len(user_usages) != 1:
                 message = (
-                    f'Failed to set usage for Project {project.pk} to '
-                    f'{project_total}.')
+                    f'Failed to set usage for Project {project_pk} and User '
+                    f'{user_pk} to {amount}.')
                 self.stderr.write(self.style.ERROR(message))
                 self.logger.error(message)
-                self.logger.exception(e)
-            # Set the ProjectUsers' usages.
-            for user_pk in project_user_totals:
-                # TODO: This will fail when more than one attribute has usage.
-                try:
-                    amount = project_user_totals[user_pk]
-                    allocation_user = allocation.allocationuser_set.get(
-                        user__pk=user_pk)
-                    allocation_user_attribute_usage = \
-                        AllocationUserAttributeUsage.objects.get(
-                            allocation_user_attribute__allocation_user=allocation_user)
-                    allocation_user_attribute_usage.value = amount
-                    allocation_user_attribute_usage.save()
-                    message = (
-                        f'Set usage for Project {project.pk} and User '
-                        f'{user_pk} to {amount}.')
-                    self.stdout.write(self.style.SUCCESS(message))
-                    self.logger.info(message)
-                except Exception as e:
-                    message = (
-                        f'Failed to set usage for Project {project.pk} and '
-                        f'User {user_pk} to {amount}.')
-                    self.stderr.write(self.style.ERROR(message))
-                    self.logger.error(message)
-                    self.logger.exception(e)
+                continue
+            usage = user_usages[0]
+            if usage.value != amount:
+                usage.value = amount
+                usages_to_update.append(usage)
+                message = (
+                    f'Set usage for Project {project_pk} and User {user_pk} '
+                    f'to {amount}.')
+                self.stdout.write(self.style.SUCCESS(message))
+                self.logger.info(message)
+        self.bulk_update_usages(AllocationUserAttributeUsage, usages_to_update)
+
+    @staticmethod
+    def bulk_update_usages(model, usages):
+        """Update the values of the given usages of the given model in
+        bulk, recording their histories."""
+        modified = timezone.now()
+        for usage in usages:
+            usage.modified = modified
+        bulk_update_with_history(
+            usages, model, ['value', 'modified'], batch_size=1000)
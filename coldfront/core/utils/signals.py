@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+
+from coldfront.core.utils.choice_registry import ChoiceRegistry
+
+
+def invalidate_choice_registry(sender, **kwargs):
+    """When a row of a registered model is saved or deleted, invalidate
+    the registered rows of the model.
+
+    Invalidate both immediately and once the current transaction is
+    committed, so that rows reloaded by another process before the
+    commit, which would not include the change, are discarded."""
+    ChoiceRegistry.invalidate(sender)
+    transaction.on_commit(lambda: ChoiceRegistry.invalidate(sender))
+
+
+for model in ChoiceRegistry.registered_models():
+    post_save.connect(
+        invalidate_choice_registry, sender=model,
+        dispatch_uid=f'invalidate_choice_registry_on_save_{model._meta.label}')
+    post_delete.connect(
+        invalidate_choice_registry, sender=model,
+        dispatch_uid=(
+            f'invalidate_choice_registry_on_delete_{model._meta.label}'))
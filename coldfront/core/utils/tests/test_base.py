@@ -2,11 +2,14 @@ from copy import deepcopy
 from http import HTTPStatus
 from io import StringIO
 import os
+import shutil
 import sys
+import tempfile
 
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
+from django.core.cache import caches
 from django.core.management import call_command
 from django.test import Client
 from django.test import override_settings
@@ -214,3 +217,35 @@ class enable_deployment(TestContextDecorator):
 
         for flag_name in self._pre_states:
             assert flag_enabled(flag_name) == self._pre_states[flag_name]
+
+
+class use_shared_cache(TestContextDecorator):
+    """A class that replaces the default cache with one that, unlike the
+    default local-memory cache, is shared between processes: a cache
+    stored in a temporary directory.
+
+    As a context manager, it returns itself, so that callers may create
+    separate instances of the cache, as another process would (see
+    create_cache)."""
+
+    def enable(self):
+        self.location = tempfile.mkdtemp()
+        self.override = override_settings(CACHES={
+            'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': self.location,
+            },
+        })
+        self.override.enable()
+        return self
+
+    def disable(self):
+        self.override.disable()
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    @staticmethod
+    def create_cache():
+        """Return a new instance of the default cache, as used by
+        another process."""
+        return caches.create_connection('default')
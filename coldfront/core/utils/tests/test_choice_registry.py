@@ -0,0 +1,123 @@
+from coldfront.core.allocation.models import AllocationAttributeType
+from coldfront.core.allocation.models import AllocationStatusChoice
+from coldfront.core.allocation.models import AllocationUserStatusChoice
+from coldfront.core.project.models import Project
+from coldfront.core.project.models import ProjectUserRoleChoice
+from coldfront.core.utils.choice_registry import ChoiceRegistry
+from coldfront.core.utils.choice_registry import get_choice
+from coldfront.core.utils.choice_registry import get_choice_pk
+from coldfront.core.utils.tests.test_base import TestBase
+from django.conf import settings
+from unittest.mock import patch
+import time
+
+
+class TestChoiceRegistry(TestBase):
+    """A class for testing ChoiceRegistry."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        # Rows loaded in committed transactions remain registered after the
+        # test's transaction is rolled back, so discard them.
+        self.addCleanup(ChoiceRegistry.invalidate_all)
+
+    def load(self, model):
+        """Load the rows of the given model into the registry, as if the
+        transaction loading them were committed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            get_choice_pk(model, 'Active')
+
+    def test_registered_models(self):
+        """Test that status and role choices, and allocation attribute
+        types, are registered, and that other models are not."""
+        models = ChoiceRegistry.registered_models()
+        for model in (AllocationAttributeType, AllocationStatusChoice,
+                      AllocationUserStatusChoice, ProjectUserRoleChoice):
+            self.assertIn(model, models)
+        self.assertNotIn(Project, models)
+        with self.assertRaises(ValueError):
+            get_choice(Project, 'Active')
+
+    def test_lookups_match_database(self):
+        """Test that rows are returned, or exceptions raised, as with
+        model.objects.get(name=name)."""
+        status = get_choice(AllocationStatusChoice, 'Active')
+        self.assertEqual(
+            status, AllocationStatusChoice.objects.get(name='Active'))
+        self.assertEqual(
+            get_choice_pk(AllocationStatusChoice, 'Active'), status.pk)
+        attribute_type = get_choice(AllocationAttributeType, 'Service Units')
+        self.assertEqual(
+            attribute_type,
+            AllocationAttributeType.objects.get(name='Service Units'))
+
+        with self.assertRaises(AllocationStatusChoice.DoesNotExist):
+            get_choice(AllocationStatusChoice, 'Nonexistent')
+        AllocationStatusChoice.objects.create(name='Active')
+        with self.assertRaises(AllocationStatusChoice.MultipleObjectsReturned):
+            get_choice(AllocationStatusChoice, 'Active')
+
+    def test_registered_rows_used_without_queries(self):
+        """Test that rows are only registered once the transaction that
+        loaded them is committed, and that they are then returned without
+        querying the database."""
+        get_choice(AllocationStatusChoice, 'Active')
+        with self.assertNumQueries(1):
+            get_choice(AllocationStatusChoice, 'Active')
+
+        self.load(AllocationStatusChoice)
+        with self.assertNumQueries(0):
+            status = get_choice(AllocationStatusChoice, 'Active')
+            get_choice(AllocationStatusChoice, 'Expired')
+        self.assertEqual(status.name, 'Active')
+
+        # Returned rows are copies, which may be modified independently.
+        status.name = 'Modified'
+        self.assertEqual(
+            get_choice(AllocationStatusChoice, 'Active').name, 'Active')
+
+    def test_invalidated_on_save_and_delete(self):
+        """Test that registered rows are reloaded after rows of the same
+        model are created, updated, or deleted."""
+        self.load(AllocationStatusChoice)
+        status = AllocationStatusChoice.objects.create(name='Test Status')
+        self.assertEqual(
+            get_choice_pk(AllocationStatusChoice, 'Test Status'), status.pk)
+
+        self.load(AllocationStatusChoice)
+        status.name = 'Renamed'
+        status.save()
+        self.assertEqual(
+            get_choice_pk(AllocationStatusChoice, 'Renamed'), status.pk)
+        with self.assertRaises(AllocationStatusChoice.DoesNotExist):
+            get_choice(AllocationStatusChoice, 'Test Status')
+
+        self.load(AllocationStatusChoice)
+        status.delete()
+        with self.assertRaises(AllocationStatusChoice.DoesNotExist):
+            get_choice(AllocationStatusChoice, 'Renamed')
+
+        # Other models are unaffected.
+        self.load(AllocationUserStatusChoice)
+        AllocationStatusChoice.objects.create(name='Other')
+        with self.assertNumQueries(0):
+            get_choice(AllocationUserStatusChoice, 'Active')
+
+    def test_reloaded_after_generation_expires(self):
+        """Test that registered rows are reloaded once their generation
+        expires, even if they were changed without being invalidated."""
+        self.load(AllocationStatusChoice)
+        # Update a row without sending signals, so that the rows are not
+        # invalidated.
+        AllocationStatusChoice.objects.filter(name='Expired').update(
+            name='Renamed')
+        with self.assertNumQueries(0):
+            get_choice(AllocationStatusChoice, 'Expired')
+
+        expired_time = time.time() + settings.CACHE_GENERATION_TIMEOUT + 1
+        with patch('django.core.cache.backends.locmem.time') as mock_time:
+            mock_time.time.return_value = expired_time
+            with self.assertRaises(AllocationStatusChoice.DoesNotExist):
+                get_choice(AllocationStatusChoice, 'Expired')
+            get_choice(AllocationStatusChoice, 'Renamed')
@@ -1,13 +1,21 @@
 import datetime
+import gzip
 import json
+import os
+import tempfile
 from decimal import Decimal
 
 import sys
+from collections import Counter
 from csv import DictReader
 from io import StringIO
 
+import pytz
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from coldfront.api.statistics.utils import get_accounting_allocation_objects, \
     create_project_allocation, create_user_project_allocation
@@ -435,6 +443,56 @@ class TestJobAvgQueueTime(TestBaseExportData):
         self.assertIn('48hrs 0mins 0secs', output)
         self.assertEqual(error, '')
 
+    def test_group_by_partition(self):
+        """Testing job_avg_queue_time grouped by partition, in which a job
+        counts towards each of its partitions"""
+        output, error = self.call_command('export_data',
+                                          'job_avg_queue_time',
+                                          '--group_by=partition')
+        lines = output.strip().split('\n')
+        self.assertEqual(len(lines), 4)
+        self.assertIn('partition=savio: 24hrs 0mins 0secs (1 jobs)', lines[0])
+        self.assertIn('partition=savio2: 36hrs 0mins 0secs (2 jobs)',
+                      lines[1])
+        self.assertIn('partition=savio3: 72hrs 0mins 0secs (1 jobs)',
+                      lines[2])
+        self.assertIn('partition=savio_bigmem: 48hrs 0mins 0secs (1 jobs)',
+                      lines[3])
+        self.assertEqual(error, '')
+
+    def test_percentiles(self):
+        """Testing job_avg_queue_time with percentile args passed"""
+        output, error = self.call_command('export_data',
+                                          'job_avg_queue_time',
+                                          '--percentile=50',
+                                          '--percentile=90')
+        self.assertIn(
+            '48hrs 0mins 0secs (3 jobs, p50 48hrs 0mins 0secs, '
+            'p90 72hrs 0mins 0secs)', output)
+        self.assertEqual(error, '')
+
+        with self.assertRaises(CommandError):
+            self.call_command('export_data', 'job_avg_queue_time',
+                              '--percentile=100')
+
+    def test_group_by_allowance_type_and_month(self):
+        """Testing job_avg_queue_time grouped by multiple groups"""
+        output, error = self.call_command('export_data',
+                                          'job_avg_queue_time',
+                                          '--group_by=allowance_type',
+                                          '--group_by=month',
+                                          '--partition=savio2')
+        lines = output.strip().split('\n')
+        display_tz = pytz.timezone(settings.DISPLAY_TIME_ZONE)
+        num_jobs_by_month = Counter(
+            job.submitdate.astimezone(display_tz).strftime('%Y-%m')
+            for job in (self.job1, self.job2))
+        self.assertEqual(len(lines), len(num_jobs_by_month))
+        for line, month in zip(lines, sorted(num_jobs_by_month)):
+            self.assertIn(f'allowance_type=, month={month}: ', line)
+            self.assertIn(f'({num_jobs_by_month[month]} jobs)', line)
+        self.assertEqual(error, '')
+
     def test_errors(self):
         # invalid date error
         start_date = datetime.datetime.strftime(
@@ -639,6 +697,85 @@ class TestProjects(TestBase):
 
         self.assertEqual(len(query_set), count)
 
+    def test_pis_and_managers(self):
+        """Test that PIs and Managers are included, and that the number
+        of queries does not depend on the number of Projects."""
+        def num_queries():
+            out, err = StringIO(''), StringIO('')
+            with CaptureQueriesContext(connection) as queries:
+                call_command('export_data', 'projects',
+                             '--format=csv', stdout=out, stderr=err)
+            return len(queries.captured_queries)
+
+        # The first call makes queries that are only needed once.
+        num_queries()
+        expected_num_queries = num_queries()
+
+        active_status = ProjectUserStatusChoice.objects.get(name='Active')
+        pi_role = ProjectUserRoleChoice.objects.get(
+            name='Principal Investigator')
+        manager_role = ProjectUserRoleChoice.objects.get(name='Manager')
+        projects = list(Project.objects.order_by('id'))
+        for index in range(3):
+            user = User.objects.create(
+                username=f'user{index}', first_name=f'First{index}',
+                last_name=f'Last{index}', email=f'user{index}@email.com')
+            for project in projects[:index + 1]:
+                role = manager_role if index == 2 else pi_role
+                ProjectUser.objects.create(
+                    project=project, user=user, role=role,
+                    status=active_status)
+
+        self.assertEqual(num_queries(), expected_num_queries)
+
+        out, err = StringIO(''), StringIO('')
+        call_command('export_data', 'projects',
+                     '--format=csv', stdout=out, stderr=err)
+        out.seek(0)
+        for item in DictReader(out.readlines()):
+            project = Project.objects.get(id=item['id'])
+            self.assertEqual(
+                item['pis'],
+                ';'.join(
+                    f'{pi.first_name} {pi.last_name} ({pi.email})'
+                    for pi in project.pis()))
+            self.assertEqual(
+                item['manager'],
+                ';'.join(
+                    f'{manager.first_name} {manager.last_name} '
+                    f'({manager.email})'
+                    for manager in project.managers()))
+
+    def test_ndjson_and_compressed_output(self):
+        """Test that rows may be written as NDJSON, and to a compressed
+        file."""
+        out, err = StringIO(''), StringIO('')
+        call_command('export_data', 'projects',
+                     '--format=ndjson', stdout=out, stderr=err)
+        out.seek(0)
+        output = [json.loads(line) for line in out.readlines()]
+        self.assertEqual(len(output), len(self.base_queryset))
+        for item, compare in zip(output, self.base_queryset):
+            self.assertListEqual(list(compare.keys()), list(item.keys()))
+            for key in item.keys():
+                self.assertEqual(str(compare[key]), str(item[key]))
+
+        # JSON output is formatted as it was before being streamed.
+        out, err = StringIO(''), StringIO('')
+        call_command('export_data', 'projects',
+                     '--format=json', stdout=out, stderr=err)
+        self.assertEqual(
+            out.getvalue(), json.dumps(output, indent=4, default=str))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'projects.ndjson.gz')
+            call_command('export_data', 'projects',
+                         '--format=ndjson', f'--output={path}',
+                         stderr=err)
+            with gzip.open(path, 'rt') as f:
+                self.assertEqual(
+                    [json.loads(line) for line in f], output)
+
 
 class TestNewProjectRequests(TestBase):
     """ Test class to test export data subcommand new_project_requests runs correctly """
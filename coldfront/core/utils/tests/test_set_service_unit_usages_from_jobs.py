@@ -0,0 +1,131 @@
+from coldfront.api.statistics.tests.test_job_base import TestJobBase
+from coldfront.api.statistics.utils import create_project_allocation
+from coldfront.api.statistics.utils import create_user_project_allocation
+from coldfront.core.allocation.models import AllocationAttributeUsage
+from coldfront.core.allocation.models import AllocationAttributeUsageDelta
+from coldfront.core.allocation.models import AllocationUserAttributeUsage
+from coldfront.core.allocation.models import AllocationUserAttributeUsageDelta
+from coldfront.core.project.models import Project
+from coldfront.core.project.models import ProjectUser
+from coldfront.core.project.models import ProjectUserRoleChoice
+from coldfront.core.project.models import ProjectUserStatusChoice
+from coldfront.core.statistics.models import Job
+from coldfront.core.utils.management.commands.set_service_unit_usages_from_jobs import Command
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management import CommandError
+from django.utils import timezone
+from io import StringIO
+from unittest.mock import patch
+
+
+class TestSetServiceUnitUsagesFromJobs(TestJobBase):
+    """A suite for testing the set_service_unit_usages_from_jobs
+    management command."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        submitdate = self.default_start + timedelta(days=1)
+        for jobslurmid, amount in (('1', '100.00'), ('2', '50.00')):
+            Job.objects.create(
+                jobslurmid=jobslurmid, submitdate=submitdate,
+                userid=self.user, accountid=self.project,
+                amount=Decimal(amount))
+        # Jobs submitted before the start date are excluded.
+        Job.objects.create(
+            jobslurmid='3', submitdate=self.default_start - timedelta(days=1),
+            userid=self.user, accountid=self.project,
+            amount=Decimal('25.00'))
+
+    @staticmethod
+    def call_command(*args):
+        """Call the command with the given arguments, returning its
+        output and error."""
+        out, err = StringIO(), StringIO()
+        call_command(
+            'set_service_unit_usages_from_jobs', *args, stdout=out,
+            stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def assert_usages(self, expected):
+        """Assert that the usages of the Project and the User are as
+        given."""
+        self.account_usage.refresh_from_db()
+        self.user_account_usage.refresh_from_db()
+        self.assertEqual(self.account_usage.value, expected)
+        self.assertEqual(self.user_account_usage.value, expected)
+
+    def test_sets_usages(self):
+        """Test that usages are set to the totals of Jobs submitted
+        since the start date, and that pending deltas are deleted."""
+        AllocationAttributeUsageDelta.objects.create(
+            allocation_attribute_usage=self.account_usage,
+            value=Decimal('10.00'))
+        AllocationUserAttributeUsageDelta.objects.create(
+            allocation_user_attribute_usage=self.user_account_usage,
+            value=Decimal('10.00'))
+
+        out, _ = self.call_command()
+        self.assertIn('Set usage for Project', out)
+        self.assert_usages(Decimal('150.00'))
+        self.assertFalse(AllocationAttributeUsageDelta.objects.exists())
+        self.assertFalse(AllocationUserAttributeUsageDelta.objects.exists())
+
+        # Unchanged usages are not updated.
+        out, _ = self.call_command()
+        self.assertFalse(out)
+
+    def test_since(self):
+        """Test that, given a time, only Projects with Jobs modified
+        since then are updated."""
+        since = timezone.now() + timedelta(minutes=1)
+        out, _ = self.call_command('--since', since.isoformat())
+        self.assertFalse(out)
+        self.assert_usages(Decimal('0.00'))
+
+        since = timezone.now() - timedelta(minutes=1)
+        self.call_command('--since', since.isoformat())
+        self.assert_usages(Decimal('150.00'))
+
+    def test_batches(self):
+        """Test that usages are set one batch of Projects at a time,
+        with Jobs summed only for the Projects in the batch."""
+        project = Project.objects.create(
+            name='fc_project2', status=self.project.status)
+        ProjectUser.objects.create(
+            user=self.user, project=project,
+            role=ProjectUserRoleChoice.objects.get(name='User'),
+            status=ProjectUserStatusChoice.objects.get(name='Active'))
+        allocation_objects = create_project_allocation(
+            project, Decimal('1000.00'))
+        allocation = allocation_objects.allocation
+        allocation.start_date = self.allocation.start_date
+        allocation.save()
+        user_allocation_objects = create_user_project_allocation(
+            self.user, project, Decimal('500.00'))
+        Job.objects.create(
+            jobslurmid='4', submitdate=self.default_start + timedelta(days=1),
+            userid=self.user, accountid=project, amount=Decimal('20.00'))
+
+        with patch.object(
+                Command, 'get_totals', wraps=Command.get_totals) as get_totals:
+            self.call_command('--batch_size', '1')
+        self.assertEqual(get_totals.call_count, 2)
+        for call in get_totals.call_args_list:
+            self.assertEqual(len(call.args[0]), 1)
+
+        self.assert_usages(Decimal('150.00'))
+        account_usage = AllocationAttributeUsage.objects.get(
+            allocation_attribute=allocation_objects.allocation_attribute)
+        self.assertEqual(account_usage.value, Decimal('20.00'))
+        user_account_usage = AllocationUserAttributeUsage.objects.get(
+            allocation_user_attribute=(
+                user_allocation_objects.allocation_user_attribute))
+        self.assertEqual(user_account_usage.value, Decimal('20.00'))
+
+    def test_invalid_since(self):
+        """Test that an invalid time raises an error."""
+        with self.assertRaises(CommandError):
+            self.call_command('--since', 'invalid')
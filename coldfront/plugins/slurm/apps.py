@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SlurmConfig(AppConfig):
     name = 'coldfront.plugins.slurm'
+
+    def ready(self):
+        # coldfront.core.utils.common may not be imported before the app
+        # registry is populated, since it imports models.
+        if getattr(settings, 'SLURM_ENABLE_SIGNALS', False):
+            import coldfront.plugins.slurm.signals
@@ -1,10 +1,16 @@
 import datetime
 import logging
 import os
-import re
 import sys
+from collections import defaultdict
 
+from django.db.models import Prefetch
+
+from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationAttribute
+from coldfront.core.allocation.models import AllocationUser
 from coldfront.core.resource.models import Resource
+from coldfront.core.resource.models import ResourceAttribute
 from coldfront.plugins.slurm.utils import (SLURM_ACCOUNT_ATTRIBUTE_NAME,
                                            SLURM_CLUSTER_ATTRIBUTE_NAME,
                                            SLURM_SPECS_ATTRIBUTE_NAME,
@@ -17,31 +23,99 @@ class SlurmParserError(SlurmError):
     pass
 
 
+def _get_active_allocations_by_resource_id(resources):
+    """Return a dict mapping the ID of each of the given Resources to a
+    list of its Active Allocations, in their default order. The Slurm
+    attributes and the Active AllocationUsers of each Allocation are
+    prefetched, as slurm_attributes and active_allocation_users."""
+    resource_ids = [r.id for r in resources]
+    allocation_resources = Allocation.resources.through.objects.filter(
+        resource_id__in=resource_ids,
+        allocation__status__name='Active').values_list(
+            'allocation_id', 'resource_id')
+    resource_ids_by_allocation_id = defaultdict(list)
+    for allocation_id, resource_id in allocation_resources:
+        resource_ids_by_allocation_id[allocation_id].append(resource_id)
+
+    allocations = Allocation.objects.filter(
+        pk__in=list(resource_ids_by_allocation_id)
+    ).prefetch_related(
+        Prefetch(
+            'allocationattribute_set',
+            queryset=AllocationAttribute.objects.filter(
+                allocation_attribute_type__name__in=[
+                    SLURM_ACCOUNT_ATTRIBUTE_NAME,
+                    SLURM_SPECS_ATTRIBUTE_NAME,
+                    SLURM_USER_SPECS_ATTRIBUTE_NAME]
+            ).select_related('allocation_attribute_type').order_by('pk'),
+            to_attr='slurm_attributes'),
+        Prefetch(
+            'allocationuser_set',
+            queryset=AllocationUser.objects.filter(
+                status__name='Active').select_related('user'),
+            to_attr='active_allocation_users'))
+
+    allocations_by_resource_id = {
+        resource_id: [] for resource_id in resource_ids}
+    for allocation in allocations:
+        for resource_id in resource_ids_by_allocation_id[allocation.pk]:
+            allocations_by_resource_id[resource_id].append(allocation)
+    return allocations_by_resource_id
+
+
+def _get_attribute_values(obj, name):
+    """Return the values of the attributes with the given type name of
+    the given Allocation or Resource, from those prefetched as
+    slurm_attributes, if any, or else from the database."""
+    attributes = getattr(obj, 'slurm_attributes', None)
+    if attributes is None:
+        return obj.get_attribute_list(name)
+    if isinstance(obj, Allocation):
+        return [
+            a.value for a in attributes
+            if a.allocation_attribute_type.name == name]
+    return [
+        a.value for a in attributes
+        if a.resource_attribute_type.name == name]
+
+
+def _get_attribute_value(obj, name):
+    """Return the value of the first attribute with the given type name
+    of the given Allocation or Resource, or None."""
+    if getattr(obj, 'slurm_attributes', None) is None:
+        return obj.get_attribute(name)
+    values = _get_attribute_values(obj, name)
+    if values:
+        return values[0]
+    return None
+
+
 class SlurmBase:
-    def __init__(self, name, specs=None):
-        if specs is None:
-            specs = []
+    __slots__ = ('name', 'specs')
 
+    def __init__(self, name, specs=None):
         self.name = name
-        self.specs = specs
+        # Specs are stored as an ordered set: a dict whose keys are unique
+        # specs, each without ':'.
+        self.specs = {}
+        if specs:
+            self.add_specs(specs)
+
+    def add_specs(self, specs):
+        """Add the given Slurm Specs, each of which may join several with
+        ':', skipping duplicates."""
+        for s in specs:
+            for i in s.split(':'):
+                if i:
+                    self.specs[i] = None
 
     def spec_list(self):
         """Return unique list of Slurm Specs"""
-        items = []
-        for s in self.specs:
-            for i in s.split(':'):
-                items.append(i)
-
-        return list(set(items))
+        return list(self.specs)
 
     def format_specs(self):
         """Format unique list of Slurm Specs"""
-        items = []
-        for s in self.specs:
-            for i in s.split(':'):
-                items.append(i)
-
-        return ':'.join([x for x in self.spec_list()])
+        return ':'.join(self.specs)
 
     def _write(self, out, data):
         try:
@@ -52,46 +126,73 @@ class SlurmBase:
             sys.exit(1)
 
 
+# The separator between the record type and the quoted name in a line from
+# sacctmgr dump, the supported record types, and those that must be named.
+_RECORD_SEPARATOR = " - '"
+_RECORD_TYPES = frozenset(['Cluster', 'Account', 'Parent', 'User'])
+_NAMED_RECORD_TYPES = frozenset(['Cluster', 'Parent'])
+
+
+def _parse_record(line):
+    """Given a stripped line from sacctmgr dump, return a tuple of its
+    record type (e.g., 'Account'), name, and specs, or None if it is not
+    a record. For example, "User - 'jane':Fairshare=1" yields ('User',
+    'jane', ['Fairshare=1']).
+
+    Account and User records with empty names are not records, but
+    Cluster and Parent records with empty names raise a
+    SlurmParserError, since the records that follow them could not be
+    placed."""
+    record_type, separator, rest = line.partition(_RECORD_SEPARATOR)
+    if not separator or record_type not in _RECORD_TYPES:
+        return None
+    end = rest.find("'")
+    if end == 0 and record_type in _NAMED_RECORD_TYPES:
+        raise(SlurmParserError(
+            'Found {} record without a name for line: {}'.format(
+                record_type, line)))
+    if end <= 0:
+        return None
+    name = rest[:end]
+    specs = rest[end + 2:].split(':') if len(rest) > end + 1 else []
+    return record_type, name, specs
+
+
 class SlurmCluster(SlurmBase):
+    __slots__ = ('accounts',)
+
     def __init__(self, name, specs=None):
         super().__init__(name, specs=specs)
         self.accounts = {}
 
     @staticmethod
     def new_from_stream(stream):
-        """Create a new SlurmCluster by parsing the output from sacctmgr dump."""
+        """Create a new SlurmCluster by parsing the output from sacctmgr dump.
+
+        Each line is parsed once, dispatching on its record type."""
         cluster = None
         parent = None
         for line in stream:
             line = line.strip()
-            if re.match("^#", line):
+            if not line or line[0] == '#':
                 continue
-            elif re.match("^Cluster - '[^']+'", line):
-                parts = line.split(':')
-                name = re.sub(r"^Cluster - ", '', parts[0]).strip("\n'")
-                if len(name) == 0:
-                    raise(SlurmParserError(
-                        'Cluster name not found for line: {}'.format(line)))
-                cluster = SlurmCluster(name)
-                cluster.specs += parts[1:]
-            elif re.match("^Account - '[^']+'", line):
-                account = SlurmAccount.new_from_sacctmgr(line)
-                cluster.accounts[account.name] = account
-            elif re.match("^Parent - '[^']+'", line):
-                parent = re.sub(r"^Parent - ", '', line).strip("\n'")
-                if parent == 'root':
-                    cluster.accounts['root'] = SlurmAccount('root')
-                if not parent:
-                    raise(SlurmParserError(
-                        'Parent name not found for line: {}'.format(line)))
-            elif re.match("^User - '[^']+'", line):
-                user = SlurmUser.new_from_sacctmgr(line)
+            record = _parse_record(line)
+            if record is None:
+                continue
+            record_type, name, specs = record
+            if record_type == 'User':
                 if not parent:
                     raise(SlurmParserError(
                         'Found user record without Parent for line: {}'.format(line)))
-                account = cluster.accounts[parent]
-                account.add_user(user)
-                cluster.accounts[parent] = account
+                cluster.accounts[parent].add_user(SlurmUser(name, specs=specs))
+            elif record_type == 'Account':
+                cluster.accounts[name] = SlurmAccount(name, specs=specs)
+            elif record_type == 'Parent':
+                parent = name
+                if parent == 'root':
+                    cluster.accounts['root'] = SlurmAccount('root')
+            else:
+                cluster = SlurmCluster(name, specs=specs)
 
         if not cluster or not cluster.name:
             raise(SlurmParserError(
@@ -101,7 +202,12 @@ class SlurmCluster(SlurmBase):
 
     @staticmethod
     def new_from_resource(resource):
-        """Create a new SlurmCluster from a ColdFront Resource model."""
+        """Create a new SlurmCluster from a ColdFront Resource model.
+
+        The Active Allocations to the Resource and to its child partition
+        Resources, their Slurm attributes, and their Active users are loaded
+        in a constant number of queries, rather than several per
+        Allocation."""
         name = resource.get_attribute(SLURM_CLUSTER_ATTRIBUTE_NAME)
         specs = resource.get_attribute_list(SLURM_SPECS_ATTRIBUTE_NAME)
         user_specs = resource.get_attribute_list(SLURM_USER_SPECS_ATTRIBUTE_NAME)
@@ -110,17 +216,33 @@ class SlurmCluster(SlurmBase):
 
         cluster = SlurmCluster(name, specs)
 
+        children = list(
+            Resource.objects.filter(
+                parent_resource_id=resource.id,
+                resource_type__name='Cluster Partition'
+            ).prefetch_related(
+                Prefetch(
+                    'resourceattribute_set',
+                    queryset=ResourceAttribute.objects.filter(
+                        resource_attribute_type__name__in=[
+                            SLURM_SPECS_ATTRIBUTE_NAME,
+                            SLURM_USER_SPECS_ATTRIBUTE_NAME]
+                    ).select_related('resource_attribute_type').order_by('pk'),
+                    to_attr='slurm_attributes')))
+        allocations_by_resource_id = _get_active_allocations_by_resource_id(
+            [resource] + children)
+
         # Process allocations
-        for allocation in resource.allocation_set.filter(status__name='Active'):
+        for allocation in allocations_by_resource_id[resource.id]:
             cluster.add_allocation(allocation, user_specs=user_specs)
 
         # Process child resources
-        children = Resource.objects.filter(
-            parent_resource_id=resource.id, resource_type__name='Cluster Partition')
         for r in children:
-            partition_specs = r.get_attribute_list(SLURM_SPECS_ATTRIBUTE_NAME)
-            partition_user_specs = r.get_attribute_list(SLURM_USER_SPECS_ATTRIBUTE_NAME)
-            for allocation in r.allocation_set.filter(status__name='Active'):
+            partition_specs = _get_attribute_values(
+                r, SLURM_SPECS_ATTRIBUTE_NAME)
+            partition_user_specs = _get_attribute_values(
+                r, SLURM_USER_SPECS_ATTRIBUTE_NAME)
+            for allocation in allocations_by_resource_id[r.id]:
                 cluster.add_allocation(allocation, specs=partition_specs, user_specs=partition_user_specs)
 
         return cluster
@@ -130,15 +252,16 @@ class SlurmCluster(SlurmBase):
             specs = []
 
         """Add accounts from a ColdFront Allocation model to SlurmCluster"""
-        name = allocation.get_attribute(SLURM_ACCOUNT_ATTRIBUTE_NAME)
+        name = _get_attribute_value(allocation, SLURM_ACCOUNT_ATTRIBUTE_NAME)
         if not name:
             name = 'root'
 
         logger.debug("Adding allocation name=%s specs=%s user_specs=%s", name, specs, user_specs)
-        account = self.accounts.get(name, SlurmAccount(name))
+        account = self.accounts.get(name)
+        if account is None:
+            account = self.accounts[name] = SlurmAccount(name)
         account.add_allocation(allocation, user_specs=user_specs)
-        account.specs += specs
-        self.accounts[name] = account
+        account.add_specs(specs)
 
     def write(self, out):
         self._write(out, "# ColdFront Allocation Slurm associations dump {}\n".format(
@@ -164,6 +287,8 @@ class SlurmCluster(SlurmBase):
 
 
 class SlurmAccount(SlurmBase):
+    __slots__ = ('users',)
+
     def __init__(self, name, specs=None):
         super().__init__(name, specs=specs)
         self.users = {}
@@ -172,24 +297,20 @@ class SlurmAccount(SlurmBase):
     def new_from_sacctmgr(line):
         """Create a new SlurmAccount by parsing a line from sacctmgr dump. For
         example: Account - 'physics':Description='physics group':Organization='cas':Fairshare=100"""
-        if not re.match("^Account - '[^']+'", line):
+        record = _parse_record(line.strip())
+        if record is None or record[0] != 'Account':
             raise(SlurmParserError(
                 'Invalid format. Must start with "Account" for line: {}'.format(line)))
 
-        parts = line.split(':')
-        name = re.sub(r"^Account - ", '', parts[0]).strip("\n'")
-        if len(name) == 0:
-            raise(SlurmParserError(
-                'Cluster name not found for line: {}'.format(line)))
-
-        return SlurmAccount(name, specs=parts[1:])
+        _, name, specs = record
+        return SlurmAccount(name, specs=specs)
 
     def add_allocation(self, allocation, user_specs=None):
         """Add users from a ColdFront Allocation model to SlurmAccount"""
         if user_specs is None:
             user_specs = []
 
-        name = allocation.get_attribute(SLURM_ACCOUNT_ATTRIBUTE_NAME)
+        name = _get_attribute_value(allocation, SLURM_ACCOUNT_ATTRIBUTE_NAME)
         if not name:
             name = 'root'
 
@@ -197,22 +318,26 @@ class SlurmAccount(SlurmBase):
             raise(SlurmError('Allocation {} slurm_account_name does not match {}'.format(
                 allocation, self.name)))
 
-        self.specs += allocation.get_attribute_list(SLURM_SPECS_ATTRIBUTE_NAME)
+        self.add_specs(_get_attribute_values(allocation, SLURM_SPECS_ATTRIBUTE_NAME))
 
-        allocation_user_specs = allocation.get_attribute_list(SLURM_USER_SPECS_ATTRIBUTE_NAME)
-        for u in allocation.allocationuser_set.filter(status__name='Active'):
+        allocation_user_specs = _get_attribute_values(allocation, SLURM_USER_SPECS_ATTRIBUTE_NAME)
+        active_allocation_users = getattr(
+            allocation, 'active_allocation_users', None)
+        if active_allocation_users is None:
+            active_allocation_users = allocation.allocationuser_set.filter(
+                status__name='Active').select_related('user')
+        for u in active_allocation_users:
             user = SlurmUser(u.user.username)
-            user.specs += allocation_user_specs
-            user.specs += user_specs
+            user.add_specs(allocation_user_specs)
+            user.add_specs(user_specs)
             self.add_user(user)
 
     def add_user(self, user):
-        if user.name not in self.users:
+        rec = self.users.get(user.name)
+        if rec is None:
             self.users[user.name] = user
-
-        rec = self.users[user.name]
-        rec.specs += user.specs
-        self.users[user.name] = rec
+        else:
+            rec.specs.update(user.specs)
 
     def write(self, out):
         if self.name != 'root':
@@ -228,21 +353,19 @@ class SlurmAccount(SlurmBase):
 
 
 class SlurmUser(SlurmBase):
+    __slots__ = ()
 
     @staticmethod
     def new_from_sacctmgr(line):
         """Create a new SlurmUser by parsing a line from sacctmgr dump. For
         example: User - 'jane':DefaultAccount='physics':Fairshare=Parent:QOS='general-compute'"""
-        if not re.match("^User - '[^']+'", line):
+        record = _parse_record(line.strip())
+        if record is None or record[0] != 'User':
             raise(SlurmParserError(
                 'Invalid format. Must start with "User" for line: {}'.format(line)))
 
-        parts = line.split(':')
-        name = re.sub(r"^User - ", '', parts[0]).strip("\n'")
-        if len(name) == 0:
-            raise(SlurmParserError('User name not found for line: {}'.format(line)))
-
-        return SlurmUser(name, specs=parts[1:])
+        _, name, specs = record
+        return SlurmUser(name, specs=specs)
 
     def write(self, out):
         self._write(out, "User - '{}':{}\n".format(
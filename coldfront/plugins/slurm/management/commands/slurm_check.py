@@ -12,9 +12,8 @@ from coldfront.plugins.slurm.associations import SlurmCluster
 from coldfront.plugins.slurm.utils import (SLURM_ACCOUNT_ATTRIBUTE_NAME,
                                            SLURM_CLUSTER_ATTRIBUTE_NAME,
                                            SLURM_USER_SPECS_ATTRIBUTE_NAME,
-                                           SlurmError, slurm_remove_qos,
-                                           slurm_dump_cluster, slurm_remove_account,
-                                           slurm_remove_assoc)
+                                           SlurmChangePlan, SlurmError,
+                                           slurm_dump_cluster)
 
 SLURM_IGNORE_USERS = import_from_settings('SLURM_IGNORE_USERS', [])
 SLURM_IGNORE_ACCOUNTS = import_from_settings('SLURM_IGNORE_ACCOUNTS', [])
@@ -84,14 +83,7 @@ class Command(BaseCommand):
             return
 
         if self.sync:
-            try:
-                slurm_remove_assoc(user, cluster, account, noop=self.noop)
-            except SlurmError as e:
-                logger.error(
-                    "Failed removing Slurm association user %s account %s cluster %s: %s", user, account, cluster, e)
-            else:
-                logger.error(
-                    "Removed Slurm association user %s account %s cluster %s successfully", user, account, cluster)
+            self.plan.remove_assoc(user, account)
 
         row = [
             user,
@@ -107,14 +99,7 @@ class Command(BaseCommand):
             return
 
         if self.sync:
-            try:
-                slurm_remove_account(cluster, account, noop=self.noop)
-            except SlurmError as e:
-                logger.error(
-                    "Failed removing Slurm account %s cluster %s: %s", account, cluster, e)
-            else:
-                logger.error(
-                    "Removed Slurm account %s cluster %s successfully", account, cluster)
+            self.plan.remove_account(account)
 
         row = [
             '',
@@ -130,15 +115,7 @@ class Command(BaseCommand):
             return
 
         if self.sync:
-            try:
-                slurm_remove_qos(user, cluster, account, qos, noop=self.noop)
-                pass
-            except SlurmError as e:
-                logger.error(
-                    "Failed removing Slurm qos %s for user %s account %s cluster %s: %s", qos, user, account, cluster, e)
-            else:
-                logger.error(
-                    "Removed Slurm qos %s for user %s account %s cluster %s successfully", qos, user, account, cluster)
+            self.plan.remove_qos(user, account, qos)
 
         row = [
             user,
@@ -212,9 +189,39 @@ class Command(BaseCommand):
 
                 self.remove_account(name, cluster_a.name)
 
+    def apply_plan(self):
+        """Apply the changes collected while checking, in batches, and
+        log the result of each."""
+        cluster = self.plan.cluster
+        for (action, user, account, qos), e in self.plan.apply(noop=self.noop):
+            if action == SlurmChangePlan.REMOVE_ASSOC:
+                if e:
+                    logger.error(
+                        "Failed removing Slurm association user %s account %s cluster %s: %s", user, account, cluster, e)
+                else:
+                    logger.error(
+                        "Removed Slurm association user %s account %s cluster %s successfully", user, account, cluster)
+            elif action == SlurmChangePlan.REMOVE_QOS:
+                if e:
+                    logger.error(
+                        "Failed removing Slurm qos %s for user %s account %s cluster %s: %s", qos, user, account, cluster, e)
+                else:
+                    logger.error(
+                        "Removed Slurm qos %s for user %s account %s cluster %s successfully", qos, user, account, cluster)
+            else:
+                if e:
+                    logger.error(
+                        "Failed removing Slurm account %s cluster %s: %s", account, cluster, e)
+                else:
+                    logger.error(
+                        "Removed Slurm account %s cluster %s successfully", account, cluster)
+
     def check_consistency(self, slurm_cluster, coldfront_cluster):
         # Check for accounts in Slurm NOT in ColdFront
+        self.plan = SlurmChangePlan(slurm_cluster.name)
         self._diff(slurm_cluster, coldfront_cluster)
+        if self.sync:
+            self.apply_plan()
 
     def _cluster_from_dump(self, cluster):
         slurm_cluster = None
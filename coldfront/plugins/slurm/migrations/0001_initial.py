@@ -0,0 +1,24 @@
+# Generated by Django 3.2.5 on 2026-10-18 05:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('allocation', '0013_allocation_usage_deltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlurmAssociationDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('allocation_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slurm_association_deltas', to='allocation.allocationuser')),
+            ],
+        ),
+    ]
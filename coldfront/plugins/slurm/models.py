@@ -0,0 +1,16 @@
+from django.db import models
+
+from coldfront.core.allocation.models import AllocationUser
+
+
+class SlurmAssociationDelta(models.Model):
+    """ A pending re-evaluation of the Slurm association of an
+    AllocationUser, enqueued when its membership or its Allocation's
+    status changes, and applied by a worker. """
+    allocation_user = models.ForeignKey(
+        AllocationUser, on_delete=models.CASCADE,
+        related_name='slurm_association_deltas')
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.allocation_user_id}: {self.created}'
@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django_q.tasks import async_task
+
+from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationUser
+from coldfront.core.allocation.signals import (allocation_activate_user,
+                                               allocation_remove_user)
+from coldfront.plugins.slurm.models import SlurmAssociationDelta
+
+
+# Changes are recorded as SlurmAssociationDeltas, each naming an
+# AllocationUser whose association should be re-evaluated, rather than the
+# change itself. A worker coalesces them, so that bursts of changes result in
+# few sacctmgr commands, and applies the state as of when it runs.
+
+
+def enqueue_association_deltas(allocation_user_pks):
+    """Record that the associations of the AllocationUsers with the
+    given IDs should be re-evaluated, and apply them once the current
+    transaction is committed."""
+    SlurmAssociationDelta.objects.bulk_create([
+        SlurmAssociationDelta(allocation_user_id=pk)
+        for pk in allocation_user_pks])
+    transaction.on_commit(
+        lambda: async_task(
+            'coldfront.plugins.slurm.tasks.apply_association_deltas'))
+
+
+@receiver(allocation_activate_user)
+@receiver(allocation_remove_user)
+def change_user(sender, **kwargs):
+    allocation_user_pk = kwargs.get('allocation_user_pk')
+    if allocation_user_pk is not None:
+        enqueue_association_deltas([allocation_user_pk])
+
+
+@receiver(pre_save, sender=Allocation)
+def store_old_allocation_status(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._slurm_old_status_id = None
+        return
+    instance._slurm_old_status_id = Allocation.objects.filter(
+        pk=instance.pk).values_list('status_id', flat=True).first()
+
+
+@receiver(post_save, sender=Allocation)
+def change_allocation_status(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    old_status_id = getattr(instance, '_slurm_old_status_id', None)
+    if old_status_id is None or old_status_id == instance.status_id:
+        return
+    allocation_user_pks = list(
+        AllocationUser.objects.filter(
+            allocation=instance).values_list('pk', flat=True))
+    if allocation_user_pks:
+        enqueue_association_deltas(allocation_user_pks)
@@ -0,0 +1,221 @@
+import logging
+from collections import defaultdict
+
+from django.core.management import call_command
+from django.db import transaction
+
+from coldfront.core.allocation.models import AllocationUser
+from coldfront.core.resource.models import ResourceAttribute
+from coldfront.core.utils.common import import_from_settings
+from coldfront.plugins.slurm.models import SlurmAssociationDelta
+from coldfront.plugins.slurm.utils import (SLURM_ACCOUNT_ATTRIBUTE_NAME,
+                                           SLURM_CLUSTER_ATTRIBUTE_NAME,
+                                           SLURM_SPECS_ATTRIBUTE_NAME,
+                                           SLURM_USER_SPECS_ATTRIBUTE_NAME,
+                                           SlurmChangePlan)
+
+SLURM_IGNORE_USERS = import_from_settings('SLURM_IGNORE_USERS', [])
+SLURM_IGNORE_ACCOUNTS = import_from_settings('SLURM_IGNORE_ACCOUNTS', [])
+SLURM_IGNORE_CLUSTERS = import_from_settings('SLURM_IGNORE_CLUSTERS', [])
+SLURM_NOOP = import_from_settings('SLURM_NOOP', False)
+
+logger = logging.getLogger(__name__)
+
+
+def _split_specs(values):
+    """Return the individual specs in the given colon-separated
+    attribute values."""
+    return [spec for value in values for spec in value.split(':') if spec]
+
+
+def _get_associations(allocation_user):
+    """Return a list of (cluster, account, account_specs, user_specs)
+    tuples describing the Slurm associations that the given
+    AllocationUser would have, were it and its Allocation Active, in the
+    same way that SlurmCluster.new_from_resource does."""
+    allocation = allocation_user.allocation
+    account = allocation.get_attribute(SLURM_ACCOUNT_ATTRIBUTE_NAME) or 'root'
+    account_specs = allocation.get_attribute_list(SLURM_SPECS_ATTRIBUTE_NAME)
+    user_specs = allocation.get_attribute_list(SLURM_USER_SPECS_ATTRIBUTE_NAME)
+
+    associations = []
+    for resource in allocation.resources.select_related(
+            'parent_resource', 'resource_type'):
+        cluster = resource.get_attribute(SLURM_CLUSTER_ATTRIBUTE_NAME)
+        partition_specs = []
+        if (not cluster and resource.parent_resource is not None and
+                resource.resource_type.name == 'Cluster Partition'):
+            # Specs of partitions are set on the account, not the cluster.
+            cluster = resource.parent_resource.get_attribute(
+                SLURM_CLUSTER_ATTRIBUTE_NAME)
+            partition_specs = resource.get_attribute_list(
+                SLURM_SPECS_ATTRIBUTE_NAME)
+        if not cluster:
+            continue
+        associations.append((
+            cluster,
+            account,
+            tuple(_split_specs(account_specs + partition_specs)),
+            tuple(_split_specs(
+                user_specs + resource.get_attribute_list(
+                    SLURM_USER_SPECS_ATTRIBUTE_NAME))),
+        ))
+    return associations
+
+
+def _is_active(allocation_user):
+    return (allocation_user.status.name == 'Active' and
+            allocation_user.allocation.status.name == 'Active')
+
+
+def _get_other_active_accounts(allocation_user):
+    """Return the set of (cluster, account) pairs that the user of the
+    given AllocationUser is associated with through other Active
+    AllocationUsers in Active Allocations."""
+    others = AllocationUser.objects.filter(
+        user=allocation_user.user,
+        status__name='Active',
+        allocation__status__name='Active',
+    ).exclude(pk=allocation_user.pk).select_related('allocation')
+    accounts = set()
+    for other in others:
+        for cluster, account, _, _ in _get_associations(other):
+            accounts.add((cluster, account))
+    return accounts
+
+
+def _is_ignored(cluster, account, username):
+    return (cluster in SLURM_IGNORE_CLUSTERS or
+            account in SLURM_IGNORE_ACCOUNTS or
+            username in SLURM_IGNORE_USERS)
+
+
+def _claim_association_deltas():
+    """Delete the pending SlurmAssociationDeltas that are not locked by
+    a concurrent run, in a short transaction. Return the distinct IDs of
+    their AllocationUsers."""
+    with transaction.atomic():
+        deltas = list(
+            SlurmAssociationDelta.objects.select_for_update(
+                skip_locked=True).order_by('pk').values_list(
+                    'pk', 'allocation_user'))
+        SlurmAssociationDelta.objects.filter(
+            pk__in=[delta_pk for delta_pk, _ in deltas]).delete()
+    return list(dict.fromkeys(
+        allocation_user_pk for _, allocation_user_pk in deltas))
+
+
+def _plan_association_changes(allocation_user_pks):
+    """Return a dict mapping cluster names to SlurmChangePlans that make
+    the associations of the AllocationUsers with the given IDs match
+    their current states, and a dict mapping the IDs to lists of
+    (cluster, item) pairs planned for each."""
+    allocation_users = AllocationUser.objects.filter(
+        pk__in=allocation_user_pks
+    ).select_related('allocation__status', 'status', 'user')
+
+    plans = {}
+    items_by_allocation_user_pk = defaultdict(list)
+    for allocation_user in allocation_users:
+        username = allocation_user.user.username
+        is_active = _is_active(allocation_user)
+        other_accounts = None
+        for cluster, account, account_specs, user_specs in \
+                _get_associations(allocation_user):
+            if _is_ignored(cluster, account, username):
+                continue
+            plan = plans.get(cluster)
+            if plan is None:
+                plan = plans[cluster] = SlurmChangePlan(cluster)
+            items = items_by_allocation_user_pk[allocation_user.pk]
+            if is_active:
+                if account != 'root':
+                    plan.add_account(account, account_specs)
+                    items.append((cluster, plan.items[-1]))
+                plan.add_assoc(username, account, user_specs)
+                items.append((cluster, plan.items[-1]))
+            else:
+                if other_accounts is None:
+                    other_accounts = _get_other_active_accounts(
+                        allocation_user)
+                if (cluster, account) in other_accounts:
+                    continue
+                plan.remove_assoc(username, account)
+                items.append((cluster, plan.items[-1]))
+    return plans, items_by_allocation_user_pk
+
+
+def _restore_association_deltas(allocation_user_pks):
+    """Re-create SlurmAssociationDeltas for the AllocationUsers with the
+    given IDs, skipping those that no longer exist."""
+    SlurmAssociationDelta.objects.bulk_create([
+        SlurmAssociationDelta(allocation_user_id=allocation_user_pk)
+        for allocation_user_pk in AllocationUser.objects.filter(
+            pk__in=allocation_user_pks).values_list('pk', flat=True)])
+
+
+def apply_association_deltas():
+    """Apply pending SlurmAssociationDeltas to Slurm in batches.
+
+    Deltas for the same AllocationUser are coalesced, and each
+    AllocationUser's association is made to match its current state: it
+    is added if the AllocationUser and its Allocation are Active, and
+    removed otherwise, unless the user has the same account on the same
+    cluster through another Allocation. Unused accounts are not removed;
+    the nightly slurm_check does so.
+
+    Deltas are claimed by deleting them in a short transaction, so that
+    no rows are locked while sacctmgr runs. Deltas locked by a
+    concurrent run are skipped. Deltas whose changes fail to apply are
+    re-created, to be retried by the next run."""
+    allocation_user_pks = _claim_association_deltas()
+    if not allocation_user_pks:
+        return
+
+    try:
+        plans, items_by_allocation_user_pk = _plan_association_changes(
+            allocation_user_pks)
+
+        failed = set()
+        for cluster, plan in plans.items():
+            for item, error in plan.apply(noop=SLURM_NOOP):
+                action, user, account, _ = item
+                if error is None:
+                    logger.info(
+                        "Applied %s for user %s account %s on cluster %s",
+                        action, user, account, cluster)
+                else:
+                    logger.error(
+                        "Failed to apply %s for user %s account %s on "
+                        "cluster %s: %s", action, user, account, cluster,
+                        error)
+                    failed.add((cluster, item))
+    except Exception:
+        _restore_association_deltas(allocation_user_pks)
+        raise
+
+    _restore_association_deltas([
+        allocation_user_pk for allocation_user_pk in allocation_user_pks
+        if failed.intersection(
+            items_by_allocation_user_pk[allocation_user_pk])])
+
+
+def check_associations():
+    """Run slurm_check with --sync against each Slurm cluster, as a
+    safety net for changes that deltas do not cover (e.g., unused
+    accounts)."""
+    clusters = ResourceAttribute.objects.filter(
+        resource_attribute_type__name=SLURM_CLUSTER_ATTRIBUTE_NAME
+    ).values_list('value', flat=True).distinct()
+    for cluster in clusters:
+        if cluster in SLURM_IGNORE_CLUSTERS:
+            continue
+        try:
+            call_command('slurm_check', cluster=cluster, sync=True)
+        except SystemExit as e:
+            if e.code:
+                logger.error(
+                    "Failed to check associations on cluster %s", cluster)
+        except Exception as e:
+            logger.error(
+                "Failed to check associations on cluster %s: %s", cluster, e)
@@ -1,11 +1,21 @@
 from io import StringIO
+import re
 
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from coldfront.core.resource.models import Resource
+from coldfront.plugins.slurm.associations import _parse_record
+from coldfront.plugins.slurm.associations import SlurmAccount
 from coldfront.plugins.slurm.associations import SlurmCluster
+from coldfront.plugins.slurm.associations import SlurmParserError
+from coldfront.plugins.slurm.associations import SlurmUser
+from coldfront.plugins.slurm.tests.utils import TestSlurmBase
 from coldfront.plugins.slurm.utils import SLURM_CLUSTER_ATTRIBUTE_NAME
+from coldfront.plugins.slurm.utils import SLURM_SPECS_ATTRIBUTE_NAME
+from coldfront.plugins.slurm.utils import SLURM_USER_SPECS_ATTRIBUTE_NAME
 
 
 class AssociationTest(TestCase):
@@ -75,3 +85,221 @@ User - 'larry':DefaultAccount='physics':Fairshare=parent
         self.assertEqual(len(cluster2.accounts['physics'].users), 3)
         for u in ['jane', 'john', 'larry']:
             self.assertIn(u, cluster2.accounts['physics'].users)
+
+
+def dump(cluster):
+    """Return the given SlurmCluster in sacctmgr dump format, without
+    the dated header."""
+    out = StringIO()
+    cluster.write(out)
+    return out.getvalue().split('\n', 1)[1]
+
+
+def new_from_resource_per_allocation(resource):
+    """Create a new SlurmCluster from the given Resource by querying the
+    attributes and users of each Allocation separately, as
+    SlurmCluster.new_from_resource did before prefetching them."""
+    name = resource.get_attribute(SLURM_CLUSTER_ATTRIBUTE_NAME)
+    specs = resource.get_attribute_list(SLURM_SPECS_ATTRIBUTE_NAME)
+    user_specs = resource.get_attribute_list(SLURM_USER_SPECS_ATTRIBUTE_NAME)
+    cluster = SlurmCluster(name, specs)
+    for allocation in resource.allocation_set.filter(status__name='Active'):
+        cluster.add_allocation(allocation, user_specs=user_specs)
+    children = Resource.objects.filter(
+        parent_resource_id=resource.id, resource_type__name='Cluster Partition')
+    for r in children:
+        partition_specs = r.get_attribute_list(SLURM_SPECS_ATTRIBUTE_NAME)
+        partition_user_specs = r.get_attribute_list(
+            SLURM_USER_SPECS_ATTRIBUTE_NAME)
+        for allocation in r.allocation_set.filter(status__name='Active'):
+            cluster.add_allocation(
+                allocation, specs=partition_specs,
+                user_specs=partition_user_specs)
+    return cluster
+
+
+class TestNewFromResource(TestSlurmBase):
+    """A suite for testing SlurmCluster.new_from_resource."""
+
+    def test_associations_unchanged(self):
+        """Test that the associations built from prefetched objects are
+        the same as those built by querying each Allocation."""
+        allocation = self.create_allocation(
+            self.cluster, 'fc_a', usernames=['user1', 'user2'], attributes=[
+                (SLURM_SPECS_ATTRIBUTE_NAME, 'QOS+=fc_a_normal'),
+                (SLURM_USER_SPECS_ATTRIBUTE_NAME, 'Fairshare=2')])
+        self.create_allocation_user(
+            allocation, 'user3', status_name='Removed')
+        self.create_allocation(
+            self.partition, 'fc_a', usernames=['user2', 'user4'])
+        self.create_allocation(
+            self.partition, 'fc_b', usernames=['user1'], attributes=[
+                (SLURM_USER_SPECS_ATTRIBUTE_NAME, 'Fairshare=3:QOS+=fc_b')])
+        self.create_allocation(
+            self.cluster, 'fc_c', usernames=['user5'], status_name='Expired')
+        self.create_allocation(self.cluster, None, usernames=['admin'])
+
+        cluster = SlurmCluster.new_from_resource(self.cluster)
+        self.assertEqual(set(cluster.accounts), {'fc_a', 'fc_b', 'root'})
+        self.assertEqual(
+            set(cluster.accounts['fc_a'].users), {'user1', 'user2', 'user4'})
+        self.assertEqual(
+            dump(cluster),
+            dump(new_from_resource_per_allocation(self.cluster)))
+
+    def test_num_queries_constant(self):
+        """Test that the number of queries does not depend on the number
+        of Allocations or users."""
+        self.create_allocation(self.cluster, 'fc_a', usernames=['user1'])
+        self.create_allocation(self.partition, 'fc_b', usernames=['user1'])
+        with CaptureQueriesContext(connection) as context:
+            SlurmCluster.new_from_resource(self.cluster)
+        num_queries = len(context.captured_queries)
+
+        for i in range(5):
+            for resource in (self.cluster, self.partition):
+                self.create_allocation(
+                    resource, f'fc_{resource.pk}_{i}',
+                    usernames=[f'user{j}' for j in range(i + 2)],
+                    attributes=[
+                        (SLURM_SPECS_ATTRIBUTE_NAME, f'QOS+=qos{i}'),
+                        (SLURM_USER_SPECS_ATTRIBUTE_NAME, 'Fairshare=1')])
+
+        with self.assertNumQueries(num_queries):
+            cluster = SlurmCluster.new_from_resource(self.cluster)
+        self.assertEqual(len(cluster.accounts), 12)
+
+
+SACCTMGR_DUMP = """
+# To edit this file start with a cluster line for the new cluster
+# Cluster - 'cluster_name':MaxNodesPerJob=50
+# Account - 'cs':MaxTRESMins=cpu=20:Description='Computer Science'
+   # User - 'lipari':MaxNodesPerJob=2
+Cluster - 'alpha':DefaultQOS='general-compute':Fairshare=1:QOS='normal'
+
+Parent - 'root'
+User - 'root':DefaultAccount='root':AdminLevel='Administrator':Fairshare=1
+Account - 'physics':Description='physics group':Organization='physics':Fairshare=100:QOS='debug,general-compute'
+Account - 'cs':MaxNodesPerJob=5:MaxJobs=4:MaxTRESMins=cpu=20:FairShare=399
+Account - 'bare'
+Account - 'trailing':
+Account - '':Fairshare=1
+QOS - 'normal':Priority=1
+Parent - 'physics'
+  User - 'jane':DefaultAccount='physics':Fairshare=parent:QOS='general-compute'  
+User - 'john'
+User - 'jane':QOS='debug'
+User - '':Fairshare=1
+Parent - 'cs'
+User - 'larry':DefaultAccount='cs':Fairshare=parent
+"""
+
+
+def get_associations(cluster):
+    """Return a dictionary mapping the names of the accounts of the
+    given SlurmCluster to pairs of their specs and dictionaries mapping
+    the names of their users to their specs."""
+    return {
+        name: (
+            account.spec_list(),
+            {username: user.spec_list()
+             for username, user in account.users.items()})
+        for name, account in cluster.accounts.items()}
+
+
+def parse_record_with_regexes(line):
+    """Parse the given stripped line from sacctmgr dump the way that
+    SlurmCluster.new_from_stream did before parsing each line in a
+    single pass, returning a tuple of its record type, name, and specs,
+    or None if it is not a record."""
+    for record_type in ('Cluster', 'Account', 'Parent', 'User'):
+        if re.match(f"^{record_type} - '[^']+'", line):
+            parts = line.split(':')
+            name = re.sub(f'^{record_type} - ', '', parts[0]).strip("\n'")
+            return record_type, name, parts[1:]
+    return None
+
+
+class TestParseSacctmgrDump(TestCase):
+    """A suite for testing the parsing of sacctmgr dump output."""
+
+    def test_records_parsed_as_before(self):
+        """Test that each line is parsed into the same record as by the
+        regular expressions previously used."""
+        for line in SACCTMGR_DUMP.splitlines():
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            with self.subTest(line=line):
+                self.assertEqual(
+                    _parse_record(line), parse_record_with_regexes(line))
+
+    def test_new_from_stream(self):
+        """Test that comments, blank lines, unsupported records, and
+        records without names are skipped, that records may have no
+        specs, and that the specs of duplicate users are merged."""
+        cluster = SlurmCluster.new_from_stream(StringIO(SACCTMGR_DUMP))
+        self.assertEqual(cluster.name, 'alpha')
+        self.assertEqual(
+            cluster.spec_list(),
+            ["DefaultQOS='general-compute'", 'Fairshare=1', "QOS='normal'"])
+        self.assertEqual(
+            list(cluster.accounts),
+            ['root', 'physics', 'cs', 'bare', 'trailing'])
+
+        accounts = cluster.accounts
+        self.assertEqual(list(accounts['root'].users), ['root'])
+        self.assertEqual(
+            accounts['physics'].spec_list(),
+            ["Description='physics group'", "Organization='physics'",
+             'Fairshare=100', "QOS='debug,general-compute'"])
+        self.assertEqual(
+            accounts['cs'].spec_list(),
+            ['MaxNodesPerJob=5', 'MaxJobs=4', 'MaxTRESMins=cpu=20',
+             'FairShare=399'])
+        self.assertEqual(accounts['bare'].spec_list(), [])
+        self.assertEqual(accounts['trailing'].spec_list(), [])
+
+        users = accounts['physics'].users
+        self.assertEqual(list(users), ['jane', 'john'])
+        self.assertEqual(
+            users['jane'].spec_list(),
+            ["DefaultAccount='physics'", 'Fairshare=parent',
+             "QOS='general-compute'", "QOS='debug'"])
+        self.assertEqual(users['john'].spec_list(), [])
+        self.assertEqual(list(accounts['cs'].users), ['larry'])
+
+        # The written dump is parsed into the same associations.
+        cluster2 = SlurmCluster.new_from_stream(StringIO(dump(cluster)))
+        self.assertEqual(get_associations(cluster2), get_associations(cluster))
+
+    def test_new_from_sacctmgr(self):
+        """Test that accounts and users are parsed from single lines,
+        and that lines of other record types are rejected."""
+        account = SlurmAccount.new_from_sacctmgr(
+            "Account - 'physics':Description='physics group'\n")
+        self.assertEqual(account.name, 'physics')
+        self.assertEqual(account.spec_list(), ["Description='physics group'"])
+        user = SlurmUser.new_from_sacctmgr("User - 'jane'")
+        self.assertEqual(user.name, 'jane')
+        self.assertEqual(user.spec_list(), [])
+
+        for cls, line in ((SlurmAccount, "User - 'jane'"),
+                          (SlurmAccount, "Account - ''"),
+                          (SlurmUser, "Account - 'physics'"),
+                          (SlurmUser, "# User - 'jane'")):
+            with self.subTest(line=line):
+                with self.assertRaises(SlurmParserError):
+                    cls.new_from_sacctmgr(line)
+
+    def test_invalid_streams(self):
+        """Test that streams without a cluster, with users before any
+        parent, or with clusters or parents without names are
+        rejected."""
+        for text in ("# Cluster - 'alpha'\n\nQOS - 'normal'\n",
+                     "Cluster - 'alpha'\nUser - 'jane'\n",
+                     "Cluster - '':Fairshare=1\n",
+                     "Cluster - 'alpha'\nParent - ''\nUser - 'jane'\n"):
+            with self.subTest(text=text):
+                with self.assertRaises(SlurmParserError):
+                    SlurmCluster.new_from_stream(StringIO(text))
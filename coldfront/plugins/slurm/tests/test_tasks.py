@@ -0,0 +1,263 @@
+from decimal import Decimal
+from subprocess import CalledProcessError
+from subprocess import CompletedProcess
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from coldfront.api.statistics.utils import create_project_allocation
+from coldfront.core.allocation.models import AllocationStatusChoice
+from coldfront.core.allocation.signals import allocation_activate_user
+from coldfront.core.allocation.signals import allocation_remove_user
+from coldfront.core.project.utils import deactivate_projects_and_allocations
+from coldfront.plugins.slurm.models import SlurmAssociationDelta
+from coldfront.plugins.slurm.tasks import apply_association_deltas
+from coldfront.plugins.slurm.tests.utils import TestSlurmBase
+from coldfront.plugins.slurm.utils import SLURM_SPECS_ATTRIBUTE_NAME
+from coldfront.plugins.slurm.utils import SLURM_USER_SPECS_ATTRIBUTE_NAME
+# Connect the receivers, which are otherwise only connected on startup if
+# SLURM_ENABLE_SIGNALS is set.
+import coldfront.plugins.slurm.signals
+
+
+class TestSacctmgrBase(TestSlurmBase):
+    """A base class for tests that run sacctmgr, which is mocked."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        # Commands that contain any of these strings fail.
+        self.failing_substrings = []
+        self.commands = []
+        patcher = patch(
+            'coldfront.plugins.slurm.utils.subprocess.run',
+            side_effect=self.run_sacctmgr)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_sacctmgr(self, args, **kwargs):
+        """Record the given sacctmgr command, and fail if it contains
+        any of the strings in self.failing_substrings."""
+        command = ' '.join(args)
+        self.commands.append(command)
+        if any(s in command for s in self.failing_substrings):
+            raise CalledProcessError(1, args, output=b'', stderr=b'Error')
+        return CompletedProcess(args, 0, stdout=b'', stderr=b'')
+
+
+class TestApplyAssociationDeltas(TestSacctmgrBase):
+    """A suite for testing the apply_association_deltas task."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.allocation = self.create_allocation(
+            self.cluster, 'fc_a', attributes=[
+                (SLURM_SPECS_ATTRIBUTE_NAME, 'Fairshare=10')])
+
+    def enqueue(self, *allocation_users):
+        """Enqueue deltas for the given AllocationUsers."""
+        coldfront.plugins.slurm.signals.enqueue_association_deltas(
+            [allocation_user.pk for allocation_user in allocation_users])
+
+    def test_adds_associations_in_batches(self):
+        """Test that accounts and associations are added for Active
+        AllocationUsers, with one command per account, and that deltas
+        are deleted."""
+        allocation_users = [
+            self.create_allocation_user(self.allocation, username)
+            for username in ('user1', 'user2')]
+        self.enqueue(*allocation_users)
+        self.enqueue(allocation_users[0])
+
+        apply_association_deltas()
+
+        sacctmgr = '/usr/bin/sacctmgr -Q -i'
+        self.assertEqual(self.commands, [
+            f'{sacctmgr} create account name=fc_a cluster=test-cluster '
+            f'Fairshare=10',
+            f'{sacctmgr} create user name=user1,user2 cluster=test-cluster '
+            f'account=fc_a Fairshare=parent',
+        ])
+        self.assertFalse(SlurmAssociationDelta.objects.exists())
+
+    def test_removes_associations(self):
+        """Test that the associations of inactive AllocationUsers are
+        removed, unless the user has the same account through another
+        Active Allocation."""
+        allocation_user1 = self.create_allocation_user(
+            self.allocation, 'user1', status_name='Removed')
+        allocation_user2 = self.create_allocation_user(
+            self.allocation, 'user2', status_name='Removed')
+        self.create_allocation(
+            self.cluster, 'fc_a', usernames=['user2'])
+        self.enqueue(allocation_user1, allocation_user2)
+
+        apply_association_deltas()
+
+        self.assertEqual(self.commands, [
+            '/usr/bin/sacctmgr -Q -i delete user where name=user1 '
+            'cluster=test-cluster account=fc_a',
+        ])
+        self.assertFalse(SlurmAssociationDelta.objects.exists())
+
+    def test_deltas_claimed_before_sacctmgr_runs(self):
+        """Test that deltas are deleted before sacctmgr runs, so that
+        they are not locked while it does."""
+        self.enqueue(self.create_allocation_user(self.allocation, 'user1'))
+        num_deltas = []
+
+        def run_sacctmgr(args, **kwargs):
+            num_deltas.append(SlurmAssociationDelta.objects.count())
+            return self.run_sacctmgr(args, **kwargs)
+
+        with patch(
+                'coldfront.plugins.slurm.utils.subprocess.run',
+                side_effect=run_sacctmgr):
+            apply_association_deltas()
+        self.assertEqual(num_deltas, [0, 0])
+
+    def test_failed_deltas_restored(self):
+        """Test that deltas are re-created only for AllocationUsers whose
+        changes failed, after retrying the failed batch per user."""
+        allocation_users = [
+            self.create_allocation_user(self.allocation, username)
+            for username in ('user1', 'user2')]
+        self.enqueue(*allocation_users)
+        self.failing_substrings.append('user2')
+
+        apply_association_deltas()
+
+        self.assertEqual(
+            [command.split(' ')[5] for command in self.commands[1:]],
+            ['name=user1,user2', 'name=user1', 'name=user2'])
+        self.assertEqual(
+            list(SlurmAssociationDelta.objects.values_list(
+                'allocation_user', flat=True)),
+            [allocation_users[1].pk])
+
+        # The next run retries the failed change.
+        self.failing_substrings.clear()
+        self.commands.clear()
+        apply_association_deltas()
+        self.assertEqual(
+            [command.split(' ')[5] for command in self.commands[1:]],
+            ['name=user2'])
+        self.assertFalse(SlurmAssociationDelta.objects.exists())
+
+    def test_all_deltas_restored_on_error(self):
+        """Test that all claimed deltas are re-created if an unexpected
+        error is raised."""
+        allocation_users = [
+            self.create_allocation_user(self.allocation, username)
+            for username in ('user1', 'user2')]
+        self.enqueue(*allocation_users)
+
+        with patch(
+                'coldfront.plugins.slurm.tasks.SlurmChangePlan.apply',
+                side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                apply_association_deltas()
+        self.assertEqual(
+            set(SlurmAssociationDelta.objects.values_list(
+                'allocation_user', flat=True)),
+            {allocation_user.pk for allocation_user in allocation_users})
+
+    def test_partition_specs(self):
+        """Test that the specs of partitions are set on accounts and
+        users, in the same way as by SlurmCluster.new_from_resource."""
+        allocation = self.create_allocation(
+            self.partition, 'fc_b', attributes=[
+                (SLURM_USER_SPECS_ATTRIBUTE_NAME, 'Fairshare=2')])
+        self.enqueue(self.create_allocation_user(allocation, 'user1'))
+
+        apply_association_deltas()
+
+        sacctmgr = '/usr/bin/sacctmgr -Q -i'
+        self.assertEqual(self.commands, [
+            f'{sacctmgr} create account name=fc_b cluster=test-cluster '
+            f'QOS+=test_partition_normal',
+            f'{sacctmgr} create user name=user1 cluster=test-cluster '
+            f'account=fc_b Fairshare=2 DefaultQOS=test_partition_normal',
+        ])
+
+
+class TestSignals(TestSlurmBase):
+    """A suite for testing that changes enqueue SlurmAssociationDeltas
+    and the task that applies them."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        self.allocation = self.create_allocation(self.cluster, 'fc_a')
+        self.allocation_users = [
+            self.create_allocation_user(self.allocation, username)
+            for username in ('user1', 'user2')]
+
+    def assert_enqueued(self, allocation_users, num_tasks):
+        """Assert that the pending deltas are for the given
+        AllocationUsers, and that the given number of tasks were
+        queued."""
+        self.assertEqual(
+            sorted(SlurmAssociationDelta.objects.values_list(
+                'allocation_user', flat=True)),
+            sorted(allocation_user.pk for allocation_user in allocation_users))
+        self.assertEqual(self.async_task.call_count, num_tasks)
+        for call in self.async_task.call_args_list:
+            self.assertEqual(
+                call.args,
+                ('coldfront.plugins.slurm.tasks.apply_association_deltas',))
+
+    def test_user_signals(self):
+        """Test that activating or removing an AllocationUser enqueues a
+        delta for it."""
+        with patch('coldfront.plugins.slurm.signals.async_task') as \
+                self.async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                allocation_activate_user.send(
+                    sender=None,
+                    allocation_user_pk=self.allocation_users[0].pk)
+                allocation_remove_user.send(
+                    sender=None,
+                    allocation_user_pk=self.allocation_users[1].pk)
+        self.assert_enqueued(self.allocation_users, 2)
+
+    def test_allocation_status_change(self):
+        """Test that changing the status of an Allocation enqueues deltas
+        for its AllocationUsers, and that other changes do not."""
+        with patch('coldfront.plugins.slurm.signals.async_task') as \
+                self.async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.allocation.justification = 'Changed'
+                self.allocation.save()
+            self.assert_enqueued([], 0)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.allocation.status = AllocationStatusChoice.objects.get(
+                    name='Expired')
+                self.allocation.save()
+        self.assert_enqueued(self.allocation_users, 1)
+
+    @override_settings(SLURM_ENABLE_SIGNALS=True)
+    def test_bulk_deactivation(self):
+        """Test that deactivating Projects in bulk, which does not send
+        signals, enqueues deltas for the AllocationUsers of newly
+        expired Allocations."""
+        allocation = create_project_allocation(
+            self.project, Decimal('1000.00')).allocation
+        allocation_users = [
+            self.create_allocation_user(allocation, username)
+            for username in ('user1', 'user3')]
+
+        with patch('coldfront.plugins.slurm.signals.async_task') as \
+                self.async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                errors = deactivate_projects_and_allocations([self.project])
+            self.assertEqual(errors, {})
+            self.assert_enqueued(allocation_users, 1)
+
+            # Allocations that were already expired are not re-enqueued.
+            SlurmAssociationDelta.objects.all().delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                deactivate_projects_and_allocations([self.project])
+        self.assert_enqueued([], 1)
@@ -0,0 +1,107 @@
+from subprocess import CalledProcessError
+from subprocess import CompletedProcess
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from coldfront.plugins.slurm.utils import SlurmChangePlan
+from coldfront.plugins.slurm.utils import SlurmError
+
+
+class TestSlurmChangePlan(TestCase):
+    """A suite for testing SlurmChangePlan, with sacctmgr mocked."""
+
+    sacctmgr = '/usr/bin/sacctmgr -Q -i'
+
+    def setUp(self):
+        """Set up test data."""
+        # Commands that contain any of these strings fail.
+        self.failing_substrings = []
+        self.commands = []
+        patcher = patch(
+            'coldfront.plugins.slurm.utils.subprocess.run',
+            side_effect=self.run_sacctmgr)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.plan = SlurmChangePlan('test-cluster')
+
+    def run_sacctmgr(self, args, **kwargs):
+        """Record the given sacctmgr command, and fail if it contains
+        any of the strings in self.failing_substrings."""
+        command = ' '.join(args)
+        self.commands.append(command)
+        if any(s in command for s in self.failing_substrings):
+            raise CalledProcessError(1, args, output=b'', stderr=b'Error')
+        return CompletedProcess(args, 0, stdout=b'', stderr=b'')
+
+    def test_batches(self):
+        """Test that items are deduplicated, grouped by action, account,
+        and specs, and applied in order, with one command per batch."""
+        self.plan.remove_account('fc_c')
+        self.plan.remove_assoc('user1', 'fc_b')
+        self.plan.remove_qos('user2', 'fc_a', 'QOS-=debug')
+        self.plan.add_assoc('user1', 'fc_a', ['Fairshare=1'])
+        self.plan.add_assoc('user2', 'fc_a', ['Fairshare=1'])
+        self.plan.add_assoc('user3', 'fc_a', ['Fairshare=2'])
+        self.plan.add_assoc('user1', 'fc_a', ['Fairshare=1'])
+        self.plan.add_account('fc_a', ['Fairshare=10'])
+        self.plan.add_account('fc_b', ['Fairshare=10'])
+        self.plan.remove_assoc('user2', 'fc_b')
+        self.plan.remove_account('fc_d')
+
+        results = self.plan.apply()
+
+        sacctmgr = self.sacctmgr
+        self.assertEqual(self.commands, [
+            f'{sacctmgr} create account name=fc_a,fc_b cluster=test-cluster '
+            f'Fairshare=10',
+            f'{sacctmgr} create user name=user1,user2 cluster=test-cluster '
+            f'account=fc_a Fairshare=1',
+            f'{sacctmgr} create user name=user3 cluster=test-cluster '
+            f'account=fc_a Fairshare=2',
+            f'{sacctmgr} modify user where name=user2 cluster=test-cluster '
+            f'account=fc_a set QOS-=debug',
+            f'{sacctmgr} delete user where name=user1,user2 '
+            f'cluster=test-cluster account=fc_b',
+            f'{sacctmgr} delete account where name=fc_c,fc_d '
+            f'cluster=test-cluster',
+        ])
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(error is None for _, error in results))
+        self.assertEqual(self.plan.items, [])
+
+    def test_batch_size(self):
+        """Test that batches have at most SLURM_BATCH_SIZE items."""
+        for i in range(5):
+            self.plan.add_assoc(f'user{i}', 'fc_a')
+        with patch('coldfront.plugins.slurm.utils.SLURM_BATCH_SIZE', 2):
+            self.plan.apply()
+        self.assertEqual(
+            [command.split(' ')[5] for command in self.commands],
+            ['name=user0,user1', 'name=user2,user3', 'name=user4'])
+
+    def test_failed_batch_retried_per_item(self):
+        """Test that the items of a failed batch are retried
+        individually, and that errors are reported per item."""
+        for i in range(3):
+            self.plan.add_assoc(f'user{i}', 'fc_a')
+        self.failing_substrings.append('user1')
+
+        results = self.plan.apply()
+
+        self.assertEqual(
+            [command.split(' ')[5] for command in self.commands],
+            ['name=user0,user1,user2', 'name=user0', 'name=user1',
+             'name=user2'])
+        self.assertEqual(
+            [(item[1], error is not None) for item, error in results],
+            [('user0', False), ('user1', True), ('user2', False)])
+        self.assertIsInstance(results[1][1], SlurmError)
+
+    def test_noop(self):
+        """Test that no commands are run in noop mode."""
+        self.plan.add_account('fc_a')
+        self.plan.add_assoc('user1', 'fc_a')
+        results = self.plan.apply(noop=True)
+        self.assertEqual(self.commands, [])
+        self.assertTrue(all(error is None for _, error in results))
@@ -0,0 +1,105 @@
+from datetime import date
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+
+from coldfront.core.allocation.models import Allocation
+from coldfront.core.allocation.models import AllocationAttribute
+from coldfront.core.allocation.models import AllocationAttributeType
+from coldfront.core.allocation.models import AllocationStatusChoice
+from coldfront.core.allocation.models import AllocationUser
+from coldfront.core.allocation.models import AllocationUserStatusChoice
+from coldfront.core.resource.models import AttributeType
+from coldfront.core.resource.models import Resource
+from coldfront.core.resource.models import ResourceAttribute
+from coldfront.core.resource.models import ResourceAttributeType
+from coldfront.core.resource.models import ResourceType
+from coldfront.core.utils.tests.test_base import TestBase
+from coldfront.plugins.slurm.utils import SLURM_ACCOUNT_ATTRIBUTE_NAME
+from coldfront.plugins.slurm.utils import SLURM_CLUSTER_ATTRIBUTE_NAME
+from coldfront.plugins.slurm.utils import SLURM_SPECS_ATTRIBUTE_NAME
+from coldfront.plugins.slurm.utils import SLURM_USER_SPECS_ATTRIBUTE_NAME
+
+
+class TestSlurmBase(TestBase):
+    """A base class for testing the Slurm plugin."""
+
+    def setUp(self):
+        """Set up test data."""
+        super().setUp()
+        # There is no default for this attribute type on Resources.
+        ResourceAttributeType.objects.get_or_create(
+            name=SLURM_USER_SPECS_ATTRIBUTE_NAME,
+            attribute_type=AttributeType.objects.get(name='Text'))
+
+        self.cluster = self.create_resource(
+            'Test Cluster', 'Cluster', attributes=[
+                (SLURM_CLUSTER_ATTRIBUTE_NAME, 'test-cluster'),
+                (SLURM_SPECS_ATTRIBUTE_NAME, 'Fairshare=1'),
+                (SLURM_USER_SPECS_ATTRIBUTE_NAME, 'Fairshare=parent')])
+        self.partition = self.create_resource(
+            'Test Partition', 'Cluster Partition',
+            parent_resource=self.cluster, attributes=[
+                (SLURM_SPECS_ATTRIBUTE_NAME, 'QOS+=test_partition_normal'),
+                (SLURM_USER_SPECS_ATTRIBUTE_NAME,
+                 'DefaultQOS=test_partition_normal')])
+
+        self.pi = User.objects.create(username='pi', email='pi@email.com')
+        self.project = self.create_active_project_with_pi(
+            'fc_project', self.pi)
+
+    @staticmethod
+    def create_resource(name, resource_type_name, parent_resource=None,
+                        attributes=()):
+        """Create a Resource with the given name, type name, parent,
+        and list of (attribute type name, value) pairs. Return it."""
+        resource = Resource.objects.create(
+            name=name,
+            resource_type=ResourceType.objects.get(name=resource_type_name),
+            parent_resource=parent_resource)
+        for type_name, value in attributes:
+            ResourceAttribute.objects.create(
+                resource_attribute_type=ResourceAttributeType.objects.get(
+                    name=type_name),
+                resource=resource,
+                value=value)
+        return resource
+
+    def create_allocation(self, resource, account_name, usernames=(),
+                          status_name='Active', attributes=()):
+        """Create an Allocation to the given Resource, under
+        self.project, with the given Slurm account name, if any, status
+        name, and list of (attribute type name, value) pairs, and Active
+        AllocationUsers for the users with the given usernames, which
+        are created if needed. Return it."""
+        num_allocations = Allocation.objects.count()
+        allocation = Allocation.objects.create(
+            project=self.project,
+            status=AllocationStatusChoice.objects.get(name=status_name),
+            # Allocations are ordered by end date.
+            end_date=date(2000, 1, 1) + timedelta(days=num_allocations))
+        allocation.resources.add(resource)
+        attributes = list(attributes)
+        if account_name is not None:
+            attributes.insert(0, (SLURM_ACCOUNT_ATTRIBUTE_NAME, account_name))
+        for type_name, value in attributes:
+            AllocationAttribute.objects.create(
+                allocation_attribute_type=AllocationAttributeType.objects.get(
+                    name=type_name),
+                allocation=allocation,
+                value=value)
+        for username in usernames:
+            self.create_allocation_user(allocation, username)
+        return allocation
+
+    @staticmethod
+    def create_allocation_user(allocation, username, status_name='Active'):
+        """Create an AllocationUser with the given status name for the
+        given Allocation and the user with the given username, who is
+        created if needed. Return it."""
+        user, _ = User.objects.get_or_create(
+            username=username, defaults={'email': f'{username}@email.com'})
+        return AllocationUser.objects.create(
+            allocation=allocation,
+            user=user,
+            status=AllocationUserStatusChoice.objects.get(name=status_name))
@@ -19,6 +19,9 @@ SLURM_CMD_ADD_USER = SLURM_SACCTMGR_PATH + ' -Q -i create user name={} cluster={
 SLURM_CMD_CHECK_ASSOCIATION = SLURM_SACCTMGR_PATH + ' list associations User={} Cluster={} Account={} Format=Cluster,Account,User,QOS -P'
 SLURM_CMD_BLOCK_ACCOUNT = SLURM_SACCTMGR_PATH + ' -Q -i modify account {} where Cluster={} set GrpSubmitJobs=0'
 SLURM_CMD_DUMP_CLUSTER = SLURM_SACCTMGR_PATH + ' dump {} file={}'
+# The maximum number of entities to name in the where clause of a single
+# sacctmgr command when applying changes in batches.
+SLURM_BATCH_SIZE = import_from_settings('SLURM_BATCH_SIZE', 200)
 
 logger = logging.getLogger(__name__)
 
@@ -98,3 +101,116 @@ def slurm_check_assoc(user, cluster, account):
 def slurm_dump_cluster(cluster, fname, noop=False):
     cmd = SLURM_CMD_DUMP_CLUSTER.format(shlex.quote(cluster), shlex.quote(fname))
     _run_slurm_cmd(cmd, noop=noop)
+
+
+class SlurmChangePlan:
+    """Changes to Slurm accounts, associations, and QOS on a cluster,
+    collected so that they may be applied with few sacctmgr commands.
+
+    Each command names several entities in its where clause. Since
+    sacctmgr matches every combination of the values given, each command
+    names a single account, except for those that add or remove accounts
+    themselves. If a batched command fails, its items are retried
+    individually, so that results are reported per item.
+
+    Each item is a tuple of (action, user, account, specs), where specs
+    is the QOS change for QOS removals and a tuple of specs for
+    additions."""
+
+    ADD_ACCOUNT = 'add_account'
+    ADD_ASSOC = 'add_assoc'
+    REMOVE_ASSOC = 'remove_assoc'
+    REMOVE_QOS = 'remove_qos'
+    REMOVE_ACCOUNT = 'remove_account'
+
+    # The order in which actions are applied.
+    ORDER = [ADD_ACCOUNT, ADD_ASSOC, REMOVE_QOS, REMOVE_ASSOC, REMOVE_ACCOUNT]
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+        self.items = []
+
+    def add_account(self, account, specs=()):
+        self.items.append((self.ADD_ACCOUNT, None, account, tuple(specs)))
+
+    def add_assoc(self, user, account, specs=()):
+        self.items.append((self.ADD_ASSOC, user, account, tuple(specs)))
+
+    def remove_assoc(self, user, account):
+        self.items.append((self.REMOVE_ASSOC, user, account, None))
+
+    def remove_qos(self, user, account, qos):
+        self.items.append((self.REMOVE_QOS, user, account, qos))
+
+    def remove_account(self, account):
+        self.items.append((self.REMOVE_ACCOUNT, None, account, None))
+
+    def _batches(self):
+        """Return a list of batches of distinct items, in the order in
+        which they should be applied: additions of accounts, then of
+        associations, then removals of QOS, of associations, and of
+        accounts. Each batch is a list of items that may be applied with
+        a single command."""
+        groups = {}
+        for item in dict.fromkeys(self.items):
+            action, user, account, specs = item
+            if action == self.REMOVE_ACCOUNT:
+                key = (action,)
+            elif action == self.ADD_ACCOUNT:
+                key = (action, specs)
+            else:
+                key = (action, account, specs)
+            groups.setdefault(key, []).append(item)
+
+        batches = []
+        for key in sorted(groups, key=lambda k: self.ORDER.index(k[0])):
+            items = groups[key]
+            for i in range(0, len(items), SLURM_BATCH_SIZE):
+                batches.append(items[i:i + SLURM_BATCH_SIZE])
+        return batches
+
+    def _apply_batch(self, batch, noop=False):
+        action, _, account, specs = batch[0]
+        if action in (self.ADD_ACCOUNT, self.REMOVE_ACCOUNT):
+            accounts = ','.join(item[2] for item in batch)
+            if action == self.ADD_ACCOUNT:
+                slurm_add_account(
+                    self.cluster, accounts, specs=list(specs), noop=noop)
+            else:
+                slurm_remove_account(self.cluster, accounts, noop=noop)
+            return
+        users = ','.join(item[1] for item in batch)
+        if action == self.ADD_ASSOC:
+            slurm_add_assoc(
+                users, self.cluster, account, specs=list(specs), noop=noop)
+        elif action == self.REMOVE_QOS:
+            slurm_remove_qos(users, self.cluster, account, specs, noop=noop)
+        else:
+            slurm_remove_assoc(users, self.cluster, account, noop=noop)
+
+    def apply(self, noop=False):
+        """Apply the planned changes. Return a list of pairs of each item
+        and the SlurmError raised when applying it, or None if it was
+        applied successfully."""
+        results = []
+        for batch in self._batches():
+            try:
+                self._apply_batch(batch, noop=noop)
+            except SlurmError as e:
+                if len(batch) == 1:
+                    results.append((batch[0], e))
+                    continue
+                logger.warning(
+                    'Batched Slurm command failed. Retrying %s items '
+                    'individually: %s', len(batch), e)
+                for item in batch:
+                    try:
+                        self._apply_batch([item], noop=noop)
+                    except SlurmError as e:
+                        results.append((item, e))
+                    else:
+                        results.append((item, None))
+            else:
+                results.extend((item, None) for item in batch)
+        self.items = []
+        return results
@@ -0,0 +1,12 @@
+from django.core.cache import cache
+
+from coldfront.plugins.system_monitor.utils import SYSTEM_MONITOR_REFRESH_REQUESTED_KEY
+from coldfront.plugins.system_monitor.utils import cache_system_monitor_data
+
+
+def refresh_system_monitor_data():
+    """Fetch and parse data from the system monitor endpoint, and cache
+    them. If this fails, leave the cached snapshot, if any, in place
+    until it expires."""
+    cache_system_monitor_data()
+    cache.delete(SYSTEM_MONITOR_REFRESH_REQUESTED_KEY)
@@ -1,16 +1,77 @@
+import logging
 import re
 
 import requests
 from bs4 import BeautifulSoup
+from django.core.cache import cache
+from django_q.tasks import async_task
 
 from coldfront.core.utils.common import import_from_settings
+from coldfront.core.utils.common import is_cache_shared
+
+logger = logging.getLogger(__name__)
+
+
+# Data from the system monitor endpoint are fetched and parsed in the
+# background, on a schedule, and stored in the cache, so that pages display a
+# snapshot without waiting on the endpoint. If the cache is local to each
+# process, snapshots stored by the worker are not visible to web processes,
+# which instead fetch their own.
+
+SYSTEM_MONITOR_CACHE_KEY = 'system_monitor_data'
+# The number of seconds for which a snapshot is displayed. If the endpoint is
+# unavailable for longer, the panel displays an error rather than stale data.
+SYSTEM_MONITOR_CACHE_TIMEOUT = import_from_settings(
+    'SYSTEM_MONITOR_CACHE_TIMEOUT', 10 * 60)
+# The key of an entry marking that a refresh was requested because no
+# snapshot was cached, so that concurrent page loads request only one.
+SYSTEM_MONITOR_REFRESH_REQUESTED_KEY = 'system_monitor_refresh_requested'
+SYSTEM_MONITOR_REFRESH_REQUESTED_TIMEOUT = 60
+
+
+def cache_system_monitor_data():
+    """Fetch and parse data from the system monitor endpoint, and cache
+    them. Return them, or an empty dictionary if this fails, in which
+    case the cached snapshot, if any, is left in place until it
+    expires."""
+    data = SystemMonitor().get_data()
+    if data:
+        cache.set(
+            SYSTEM_MONITOR_CACHE_KEY, data, SYSTEM_MONITOR_CACHE_TIMEOUT)
+    else:
+        logger.warning('Failed to refresh system monitor data.')
+    return data
+
+
+def get_cached_system_monitor_data():
+    """Return the cached snapshot of data from the system monitor
+    endpoint. If there is none, request a refresh in the background and
+    return an empty dictionary.
+
+    If the cache is not shared between processes, the background
+    refresh would not be visible to this one, so the snapshot is instead
+    fetched synchronously, subject to the endpoint's short timeout. In
+    either case, at most one refresh is requested per
+    SYSTEM_MONITOR_REFRESH_REQUESTED_TIMEOUT seconds, so that an
+    unavailable endpoint does not delay every page load."""
+    data = cache.get(SYSTEM_MONITOR_CACHE_KEY)
+    if data is not None:
+        return data
+    if not cache.add(SYSTEM_MONITOR_REFRESH_REQUESTED_KEY, True,
+                     SYSTEM_MONITOR_REFRESH_REQUESTED_TIMEOUT):
+        return {}
+    if not is_cache_shared():
+        return cache_system_monitor_data()
+    async_task(
+        'coldfront.plugins.system_monitor.tasks.refresh_system_monitor_data')
+    return {}
 
 
 def get_system_monitor_context():
     context = {}
-    system_monitor = SystemMonitor()
-    system_monitor_data = system_monitor.get_data()
-    system_monitor_panel_title = system_monitor.get_panel_title()
+    system_monitor_data = get_cached_system_monitor_data()
+    system_monitor_panel_title = import_from_settings(
+        'SYSTEM_MONITOR_PANEL_TITLE')
 
     context['last_updated'] = system_monitor_data.get('last_updated')
     context['utilization_data'] = system_monitor_data.get('utilization_data')